@@ -1,15 +1,22 @@
 # Common library for Admin Component
 
+import base64
+import enum
 import hashlib
+import json
 import logging
 import os
 import time
+from collections import defaultdict
 from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 import arrow
 import transaction
 from pyramid.httpexceptions import exception_response
+from sqlalchemy import Text, and_, cast, or_, text
 from sqlalchemy.exc import IntegrityError, ProgrammingError
+from sqlalchemy_utils import ArrowType
 
 from dbas.database import DBDiscussionSession
 from dbas.database.discussion_model import Issue, Language, User, Settings, Statement, StatementReference, \
@@ -18,9 +25,13 @@ from dbas.database.discussion_model import Issue, Language, User, Settings, Stat
     LastReviewerEdit, LastReviewerOptimization, ReputationHistory, ReputationReason, OptimizationReviewLocks, \
     ReviewCanceled, RevokedContent, RevokedContentHistory, LastReviewerDuplicate, ReviewDuplicate, \
     RevokedDuplicate, MarkedArgument, MarkedStatement, History, APIToken, StatementOrigins, StatementToIssue
-from dbas.lib import get_text_for_premisegroup_uid, get_text_for_argument_uid, \
-    get_text_for_statement_uid, get_profile_picture
+from dbas.handler.activity import get_issue_activity_summary
+from dbas.helper.cache import TTLCache
+from dbas.lib import get_profile_picture
+from dbas.profiling import profiler
+from dbas.slow_queries import slow_query_log
 from dbas.strings.keywords import Keywords as _
+from dbas.strings.lib import start_with_capital, start_with_small
 from dbas.strings.translator import Translator
 
 LOG = logging.getLogger(__name__)
@@ -73,74 +84,103 @@ _arrow_columns = ['timestamp', 'date', 'last_login', 'last_action', 'registered'
 # list of all columns, which will not be displayed
 _forbidden_columns = ['token', 'token_timestamp']
 
+# number of rows on a page of a table
+table_page_size = 50
 
-def get_overview(page):
+# tables with fewer estimated rows are counted exactly, see get_row_counts
+exact_count_limit = 10000
+
+# overview of the dashboard by page, the counts of other workers and of the estimates lag behind by the lifetime
+overview_cache = TTLCache('admin_overview', maxsize=16, ttl=60)
+
+# id and owner of verified application tokens by the hash of the token, a hit saves the scan of the prefixes and the
+# salted hash, but the token is still looked up by its id, so tokens revoked by other workers are rejected at once
+verified_api_tokens = TTLCache('verified_api_tokens', maxsize=1024, ttl=300)
+
+
+def get_overview(page, exact=False):
     """
-    Returns a nested data structure with information about the database
+    Returns a nested data structure with information about the database. The overview with approximate counts is
+    cached for a minute, exact counts are computed on every call.
 
     :param page: Name of the overview page
-    :return: [[{'name': .., 'content': [{'name': .., 'count': .., 'href': ..}, ..] }], ..]
+    :param exact: Count the rows of every table exactly
+    :return: [[{'name': .., 'content': [{'name': .., 'count': .., 'approximate': .., 'href': ..}, ..] }], ..]
+    """
+    if exact:
+        return __get_overview(page, exact=True)
+    return overview_cache.get_or_compute(page, lambda: __get_overview(page, exact=False))
+
+
+def __get_overview(page, exact):
+    """
+    Computes the overview of get_overview
+
+    :param page: Name of the overview page
+    :param exact: Count the rows of every table exactly
+    :return: [[{'name': .., 'content': [{'name': .., 'count': .., 'approximate': .., 'href': ..}, ..] }], ..]
     """
     LOG.debug("main")
     return_list = list()
+    counts = get_row_counts([entry['table'] for entry in table_mapper.values()], exact)
 
     # all tables for the 'general' group
     general = list()
-    general.append(_get_dash_dict('Issue', page + 'Issue'))
-    general.append(_get_dash_dict('Language', page + 'Language'))
-    general.append(_get_dash_dict('History', page + 'History'))
+    general.append(_get_dash_dict('Issue', page + 'Issue', counts))
+    general.append(_get_dash_dict('Language', page + 'Language', counts))
+    general.append(_get_dash_dict('History', page + 'History', counts))
 
     # all tables for the 'users' group
     users = list()
-    users.append(_get_dash_dict('User', page + 'User'))
-    users.append(_get_dash_dict('Settings', page + 'Settings'))
-    users.append(_get_dash_dict('Message', page + 'Message'))
+    users.append(_get_dash_dict('User', page + 'User', counts))
+    users.append(_get_dash_dict('Settings', page + 'Settings', counts))
+    users.append(_get_dash_dict('Message', page + 'Message', counts))
 
     # all tables for the 'content' group
     content = list()
-    content.append(_get_dash_dict('Statement', page + 'Statement'))
-    content.append(_get_dash_dict('StatementOrigins', page + 'StatementOrigins'))
-    content.append(_get_dash_dict('StatementToIssue', page + 'StatementToIssue'))
-    content.append(_get_dash_dict('TextVersion', page + 'TextVersion'))
-    content.append(_get_dash_dict('StatementReference', page + 'StatementReference'))
-    content.append(_get_dash_dict('PremiseGroup', page + 'PremiseGroup'))
-    content.append(_get_dash_dict('Premise', page + 'Premise'))
-    content.append(_get_dash_dict('Argument', page + 'Argument'))
+    content.append(_get_dash_dict('Statement', page + 'Statement', counts))
+    content.append(_get_dash_dict('StatementOrigins', page + 'StatementOrigins', counts))
+    content.append(_get_dash_dict('StatementToIssue', page + 'StatementToIssue', counts))
+    content.append(_get_dash_dict('TextVersion', page + 'TextVersion', counts))
+    content.append(_get_dash_dict('StatementReference', page + 'StatementReference', counts))
+    content.append(_get_dash_dict('PremiseGroup', page + 'PremiseGroup', counts))
+    content.append(_get_dash_dict('Premise', page + 'Premise', counts))
+    content.append(_get_dash_dict('Argument', page + 'Argument', counts))
 
     # all tables for the 'voting' group
     voting = list()
-    voting.append(_get_dash_dict('ClickedArgument', page + 'ClickedArgument'))
-    voting.append(_get_dash_dict('ClickedStatement', page + 'ClickedStatement'))
-    voting.append(_get_dash_dict('MarkedArgument', page + 'MarkedArgument'))
-    voting.append(_get_dash_dict('MarkedStatement', page + 'MarkedStatement'))
-    voting.append(_get_dash_dict('SeenArgument', page + 'SeenArgument'))
-    voting.append(_get_dash_dict('SeenStatement', page + 'SeenStatement'))
+    voting.append(_get_dash_dict('ClickedArgument', page + 'ClickedArgument', counts))
+    voting.append(_get_dash_dict('ClickedStatement', page + 'ClickedStatement', counts))
+    voting.append(_get_dash_dict('MarkedArgument', page + 'MarkedArgument', counts))
+    voting.append(_get_dash_dict('MarkedStatement', page + 'MarkedStatement', counts))
+    voting.append(_get_dash_dict('SeenArgument', page + 'SeenArgument', counts))
+    voting.append(_get_dash_dict('SeenStatement', page + 'SeenStatement', counts))
 
     # all tables for the 'reviews' group
     reviews = list()
-    reviews.append(_get_dash_dict('ReviewDelete', page + 'ReviewDelete'))
-    reviews.append(_get_dash_dict('ReviewEdit', page + 'ReviewEdit'))
-    reviews.append(_get_dash_dict('ReviewEditValue', page + 'ReviewEditValue'))
-    reviews.append(_get_dash_dict('ReviewOptimization', page + 'ReviewOptimization'))
-    reviews.append(_get_dash_dict('ReviewDeleteReason', page + 'ReviewDeleteReason'))
-    reviews.append(_get_dash_dict('ReviewDuplicate', page + 'ReviewDuplicate'))
+    reviews.append(_get_dash_dict('ReviewDelete', page + 'ReviewDelete', counts))
+    reviews.append(_get_dash_dict('ReviewEdit', page + 'ReviewEdit', counts))
+    reviews.append(_get_dash_dict('ReviewEditValue', page + 'ReviewEditValue', counts))
+    reviews.append(_get_dash_dict('ReviewOptimization', page + 'ReviewOptimization', counts))
+    reviews.append(_get_dash_dict('ReviewDeleteReason', page + 'ReviewDeleteReason', counts))
+    reviews.append(_get_dash_dict('ReviewDuplicate', page + 'ReviewDuplicate', counts))
 
     # all tables for the 'reviewer' group
     reviewer = list()
-    reviewer.append(_get_dash_dict('LastReviewerDelete', page + 'LastReviewerDelete'))
-    reviewer.append(_get_dash_dict('LastReviewerEdit', page + 'LastReviewerEdit'))
-    reviewer.append(_get_dash_dict('LastReviewerOptimization', page + 'LastReviewerOptimization'))
-    reviewer.append(_get_dash_dict('LastReviewerDuplicate', page + 'LastReviewerDuplicate'))
+    reviewer.append(_get_dash_dict('LastReviewerDelete', page + 'LastReviewerDelete', counts))
+    reviewer.append(_get_dash_dict('LastReviewerEdit', page + 'LastReviewerEdit', counts))
+    reviewer.append(_get_dash_dict('LastReviewerOptimization', page + 'LastReviewerOptimization', counts))
+    reviewer.append(_get_dash_dict('LastReviewerDuplicate', page + 'LastReviewerDuplicate', counts))
 
     # all tables for the 'reputation' group
     reputation = list()
-    reputation.append(_get_dash_dict('ReputationHistory', page + 'ReputationHistory'))
-    reputation.append(_get_dash_dict('ReputationReason', page + 'ReputationReason'))
-    reputation.append(_get_dash_dict('OptimizationReviewLocks', page + 'OptimizationReviewLocks'))
-    reputation.append(_get_dash_dict('ReviewCanceled', page + 'ReviewCanceled'))
-    reputation.append(_get_dash_dict('RevokedContent', page + 'RevokedContent'))
-    reputation.append(_get_dash_dict('RevokedContentHistory', page + 'RevokedContentHistory'))
-    reputation.append(_get_dash_dict('RevokedDuplicate', page + 'RevokedDuplicate'))
+    reputation.append(_get_dash_dict('ReputationHistory', page + 'ReputationHistory', counts))
+    reputation.append(_get_dash_dict('ReputationReason', page + 'ReputationReason', counts))
+    reputation.append(_get_dash_dict('OptimizationReviewLocks', page + 'OptimizationReviewLocks', counts))
+    reputation.append(_get_dash_dict('ReviewCanceled', page + 'ReviewCanceled', counts))
+    reputation.append(_get_dash_dict('RevokedContent', page + 'RevokedContent', counts))
+    reputation.append(_get_dash_dict('RevokedContentHistory', page + 'RevokedContentHistory', counts))
+    reputation.append(_get_dash_dict('RevokedDuplicate', page + 'RevokedDuplicate', counts))
 
     # first row
     return_list.append([{'name': 'General', 'content': general},
@@ -154,72 +194,189 @@ def get_overview(page):
     return return_list
 
 
-def get_table_dict(table_name, main_page):
+def get_table_dict(table_name, main_page, sort=None, descending=None, filters=None, after=None, before=None,
+                   limit=table_page_size):
     """
-    Returns information about a specific table
+    Returns one page of a specific table
+
+    The rows are ordered by the sort column and the primary key. A page starts behind the cursor of the last row of
+    the previous page, so that the database never reads the rows in front of the page.
 
     :param table_name: Name of the table
     :param main_page: URL
-    :return: Dictionary with head, row, count and has_elements
+    :param sort: Name of the column to sort by, defaults to the primary key
+    :param descending: Sort descending, defaults to True for the History and to False for every other table
+    :param filters: Dictionary with a value per column, text columns are matched case insensitive by substring
+    :param after: Cursor of the row in front of the page
+    :param before: Cursor of the row behind the page
+    :param limit: Number of rows per page
+    :return: Dictionary with head, row, count, approximate, has_elements, sort, descending, filters, next and previous
+    :raises ValueError: if the sort column, a filter or a cursor is invalid
     """
-    LOG.debug("%s", table_name)
+    LOG.debug("%s sorted by %s, filtered by %s", table_name, sort, filters)
 
-    # check for elements
     table = table_mapper[table_name.lower()]['table']
-    db_elements = DBDiscussionSession.query(table).all()
-
-    count = len(db_elements)
-    if count == 0:
-        return {
-            'has_elements': False,
-            'name': table_name,
-            'count': count
-        }
-
-    # getting all keys
-    columns = [r.key for r in table.__table__.columns]
-    # remove all unnecessary columns
-    for bad in _forbidden_columns:
-        if bad in columns:
-            columns.remove(bad)
-
-    # getting data
-    # data = [[str(getattr(row, c.name)) for c in row.__table__.columns] for row in db_elements]
-    data = get_rows_of(columns, db_elements, main_page)
-    if table_mapper[table_name.lower()]['name'] == 'History':
-        data = data[::-1]
-
-    # save it
+    columns = [c.key for c in table.__table__.columns if c.key not in _forbidden_columns]
+    primary_key = table.__table__.primary_key.columns.values()[0]
+    if descending is None:
+        descending = table_mapper[table_name.lower()]['name'] == 'History'
+    sort = sort or primary_key.key
+    if sort not in columns:
+        raise ValueError('Unknown column: {}'.format(sort))
+    sort_column = table.__table__.c[sort]
+
+    filters = {column: value for column, value in (filters or {}).items() if value}
+    query = DBDiscussionSession.query(table)
+    for column, value in filters.items():
+        query = query.filter(_get_filter(table, columns, column, value))
+    if filters:
+        count, approximate = query.count(), False
+    else:
+        count, approximate = get_row_counts([table])[table]
+
+    # a previous page is read against the sort order, starting at its end
+    forward = before is None
+    ascending = descending != forward
+    cursor = after if forward else before
+    if cursor:
+        value, key = _decode_cursor(cursor, sort_column)
+        query = query.filter(_behind_cursor(sort_column, primary_key, value, key, ascending))
+    order = [primary_key] if sort_column is primary_key else [sort_column, primary_key]
+    query = query.order_by(*[column if ascending else column.desc() for column in order])
+
+    db_elements = query.limit(limit + 1).all()
+    has_more = len(db_elements) > limit
+    db_elements = db_elements[:limit]
+    if not forward:
+        db_elements.reverse()
+
+    has_next = has_more if forward else True
+    has_previous = bool(cursor) if forward else has_more
     return {
         'name': table_name,
-        'has_elements': True,
+        'has_elements': len(db_elements) > 0,
         'count': count,
+        'approximate': approximate,
         'head': columns,
-        'row': data,
+        'row': get_rows_of(columns, db_elements, main_page),
+        'sort': sort,
+        'descending': descending,
+        'filters': filters,
+        'next': _encode_cursor(db_elements[-1], sort, primary_key.key) if db_elements and has_next else None,
+        'previous': _encode_cursor(db_elements[0], sort, primary_key.key) if db_elements and has_previous else None,
     }
 
 
-def _get_language(uid, query):
+def _get_filter(table, columns, column, value):
+    """
+    Returns the condition for a filter of the admin table
+
+    :param table: current table
+    :param columns: which are displayed
+    :param column: name of the filtered column
+    :param value: as entered
+    :return: SQL expression
+    :raises ValueError: if the column is not displayed or the value does not match its type
+    """
+    if column not in columns:
+        raise ValueError('Unknown column: {}'.format(column))
+    table_column = table.__table__.c[column]
+    value_type = str(table_column.type)
+
+    if value_type == 'INTEGER':
+        return table_column == int(value)
+
+    if value_type == 'BOOLEAN':
+        if value.lower() not in ('true', 'false'):
+            raise ValueError('Invalid boolean: {}'.format(value))
+        return table_column == (value.lower() == 'true')
+
+    pattern = value.replace('/', '//').replace('%', '/%').replace('_', '/_')
+    return cast(table_column, Text).ilike('%{}%'.format(pattern), escape='/')
+
+
+def _behind_cursor(sort_column, primary_key, value, key, ascending):
+    """
+    Returns the condition for all rows behind the cursor. Like the default of Postgres, NULL is sorted behind every
+    value in ascending and in front of every value in descending order.
+
+    :param sort_column: column to sort by
+    :param primary_key: column of the primary key
+    :param value: of the sort column in the cursor
+    :param key: of the primary key in the cursor
+    :param ascending: direction of the query
+    :return: SQL expression
+    """
+    if sort_column is primary_key:
+        return primary_key > key if ascending else primary_key < key
+
+    if ascending:
+        if value is None:
+            return and_(sort_column.is_(None), primary_key > key)
+        return or_(sort_column > value, sort_column.is_(None), and_(sort_column == value, primary_key > key))
+
+    if value is None:
+        return or_(sort_column.isnot(None), primary_key < key)
+    return or_(sort_column < value, and_(sort_column == value, primary_key < key))
+
+
+def _encode_cursor(row, sort, key):
+    """
+    Returns the position of a row as url safe string
+
+    :param row: of the table
+    :param sort: name of the sort column
+    :param key: name of the primary key
+    :return: string
+    """
+    values = [getattr(row, sort), getattr(row, key)]
+    values = [value.isoformat() if isinstance(value, arrow.Arrow) else value for value in values]
+    values = [value.name if isinstance(value, enum.Enum) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def _decode_cursor(cursor, sort_column):
+    """
+    Returns the values of the sort column and the primary key of a cursor
+
+    :param cursor: as created by _encode_cursor
+    :param sort_column: column to sort by
+    :return: value, key
+    :raises ValueError: if the cursor is invalid
+    """
+    try:
+        value, key = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor: {}'.format(cursor)) from e
+
+    if not isinstance(key, int):
+        raise ValueError('Invalid cursor: {}'.format(cursor))
+    if value is not None and isinstance(sort_column.type, ArrowType):
+        value = arrow.get(value)
+    return value, key
+
+
+def _get_language(uid, languages):
     """
     Returns ui_locales of a language
 
     :param uid: of language
-    :param query: of all languages
+    :param languages: ui_locales by uid
     :return: string
     """
-    return query.get(uid).ui_locales
+    return str(languages.get(uid))
 
 
-def _get_author_data(uid, query, main_page):
+def _get_author_data(uid, users, main_page):
     """
     Returns a-tag with gravatar of current author and users page as href
 
     :param uid: of user
-    :param query: of all users
+    :param users: users by uid
     :params main_page: URL
     :return: string
     """
-    db_user = query.get(uid)
+    db_user = users.get(uid)
     if not db_user:
         return 'Missing author with uid ' + str(uid), False
 
@@ -228,22 +385,72 @@ def _get_author_data(uid, query, main_page):
                                                         db_user.uid), True
 
 
-def _get_dash_dict(name, href):
+def _get_dash_dict(name, href, counts):
     """
     Returns dictionary with all attributes
 
     :param name: name of current table
     :param href: link for current table
-    :return: {'count': count, 'name': name, 'href': href}
+    :param counts: as returned by get_row_counts
+    :return: {'count': count, 'approximate': approximate, 'name': name, 'href': href}
     """
-    count = DBDiscussionSession.query(table_mapper[name.lower()]['table']).count()
+    count, approximate = counts[table_mapper[name.lower()]['table']]
     return {
         'name': name,
         'href': href,
         'count': count,
+        'approximate': approximate,
     }
 
 
+def get_row_counts(tables, exact=False):
+    """
+    Returns the number of rows of every table. Unless exact counts are requested, tables with an estimate of at least
+    exact_count_limit rows are not scanned, but reported with the estimate of the planner statistics in pg_class,
+    which are refreshed by autovacuum.
+
+    :param tables: mapped classes of the tables
+    :param exact: count the rows of every table exactly
+    :return: {table: (count, is approximate)}
+    """
+    estimates = {} if exact else _get_estimated_row_counts(tables)
+    counts = {}
+    for table in tables:
+        estimate = estimates.get(table.__table__.fullname, 0)
+        if estimate >= exact_count_limit:
+            counts[table] = estimate, True
+        else:
+            counts[table] = DBDiscussionSession.query(table).count(), False
+    return counts
+
+
+def _get_estimated_row_counts(tables):
+    """
+    Returns the estimated number of rows of the tables from the statistics of Postgres
+
+    :param tables: mapped classes of the tables
+    :return: {table name: estimate}
+    """
+    names = [table.__table__.fullname for table in tables]
+    rows = DBDiscussionSession.execute(text(
+        'SELECT name, reltuples FROM unnest(CAST(:names AS TEXT[])) AS name '
+        'JOIN pg_class ON pg_class.oid = to_regclass(name)'), {'names': names})
+    return {name: int(reltuples) for name, reltuples in rows}
+
+
+class _References(NamedTuple):
+    """
+    Everything the cells of a page refer to
+    """
+    languages: Dict[int, str]
+    users: Dict[int, User]
+    users_by_email: Dict[str, User]
+    statements: Dict[int, str]
+    textversions: Dict[int, str]
+    premisegroups: Dict[int, Tuple[str, List[int]]]
+    arguments: Dict[int, str]
+
+
 def get_rows_of(columns, db_elements, main_page):
     """
     Returns array with all data of a table
@@ -253,19 +460,174 @@ def get_rows_of(columns, db_elements, main_page):
     :param main_page: URL
     :return: []
     """
-    db_languages = DBDiscussionSession.query(Language)
-    db_users = DBDiscussionSession.query(User)
+    references = _get_references(columns, db_elements)
     data = []
     for row in db_elements:
         tmp = []
         for column in columns:
             attribute = getattr(row, column)
-            _resolve_attribute(attribute, column, main_page, db_languages, db_users, tmp)
+            _resolve_attribute(attribute, column, main_page, references, tmp)
         data.append(tmp)
     return data
 
 
-def _resolve_attribute(attribute, column, main_page, db_languages, db_users, tmp):
+def _get_references(columns, db_elements):
+    """
+    Loads the languages, users, statements, textversions, premise groups and arguments the given rows refer to, with one
+    query per kind of reference
+
+    :param columns: which should be displayed
+    :param db_elements: which should be displayed
+    :return: _References
+    """
+
+    def values_of(names):
+        return {getattr(row, column) for row in db_elements for column in columns if column in names} - {None}
+
+    user_uids = values_of(_user_columns)
+    emails = {str(email) for email in values_of(['email'])}
+    textversion_uids = values_of(['textversion_uid'])
+
+    db_users = DBDiscussionSession.query(User).filter(User.uid.in_(user_uids)).all() if user_uids else []
+    db_users_by_email = DBDiscussionSession.query(User).filter(User.email.in_(emails)).all() if emails else []
+    db_textversions = DBDiscussionSession.query(TextVersion.uid, TextVersion.content).filter(
+        TextVersion.uid.in_(textversion_uids)).all() if textversion_uids else []
+
+    return _References(
+        languages=dict(DBDiscussionSession.query(Language.uid, Language.ui_locales).all()),
+        users={db_user.uid: db_user for db_user in db_users},
+        users_by_email={db_user.email: db_user for db_user in db_users_by_email},
+        statements=_get_statement_texts(values_of(_statement_columns)),
+        textversions=dict(db_textversions),
+        premisegroups=_get_premisegroups(values_of(['premisegroup_uid'])),
+        arguments=_get_argument_texts(values_of(['argument_uid'])),
+    )
+
+
+def _get_statement_texts(uids):
+    """
+    Returns the current texts of the statements without trailing punctuation, like Statement.get_text()
+
+    :param uids: of the statements
+    :return: {uid: text}
+    """
+    if not uids:
+        return {}
+
+    db_textversions = DBDiscussionSession.query(TextVersion.statement_uid, TextVersion.content).filter(
+        TextVersion.statement_uid.in_(uids), TextVersion.is_disabled.is_(False)).distinct(
+        TextVersion.statement_uid).order_by(TextVersion.statement_uid, TextVersion.timestamp.desc())
+    return {uid: content.rstrip('.?!') for uid, content in db_textversions}
+
+
+def _get_premisegroups(uids):
+    """
+    Returns the texts and the statement uids of the premise groups, like get_text_for_premisegroup_uid()
+
+    :param uids: of the premise groups
+    :return: {uid: (text, statement uids)}
+    """
+    if not uids:
+        return {}
+
+    db_premises = DBDiscussionSession.query(Premise.premisegroup_uid, Premise.statement_uid, Language.ui_locales) \
+        .join(Issue, Premise.issue_uid == Issue.uid) \
+        .join(Language, Issue.lang_uid == Language.uid) \
+        .filter(Premise.premisegroup_uid.in_(uids)) \
+        .order_by(Premise.uid).all()
+    texts = _get_statement_texts({db_premise.statement_uid for db_premise in db_premises})
+
+    premises_of = defaultdict(list)
+    for db_premise in db_premises:
+        premises_of[db_premise.premisegroup_uid].append(db_premise)
+
+    premisegroups = {}
+    for uid, premises in premises_of.items():
+        _t = Translator(premises[0].ui_locales)
+        text = ' {} '.format(_t.get(_.aand)).join(str(texts.get(premise.statement_uid)) for premise in premises)
+        premisegroups[uid] = text, [premise.statement_uid for premise in premises]
+    return premisegroups
+
+
+def _get_argument_texts(uids):
+    """
+    Returns the texts of the arguments, like get_text_for_argument_uid(). The attacked arguments of undercuts are loaded
+    level by level, so a page needs one query per level of the chains instead of several queries per cell.
+
+    :param uids: of the arguments
+    :return: {uid: text}
+    """
+    db_arguments = {}
+    missing = set(uids)
+    while missing:
+        rows = DBDiscussionSession.query(Argument.uid, Argument.premisegroup_uid, Argument.conclusion_uid,
+                                         Argument.argument_uid, Argument.is_supportive, Language.ui_locales) \
+            .join(Issue, Argument.issue_uid == Issue.uid) \
+            .join(Language, Issue.lang_uid == Language.uid) \
+            .filter(Argument.uid.in_(missing)).all()
+        db_arguments.update({row.uid: row for row in rows})
+        missing = {row.argument_uid for row in rows} - {None} - db_arguments.keys()
+
+    premisegroups = _get_premisegroups({row.premisegroup_uid for row in db_arguments.values()})
+    conclusions = _get_statement_texts({row.conclusion_uid for row in db_arguments.values()} - {None})
+
+    texts = {}
+    for uid in set(uids) & db_arguments.keys():
+        chain = [db_arguments[uid]]
+        while chain[-1].argument_uid in db_arguments:
+            chain.append(db_arguments[chain[-1].argument_uid])
+        pgroups = [premisegroups.get(row.premisegroup_uid, ('', []))[0] for row in chain]
+        conclusion = str(conclusions.get(chain[-1].conclusion_uid, ''))
+        texts[uid] = _build_argument_text(chain, pgroups, conclusion)
+    return texts
+
+
+def _build_argument_text(chain, pgroups, conclusion):
+    """
+    Builds the text of an argument like get_text_for_argument_uid() does without any further options
+
+    :param chain: rows of the argument and of the arguments it attacks
+    :param pgroups: texts of the premise groups of the chain
+    :param conclusion: text of the conclusion of the last argument in the chain
+    :return: text
+    """
+    lang = chain[0].ui_locales
+    _t = Translator(lang)
+    because = _t.get(_.because).lower()
+
+    if len(chain) == 1:
+        premises = pgroups[0] if lang == 'de' else start_with_small(pgroups[0])
+        if lang == 'de':
+            text = _t.get(_.iArgue) + ' '
+            text += ' {} '.format(_t.get(_.itIsNotRight)) if not chain[0].is_supportive else ''
+            text += '{}, {} {}'.format(conclusion, because, premises)
+        else:
+            bind = because if chain[0].is_supportive else ' {}, {} '.format(_t.get(_.isNotRight).lower(), because)
+            text = '{} {} {}'.format(conclusion, bind, premises)
+        return text.replace('  ', ' ')
+
+    chain = chain[::-1]
+    pgroups = pgroups[::-1]
+    because = (', ' if chain[0].ui_locales == 'de' else ' ') + because + ' '
+
+    if len(chain) % 2 == 0:  # system starts
+        text = _t.get(_.otherUsersSaidThat) + ' '
+        users_opinion = True
+    else:  # user starts
+        text = ''
+        users_opinion = False
+        conclusion = start_with_capital(conclusion)
+
+    text += _t.get(_.itFalseIsThat) + ' ' if not chain[0].is_supportive else ''
+    text += conclusion + because + pgroups[0] + '.'
+    for pgroup in pgroups[1:]:
+        text += ' ' + _t.get(_.butYouCounteredWithInterest if users_opinion else _.youAgreeWithThatNow)
+        text += ' ' + pgroup + '.'
+        users_opinion = not users_opinion
+    return text.replace('  ', ' ')
+
+
+def _resolve_attribute(attribute, column, main_page, references, tmp):
     user_columns = {col: _resolve_user_attribute for col in _user_columns}
     statement_columns = {col: _resolve_statement_attribute for col in _statement_columns}
     arrow_columns = {col: _resolve_arrow_attribute for col in _arrow_columns}
@@ -284,63 +646,55 @@ def _resolve_attribute(attribute, column, main_page, db_languages, db_users, tmp
     column_matcher.update(arrow_columns)
 
     if column in column_matcher:
-        column_matcher[column](attribute, main_page, db_languages, db_users, tmp)
+        column_matcher[column](attribute, main_page, references, tmp)
     else:
         tmp.append(str(attribute))
 
 
-def _resolve_user_attribute(attribute, main_page, db_languages, db_users, tmp):
-    text, success = _get_author_data(attribute, db_users, main_page)
+def _resolve_user_attribute(attribute, main_page, references, tmp):
+    text, success = _get_author_data(attribute, references.users, main_page)
     text = str(text) if success else ''
     tmp.append(text)
 
 
-def _resolve_statement_attribute(attribute, main_page, db_languages, db_users, tmp):
-    text = get_text_for_statement_uid(attribute) if attribute is not None else 'None'
+def _resolve_statement_attribute(attribute, main_page, references, tmp):
+    text = references.statements.get(attribute) if attribute is not None else 'None'
     tmp.append(str(attribute) + ' - ' + str(text))
 
 
-def _resolve_arrow_attribute(attribute, main_page, db_languages, db_users, tmp):
+def _resolve_arrow_attribute(attribute, main_page, references, tmp):
     tmp.append(attribute.format('YYYY-MM-DD HH:mm:ss'))
 
 
-def _resolve_lang_attribute(attribute, main_page, db_languages, db_users, tmp):
-    tmp.append(_get_language(attribute, db_languages))
+def _resolve_lang_attribute(attribute, main_page, references, tmp):
+    tmp.append(_get_language(attribute, references.languages))
 
 
-def _resolve_password_attribute(attribute, main_page, db_languages, db_users, tmp):
+def _resolve_password_attribute(attribute, main_page, references, tmp):
     tmp.append(str(attribute)[:5] + '...')
 
 
-def _resolve_premisesgroup_attribute(attribute, main_page, db_languages, db_users, tmp):
-    text = ''
-    uids = []
-    if attribute is not None:
-        text = get_text_for_premisegroup_uid(attribute)
-        db_premises = DBDiscussionSession.query(Premise).filter_by(premisegroup_uid=attribute).join(Statement).all()
-        uids = [premise.statement.uid for premise in db_premises]
+def _resolve_premisesgroup_attribute(attribute, main_page, references, tmp):
+    text, uids = references.premisegroups.get(attribute, ('', []))
     tmp.append('{} - {} {}'.format(attribute, text, uids))
 
 
-def _resolve_argument_attribute(attribute, main_page, db_languages, db_users, tmp):
-    text = get_text_for_argument_uid(attribute) if attribute is not None else 'None'
+def _resolve_argument_attribute(attribute, main_page, references, tmp):
+    text = references.arguments.get(attribute) if attribute is not None else 'None'
     tmp.append('{} - {}'.format(attribute, text))
 
 
-def _resolve_textversion_attribute(attribute, main_page, db_languages, db_users, tmp):
-    text = 'None'
-    if attribute is not None:
-        db_tv = DBDiscussionSession.query(TextVersion).get(attribute)
-        text = db_tv.content if db_tv else ''
+def _resolve_textversion_attribute(attribute, main_page, references, tmp):
+    text = references.textversions.get(attribute, '') if attribute is not None else 'None'
     tmp.append('{} - {}'.format(attribute, text))
 
 
-def _resolve_path_attribute(attribute, main_page, db_languages, db_users, tmp):
+def _resolve_path_attribute(attribute, main_page, references, tmp):
     tmp.append('<a href="{}/{}{}" target="_blank">{}</a>'.format(main_page, 'discuss', attribute, attribute))
 
 
-def _resolve_email_attribute(attribute, main_page, db_languages, db_users, tmp):
-    db_user = DBDiscussionSession.query(User).filter_by(email=str(attribute)).first()
+def _resolve_email_attribute(attribute, main_page, references, tmp):
+    db_user = references.users_by_email.get(str(attribute))
     img = '<img class="img-circle" src="{}">'.format(get_profile_picture(db_user, 25))
     tmp.append('{} {}'.format(img, attribute))
 
@@ -409,6 +763,7 @@ def delete_row(table_name, uids):
 
     DBDiscussionSession.flush()
     transaction.commit()
+    overview_cache.clear()
     return True
 
 
@@ -434,6 +789,7 @@ def add_row(table_name, data):
 
     DBDiscussionSession.flush()
     transaction.commit()
+    overview_cache.clear()
     return True
 
 
@@ -543,6 +899,64 @@ def _find_type(table, col_name):
     raise NameError(col_name)
 
 
+def get_profiling_overview(page: str) -> dict:
+    """
+    Returns the last profiling session and the profiled routes with the links to their downloads
+
+    :param page: path of the admin dashboard
+    :return: {'session': {..} or None, 'routes': [{'route': .., 'requests': .., 'samples': .., 'pstats': ..}, ..]}
+    """
+    session = profiler.last_session()
+    if session is not None:
+        session = {
+            'pattern': session.pattern,
+            'sample_rate': session.sample_rate,
+            'started': arrow.get(session.started).format('YYYY-MM-DD HH:mm:ss'),
+            'until': arrow.get(session.until).format('YYYY-MM-DD HH:mm:ss'),
+            'active': session.is_active,
+        }
+    routes = [{**route,
+               'pstats': f'{page}profiling/{route["key"]}/pstats',
+               'collapsed': f'{page}profiling/{route["key"]}/collapsed'} for route in profiler.get_routes()]
+    return {'session': session, 'routes': routes}
+
+
+def get_slow_query_report(limit: int = 20, order: str = 'total') -> List[dict]:
+    """
+    Returns the SQL fingerprints and call sites with the worst durations of all workers
+
+    :param limit: count of the returned rows
+    :param order: 'total', 'max', 'count' or 'mean'
+    :return: [{'fingerprint': .., 'call_site': .., 'statement': .., 'count': .., 'total_ms': .., ..}, ..]
+    """
+    return [{
+        'fingerprint': row.fingerprint,
+        'call_site': row.call_site,
+        'statement': row.statement,
+        'count': row.count,
+        'total_ms': round(row.total * 1000, 1),
+        'mean_ms': round(row.total / row.count * 1000, 2),
+        'max_ms': round(row.max * 1000, 1),
+    } for row in slow_query_log.get_report(limit, order)]
+
+
+def get_activity_overview(days: int = 30) -> List[dict]:
+    """
+    Returns the activity of the last days per issue from the daily rollups
+
+    :param days: number of days before today
+    :return: [{'issue': .., 'users': .., 'clicks': .., 'statements': .., 'edits': ..}, ..]
+    """
+    titles = dict(DBDiscussionSession.query(Issue.uid, Issue.title))
+    return [{
+        'issue': titles.get(row.issue_uid, row.issue_uid),
+        'users': row.users,
+        'clicks': int(row.clicks),
+        'statements': int(row.statements),
+        'edits': int(row.edits),
+    } for row in get_issue_activity_summary(days)]
+
+
 def get_application_tokens():
     """
 
@@ -561,6 +975,7 @@ def revoke_application_token(token_id: int):
     """
     DBDiscussionSession.query(APIToken).get(token_id).disabled = True
     transaction.commit()
+    verified_api_tokens.invalidate_where(lambda _, value: value[0] == token_id)
 
 
 def generate_application_token(owner: str) -> str:
@@ -592,6 +1007,16 @@ def _hash_token_with_owner(owner, token):
     return hashlib.sha256((owner + token).encode()).hexdigest()
 
 
+def get_token_hash(token: str) -> str:
+    """
+    Returns the key of a token in the caches of verified tokens, so that the tokens themselves are not kept in memory
+
+    :param token: an application token or a JWT
+    :return: hex digest of the SHA-256 hash of the token
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
 def is_api_token(token: str) -> bool:
     """
     Checks if the provided token COULD be an api-token
@@ -608,6 +1033,25 @@ def check_api_token(token: str) -> bool:
     :param token: The token to check.
     :return: True if the token is valid and not disabled.
     """
+    return get_owner_of_api_token(token) is not None
+
+
+def get_owner_of_api_token(token: str) -> Optional[str]:
+    """
+    Returns the owner of a valid token.
+
+    :param token: The token to check.
+    :return: The owner if the token is valid and not disabled, otherwise None.
+    """
+
+    token_hash = get_token_hash(token)
+    cached = verified_api_tokens.get(token_hash)
+    if cached is not None:
+        token_id, owner = cached
+        if DBDiscussionSession.query(APIToken.disabled).filter_by(id=token_id).scalar() is False:
+            return owner
+        verified_api_tokens.invalidate(token_hash)
+        return None
 
     token_components = token.split(":")
     if len(token_components) == 2:
@@ -618,6 +1062,9 @@ def check_api_token(token: str) -> bool:
                     APIToken.disabled == False)
 
         for api_token in api_tokens:
-            return _hash_token_with_owner(api_token.owner, auth_token) == api_token.token
+            if _hash_token_with_owner(api_token.owner, auth_token) == api_token.token:
+                verified_api_tokens.set(token_hash, (api_token.id, api_token.owner))
+                return api_token.owner
+            return None
 
-    return False
+    return None
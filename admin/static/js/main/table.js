@@ -208,13 +208,14 @@ $(document).ready(function () {
 
     try {
         var dict = getLanguage() === 'de' ? dataTables_german_lang : dataTables_english_lang;
+        // the server sorts, filters and pages the rows
         var options = {
             language: dict,
-            ordering: true
+            paging: false,
+            ordering: false,
+            searching: false,
+            info: false
         };
-        if ($('#table_name') === 'History') {
-            options.ordering = false;
-        }
         data.DataTable(options);
     } catch (e) {
     }
@@ -4,8 +4,9 @@ Unit tests for lib.py.
 
 import admin.lib as admin
 from dbas.database import DBDiscussionSession
-from dbas.database.discussion_model import User, APIToken
-from dbas.lib import nick_of_anonymous_user
+from dbas.database.discussion_model import User, APIToken, Argument, Issue, ClickedArgument
+from dbas.lib import nick_of_anonymous_user, get_text_for_premisegroup_uid, get_text_for_statement_uid, \
+    get_text_for_argument_uid
 from dbas.tests.utils import TestCaseWithConfig
 
 
@@ -30,6 +31,37 @@ class AdminTest(TestCaseWithConfig):
                     self.assertIn(table['name'].lower(), admin.table_mapper)
                     self.assertEqual('some_main_page' + table['name'], table['href'])
 
+    def test_get_overview_is_cached(self):
+        admin.overview_cache.clear()
+        overview = admin.get_overview('some_main_page')
+        self.assertIs(admin.get_overview('some_main_page'), overview)
+
+        exact = admin.get_overview('some_main_page', exact=True)
+        self.assertIsNot(exact, overview)
+        for category in exact[0]:
+            for table in category['content']:
+                self.assertFalse(table['approximate'])
+                self.assertEqual(table['count'],
+                                 DBDiscussionSession.query(admin.table_mapper[table['name'].lower()]['table']).count())
+
+        admin.add_row('User', self.new_user)
+        self.assertIsNot(admin.get_overview('some_main_page'), overview)
+
+    def test_get_row_counts(self):
+        tables = [User, Issue]
+        counts = admin.get_row_counts(tables)
+        for table in tables:
+            self.assertEqual(counts[table], (DBDiscussionSession.query(table).count(), False))
+
+        limit = admin.exact_count_limit
+        admin.exact_count_limit = 0
+        try:
+            counts = admin.get_row_counts(tables)
+            self.assertTrue(all(approximate for _, approximate in counts.values()))
+            self.assertTrue(all(not approximate for _, approximate in admin.get_row_counts(tables, True).values()))
+        finally:
+            admin.exact_count_limit = limit
+
     def test_get_table_dict(self):
         for table in admin.table_mapper:
             return_dict = admin.get_table_dict(admin.table_mapper[table]['name'], 'some_main_page')
@@ -38,6 +70,76 @@ class AdminTest(TestCaseWithConfig):
             self.assertNotIn('token', return_dict)
             self.assertNotIn('token_timestamp', return_dict)
 
+    def test_get_table_dict_pages(self):
+        for sort in ['uid', 'nickname', 'last_login']:
+            for descending in [False, True]:
+                uids = []
+                page = admin.get_table_dict('User', 'some_main_page', sort=sort, descending=descending, limit=2)
+                self.assertIsNone(page['previous'])
+                while True:
+                    uids += [int(row[0]) for row in page['row']]
+                    if not page['next']:
+                        break
+                    page = admin.get_table_dict('User', 'some_main_page', sort=sort, descending=descending,
+                                                after=page['next'], limit=2)
+
+                db_users = DBDiscussionSession.query(User).order_by(User.uid).all()
+                self.assertEqual(sorted(uids), [db_user.uid for db_user in db_users])
+                self.assertEqual(len(uids), page['count'])
+                if sort == 'uid':
+                    self.assertEqual(uids, sorted(uids, reverse=descending))
+
+                last = len(page['row'])
+                previous = admin.get_table_dict('User', 'some_main_page', sort=sort, descending=descending,
+                                                before=page['previous'], limit=2)
+                self.assertEqual([int(row[0]) for row in previous['row']], uids[-last - 2:-last])
+                self.assertIsNotNone(previous['next'])
+
+    def test_get_table_dict_history_is_descending(self):
+        page = admin.get_table_dict('History', 'some_main_page')
+        self.assertTrue(page['descending'])
+        self.assertLessEqual(len(page['row']), admin.table_page_size)
+
+    def test_get_table_dict_filters(self):
+        page = admin.get_table_dict('User', 'some_main_page', filters={'nickname': 'tobi', 'uid': ''})
+        self.assertEqual(page['filters'], {'nickname': 'tobi'})
+        nicknames = [row[page['head'].index('nickname')] for row in page['row']]
+        self.assertEqual(page['count'], len(nicknames))
+        self.assertIn('Tobias', nicknames)
+        self.assertTrue(all('tobi' in nickname.lower() for nickname in nicknames))
+
+        page = admin.get_table_dict('User', 'some_main_page', filters={'nickname': '%'})
+        self.assertEqual(page['count'], 0)
+        self.assertFalse(page['has_elements'])
+
+        page = admin.get_table_dict('Issue', 'some_main_page', filters={'is_disabled': 'false'})
+        self.assertEqual(page['count'], DBDiscussionSession.query(Issue).filter_by(is_disabled=False).count())
+
+    def test_get_table_dict_invalid(self):
+        self.assertRaises(ValueError, admin.get_table_dict, 'User', 'some_main_page', sort='password2')
+        self.assertRaises(ValueError, admin.get_table_dict, 'User', 'some_main_page', filters={'token': 'x'})
+        self.assertRaises(ValueError, admin.get_table_dict, 'User', 'some_main_page', filters={'uid': 'one'})
+        self.assertRaises(ValueError, admin.get_table_dict, 'Issue', 'some_main_page', filters={'is_disabled': 'no'})
+        self.assertRaises(ValueError, admin.get_table_dict, 'User', 'some_main_page', after='no-cursor')
+
+    def test_get_rows_of_references(self):
+        db_argument = DBDiscussionSession.query(Argument).filter_by(issue_uid=self.issue_town.uid).first()
+        rows = admin.get_rows_of(['premisegroup_uid', 'conclusion_uid', 'author_uid'], [db_argument], 'page')
+        premisegroup, conclusion, author = rows[0]
+        self.assertIn(get_text_for_premisegroup_uid(db_argument.premisegroup_uid), premisegroup)
+        if db_argument.conclusion_uid:
+            self.assertEqual(conclusion, '{} - {}'.format(db_argument.conclusion_uid,
+                                                          get_text_for_statement_uid(db_argument.conclusion_uid)))
+        self.assertIn('page/user/{}'.format(db_argument.author_uid), author)
+
+    def test_get_rows_of_arguments(self):
+        db_undercuts = DBDiscussionSession.query(Argument).filter(Argument.argument_uid.isnot(None)).all()
+        db_clicks = DBDiscussionSession.query(ClickedArgument).limit(20).all()
+        rows = admin.get_rows_of(['argument_uid'], db_undercuts + db_clicks, 'page')
+        for (argument,), db_row in zip(rows, db_undercuts + db_clicks):
+            self.assertEqual(argument, '{} - {}'.format(db_row.argument_uid,
+                                                        get_text_for_argument_uid(db_row.argument_uid)))
+
     def test_add_row(self):
         return_val = admin.add_row('User', self.new_user)
         self.assertTrue(return_val)
@@ -80,6 +182,26 @@ class APITokenTest(TestCaseWithConfig):
         token = admin.generate_application_token("test")
         self.assertTrue(admin.check_api_token(token))
 
+    def test_revoke_evicts_verified_token(self):
+        token = admin.generate_application_token("test")
+        self.assertTrue(admin.check_api_token(token))
+        self.assertEqual(admin.verified_api_tokens.get(admin.get_token_hash(token))[1], "test")
+
+        token_id = DBDiscussionSession.query(APIToken).filter_by(owner="test").one().id
+        admin.revoke_application_token(token_id)
+        self.assertIsNone(admin.verified_api_tokens.get(admin.get_token_hash(token)))
+        self.assertFalse(admin.check_api_token(token))
+
+    def test_token_revoked_by_other_worker_is_rejected(self):
+        token = admin.generate_application_token("test")
+        self.assertTrue(admin.check_api_token(token))
+
+        # another worker revokes the token, the cache of this worker still holds it
+        DBDiscussionSession.query(APIToken).filter_by(owner="test").update({'disabled': True})
+        self.assertIsNotNone(admin.verified_api_tokens.get(admin.get_token_hash(token)))
+        self.assertFalse(admin.check_api_token(token))
+        self.assertIsNone(admin.verified_api_tokens.get(admin.get_token_hash(token)))
+
     def test_fail_check(self):
         token = "hglug8o7aug458oghag8o7h5o87gao87ha47z"  # contains non hex symbols
         self.assertFalse(admin.check_api_token(token))
@@ -54,3 +54,20 @@ class AdminViewTest(TestCaseWithConfig):
         self.assertIsNotNone(response['table'].get('count'))
         self.assertIsNotNone(response['table'].get('head'))
         self.assertIsNotNone(response['table'].get('row'))
+
+    def test_main_table_page(self):
+        self.config.testing_securitypolicy(userid='Tobias', permissive=True)
+        request = construct_dummy_request(matchdict={'table': 'User'},
+                                          params={'sort': 'nickname', 'order': 'desc', 'filter-nickname': 'o'})
+        response = main_table(request)
+        self.assertEqual(response['table']['sort'], 'nickname')
+        self.assertTrue(response['table']['descending'])
+        self.assertEqual(response['table']['filters'], {'nickname': 'o'})
+        self.assertIn('filter-nickname=o', response['table']['links']['first'])
+        self.assertIn('order=asc', response['table']['links']['sort']['nickname'])
+
+    def test_main_table_invalid_page(self):
+        self.config.testing_securitypolicy(userid='Tobias', permissive=True)
+        request = construct_dummy_request(matchdict={'table': 'User'}, params={'sort': 'token'})
+        response = main_table(request)
+        self.assertEqual(400, response.status_code)
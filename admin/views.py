@@ -2,12 +2,16 @@
 Introducing an admin interface to enable easy database management.
 """
 import logging
+from urllib.parse import urlencode
 
 from cornice import Service
-from pyramid.httpexceptions import exception_response
+from pyramid.httpexceptions import HTTPFound, exception_response
+from pyramid.response import Response
 
 import admin.lib as lib
 from dbas.handler.language import get_language_from_cookie
+from dbas.profiling import profiler
+from dbas.slow_queries import slow_query_log
 from dbas.helper.dictionary.main import DictionaryHelper
 from dbas.validators.core import has_keywords_in_json_path, validate
 from dbas.validators.database import valid_table_name
@@ -74,6 +78,38 @@ revoke_token = Service(name='revoke_token',
                        permission='admin',
                        cors_policy=cors_policy)
 
+profiling = Service(name='profiling',
+                    path='/profiling/',
+                    renderer='json',
+                    permission='admin',
+                    cors_policy=cors_policy)
+
+start_profiling = Service(name='start_profiling',
+                          path='/profiling/start',
+                          permission='admin',
+                          cors_policy=cors_policy)
+
+stop_profiling = Service(name='stop_profiling',
+                         path='/profiling/stop',
+                         permission='admin',
+                         cors_policy=cors_policy)
+
+download_profile = Service(name='download_profile',
+                           path=r'/profiling/{key:[A-Za-z0-9_-]+}/{format:(pstats|collapsed)}',
+                           permission='admin',
+                           cors_policy=cors_policy)
+
+slow_queries = Service(name='slow_queries',
+                       path='/slow_queries/',
+                       renderer='json',
+                       permission='admin',
+                       cors_policy=cors_policy)
+
+reset_slow_queries = Service(name='reset_slow_queries',
+                             path='/slow_queries/reset',
+                             permission='admin',
+                             cors_policy=cors_policy)
+
 
 # IMPORTANT: we do not need to validate if the user in an admin because we set the permission of this views
 
@@ -96,8 +132,11 @@ def main_admin(request):
                                                                                    request.path,
                                                                                    db_user)
     dashboard_elements = {
-        'entities': lib.get_overview(request.path),
-        'api_tokens': lib.get_application_tokens()
+        'entities': lib.get_overview(request.path, exact=request.params.get('exact') == 'true'),
+        'api_tokens': lib.get_application_tokens(),
+        'profiling': lib.get_profiling_overview(request.path),
+        'slow_queries': lib.get_slow_query_report(limit=10),
+        'activity': lib.get_activity_overview(days=30)
     }
 
     return {
@@ -129,7 +168,12 @@ def main_table(request):
     table_name = request.matchdict['table']
     if not table_name.lower() in lib.table_mapper:
         return exception_response(400)
-    table_dict = lib.get_table_dict(table_name, request.application_url)
+    try:
+        table_dict = lib.get_table_dict(table_name, request.application_url, **_get_table_params(request.params))
+    except ValueError as e:
+        LOG.debug("Invalid page of table %s: %s", table_name, e)
+        return exception_response(400)
+    table_dict['links'] = _get_table_links(request.path, table_dict)
 
     return {
         'language': str(ui_locales),
@@ -141,6 +185,52 @@ def main_table(request):
     }
 
 
+def _get_table_params(params):
+    """
+    Returns the sort column, the sort order, the filters and the cursor of a table page. Filters are passed as GET
+    parameters named filter-<column>.
+
+    :param params: GET parameters of the request
+    :return: dict()
+    """
+    order = params.get('order')
+    return {
+        'sort': params.get('sort'),
+        'descending': order == 'desc' if order else None,
+        'filters': {key[len('filter-'):]: value for key, value in params.items() if key.startswith('filter-')},
+        'after': params.get('after'),
+        'before': params.get('before'),
+    }
+
+
+def _get_table_links(path, table_dict):
+    """
+    Returns the links for sorting by every column and for the first, the previous and the next page
+
+    :param path: of the table page
+    :param table_dict: as returned by lib.get_table_dict
+    :return: dict()
+    """
+    params = {'filter-' + column: value for column, value in table_dict['filters'].items()}
+    params['sort'] = table_dict['sort']
+    params['order'] = 'desc' if table_dict['descending'] else 'asc'
+
+    def link(**changes):
+        return '{}?{}'.format(path, urlencode(dict(params, **changes)))
+
+    sort_links = {}
+    for column in table_dict['head']:
+        descending = column == table_dict['sort'] and not table_dict['descending']
+        sort_links[column] = link(sort=column, order='desc' if descending else 'asc')
+
+    return {
+        'sort': sort_links,
+        'first': link(),
+        'previous': link(before=table_dict['previous']) if table_dict['previous'] else None,
+        'next': link(after=table_dict['next']) if table_dict['next'] else None,
+    }
+
+
 @update_row.post()
 @validate(valid_user_as_admin, valid_table_name,
           has_keywords_in_json_path(('keys', list), ('uids', list), ('values', list)))
@@ -198,3 +288,94 @@ def revoke_api_token(request):
     token_id = request.matchdict['id']
     lib.revoke_application_token(token_id)
     LOG.debug("API-Token %s was revoked.", token_id)
+
+
+@profiling.get()
+def get_profiling(request):
+    """
+    Returns the current profiling session and the profiled routes
+
+    :param request: current webservers request
+    :return: dict()
+    """
+    return lib.get_profiling_overview(request.path.rsplit('profiling/', 1)[0])
+
+
+@start_profiling.post()
+def start_profiling_session(request):
+    """
+    Starts profiling the routes, whose name or pattern matches the glob pattern, for all workers
+
+    :param request: current webservers request
+    :return: redirect to the dashboard
+    """
+    try:
+        profiler.start_session(request.params.get('pattern', '').strip(), float(request.params.get('duration', 60)),
+                               float(request.params.get('sample_rate', 1)))
+    except ValueError as e:
+        LOG.debug("Could not start profiling: %s", e)
+        return exception_response(400)
+    return HTTPFound(location=request.route_path('dashboard_page'))
+
+
+@stop_profiling.post()
+def stop_profiling_session(request):
+    """
+    Stops the current profiling session, the profiles are kept
+
+    :param request: current webservers request
+    :return: redirect to the dashboard
+    """
+    profiler.stop_session()
+    return HTTPFound(location=request.route_path('dashboard_page'))
+
+
+@download_profile.get()
+def download_route_profile(request):
+    """
+    Returns the merged profile of a route as pstats file or as collapsed stacks for flamegraphs
+
+    :param request: current webservers request
+    :return: file download
+    """
+    key = request.matchdict['key']
+    if request.matchdict['format'] == 'pstats':
+        content = profiler.get_pstats(key)
+        filename, content_type = f'{key}.pstats', 'application/octet-stream'
+    else:
+        content = profiler.get_collapsed_stacks(key)
+        filename, content_type = f'{key}.collapsed.txt', 'text/plain'
+    if content is None:
+        return exception_response(404)
+    return Response(body=content if isinstance(content, bytes) else content.encode('utf-8'),
+                    content_type=content_type,
+                    content_disposition=f'attachment; filename="{filename}"')
+
+
+@slow_queries.get()
+def get_slow_queries(request):
+    """
+    Returns the SQL fingerprints and call sites with the worst durations, ordered by the GET parameter order ('total',
+    'max', 'count' or 'mean') and limited by the GET parameter limit
+
+    :param request: current webservers request
+    :return: dict()
+    """
+    try:
+        limit = int(request.params.get('limit', 20))
+        return {'queries': lib.get_slow_query_report(limit, request.params.get('order', 'total'))}
+    except ValueError as e:
+        LOG.debug("Invalid report of slow queries: %s", e)
+        return exception_response(400)
+
+
+@reset_slow_queries.post()
+def reset_slow_query_report(request):
+    """
+    Drops the aggregated SQL statements of all workers
+
+    :param request: current webservers request
+    :return: redirect to the dashboard
+    """
+    slow_query_log.reset()
+    return HTTPFound(location=request.route_path('dashboard_page'))
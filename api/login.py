@@ -9,16 +9,21 @@ from typing import Union
 import jwt
 from pyramid.request import Request
 
-from admin.lib import check_api_token, is_api_token
+from admin.lib import check_api_token, is_api_token, get_token_hash
 from dbas.auth.login import login_local_user
 from dbas.database import DBDiscussionSession
 from dbas.database.discussion_model import User
+from dbas.helper.cache import TTLCache
 from dbas.lib import get_user_by_case_insensitive_nickname, nick_of_anonymous_user
 from dbas.validators.lib import add_error
 from .lib import json_to_dict, logger
 
 log = logger()
 
+# uid of the user, claims and expiry of verified JWTs by the hash of the token, a hit skips the verification of the
+# signature and entries never outlive the expiry of their token
+verified_jwts = TTLCache('verified_jwts', maxsize=4096, ttl=300)
+
 
 # #############################################################################
 # Dispatch API attempts by type
@@ -54,6 +59,18 @@ def decode_jwt(request, token) -> dict:
 
 
 def check_jwt(request, token) -> bool:
+    token_hash = get_token_hash(token)
+    cached = verified_jwts.get(token_hash)
+    if cached is not None and (cached[2] is None or cached[2] > time.time()):
+        user_uid, payload, _ = cached
+        user_by_id: User = DBDiscussionSession.query(User).get(user_uid)
+        if user_by_id is not None and payload.get('nickname') in (None, user_by_id.nickname):
+            request.validated['token-payload'] = dict(payload)
+            request.validated['user'] = user_by_id
+            request.validated['auth-by-api-token'] = False
+            return True
+        verified_jwts.invalidate(token_hash)
+
     try:
         payload = decode_jwt(request, token)
     except jwt.ExpiredSignatureError as e:
@@ -73,12 +90,31 @@ def check_jwt(request, token) -> bool:
         add_error(request, "Invalid token: nickname and id do not match", status_code=401, location="header")
         return False
 
+    __cache_verified_jwt(token_hash, user_by_id.uid, payload)
     request.validated['token-payload'] = payload
     request.validated['user'] = user_by_id
     request.validated['auth-by-api-token'] = False
     return True
 
 
+def __cache_verified_jwt(token_hash: str, user_uid: int, payload: dict):
+    """
+    Remembers a verified JWT until it expires, but at most for the ttl of the cache
+
+    :param token_hash: hash of the token
+    :param user_uid: uid of the user of the token
+    :param payload: the verified claims
+    :return: None
+    """
+    expires_at = payload.get('exp')
+    ttl = None
+    if expires_at is not None:
+        ttl = min(verified_jwts.ttl, expires_at - time.time())
+        if ttl <= 0:
+            return
+    verified_jwts.set(token_hash, (user_uid, dict(payload), expires_at), ttl=ttl)
+
+
 # #############################################################################
 # Validators
 
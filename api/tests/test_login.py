@@ -1,6 +1,10 @@
 import json
+import time
+from unittest import mock
 
-from api.login import validate_credentials, valid_token, valid_token_optional
+from admin.lib import get_token_hash
+from api import login
+from api.login import validate_credentials, valid_token, valid_token_optional, verified_jwts
 from api.tests.test_views import create_request_with_token_header, user_tokens
 from dbas.tests.utils import construct_dummy_request, TestCaseWithConfig
 
@@ -93,3 +97,41 @@ class ValidTokenTest(TestCaseWithConfig):
         valid_token_optional(request)
         self.assertListEqual(request.errors, [])
         self.assertIn('user', request.validated)
+
+
+class VerifiedJWTCacheTest(TestCaseWithConfig):
+    def setUp(self):
+        super().setUp()
+        verified_jwts.clear()
+
+    def tearDown(self):
+        verified_jwts.clear()
+        super().tearDown()
+
+    def test_second_check_skips_verification(self):
+        valid_token(create_request_with_token_header())
+        self.assertEqual(len(verified_jwts), 1)
+
+        request = create_request_with_token_header()
+        with mock.patch.object(login, 'decode_jwt') as decode_jwt:
+            valid_token(request)
+            decode_jwt.assert_not_called()
+        self.assertEqual(request.errors, [])
+        self.assertEqual(request.validated['user'].nickname, 'Walter')
+        self.assertEqual(request.validated['token-payload']['nickname'], 'Walter')
+
+    def test_invalid_tokens_are_not_cached(self):
+        request = construct_dummy_request()
+        request.headers['Authorization'] = 'Bearer thisisnotarealtoken'
+        valid_token(request)
+        self.assertEqual(len(verified_jwts), 0)
+
+    def test_expired_entries_are_verified_again(self):
+        token = user_tokens['Walter']
+        verified_jwts.set(get_token_hash(token), (17, {'nickname': 'Walter', 'id': 17}, time.time() - 1))
+
+        request = create_request_with_token_header()
+        with mock.patch.object(login, 'decode_jwt', wraps=login.decode_jwt) as decode_jwt:
+            valid_token(request)
+            decode_jwt.assert_called_once()
+        self.assertEqual(request.errors, [])
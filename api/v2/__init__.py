@@ -3,11 +3,22 @@ REST API for to communicate with the world. Enables remote discussion from arbit
 """
 from pyramid.config import Configurator
 
+from api.v2.query.cost import parse_token_budgets
+from api.v2.query.schema import load_persisted_queries
+
 
 def init(config):
     config.include("cornice")
     config.scan("api.v2.views")
 
+    settings = config.get_settings()
+    # parsed once, because the budget of every query with an api token is looked up
+    settings['api.query.token_budgets'] = parse_token_budgets(settings.get('api.query.token_budgets', ''))
+
+    persisted_queries = settings.get('api.persisted_queries')
+    if persisted_queries:
+        load_persisted_queries(persisted_queries)
+
 
 def main(global_config, **settings):
     config = Configurator(settings=settings)
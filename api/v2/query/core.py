@@ -2,6 +2,8 @@
 GraphQL Core. Here are the models listed, which can be queried by GraphQl.
 """
 
+from typing import Optional
+
 import arrow
 import graphene
 from arrow import Arrow
@@ -11,7 +13,9 @@ from graphene_sqlalchemy.converter import convert_sqlalchemy_type
 from graphql.language import ast
 from sqlalchemy_utils import ArrowType
 
-from api.v2.query.resolve import resolve_field_query, resolve_list_query
+from api.v2.query.loaders import get_loaders
+from api.v2.query.resolve import resolve_field_query, resolve_list_query, resolve_list_by, resolve_field_by, \
+    limit_list_query
 from dbas.database import DBDiscussionSession
 from dbas.database.discussion_model import Statement, Issue, TextVersion, User, Language, StatementReference, \
     StatementOrigins, PremiseGroup, Premise, Argument, ClickedArgument, ClickedStatement
@@ -73,14 +77,29 @@ class ArgumentGraph(SQLAlchemyObjectType):
     issues = graphene.Dynamic(lambda: graphene.Field(IssueGraph, deprecation_reason="Use `issue` instead"))
     arguments = graphene.Dynamic(lambda: graphene.Field(ArgumentGraph, deprecation_reason="Use `attacks` instead"))
 
-    def resolve_users(self: StatementReference, info):
-        return resolve_field_query({"uid": self.author_uid}, info, UserGraph)
+    def resolve_users(self: Argument, info):
+        return resolve_field_by(info, UserGraph, "uid", self.author_uid)
 
-    def resolve_issues(self: StatementReference, info):
-        return resolve_field_query({"uid": self.issue_uid}, info, IssueGraph)
+    def resolve_issues(self: Argument, info):
+        return resolve_field_by(info, IssueGraph, "uid", self.issue_uid)
 
     def resolve_arguments(self: Argument, info):
-        return resolve_field_query({"uid": self.argument_uid}, info, ArgumentGraph)
+        return resolve_field_by(info, ArgumentGraph, "uid", self.argument_uid)
+
+    def resolve_author(self: Argument, info):
+        return resolve_field_by(info, UserGraph, "uid", self.author_uid)
+
+    def resolve_issue(self: Argument, info):
+        return resolve_field_by(info, IssueGraph, "uid", self.issue_uid)
+
+    def resolve_premisegroup(self: Argument, info):
+        return resolve_field_by(info, PremiseGroupGraph, "uid", self.premisegroup_uid)
+
+    def resolve_conclusion(self: Argument, info):
+        return resolve_field_by(info, StatementGraph, "uid", self.conclusion_uid)
+
+    def resolve_attacks(self: Argument, info):
+        return resolve_field_by(info, ArgumentGraph, "uid", self.argument_uid)
 
 
 class StatementGraph(SQLAlchemyObjectType):
@@ -94,31 +113,22 @@ class StatementGraph(SQLAlchemyObjectType):
     undercuts = ArgumentGraph.plural()
 
     def resolve_textversions(self, info, **kwargs):
-        return resolve_field_query({**kwargs, "statement_uid": self.uid}, info, TextVersionGraph)
+        return resolve_field_by(info, TextVersionGraph, "statement_uid", self.uid)
 
     def resolve_text(self: Statement, info):
-        return self.get_text()
+        # the latest enabled textversions of all statements of this level are loaded at once, like get_text does it
+        return get_loaders(info).load(TextVersion, "statement_uid", self.uid, latest_by="timestamp", is_disabled=False) \
+            .then(_text_of)
 
     def resolve_supports(self, info, **kwargs):
-        return resolve_list_query({**kwargs, "is_supportive": True, "conclusion_uid": self.uid}, info, ArgumentGraph)
+        return resolve_list_by({**kwargs, "is_supportive": True}, info, ArgumentGraph, "conclusion_uid", self.uid)
 
     def resolve_rebuts(self, info, **kwargs):
-        return resolve_list_query({**kwargs, "is_supportive": False, "conclusion_uid": self.uid}, info, ArgumentGraph)
+        return resolve_list_by({**kwargs, "is_supportive": False}, info, ArgumentGraph, "conclusion_uid", self.uid)
 
     def resolve_undercuts(self, info, **kwargs):
-        # Query for all arguments attacking / supporting this statement
-        sq = DBDiscussionSession.query(Argument.uid) \
-            .filter(Argument.conclusion_uid == self.uid,
-                    Argument.is_disabled == False) \
-            .subquery()
-
-        # Query for all arguments, which are attacking the arguments from the query above.
-        return ArgumentGraph.get_query(info) \
-            .filter_by(**kwargs) \
-            .filter(
-            Argument.is_disabled == False,
-            Argument.argument_uid.in_(sq)
-        )
+        # all arguments, which are attacking the arguments attacking / supporting this statement
+        return get_loaders(info).load_undercuts(self.uid, **{**kwargs, "is_disabled": False})
 
     @staticmethod
     def singular():
@@ -136,6 +146,18 @@ class StatementGraph(SQLAlchemyObjectType):
         return self.flat_statements_below()
 
 
+def _text_of(textversion: Optional[TextVersion]) -> Optional[str]:
+    """
+    Returns the content of the textversion without trailing punctuation like Statement.get_text
+
+    :param textversion: latest enabled textversion of a statement or None
+    :return: text or None
+    """
+    if textversion is None:
+        return None
+    return textversion.content.rstrip('.?!')
+
+
 class ClickedArgumentNode(SQLAlchemyObjectType):
     class Meta:
         model = ClickedArgument
@@ -156,7 +178,7 @@ class UserGraph(SQLAlchemyObjectType):
         return get_profile_picture(self, **kwargs)
 
     def resolve_clicked_statements(self: User, info, **kwargs):
-        return resolve_list_query({**kwargs, "author_uid": self.uid}, info, ClickedStatementNode)
+        return resolve_list_by(kwargs, info, ClickedStatementNode, "author_uid", self.uid)
 
     class Meta:
         model = User
@@ -193,7 +215,7 @@ class IssueGraph(SQLAlchemyObjectType):
         return resolve_field_query(kwargs, info, StatementGraph)
 
     def resolve_arguments(self, info, **kwargs):
-        return resolve_list_query({**kwargs, "issue_uid": self.uid}, info, ArgumentGraph)
+        return resolve_list_by(kwargs, info, ArgumentGraph, "issue_uid", self.uid)
 
     def resolve_number_of_participating_authors(self: Issue, info):
         return len(self.participating_authors)
@@ -267,11 +289,15 @@ class PremiseGroupGraph(SQLAlchemyObjectType):
     statements = StatementGraph.plural()
 
     def resolve_statements(self, info, **kwargs):
-        premises = DBDiscussionSession.query(Premise).filter(Premise.premisegroup_uid == self.uid).all()
-        uids = set([premise.statement_uid for premise in premises])
-        query = StatementGraph.get_query(info)
+        loaders = get_loaders(info)
 
-        return query.filter_by(**kwargs).filter(Statement.uid.in_(uids))
+        def load_statements(premises):
+            uids = sorted(set([premise.statement_uid for premise in premises]))
+            return loaders.load_many(Statement, "uid", uids, **kwargs)
+
+        return loaders.load(Premise, "premisegroup_uid", self.uid, many=True) \
+            .then(load_statements) \
+            .then(lambda statements: [statement for statement in statements if statement])
 
     class Meta:
         model = PremiseGroup
@@ -281,6 +307,18 @@ class PremiseGraph(SQLAlchemyObjectType):
     class Meta:
         model = Premise
 
+    def resolve_statement(self: Premise, info):
+        return resolve_field_by(info, StatementGraph, "uid", self.statement_uid)
+
+    def resolve_premisegroup(self: Premise, info):
+        return resolve_field_by(info, PremiseGroupGraph, "uid", self.premisegroup_uid)
+
+    def resolve_author(self: Premise, info):
+        return resolve_field_by(info, UserGraph, "uid", self.author_uid)
+
+    def resolve_issue(self: Premise, info):
+        return resolve_field_by(info, IssueGraph, "uid", self.issue_uid)
+
 
 class StatementReferenceGraph(SQLAlchemyObjectType):
     class Meta:
@@ -292,13 +330,13 @@ class StatementReferenceGraph(SQLAlchemyObjectType):
     statements = graphene.Field(StatementGraph, deprecation_reason="Use `statement` instead")
 
     def resolve_users(self: StatementReference, info):
-        return resolve_field_query({"uid": self.author_uid}, info, UserGraph)
+        return resolve_field_by(info, UserGraph, "uid", self.author_uid)
 
     def resolve_issues(self: StatementReference, info):
-        return resolve_field_query({"uid": self.issue_uid}, info, IssueGraph)
+        return resolve_field_by(info, IssueGraph, "uid", self.issue_uid)
 
     def resolve_statements(self: StatementReference, info):
-        return resolve_field_query({"uid": self.statement_uid}, info, StatementGraph)
+        return resolve_field_by(info, StatementGraph, "uid", self.statement_uid)
 
 
 # -----------------------------------------------------------------------------
@@ -344,7 +382,7 @@ class Query(graphene.ObjectType):
         return resolve_field_query(kwargs, info, StatementReferenceGraph)
 
     def resolve_statement_references(self, info, **kwargs):
-        return StatementReferenceGraph.get_query(info).all()
+        return limit_list_query(StatementReferenceGraph.get_query(info), info).all()
 
     def resolve_statement_origin(self, info, **kwargs):
         return resolve_field_query(kwargs, info, StatementOriginsGraph)
@@ -365,7 +403,7 @@ class Query(graphene.ObjectType):
         return resolve_field_query(kwargs, info, PremiseGroupGraph)
 
     def resolve_premisegroups(self, info, **kwargs):
-        return PremiseGroupGraph.get_query(info).all()
+        return limit_list_query(PremiseGroupGraph.get_query(info), info).all()
 
     def resolve_user(self, info, **kwargs):
         return resolve_field_query(kwargs, info, UserGraph)
@@ -0,0 +1,222 @@
+"""
+Cost analysis of GraphQL queries. Before a query is executed, its cost and depth are estimated from the document, so
+queries which would exceed the budget of the client are rejected early. During the execution, the actual cost is
+counted and the execution is stopped as soon as the budget is spent. The resolvers limit the queries of lists to
+``api.query.max_list_size`` rows, lists, which are built in Python, are capped afterwards.
+
+Every resolved field costs one point, the fields of ``field_weights`` are more expensive. The fields below a list are
+multiplied by the estimated size of the list.
+
+All limits are configured in the settings::
+
+    api.query.max_cost = 10000
+    api.query.max_depth = 10
+    api.query.max_list_size = 1000
+    api.query.list_size_estimate = 10
+    api.query.token_budgets = <owner of an api token>:<max_cost> ...
+"""
+import logging
+from typing import Dict, Optional, Tuple
+
+from graphql.error import GraphQLError
+from graphql.language.ast import Document, OperationDefinition, FragmentDefinition, Field, FragmentSpread, \
+    SelectionSet
+from graphql.type.definition import GraphQLList, GraphQLNonNull, get_named_type
+from promise import is_thenable
+
+LOG = logging.getLogger(__name__)
+
+field_weights: Dict[str, int] = {
+    'completeGraph': 1000,
+    'completeGraphCypher': 1000,
+    'flatStatementsBelow': 500,
+}
+default_field_weight: int = 1
+
+default_max_cost: int = 10000
+default_max_depth: int = 10
+default_max_list_size: int = 1000
+default_list_size_estimate: int = 10
+
+
+class QueryBudget:
+    """
+    The limits of one query and the cost, which is spent during its execution
+    """
+
+    def __init__(self, max_cost: int = default_max_cost, max_depth: int = default_max_depth,
+                 max_list_size: int = default_max_list_size, list_size_estimate: int = default_list_size_estimate):
+        """
+        :param max_cost: maximal estimated and actual cost of the query
+        :param max_depth: maximal depth of nested fields
+        :param max_list_size: lists with more items are cut
+        :param list_size_estimate: assumed size of every list for the estimation
+        """
+        self.max_cost = max_cost
+        self.max_depth = max_depth
+        self.max_list_size = max_list_size
+        self.list_size_estimate = min(list_size_estimate, max_list_size)
+        self.estimated_cost = 0
+        self.depth = 0
+        self.actual_cost = 0
+
+    @staticmethod
+    def from_settings(settings: dict, token_owner: Optional[str] = None) -> 'QueryBudget':
+        """
+        Creates the budget for a query based on the settings. Owners of api tokens may have their own maximal cost.
+
+        :param settings: the settings of the app
+        :param token_owner: owner of the api token of the request or None
+        :return: QueryBudget
+        """
+        max_cost = int(settings.get('api.query.max_cost', default_max_cost))
+        if token_owner:
+            token_budgets = settings.get('api.query.token_budgets', {})
+            if isinstance(token_budgets, str):
+                token_budgets = parse_token_budgets(token_budgets)
+            max_cost = token_budgets.get(token_owner, max_cost)
+
+        return QueryBudget(max_cost=max_cost,
+                           max_depth=int(settings.get('api.query.max_depth', default_max_depth)),
+                           max_list_size=int(settings.get('api.query.max_list_size', default_max_list_size)),
+                           list_size_estimate=int(settings.get('api.query.list_size_estimate',
+                                                               default_list_size_estimate)))
+
+    def check_estimation(self, schema, document: Document) -> Optional[str]:
+        """
+        Estimates cost and depth of the document
+
+        :param schema: the GraphQL schema
+        :param document: parsed and validated document
+        :return: None, if the query is within the budget, otherwise the reason of the rejection
+        """
+        self.estimated_cost, self.depth = estimate_query(schema, document, self.list_size_estimate)
+        if self.depth > self.max_depth:
+            return f'The query is nested too deep ({self.depth} > {self.max_depth}).'
+        if self.estimated_cost > self.max_cost:
+            return f'The query is too expensive ({self.estimated_cost} > {self.max_cost}).'
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            'estimated': self.estimated_cost,
+            'actual': self.actual_cost,
+            'budget': self.max_cost,
+            'depth': self.depth,
+            'maxDepth': self.max_depth
+        }
+
+
+class CostMiddleware:
+    """
+    Counts the actual cost of a query, stops its execution if the budget is spent and caps lists. The maximal list size
+    is put into the context, where the resolvers read it to limit their queries.
+    """
+
+    def __init__(self, budget: QueryBudget):
+        self.budget = budget
+
+    def resolve(self, next_resolver, root, info, **args):
+        info.context.setdefault('max_list_size', self.budget.max_list_size)
+        self.budget.actual_cost += field_weights.get(info.field_name, default_field_weight)
+        if self.budget.actual_cost > self.budget.max_cost:
+            raise GraphQLError(f'The query exceeded its budget of {self.budget.max_cost}.')
+
+        value = next_resolver(root, info, **args)
+        if is_thenable(value):
+            return value.then(self.__cap)
+        return self.__cap(value)
+
+    def __cap(self, value):
+        if isinstance(value, list) and len(value) > self.budget.max_list_size:
+            return value[:self.budget.max_list_size]
+        return value
+
+
+def parse_token_budgets(value: str) -> Dict[str, int]:
+    """
+    Parses the budgets of the owners of api tokens. Malformed entries are logged and skipped.
+
+    :param value: whitespace separated entries of the form <owner>:<max_cost>
+    :return: maximal cost by owner
+    """
+    token_budgets = {}
+    for entry in value.split():
+        owner, _, max_cost = entry.rpartition(':')
+        if not owner or not max_cost.isdigit() or int(max_cost) <= 0:
+            LOG.error("Skip the malformed entry %r of api.query.token_budgets", entry)
+            continue
+        token_budgets[owner] = int(max_cost)
+    return token_budgets
+
+
+def estimate_query(schema, document: Document, list_size_estimate: int) -> Tuple[int, int]:
+    """
+    Estimates the cost and the depth of all operations of the document
+
+    :param schema: the GraphQL schema
+    :param document: parsed and validated document
+    :param list_size_estimate: assumed size of every list
+    :return: cost and depth
+    """
+    fragments = {d.name.value: d for d in document.definitions if isinstance(d, FragmentDefinition)}
+    cost, depth = 0, 0
+    for definition in document.definitions:
+        if isinstance(definition, OperationDefinition):
+            root_type = schema.get_query_type() if definition.operation == 'query' else None
+            operation_cost, operation_depth = __estimate_selection_set(schema, definition.selection_set, root_type,
+                                                                       fragments, list_size_estimate)
+            cost += operation_cost
+            depth = max(depth, operation_depth)
+    return cost, depth
+
+
+def __estimate_selection_set(schema, selection_set: SelectionSet, parent_type, fragments: Dict[str, FragmentDefinition],
+                             list_size_estimate: int) -> Tuple[int, int]:
+    """
+    Estimates the cost and the depth of a selection set. The document is validated, therefore fragments are not cyclic.
+
+    :return: cost and depth
+    """
+    cost, depth = 0, 0
+    for selection in selection_set.selections:
+        if isinstance(selection, Field):
+            field_cost, field_depth = __estimate_field(schema, selection, parent_type, fragments, list_size_estimate)
+        else:
+            if isinstance(selection, FragmentSpread):
+                fragment = fragments[selection.name.value]
+            else:  # InlineFragment
+                fragment = selection
+            fragment_type = schema.get_type(fragment.type_condition.name.value) if fragment.type_condition else None
+            field_cost, field_depth = __estimate_selection_set(schema, fragment.selection_set,
+                                                               fragment_type or parent_type, fragments,
+                                                               list_size_estimate)
+        cost += field_cost
+        depth = max(depth, field_depth)
+    return cost, depth
+
+
+def __estimate_field(schema, field: Field, parent_type, fragments: Dict[str, FragmentDefinition],
+                     list_size_estimate: int) -> Tuple[int, int]:
+    """
+    Estimates the cost and the depth of a field including all its subfields
+
+    :return: cost and depth
+    """
+    name = field.name.value
+    cost = field_weights.get(name, default_field_weight)
+    if not field.selection_set:
+        return cost, 1
+
+    field_definition = getattr(parent_type, 'fields', {}).get(name) if parent_type else None
+    field_type = field_definition.type if field_definition else None
+    sub_cost, sub_depth = __estimate_selection_set(schema, field.selection_set, get_named_type(field_type), fragments,
+                                                   list_size_estimate)
+    multiplier = list_size_estimate if __is_list(field_type) else 1
+    return cost + multiplier * sub_cost, sub_depth + 1
+
+
+def __is_list(field_type) -> bool:
+    while isinstance(field_type, GraphQLNonNull):
+        field_type = field_type.of_type
+    return isinstance(field_type, GraphQLList)
@@ -0,0 +1,178 @@
+"""
+Per-request DataLoaders for the GraphQL resolvers. Every loader collects the keys, which are requested by the resolvers
+of one level of the query, and fetches all of them with a single ``IN (...)`` query. Lists are limited per key in the
+same query.
+"""
+from collections import defaultdict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from promise import Promise
+from promise.dataloader import DataLoader
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
+
+from dbas.database import DBDiscussionSession
+from dbas.database.discussion_model import Argument
+
+
+class ModelLoader(DataLoader):
+    """
+    Loads the rows of a model by the values of one of its columns
+    """
+
+    def __init__(self, session, model, column: str, many: bool, filters: Dict[str, Any],
+                 max_list_size: Optional[int] = None, latest_by: Optional[str] = None):
+        """
+        :param session: session of the current request
+        :param model: the model, which is queried
+        :param column: name of the column, which is compared with the keys
+        :param many: True, if a list of rows should be loaded for each key, otherwise the first row is loaded
+        :param filters: additional filters, which are applied to all rows
+        :param max_list_size: maximal count of rows per key, if many is True
+        :param latest_by: name of a column, the row with its highest value is loaded instead of the first row
+        """
+        super().__init__()
+        self.session = session
+        self.model = model
+        self.column = column
+        self.many = many
+        self.filters = filters
+        self.max_list_size = max_list_size
+        self.latest_by = latest_by
+
+    def batch_load_fn(self, keys: List[Hashable]) -> Promise:
+        order = list(self.model.__mapper__.primary_key)
+        if self.latest_by:
+            order.insert(0, getattr(self.model, self.latest_by).desc())
+        query = self.session.query(self.model) \
+            .filter(getattr(self.model, self.column).in_(set(keys))) \
+            .filter_by(**self.filters)
+        if self.many and self.max_list_size is not None:
+            # numbers the rows of every key, so the database returns only the first rows of each list
+            position = func.row_number().over(partition_by=getattr(self.model, self.column), order_by=order)
+            subquery = query.add_columns(position.label('position')).subquery()
+            query = self.session.query(aliased(self.model, subquery)).filter(subquery.c.position <= self.max_list_size)
+            order = [subquery.c.position]
+        rows = query.order_by(*order).all()
+
+        if self.many:
+            rows_by_key = defaultdict(list)
+            for row in rows:
+                rows_by_key[getattr(row, self.column)].append(row)
+            return Promise.resolve([rows_by_key.get(key, []) for key in keys])
+
+        row_by_key = {}
+        for row in rows:
+            row_by_key.setdefault(getattr(row, self.column), row)
+        return Promise.resolve([row_by_key.get(key) for key in keys])
+
+
+class UndercutLoader(DataLoader):
+    """
+    Loads the arguments, which undercut the enabled arguments of a conclusion, by the uid of the conclusion. The
+    attacked arguments are joined, so only the undercuts are limited per key.
+    """
+
+    def __init__(self, session, filters: Dict[str, Any], max_list_size: Optional[int] = None):
+        """
+        :param session: session of the current request
+        :param filters: additional filters, which are applied to the undercuts
+        :param max_list_size: maximal count of undercuts per conclusion
+        """
+        super().__init__()
+        self.session = session
+        self.filters = filters
+        self.max_list_size = max_list_size
+
+    def batch_load_fn(self, keys: List[Hashable]) -> Promise:
+        attacked = aliased(Argument)
+        query = self.session.query(Argument, attacked.conclusion_uid.label('key')) \
+            .join(attacked, Argument.argument_uid == attacked.uid) \
+            .filter(attacked.conclusion_uid.in_(set(keys)), attacked.is_disabled.is_(False)) \
+            .filter(*[getattr(Argument, column) == value for column, value in self.filters.items()])
+        order = [Argument.uid]
+        if self.max_list_size is not None:
+            position = func.row_number().over(partition_by=attacked.conclusion_uid, order_by=Argument.uid)
+            subquery = query.add_columns(position.label('position')).subquery()
+            query = self.session.query(aliased(Argument, subquery), subquery.c.key) \
+                .filter(subquery.c.position <= self.max_list_size)
+            order = [subquery.c.position]
+
+        undercuts_by_key = defaultdict(list)
+        for undercut, key in query.order_by(*order).all():
+            undercuts_by_key[key].append(undercut)
+        return Promise.resolve([undercuts_by_key.get(key, []) for key in keys])
+
+
+class RequestLoaders:
+    """
+    All loaders of one request. The loaders cache their rows, therefore they must not outlive the request.
+    """
+
+    def __init__(self, session, max_list_size: Optional[int] = None):
+        """
+        :param session: session of the current request
+        :param max_list_size: maximal count of rows of every loaded list
+        """
+        self.session = session
+        self.max_list_size = max_list_size
+        self.__loaders: Dict[Tuple, DataLoader] = {}
+
+    def load(self, model, column: str, key: Hashable, many: bool = False, latest_by: Optional[str] = None,
+             **filters) -> Promise:
+        """
+        Loads the first row or all rows of the model, whose column equals the key
+
+        :param model: the model, which is queried
+        :param column: name of the column, which is compared with the key
+        :param key: the value of the column
+        :param many: True, if a list of rows should be loaded
+        :param latest_by: name of a column, the row with its highest value is loaded instead of the first row
+        :param filters: additional filters
+        :return: Promise of the row, None or a list of rows
+        """
+        if key is None:
+            return Promise.resolve([] if many else None)
+        return self.__get_loader(model, column, many, filters, latest_by).load(key)
+
+    def load_many(self, model, column: str, keys: List[Hashable], many: bool = False, **filters) -> Promise:
+        """
+        Like load, but for several keys at once
+
+        :return: Promise of the list of results in order of the keys
+        """
+        return Promise.all([self.load(model, column, key, many, **filters) for key in keys])
+
+    def load_undercuts(self, conclusion_uid: Hashable, **filters) -> Promise:
+        """
+        Loads the arguments, which undercut the enabled arguments of the conclusion
+
+        :param conclusion_uid: uid of the statement
+        :param filters: additional filters of the undercuts
+        :return: Promise of the list of undercuts
+        """
+        loader_key = (UndercutLoader, tuple(sorted(filters.items())))
+        if loader_key not in self.__loaders:
+            self.__loaders[loader_key] = UndercutLoader(self.session, filters, self.max_list_size)
+        return self.__loaders[loader_key].load(conclusion_uid)
+
+    def __get_loader(self, model, column: str, many: bool, filters: Dict[str, Any],
+                     latest_by: Optional[str]) -> ModelLoader:
+        loader_key = (model, column, many, latest_by, tuple(sorted(filters.items())))
+        if loader_key not in self.__loaders:
+            self.__loaders[loader_key] = ModelLoader(self.session, model, column, many, filters, self.max_list_size,
+                                                     latest_by)
+        return self.__loaders[loader_key]
+
+
+def get_loaders(info) -> RequestLoaders:
+    """
+    Returns the loaders of the current request, which are stored in the context of the query
+
+    :param info: ResolveInfo of the resolver
+    :return: RequestLoaders
+    """
+    context = info.context
+    if 'loaders' not in context:
+        context['loaders'] = RequestLoaders(context.get('session', DBDiscussionSession), context.get('max_list_size'))
+    return context['loaders']
@@ -1,7 +1,11 @@
 """
 Namespace for functions used to resolve Queries on the database for GraphQL.
 """
-from typing import Dict
+from typing import Dict, Hashable
+
+from promise import Promise
+
+from api.v2.query.loaders import get_loaders
 
 
 def resolve_list_query(args: Dict, context, graph):
@@ -18,7 +22,23 @@ def resolve_list_query(args: Dict, context, graph):
     query = graph.get_query(context)
     query = __default(query, args, 'is_disabled', False)
 
-    return query.filter_by(**args).all()
+    return limit_list_query(query.filter_by(**args), context).all()
+
+
+def limit_list_query(query, context):
+    """
+    Limits a query of a list to the maximal list size of the current GraphQL query, so the database does not load the
+    rows, which would be cut anyway. The rows are ordered by their primary key to cut the same rows every time.
+
+    :param query: query of the list
+    :param context: retrieve the maximal list size
+    :return: the limited query
+    """
+    max_list_size = context.context.get('max_list_size')
+    if max_list_size is None:
+        return query
+    model = query.column_descriptions[0]['entity']
+    return query.order_by(*model.__mapper__.primary_key).limit(max_list_size)
 
 
 def resolve_field_query(args, context, graph):
@@ -39,6 +59,37 @@ def resolve_field_query(args, context, graph):
     return query
 
 
+def resolve_list_by(args: Dict, context, graph, column: str, key: Hashable) -> Promise:
+    """
+    Like resolve_list_query, but only for the objects whose `column` equals `key`, e.g. all arguments of one
+    conclusion. The objects of all keys, which are requested with the same arguments, are queried at once.
+
+    :param args: Arguments provided by the GraphQL query
+    :param context: retrieve current session and loaders
+    :param graph: reduced database model
+    :param column: name of the column, which references the parent object
+    :param key: value of the column
+    :return: Promise of the list of objects matching the criterias
+    """
+    model = graph._meta.model
+    if hasattr(model, 'is_disabled'):
+        args = {'is_disabled': False, **args}
+    return get_loaders(context).load(model, column, key, many=True, **args)
+
+
+def resolve_field_by(context, graph, column: str, key: Hashable) -> Promise:
+    """
+    Like resolve_field_query, but the objects of all keys, which are requested on the same level, are queried at once.
+
+    :param context: retrieve current session and loaders
+    :param graph: reduced database model
+    :param column: name of the column, which is compared with the key
+    :param key: value of the column
+    :return: Promise of the first object matching the key or None
+    """
+    return get_loaders(context).load(graph._meta.model, column, key)
+
+
 def __default(query, args, key, default_value):
     """
     Filters a query by a value provided in args or the default given.
@@ -0,0 +1,104 @@
+"""
+The GraphQL schema of D-BAS and a cache of its validated query documents.
+
+Building the schema introspects every SQLAlchemyObjectType, therefore it is done once per worker. Parsing and
+validating a query is cached per query, using the SHA-256 hash of its text as key. Clients can send this hash instead
+of the query text (persisted queries). Either the hash belongs to a query of the file configured by
+``api.persisted_queries`` or the client has sent the query together with its hash before.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Optional, Tuple, List, Dict
+
+import graphene
+from graphql import parse, validate
+from graphql.error import GraphQLError
+from graphql.language.ast import Document
+
+from api.v2.query.core import Query
+from dbas.helper.cache import TTLCache
+
+LOG = logging.getLogger(__name__)
+
+schema = graphene.Schema(query=Query)
+
+# parsed and validated documents by the hash of their query text
+document_cache = TTLCache('graphql_documents', maxsize=512)
+
+# query texts, which were registered by clients, by their hash
+registered_queries = TTLCache('graphql_registered_queries', maxsize=1024)
+
+# query texts of the configured file by their hash, these are never evicted
+persisted_queries: Dict[str, str] = {}
+
+
+class PersistedQueryError(ValueError):
+    """
+    Raised, if a hash of a query is unknown or does not match the query
+    """
+
+
+def get_query_hash(query: str) -> str:
+    """
+    Returns the hash, which identifies the query in the caches
+
+    :param query: text of the GraphQL query
+    :return: hex digest of the SHA-256 hash
+    """
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+
+def load_persisted_queries(path: str) -> int:
+    """
+    Loads the persisted queries from a JSON file, which is either a list of query texts or a mapping of their hashes
+    to the query texts
+
+    :param path: path of the JSON file
+    :return: count of loaded queries
+    """
+    with open(path) as f:
+        content = json.load(f)
+
+    queries = content.values() if isinstance(content, dict) else content
+    for query in queries:
+        persisted_queries[get_query_hash(query)] = query
+    LOG.info("Loaded %s persisted GraphQL queries from %s", len(persisted_queries), path)
+    return len(persisted_queries)
+
+
+def get_document(query: Optional[str] = None, query_hash: Optional[str] = None) -> Tuple[Optional[Document], List]:
+    """
+    Returns the parsed and validated document of the query. If only the hash is given, the query text is looked up in
+    the persisted and registered queries. If both are given, the query is registered for later requests with the hash.
+
+    :param query: text of the GraphQL query
+    :param query_hash: SHA-256 hash of the query text
+    :raise PersistedQueryError: if the hash is unknown or does not match the query
+    :return: the document or None and a list of the syntax or validation errors
+    """
+    if not query:
+        query = persisted_queries.get(query_hash) or registered_queries.get(query_hash)
+        if query is None:
+            raise PersistedQueryError('PersistedQueryNotFound')
+
+    key = get_query_hash(query)
+    if query_hash and query_hash != key:
+        raise PersistedQueryError('The provided hash does not match the query.')
+
+    document = document_cache.get(key)
+    if document is None:
+        try:
+            document = parse(query)
+        except GraphQLError as e:
+            return None, [e]
+
+        errors = validate(schema, document)
+        if errors:
+            return None, errors
+        document_cache.set(key, document)
+
+    if query_hash and query_hash not in persisted_queries:
+        registered_queries.set(query_hash, query)
+    return document, []
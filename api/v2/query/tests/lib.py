@@ -21,4 +21,5 @@ def graphql_query(query) -> dict:
     response = get_testapp().get(url, status=200)
     ret = json_to_dict(response.body)
     assert_is_not_none(ret)
-    return ret
+    assert_is_not_none(ret.get('extensions'))
+    return ret.get('data', ret)
@@ -0,0 +1,126 @@
+import unittest
+
+from graphql import parse
+from graphql.execution import execute
+from sqlalchemy import event
+
+from api.v2.query.cost import QueryBudget, CostMiddleware, estimate_query, parse_token_budgets
+from api.v2.query.schema import schema
+from dbas.database import DBDiscussionSession
+from dbas.tests.utils import TestCaseWithConfig
+
+
+class TestEstimation(unittest.TestCase):
+
+    def test_estimate_flat_query(self):
+        cost, depth = estimate_query(schema, parse('query { statement(uid: 1) { uid isPosition } }'), 10)
+        self.assertEqual(cost, 3)
+        self.assertEqual(depth, 2)
+
+    def test_estimate_multiplies_lists(self):
+        cost, depth = estimate_query(schema, parse('query { statements { uid supports { uid } } }'), 10)
+        # statements + 10 * (uid + supports + 10 * uid)
+        self.assertEqual(cost, 1 + 10 * (1 + 1 + 10 * 1))
+        self.assertEqual(depth, 3)
+
+    def test_estimate_fragments(self):
+        document = parse("""
+            query { statement(uid: 1) { ...fields } }
+            fragment fields on StatementGraph { uid isPosition }
+        """)
+        self.assertEqual(estimate_query(schema, document, 10), (3, 2))
+
+    def test_estimate_weighted_fields(self):
+        cost, _ = estimate_query(schema, parse('query { issue(uid: 2) { completeGraph } }'), 10)
+        self.assertEqual(cost, 1 + 1000)
+
+    def test_reject_expensive_query(self):
+        budget = QueryBudget(max_cost=500)
+        rejection = budget.check_estimation(schema, parse('query { issue(uid: 2) { completeGraph } }'))
+        self.assertIn('too expensive', rejection)
+        self.assertEqual(budget.to_dict()['estimated'], 1001)
+
+    def test_reject_deep_query(self):
+        budget = QueryBudget(max_depth=2)
+        rejection = budget.check_estimation(schema, parse('query { statements { supports { uid } } }'))
+        self.assertIn('too deep', rejection)
+
+    def test_accept_cheap_query(self):
+        budget = QueryBudget()
+        self.assertIsNone(budget.check_estimation(schema, parse('query { statement(uid: 1) { uid } }')))
+
+
+class TestQueryBudget(unittest.TestCase):
+
+    def test_from_settings(self):
+        budget = QueryBudget.from_settings({'api.query.max_cost': '100', 'api.query.max_depth': '3',
+                                            'api.query.max_list_size': '5', 'api.query.list_size_estimate': '20'})
+        self.assertEqual(budget.max_cost, 100)
+        self.assertEqual(budget.max_depth, 3)
+        self.assertEqual(budget.max_list_size, 5)
+        self.assertEqual(budget.list_size_estimate, 5)
+
+    def test_token_budgets(self):
+        settings = {'api.query.max_cost': '100', 'api.query.token_budgets': 'kibana:5000 other:200'}
+        self.assertEqual(QueryBudget.from_settings(settings, 'kibana').max_cost, 5000)
+        self.assertEqual(QueryBudget.from_settings(settings, 'unknown').max_cost, 100)
+        self.assertEqual(QueryBudget.from_settings(settings).max_cost, 100)
+
+    def test_malformed_token_budgets_are_skipped(self):
+        self.assertEqual(parse_token_budgets('kibana:5000 broken other:x :10 zero:0 a:b:20'), {'kibana': 5000, 'a:b': 20})
+        settings = {'api.query.max_cost': '100', 'api.query.token_budgets': parse_token_budgets('kibana: other:200')}
+        self.assertEqual(QueryBudget.from_settings(settings, 'kibana').max_cost, 100)
+        self.assertEqual(QueryBudget.from_settings(settings, 'other').max_cost, 200)
+
+
+class TestCostMiddleware(TestCaseWithConfig):
+
+    def test_lists_are_capped(self):
+        budget = QueryBudget(max_list_size=2)
+        result = execute(schema, parse('query { statements { uid } }'), context_value={'session': DBDiscussionSession},
+                         middleware=[CostMiddleware(budget)])
+        self.assertIsNone(result.errors)
+        self.assertEqual(len(result.data['statements']), 2)
+        self.assertEqual(budget.actual_cost, 3)
+
+    def test_lists_are_limited_in_the_database(self):
+        engine = DBDiscussionSession.get_bind()
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        budget = QueryBudget(max_list_size=1)
+        DBDiscussionSession.expunge_all()
+        event.listen(engine, 'before_cursor_execute', count)
+        try:
+            result = execute(schema, parse('query { statements { uid supports { uid } } }'),
+                             context_value={'session': DBDiscussionSession}, middleware=[CostMiddleware(budget)])
+        finally:
+            event.remove(engine, 'before_cursor_execute', count)
+
+        self.assertIsNone(result.errors)
+        self.assertEqual(len(result.data['statements']), 1)
+        self.assertLessEqual(len(result.data['statements'][0]['supports']), 1)
+        self.assertIn('LIMIT', statements[0])
+        self.assertIn('row_number', statements[1])
+
+    def test_undercuts_are_limited_per_statement(self):
+        complete = execute(schema, parse('query { statements { uid undercuts { uid } } }'),
+                           context_value={'session': DBDiscussionSession}, middleware=[CostMiddleware(QueryBudget())])
+        uid, undercuts = next((statement['uid'], statement['undercuts']) for statement in complete.data['statements']
+                              if statement['undercuts'])
+
+        # the undercuts of all arguments of the statement are candidates, the cap applies to the final list only
+        limited = execute(schema, parse(f'query {{ statement(uid: {uid}) {{ undercuts {{ uid }} }} }}'),
+                          context_value={'session': DBDiscussionSession},
+                          middleware=[CostMiddleware(QueryBudget(max_list_size=1))])
+        self.assertIsNone(limited.errors)
+        self.assertEqual(limited.data['statement']['undercuts'], [min(undercuts, key=lambda undercut: undercut['uid'])])
+
+    def test_execution_stops_when_budget_is_spent(self):
+        budget = QueryBudget(max_cost=5)
+        result = execute(schema, parse('query { statements { uid } }'), context_value={'session': DBDiscussionSession},
+                         middleware=[CostMiddleware(budget)])
+        self.assertTrue(result.errors)
+        self.assertIn('budget', str(result.errors[0]))
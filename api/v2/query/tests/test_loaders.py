@@ -0,0 +1,92 @@
+from graphql import parse
+from graphql.execution import execute
+from sqlalchemy import event
+
+from api.v2.query.schema import schema
+from dbas.database import DBDiscussionSession
+from dbas.database.discussion_model import Statement
+from dbas.tests.utils import TestCaseWithConfig
+
+# every statement with the texts of the statements of all its supporting premisegroups, which triggered one query per
+# parent object before the resolvers were batched
+benchmark_query = """
+    query {
+        statements {
+            text
+            supports {
+                premisegroup {
+                    statements {
+                        text
+                    }
+                }
+            }
+        }
+    }
+"""
+
+
+class TestDataLoaders(TestCaseWithConfig):
+    def __execute_and_count_queries(self, query: str):
+        engine = DBDiscussionSession.get_bind()
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        DBDiscussionSession.expunge_all()
+        event.listen(engine, 'before_cursor_execute', count)
+        try:
+            result = execute(schema, parse(query), context_value={'session': DBDiscussionSession})
+        finally:
+            event.remove(engine, 'before_cursor_execute', count)
+        return result, statements
+
+    def test_benchmark_query_needs_one_query_per_level(self):
+        result, statements = self.__execute_and_count_queries(benchmark_query)
+        self.assertIsNone(result.errors)
+
+        db_statements = result.data['statements']
+        supports = [support for statement in db_statements for support in statement['supports']]
+        self.assertGreater(len(db_statements), 10)
+        self.assertGreater(len(supports), 10)
+
+        # statements, their textversions, supports, premisegroups, premises, statements and their textversions
+        self.assertLessEqual(len(statements), 7)
+
+    def test_texts_equal_the_texts_of_the_statements(self):
+        result, statements = self.__execute_and_count_queries('query { statements { uid text } }')
+        self.assertIsNone(result.errors)
+        self.assertLessEqual(len(statements), 2)
+        for statement in result.data['statements']:
+            self.assertEqual(statement['text'], DBDiscussionSession.query(Statement).get(statement['uid']).get_text())
+
+    def test_premisegroup_statements_are_resolved(self):
+        result, _ = self.__execute_and_count_queries("""
+            query {
+                premisegroup(uid: 2) {
+                    statements {
+                        uid
+                        text
+                    }
+                }
+            }
+        """)
+        self.assertIsNone(result.errors)
+        self.assertGreaterEqual(len(result.data['premisegroup']['statements']), 1)
+        self.assertIsNotNone(result.data['premisegroup']['statements'][0]['text'])
+
+    def test_undercuts_are_resolved(self):
+        result, _ = self.__execute_and_count_queries("""
+            query {
+                statements {
+                    undercuts {
+                        uid
+                        argumentUid
+                    }
+                }
+            }
+        """)
+        self.assertIsNone(result.errors)
+        undercuts = [undercut for statement in result.data['statements'] for undercut in statement['undercuts']]
+        self.assertGreater(len(undercuts), 0)
+        self.assertTrue(all(undercut['argumentUid'] for undercut in undercuts))
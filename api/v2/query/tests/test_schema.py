@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+
+from api.v2.query.schema import get_document, get_query_hash, document_cache, registered_queries, \
+    persisted_queries, load_persisted_queries, PersistedQueryError
+from api.v2.query.tests.lib import get_testapp, API
+from api.lib import json_to_dict
+from dbas.tests.utils import TestCaseWithConfig
+
+query = """
+    query {
+        issues {
+            uid
+        }
+    }
+"""
+
+
+class TestGetDocument(TestCaseWithConfig):
+    def setUp(self):
+        super().setUp()
+        document_cache.clear()
+        registered_queries.clear()
+        persisted_queries.clear()
+
+    def test_documents_are_cached(self):
+        document, errors = get_document(query)
+        self.assertEqual(errors, [])
+        self.assertIsNotNone(document)
+
+        cached_document, errors = get_document(query)
+        self.assertIs(cached_document, document)
+        self.assertEqual(len(document_cache), 1)
+
+    def test_invalid_documents_are_not_cached(self):
+        document, errors = get_document('query { user(uid: 1) { password } }')
+        self.assertIsNone(document)
+        self.assertGreater(len(errors), 0)
+
+        document, errors = get_document('query { issues {')
+        self.assertIsNone(document)
+        self.assertGreater(len(errors), 0)
+        self.assertEqual(len(document_cache), 0)
+
+    def test_registered_query_by_hash(self):
+        query_hash = get_query_hash(query)
+        self.assertRaises(PersistedQueryError, get_document, None, query_hash)
+
+        get_document(query, query_hash)
+        document, errors = get_document(None, query_hash)
+        self.assertIsNotNone(document)
+        self.assertEqual(errors, [])
+
+    def test_hash_has_to_match_the_query(self):
+        self.assertRaises(PersistedQueryError, get_document, query, get_query_hash('query { user(uid: 1) { uid } }'))
+        self.assertEqual(len(registered_queries), 0)
+
+    def test_load_persisted_queries(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump([query], f)
+        try:
+            self.assertEqual(load_persisted_queries(f.name), 1)
+        finally:
+            os.remove(f.name)
+
+        document, errors = get_document(None, get_query_hash(query))
+        self.assertIsNotNone(document)
+
+
+class TestQueryRouteWithHash(TestCaseWithConfig):
+    def test_query_by_hash(self):
+        app = get_testapp()
+        query_hash = get_query_hash(query)
+        registered_queries.clear()
+
+        content = json_to_dict(app.get(API + 'query', params={'hash': query_hash}, status=200).body)
+        self.assertEqual(content['errors']['message'], 'PersistedQueryNotFound')
+
+        content = json_to_dict(app.get(API + 'query', params={'q': query, 'hash': query_hash}, status=200).body)
+        self.assertGreater(len(content['issues']), 1)
+
+        content = json_to_dict(app.get(API + 'query', params={'hash': query_hash}, status=200).body)
+        self.assertGreater(len(content['issues']), 1)
@@ -1,14 +1,20 @@
-import graphene
+import json
+from typing import Optional
+
 from cornice import Service
+from graphql.execution import execute
 
-from api.v2.query.core import Query
+from admin.lib import is_api_token, get_owner_of_api_token
+from api.lib import json_to_dict
+from api.v2.query.cost import QueryBudget, CostMiddleware
+from api.v2.query.schema import schema, get_document, PersistedQueryError
 from dbas.database import DBDiscussionSession
 
 #
 # CORS configuration
 #
 cors_policy = dict(enabled=True,
-                   headers=('Origin', 'X-Requested-With', 'Content-Type', 'Accept'),
+                   headers=('Origin', 'X-Requested-With', 'Content-Type', 'Accept', 'X-Authentication'),
                    origins=('*',),
                    credentials=True,  # TODO: how can i use this?
                    max_age=42)
@@ -32,15 +38,56 @@ def query_route(request):
     Parameters must be coded into a "q" GET parameter, e.g.
     `curl "localhost:4284/api/v2/query?q=query\{statements\{uid,isStartpoint\}\}"`
 
-    :return: JSON containing queried data
+    Additionally, the SHA-256 hash of the query can be sent as "hash" GET parameter. Afterwards, or if the query is
+    persisted on the server, the hash alone is sufficient.
+
+    :return: JSON containing queried data and the cost of the query in extensions
     """
     q = request.params.get("q")
-    if q:
-        schema = graphene.Schema(query=Query)
-        result = schema.execute(q, context_value={'session': DBDiscussionSession})
-        if result.errors:
-            return {"errors": {"message": "Not all requested parameters could be queried. Some fields are not "
-                                          "allowed, e.g. the password.",
-                               "exception": str(result.errors)}}
-        return result.data
-    return {"errors": {"message": "No valid query provided."}}
+    query_hash = request.params.get("hash")
+    if not q and not query_hash:
+        return {"errors": {"message": "No valid query provided."}}
+
+    try:
+        document, errors = get_document(q, query_hash)
+    except PersistedQueryError as e:
+        return {"errors": {"message": str(e)}}
+
+    if errors:
+        return {"errors": {"message": "Not all requested parameters could be queried. Some fields are not "
+                                      "allowed, e.g. the password.",
+                           "exception": str(errors)}}
+
+    budget = QueryBudget.from_settings(request.registry.settings, __get_owner_of_api_token(request))
+    rejection = budget.check_estimation(schema, document)
+    if rejection:
+        return {"errors": {"message": rejection},
+                "extensions": {"cost": budget.to_dict()}}
+
+    result = execute(schema, document, context_value={'session': DBDiscussionSession},
+                     middleware=[CostMiddleware(budget)])
+    if result.errors:
+        message = "Not all requested parameters could be queried. Some fields are not allowed, e.g. the password."
+        if budget.actual_cost > budget.max_cost:
+            message = f"The query exceeded its budget of {budget.max_cost}."
+        return {"errors": {"message": message,
+                           "exception": str(result.errors)},
+                "extensions": {"cost": budget.to_dict()}}
+    return {"data": result.data,
+            "extensions": {"cost": budget.to_dict()}}
+
+
+def __get_owner_of_api_token(request) -> Optional[str]:
+    """
+    Returns the owner of the api token in the X-Authentication header, which decides about the budget of the query
+
+    :param request: current request of the server
+    :return: the owner or None, if there is no valid api token
+    """
+    try:
+        token = json_to_dict(request.headers.get('X-Authentication', '{}')).get('token') or ''
+    except (json.decoder.JSONDecodeError, AttributeError):
+        return None
+    if len(token) > 5 and is_api_token(token):
+        return get_owner_of_api_token(token)
+    return None
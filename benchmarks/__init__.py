@@ -0,0 +1,3 @@
+"""
+Benchmarks of D-BAS. They run against the services of a local installation and are not part of the test suite.
+"""
@@ -0,0 +1,263 @@
+"""
+Benchmarks of the hot path of the discussion.
+
+The real app is driven by WebTest over a synthetic dataset of ``dbas-generate-dataset``. Every scenario is requested
+``--iterations`` times after a few untimed warm-up requests. The report contains the latency percentiles and the count
+of SQL queries per request. It is compared against a stored baseline; the script fails if the median latency of a
+scenario grows by more than ``--tolerance`` or a scenario needs more queries than before::
+
+    dbas-generate-dataset --seed 42 --statements 20000 --users 2000
+    python -m benchmarks.hot_path --prefix synthetic-42 --save-baseline
+    python -m benchmarks.hot_path --prefix synthetic-42
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import quote
+
+import transaction
+import webtest
+from pyramid.authentication import AuthTicket
+from pyramid.paster import get_appsettings
+from sqlalchemy import event
+
+import dbas
+from dbas.database import DBDiscussionSession
+from dbas.database.discussion_model import Issue, Statement, StatementToIssue, Argument, User
+from dbas.review.queue import review_queues
+from dbas.strings.fuzzy_modes import FuzzyMode
+
+default_baseline = os.path.join(os.path.dirname(__file__), 'baseline.json')
+csrf_pattern = re.compile(r'id="hidden_csrf_token"[^>]*value="([^"]+)"')
+
+
+class Scenario(NamedTuple):
+    name: str
+    url: str
+    json: Optional[dict] = None
+
+
+class Result(NamedTuple):
+    durations: List[float]
+    queries: int
+    errors: int
+
+    def summary(self) -> Dict[str, float]:
+        durations = sorted(self.durations)
+        return {
+            'p50_ms': round(percentile(durations, 0.50) * 1000, 2),
+            'p90_ms': round(percentile(durations, 0.90) * 1000, 2),
+            'p99_ms': round(percentile(durations, 0.99) * 1000, 2),
+            'mean_ms': round(statistics.mean(durations) * 1000, 2),
+            'queries': self.queries,
+            'errors': self.errors,
+        }
+
+
+class QueryCounter:
+    """
+    Counts the SQL statements, which are sent over an engine
+    """
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self.__count)
+
+    def __count(self, *_):
+        self.count += 1
+
+
+def percentile(sorted_values: List[float], share: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * share))]
+
+
+def build_scenarios(prefix: str) -> List[Scenario]:
+    """
+    Looks up the statements and arguments of the first synthetic issue, which are requested by the scenarios. Scenarios,
+    whose arguments the dataset lacks, e.g. ``support`` for ``--branching`` below 3, are skipped.
+
+    :param prefix: prefix of the synthetic dataset
+    :return: list of scenarios
+    """
+    db_issue = DBDiscussionSession.query(Issue).filter_by(slug=f'{prefix}-0').first()
+    if db_issue is None:
+        raise ValueError(f'There is no synthetic issue {prefix}-0, run dbas-generate-dataset first')
+
+    slug = db_issue.slug
+    position = DBDiscussionSession.query(Statement).join(StatementToIssue).filter(
+        StatementToIssue.issue_uid == db_issue.uid, Statement.is_position.is_(True)).order_by(Statement.uid).first()
+    arguments = DBDiscussionSession.query(Argument).filter(Argument.conclusion_uid == position.uid,
+                                                           Argument.is_supportive.is_(True)).order_by(Argument.uid)
+    supporting = arguments.limit(2).all()
+    undercut = DBDiscussionSession.query(Argument).filter(Argument.issue_uid == db_issue.uid,
+                                                          Argument.argument_uid.isnot(None)).order_by(Argument.uid)
+    undercut = undercut.first()
+    author = DBDiscussionSession.query(User).filter_by(nickname=f'{prefix}-user-0').one()
+
+    issue_query = f'query {{ issue(slug: "{slug}") {{ uid title numberOfParticipants }} }}'
+    statement_query = f'query {{ statement(uid: {position.uid}) {{ uid text supports {{ uid }} rebuts {{ uid }} }} }}'
+
+    scenarios = [
+        Scenario('discussion_init', f'/discuss/{slug}'),
+        Scenario('attitude', f'/discuss/{slug}/attitude/{position.uid}'),
+        Scenario('justify_statement', f'/discuss/{slug}/justify/{position.uid}/agree'),
+    ]
+    if undercut is not None:
+        scenarios.append(Scenario('reaction',
+                                  f'/discuss/{slug}/reaction/{undercut.argument_uid}/undercut/{undercut.uid}'))
+    else:
+        print('Skip the scenario reaction, the issue has no undercuts')
+    if len(supporting) == 2:
+        scenarios.append(Scenario('support', f'/discuss/{slug}/support/{supporting[0].uid}/{supporting[1].uid}'))
+    else:
+        print('Skip the scenario support, the position has less than two supporting arguments')
+    scenarios += [
+        Scenario('fuzzy_search', '/fuzzy_search', json={'type': int(FuzzyMode.START_STATEMENT), 'value': 'the town',
+                                                        'statement_uid': 0, 'issue': db_issue.uid}),
+        Scenario('graph_d3', '/graph/complete', json={'issue': db_issue.uid}),
+        Scenario('graphql_issue', f'/api/v2/query?q={quote(issue_query)}'),
+        Scenario('graphql_statement', f'/api/v2/query?q={quote(statement_query)}'),
+        Scenario('review_index', '/review'),
+        Scenario('user_page', f'/user/{author.uid}'),
+        Scenario('settings', '/settings'),
+        Scenario('notifications', '/notifications'),
+    ]
+    scenarios += [Scenario(f'review_{queue}', f'/review/{queue}') for queue in review_queues]
+    return scenarios
+
+
+def create_app(config: str) -> webtest.TestApp:
+    settings = dict(get_appsettings(config))
+    settings['startup.warmup'] = 'true'
+    return webtest.TestApp(dbas.main({'__file__': os.path.abspath(config)}, **settings),
+                           extra_environ={'HTTP_HOST': 'localhost'})
+
+
+def login(app: webtest.TestApp, nickname: str):
+    """
+    Sets the authentication cookie of the user and refreshes the last action, so the user is not logged out
+    """
+    with transaction.manager:
+        db_user = DBDiscussionSession.query(User).filter_by(nickname=nickname).one()
+        db_user.update_last_login()
+        db_user.update_last_action()
+    secret = app.app.registry.settings['authn.secret']
+    app.set_cookie('auth_tkt', AuthTicket(secret, nickname, '0.0.0.0', hashalg='sha512').cookie_value())
+
+
+def get_csrf_token(app: webtest.TestApp, url: str) -> str:
+    match = csrf_pattern.search(app.get(url).text)
+    return match.group(1) if match else ''
+
+
+def run_scenario(app: webtest.TestApp, scenario: Scenario, iterations: int, warmup: int,
+                 counter: QueryCounter, csrf_token: str) -> Result:
+    """
+    Requests the scenario and measures every request
+
+    :return: durations, queries of the last request and count of failed requests
+    """
+    durations, errors, queries = [], 0, 0
+    for i in range(warmup + iterations):
+        counter.count = 0
+        start = time.perf_counter()
+        if scenario.json is None:
+            response = app.get(scenario.url, status='*')
+        else:
+            response = app.post_json(scenario.url, scenario.json, headers={'X-CSRF-Token': csrf_token}, status='*')
+        duration = time.perf_counter() - start
+        if i >= warmup:
+            durations.append(duration)
+            queries = counter.count
+            errors += response.status_int >= 400
+    return Result(durations, queries, errors)
+
+
+def compare(summaries: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """
+    Compares the results against the baseline
+
+    :param summaries: results by name of the scenario
+    :param baseline: stored results by name of the scenario
+    :param tolerance: allowed relative growth of the median latency
+    :return: descriptions of the regressions
+    """
+    regressions = []
+    for name, summary in summaries.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        if summary['p50_ms'] > before['p50_ms'] * (1 + tolerance):
+            regressions.append(f'{name}: p50 {before["p50_ms"]} ms -> {summary["p50_ms"]} ms')
+        if summary['queries'] > before['queries']:
+            regressions.append(f'{name}: {before["queries"]} -> {summary["queries"]} queries')
+        if summary['errors'] > before.get('errors', 0):
+            regressions.append(f'{name}: {summary["errors"]} failed requests')
+    return regressions
+
+
+def print_report(summaries: Dict[str, Dict], baseline: Dict[str, Dict]):
+    print(f'{"scenario":24} {"p50":>9} {"p90":>9} {"p99":>9} {"queries":>8} {"errors":>7} {"baseline p50":>13}')
+    for name, s in summaries.items():
+        before = baseline.get(name, {}).get('p50_ms')
+        before = f'{before:10.2f} ms' if before is not None else f'{"-":>13}'
+        print(f'{name:24} {s["p50_ms"]:6.2f} ms {s["p90_ms"]:6.2f} ms {s["p99_ms"]:6.2f} ms {s["queries"]:8} '
+              f'{s["errors"]:7} {before}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks the hot path of the discussion over a synthetic dataset.')
+    parser.add_argument('--config', default='development.ini', help='ini file of the app')
+    parser.add_argument('--prefix', default='synthetic-42', help='prefix of the synthetic dataset')
+    parser.add_argument('--iterations', type=int, default=50, help='measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=3, help='untimed requests per scenario')
+    parser.add_argument('--only', nargs='+', help='names of the scenarios, which should run')
+    parser.add_argument('--baseline', default=default_baseline, help='JSON file with the stored results')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative growth of the median latency')
+    args = parser.parse_args()
+
+    app = create_app(args.config)
+    counter = QueryCounter(DBDiscussionSession.get_bind())
+    try:
+        scenarios = build_scenarios(args.prefix)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    finally:
+        DBDiscussionSession.remove()
+    if args.only:
+        scenarios = [scenario for scenario in scenarios if scenario.name in args.only]
+
+    login(app, f'{args.prefix}-user-0')
+    csrf_token = get_csrf_token(app, scenarios[0].url)
+    summaries = {scenario.name: run_scenario(app, scenario, args.iterations, args.warmup, counter,
+                                             csrf_token).summary()
+                 for scenario in scenarios}
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(summaries, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({**baseline, **summaries}, f, indent=2, sort_keys=True)
+        print(f'Stored the baseline in {args.baseline}')
+        return
+
+    regressions = compare(summaries, baseline, args.tolerance)
+    if regressions:
+        print('\nRegressions against the baseline:\n  ' + '\n  '.join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+"""
+Closed-loop load test of a running D-BAS. Every simulated participant walks a synthetic discussion like the frontend
+does and waits for each response before it thinks and sends the next request. The count of participants ramps up in
+stages; the report contains throughput, latency percentiles and error rate per stage::
+
+    python -m benchmarks.loadtest --url http://localhost:4284 --prefix synthetic-42 --stages 1 10 50 100
+"""
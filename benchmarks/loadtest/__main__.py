@@ -0,0 +1,3 @@
+from benchmarks.loadtest.runner import main
+
+main()
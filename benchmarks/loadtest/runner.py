@@ -0,0 +1,136 @@
+"""
+Ramps up the count of simulated participants in stages and reports every stage.
+"""
+
+import argparse
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from benchmarks.hot_path import percentile
+from benchmarks.loadtest.walker import Behaviour, DialogWalker, Sample
+
+
+class Recorder:
+    """
+    Collects the samples of all participants of a stage
+    """
+
+    def __init__(self):
+        self.samples: List[Sample] = []
+        self.__lock = threading.Lock()
+
+    def __call__(self, sample: Sample):
+        with self.__lock:
+            self.samples.append(sample)
+
+    def summary(self, duration: float) -> Dict[str, float]:
+        """
+        Summarizes the samples
+
+        :param duration: wall-clock duration of the stage in seconds
+        :return: throughput, latency percentiles and error rate
+        """
+        with self.__lock:
+            samples = list(self.samples)
+        durations = sorted(sample.duration for sample in samples)
+        errors = sum(not sample.ok for sample in samples)
+        return {
+            'requests': len(samples),
+            'rps': round(len(samples) / duration, 1) if duration else 0.0,
+            'p50_ms': round(percentile(durations, 0.50) * 1000, 1) if durations else 0.0,
+            'p99_ms': round(percentile(durations, 0.99) * 1000, 1) if durations else 0.0,
+            'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        }
+
+    def summary_per_action(self) -> Dict[str, Dict[str, float]]:
+        with self.__lock:
+            samples = list(self.samples)
+        per_action: Dict[str, List[Sample]] = defaultdict(list)
+        for sample in samples:
+            per_action[sample.action].append(sample)
+        summaries = {}
+        for action, action_samples in sorted(per_action.items()):
+            durations = sorted(sample.duration for sample in action_samples)
+            summaries[action] = {
+                'requests': len(action_samples),
+                'p50_ms': round(percentile(durations, 0.50) * 1000, 1),
+                'p99_ms': round(percentile(durations, 0.99) * 1000, 1),
+                'errors': sum(not sample.ok for sample in action_samples),
+            }
+        return summaries
+
+
+def run_stage(args: argparse.Namespace, participants: int, behaviour: Behaviour) -> Recorder:
+    """
+    Lets the participants walk the discussions for the duration of the stage. Every participant is a thread with its
+    own user, issue and connection.
+
+    :param args: parsed arguments of the command line
+    :param participants: count of concurrent participants
+    :param behaviour: behaviour of every participant
+    :return: recorder with the samples of the stage
+    """
+    recorder = Recorder()
+    until = time.monotonic() + args.duration
+    threads = []
+    for i in range(participants):
+        walker = DialogWalker(args.url, f'{args.prefix}-{i % args.issues}', f'{args.prefix}-user-{i % args.users}',
+                              args.prefix, behaviour, recorder, seed=args.seed + i)
+        thread = threading.Thread(target=walker.run, args=(until,), daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return recorder
+
+
+def print_stage(participants: int, summary: Dict[str, float]):
+    print(f'{participants:>12} {summary["requests"]:>9} {summary["rps"]:>8.1f} {summary["p50_ms"]:>6.1f} ms '
+          f'{summary["p99_ms"]:>6.1f} ms {summary["error_rate"] * 100:>6.2f} %', flush=True)
+
+
+def print_actions(per_action: Dict[str, Dict[str, float]]):
+    print(f'\n{"action":>16} {"requests":>9} {"p50":>9} {"p99":>9} {"errors":>7}')
+    for action, s in per_action.items():
+        print(f'{action:>16} {s["requests"]:>9} {s["p50_ms"]:>6.1f} ms {s["p99_ms"]:>6.1f} ms {s["errors"]:>7}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ramps up simulated participants, which walk synthetic discussions '
+                                                 'over the API of a running D-BAS.')
+    parser.add_argument('--url', default='http://localhost:4284', help='url of the running D-BAS')
+    parser.add_argument('--prefix', default='synthetic-42', help='prefix of the synthetic dataset')
+    parser.add_argument('--issues', type=int, default=1, help='count of synthetic issues, which are walked')
+    parser.add_argument('--users', type=int, default=1000, help='count of synthetic users, which log in')
+    parser.add_argument('--stages', type=int, nargs='+', default=[1, 5, 10, 25, 50],
+                        help='count of concurrent participants per stage')
+    parser.add_argument('--duration', type=float, default=60, help='duration of every stage in seconds')
+    parser.add_argument('--think-time', type=float, default=1.0, help='mean think time between two requests')
+    parser.add_argument('--vote', type=float, default=0.3, help='probability of a vote on an attitude step')
+    parser.add_argument('--add', type=float, default=0.05, help='probability of a new premise on a justify step')
+    parser.add_argument('--search', type=float, default=0.1, help='probability of a search before a dialog')
+    parser.add_argument('--max-error-rate', type=float, default=0.05,
+                        help='stop the ramp after a stage with a higher error rate')
+    parser.add_argument('--seed', type=int, default=42, help='seed of the decisions of the participants')
+    args = parser.parse_args()
+
+    behaviour = Behaviour(think_time=args.think_time, vote_probability=args.vote, add_probability=args.add,
+                          search_probability=args.search)
+
+    print(f'{"participants":>12} {"requests":>9} {"req/s":>8} {"p50":>9} {"p99":>9} {"errors":>8}', flush=True)
+    recorder = None
+    for participants in args.stages:
+        start = time.monotonic()
+        recorder = run_stage(args, participants, behaviour)
+        summary = recorder.summary(time.monotonic() - start)
+        print_stage(participants, summary)
+        if summary['error_rate'] > args.max_error_rate:
+            print(f'Stopped the ramp, the error rate exceeds {args.max_error_rate * 100:.2f} %')
+            print_actions(recorder.summary_per_action())
+            sys.exit(1)
+
+    if recorder:
+        print_actions(recorder.summary_per_action())
@@ -0,0 +1,157 @@
+"""
+Simulated participant of a discussion, which uses the REST API like the frontend does.
+"""
+
+import random
+import re
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+import requests
+
+from dbas.database.dataset import words
+
+justify_statement_pattern = re.compile(r'^/[^/]+/justify/\d+/(agree|disagree)$')
+attitude_pattern = re.compile(r'^/[^/]+/attitude/(\d+)$')
+next_step_keys = ('positions', 'items', 'attitudes', 'attacks')
+
+
+class Behaviour(NamedTuple):
+    think_time: float = 1.0
+    max_steps: int = 12
+    vote_probability: float = 0.3
+    add_probability: float = 0.05
+    search_probability: float = 0.1
+
+
+class Sample(NamedTuple):
+    action: str
+    duration: float
+    ok: bool
+
+
+def next_urls(response: dict) -> List[str]:
+    """
+    Returns the urls of the items, which the frontend offers as next steps
+
+    :param response: JSON of a step of the discussion
+    :return: urls relative to the API
+    """
+    urls = []
+    for key in next_step_keys:
+        items = response.get(key) or []
+        if isinstance(items, dict):
+            items = items.values()
+        urls += [item['url'] for item in items if isinstance(item, dict) and item.get('url')]
+    return urls
+
+
+class DialogWalker:
+    """
+    Participant, who logs in and walks from the positions of an issue along the offered steps, votes, adds premises
+    and searches
+    """
+
+    def __init__(self, base_url: str, slug: str, nickname: str, password: str, behaviour: Behaviour,
+                 record: Callable[[Sample], None], seed: Optional[int] = None):
+        """
+        :param base_url: url of the running D-BAS
+        :param slug: slug of the issue
+        :param nickname: nickname of the participant
+        :param password: password of the participant
+        :param behaviour: probabilities of the actions and think time
+        :param record: is called with every measured request
+        :param seed: seed of the decisions of this participant
+        """
+        self.api = base_url.rstrip('/') + '/api'
+        self.slug = slug
+        self.nickname = nickname
+        self.password = password
+        self.behaviour = behaviour
+        self.record = record
+        self.random = random.Random(seed)
+        self.http = requests.Session()
+
+    def login(self) -> bool:
+        response = self.__request('login', 'POST', '/login', json={'nickname': self.nickname,
+                                                                   'password': self.password})
+        if response is None:
+            return False
+        self.http.headers['Authorization'] = f'Bearer {response["token"]}'
+        return True
+
+    def run(self, until: float):
+        """
+        Walks dialogs until the deadline
+
+        :param until: time.monotonic() of the end
+        :return: None
+        """
+        while time.monotonic() < until and not self.login():
+            self.__think()
+        while time.monotonic() < until:
+            self.walk(until)
+
+    def walk(self, until: float):
+        """
+        Walks one dialog from the positions of the issue until there are no further steps, max_steps is reached or
+        the deadline has passed
+
+        :param until: time.monotonic() of the end
+        :return: None
+        """
+        if self.random.random() < self.behaviour.search_probability:
+            self.__request('search', 'GET', '/search', params={'q': self.random.choice(words)})
+            self.__think()
+
+        url = f'/{self.slug}'
+        for _ in range(self.behaviour.max_steps):
+            if time.monotonic() >= until:
+                return
+            response = self.__request(self.__action_of(url), 'GET', url)
+            self.__think()
+            if response is None:
+                return
+            self.__maybe_vote(url)
+            self.__maybe_add_premise(url)
+
+            urls = next_urls(response)
+            if not urls:
+                return
+            url = self.random.choice(urls)
+
+    @staticmethod
+    def __action_of(url: str) -> str:
+        parts = url.split('?')[0].strip('/').split('/')
+        return parts[1] if len(parts) > 1 else 'init'
+
+    def __maybe_vote(self, url: str):
+        match = attitude_pattern.match(url.split('?')[0])
+        if match and self.random.random() < self.behaviour.vote_probability:
+            attitude = self.random.choice(('agree', 'disagree'))
+            self.__request('vote', 'POST', f'/attitude/{match.group(1)}/{attitude}')
+
+    def __maybe_add_premise(self, url: str):
+        if justify_statement_pattern.match(url.split('?')[0]) and \
+                self.random.random() < self.behaviour.add_probability:
+            reason = f'{self.nickname} thinks that this holds because of reason {self.random.randrange(10 ** 6)}'
+            self.__request('add_premise', 'POST', url, json={'reason': reason}, allow_redirects=False)
+
+    def __request(self, action: str, method: str, url: str, **kwargs) -> Optional[dict]:
+        start = time.perf_counter()
+        try:
+            response = self.http.request(method, self.api + url, timeout=30, **kwargs)
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        self.record(Sample(action, time.perf_counter() - start, ok))
+        if not ok or not response.content or response.is_redirect:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    def __think(self):
+        if self.behaviour.think_time > 0:
+            time.sleep(self.random.expovariate(1 / self.behaviour.think_time))
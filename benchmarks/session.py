@@ -0,0 +1,107 @@
+"""
+Compares the overhead of the session backends per request.
+
+Every simulated request loads the session of the previous request by its cookie, reads and extends the history of the
+discussion, stores the already seen reviews and persists the session like the response callbacks of pyramid do. The
+beaker backend uses the ``beaker.session.*`` settings of the config and the database of the environment variables,
+the redis backend a local redis-server::
+
+    python -m benchmarks.session --config production.ini --redis-url redis://localhost:6379/0 --requests 1000
+"""
+
+import argparse
+import pickle
+import statistics
+import time
+from typing import List, Optional, Tuple
+
+from pyramid.paster import get_appsettings
+from pyramid.request import Request
+from pyramid.response import Response
+
+from dbas import get_dbas_environs
+from dbas.database import get_db_environs
+from dbas.handler.history import SessionHistory
+from dbas.session import session_factory_from_settings, serialize
+
+history = 'attitude/2-justify/2/agree-reaction/12/undercut/13-justify/13/agree/undercut'
+already_seen_reviews = list(range(1, 40))
+
+
+def simulate_request(session_factory, cookie: Optional[str]) -> Tuple[float, Optional[str]]:
+    """
+    Simulates the session handling of one request of a discussion
+
+    :param session_factory: factory of the backend
+    :param cookie: session cookie of the previous request
+    :return: duration in seconds and the session cookie of the response
+    """
+    request = Request.blank('/discuss/town-has-to-cut-spending/attitude/2', headers={'Cookie': cookie} if cookie else {})
+    start = time.perf_counter()
+
+    session = session_factory(request)
+    session_history = session.get('session_history') or SessionHistory(history)
+    session_history.get_session_history_as_list().append('reaction/2/rebut/3')
+    del session_history.get_session_history_as_list()[:-10]
+    session.update({'session_history': session_history, 'issue': 2})
+    session['already_seen_delete'] = already_seen_reviews
+    response = Response()
+    request._process_response_callbacks(response)
+
+    duration = time.perf_counter() - start
+    set_cookie = response.headers.get('Set-Cookie')
+    return duration, set_cookie.split(';', 1)[0] if set_cookie else cookie
+
+
+def run(backend: str, settings: dict, count: int) -> List[float]:
+    """
+    Simulates *count* requests of one user
+
+    :param backend: name of the backend
+    :param settings: the settings of the app
+    :param count: count of requests
+    :return: durations in seconds
+    """
+    session_factory = session_factory_from_settings({**settings, 'session.backend': backend})
+    durations, cookie = [], None
+    for _ in range(count):
+        duration, cookie = simulate_request(session_factory, cookie)
+        durations.append(duration)
+    return durations
+
+
+def print_report(backend: str, durations: List[float]):
+    durations = sorted(durations)
+    p99 = durations[min(len(durations) - 1, int(len(durations) * 0.99))]
+    print(f'{backend:8} mean {statistics.mean(durations) * 1000:7.3f} ms   '
+          f'p50 {statistics.median(durations) * 1000:7.3f} ms   p99 {p99 * 1000:7.3f} ms')
+
+
+def print_payload_sizes():
+    payload = {'managed_dict': {'session_history': SessionHistory(history), 'issue': 2,
+                                'already_seen_delete': already_seen_reviews},
+               'created': time.time(), 'timeout': 86400}
+    print(f'payload  pickle {len(pickle.dumps(payload))} bytes   compact {len(serialize(payload))} bytes')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compares the overhead of the session backends per request.')
+    parser.add_argument('--config', default='production.ini', help='ini file with the session settings')
+    parser.add_argument('--requests', type=int, default=1000, help='count of simulated requests per backend')
+    parser.add_argument('--redis-url', default='redis://localhost:6379/0', help='url of the local redis-server')
+    parser.add_argument('--backends', nargs='+', default=['beaker', 'redis'], choices=['beaker', 'redis'])
+    args = parser.parse_args()
+
+    settings = dict(get_appsettings(args.config))
+    settings.update(get_dbas_environs())
+    settings['redis.sessions.url'] = args.redis_url
+    if 'beaker' in args.backends and settings.get('beaker.session.type') == 'ext:database':
+        settings.update(get_db_environs(key='session.url', db_name='beaker'))
+
+    print_payload_sizes()
+    for backend in args.backends:
+        print_report(backend, run(backend, settings, args.requests))
+
+
+if __name__ == '__main__':
+    main()
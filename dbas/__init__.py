@@ -5,27 +5,42 @@ complexity of real-world argumentation. The key idea is to let users exchange ar
 a time-shifted dialog where arguments are presented and acted upon one-at-a-time.
 """
 
+import logging
 import os
 import re
+import sys
 import time
 
 from pyramid.authentication import AuthTktAuthenticationPolicy
 from pyramid.authorization import ACLAuthorizationPolicy
 from pyramid.config import Configurator
 from pyramid.request import Request
+from pyramid.settings import asbool
 from pyramid.static import QueryStringConstantCacheBuster
-from pyramid_beaker import session_factory_from_settings, set_cache_regions_from_settings
+from pyramid_beaker import set_cache_regions_from_settings
 from sqlalchemy import engine_from_config
 
 from dbas.database import get_db_environs
+from dbas.helper.last_action import last_actions
+from dbas.helper.mail_pool import mail_pool
+from dbas.slow_queries import slow_query_log
 from .database import load_discussion_database
 from .security import groupfinder
+from .session import session_factory_from_settings
+from .warmup import StartupTimer, warm_up
+
+LOG = logging.getLogger(__name__)
+
+# modules with views and subscribers, which are registered by config.scan
+view_modules = ('dbas.views', 'dbas.auth.oauth.core', 'dbas.event_handler')
 
 
 def main(global_config, **settings):
     """
     This function returns a Pyramid WSGI application.
     """
+    timer = StartupTimer()
+
     # Patch in all environment variables
     settings.update(get_dbas_environs())
 
@@ -44,6 +59,13 @@ def main(global_config, **settings):
 
     discussion_engine = engine_from_config(settings, "sqlalchemy.discussion.")
     load_discussion_database(discussion_engine)
+    if asbool(settings.get('slow_query.enabled', False)):
+        slow_query_log.configure(settings)
+        slow_query_log.instrument(discussion_engine)
+    last_actions.configure(settings)
+    mail_pool.configure(settings)
+    _check_background_threads()
+    timer.lap('database')
 
     # session management and cache region support
     session_factory = session_factory_from_settings(settings)
@@ -66,6 +88,10 @@ def main(global_config, **settings):
     config.include('admin', route_prefix='/admin')
     config.include('graph', route_prefix='/graph')
     config.include('websocket', route_prefix='/websocket')
+    if asbool(settings.get('metrics.enabled', False)):
+        config.include('dbas.metrics')
+    config.include('dbas.profiling')
+    timer.lap('includes')
 
     # more includes are in the config
     config.include('pyramid_chameleon')
@@ -148,6 +174,7 @@ def main(global_config, **settings):
     config.add_route('undo_review', '{url:.*}undo_review')
     config.add_route('cancel_review', '{url:.*}cancel_review')
     config.add_route('review_lock', '{url:.*}review_lock')
+    config.add_route('get_review_votes', '{url:.*}get_review_votes')
     config.add_route('revoke_statement_content', '{url:.*}revoke_statement_content')
     config.add_route('revoke_argument_content', '{url:.*}revoke_argument_content')
     config.add_route('get_references', '{url:.*}get_references')
@@ -179,10 +206,22 @@ def main(global_config, **settings):
     config.add_route('review_history', '/review/history')
     config.add_route('review_ongoing', '/review/ongoing')
     config.add_route('review_queue', '/review/{queue}')
+    timer.lap('routes')
 
-    config.scan()
+    # scan only the modules with views and subscribers, a scan of the whole package imports every module
+    for module in view_modules:
+        config.scan(module, ignore=[_is_test_module])
+    timer.lap('scan')
 
-    return config.make_wsgi_app()
+    app = config.make_wsgi_app()
+    timer.lap('commit')
+    app.registry.startup_timer = timer
+
+    if asbool(settings.get('startup.warmup', False)):
+        warm_up(config.registry, timer)
+    timer.log()
+
+    return app
 
 
 def get_dbas_environs(prefix=""):
@@ -237,6 +276,22 @@ def get_key_pair():
             raise EnvironmentError(f"Can't read key files at {key_path} and {pubkey_path}")
 
 
+def _check_background_threads():
+    """
+    Warns, if the app runs in uWSGI without enable-threads. Then the threads of the workers, which write the last
+    actions, send the websocket notifications and the mails and snapshot the metrics, never run.
+
+    :return: None
+    """
+    uwsgi = sys.modules.get('uwsgi')
+    if uwsgi is not None and not uwsgi.opt.get('enable-threads'):
+        LOG.error("uWSGI runs without enable-threads, the background threads of the workers will not run")
+
+
+def _is_test_module(name: str) -> bool:
+    return 'tests' in name.split('.')
+
+
 def _locale_negotiator(request: Request):
     """
     Returns current language from cookie or request for i18n translation in templates.
@@ -1,5 +1,9 @@
 # coding=utf-8
+import argparse
+import logging
 import sys
+import time
+from datetime import date
 
 import transaction
 from sqlalchemy import engine_from_config
@@ -7,13 +11,23 @@ from sqlalchemy.orm.exc import NoResultFound
 
 from dbas import get_db_environs, load_discussion_database
 from dbas.database.discussion_model import User
+from dbas.handler.activity import backfill_rollups, update_rollups
+from dbas.review.executor import run_worker
 
-# Set up the database session. Without this, you can not use DBDiscussionSession!
-settings = {}  # Add console script specific configuration here.
-settings.update(get_db_environs("sqlalchemy.discussion.url", db_name="discussion"))
 
-discussion_engine = engine_from_config(settings, "sqlalchemy.discussion.")
-load_discussion_database(discussion_engine)
+def setup_database(**engine_options):
+    """
+    Sets up the database session. Without this, you can not use DBDiscussionSession!
+    It is called by the scripts, therefore importing this module does not connect to the database.
+
+    :param engine_options: further options of the engine
+    :return: None
+    """
+    settings = {}  # Add console script specific configuration here.
+    settings.update(get_db_environs("sqlalchemy.discussion.url", db_name="discussion"))
+
+    discussion_engine = engine_from_config(settings, "sqlalchemy.discussion.", **engine_options)
+    load_discussion_database(discussion_engine)
 
 
 def promote_user(argv=sys.argv):
@@ -22,6 +36,7 @@ def promote_user(argv=sys.argv):
         sys.exit(1)
 
     username: str = argv[1]
+    setup_database()
 
     with transaction.manager:
         try:
@@ -37,6 +52,7 @@ def demote_user(argv=sys.argv):
         sys.exit(1)
 
     username: str = argv[1]
+    setup_database()
 
     with transaction.manager:
         try:
@@ -44,3 +60,43 @@ def demote_user(argv=sys.argv):
         except NoResultFound:
             print(f"The user `{username}` does not exist! Make sure you use the private and not the public nickname!")
             sys.exit(1)
+
+
+def execute_reviews(argv=sys.argv):
+    poll_interval: float = float(argv[1]) if len(argv) > 1 else 2.0
+
+    logging.basicConfig(level=logging.INFO)
+    setup_database()
+    try:
+        run_worker(poll_interval)
+    except KeyboardInterrupt:
+        print("Review worker stopped")
+
+
+def rollup_activity(argv=sys.argv):
+    parser = argparse.ArgumentParser(prog='dbas-rollup-activity',
+                                     description='Counts the new rows of the raw tables in the daily activity tables.')
+    parser.add_argument('--interval', type=float, help='repeat every INTERVAL seconds instead of running once')
+    parser.add_argument('--backfill', action='store_true', help='recompute the days from the raw tables')
+    parser.add_argument('--since', type=date.fromisoformat, help='first day of the backfill, all days by default')
+    parser.add_argument('--until', type=date.fromisoformat, help='day after the last day of the backfill')
+    args = parser.parse_args(argv[1:])
+
+    logging.basicConfig(level=logging.INFO)
+    setup_database()
+    if args.backfill:
+        with transaction.manager:
+            rows = backfill_rollups(args.since, args.until)
+        print(f"Recomputed {rows} rows of the daily activity")
+        return
+
+    try:
+        while True:
+            with transaction.manager:
+                rows = update_rollups()
+            print(f"Updated {rows} rows of the daily activity")
+            if args.interval is None:
+                return
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("Rollup of the activity stopped")
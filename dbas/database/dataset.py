@@ -0,0 +1,366 @@
+"""
+Generator of large synthetic discussions for benchmarks.
+
+Every issue is a tree of statements: the positions are justified and attacked by ``branching`` arguments per
+statement, whose premises are new statements, until the issue has ``statements`` statements. A share of the
+arguments is the start of a chain of undercuts with ``undercut_depth`` arguments. Users vote for and see statements
+and arguments with the given density and open reviews fill the review queues. The content depends only on the shape
+and the seed, the rows are written with bulk inserts::
+
+    dbas-generate-dataset --issues 3 --statements 20000 --users 2000 --seed 42
+"""
+
+import argparse
+import logging
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, NamedTuple, Optional, Type
+
+import arrow
+import transaction
+from sqlalchemy import func, text
+from zope.sqlalchemy import mark_changed
+
+from dbas.database import DBDiscussionSession, DiscussionBase
+from dbas.database.discussion_model import Issue, Language, User, Settings, Statement, TextVersion, \
+    StatementToIssue, PremiseGroup, Premise, Argument, ClickedStatement, ClickedArgument, SeenStatement, \
+    SeenArgument, UserParticipation, ReviewDelete, ReviewDeleteReason, ReviewEdit, ReviewEditValue, \
+    ReviewOptimization, ReviewDuplicate, Group
+
+LOG = logging.getLogger(__name__)
+
+Sink = Callable[[Type[DiscussionBase], dict], None]
+
+# models, whose rows reference each other by explicitly assigned uids
+models_with_uids = (User, Issue, Statement, PremiseGroup, Argument, ReviewEdit)
+
+# models in the order, in which the buffered rows have to be inserted
+insert_order = (User, Issue, Settings, Statement, TextVersion, StatementToIssue, PremiseGroup, Premise, Argument,
+                UserParticipation, ClickedStatement, ClickedArgument, SeenStatement, SeenArgument, ReviewDelete,
+                ReviewEdit, ReviewEditValue, ReviewOptimization, ReviewDuplicate)
+
+words = ('town', 'budget', 'park', 'school', 'cat', 'dog', 'tax', 'road', 'bike', 'train', 'library', 'energy',
+         'garden', 'museum', 'police', 'hospital', 'river', 'bridge', 'market', 'festival', 'noise', 'rent', 'bus',
+         'water', 'waste', 'tree', 'student', 'teacher', 'neighbour', 'council', 'citizen', 'tourist', 'office')
+verbs = ('should get', 'needs', 'must not cut', 'would improve', 'costs too much for', 'is important for',
+         'harms', 'is cheaper than', 'helps', 'replaces')
+
+
+class DatasetShape(NamedTuple):
+    issues: int = 1
+    users: int = 500
+    positions: int = 10
+    statements: int = 5000
+    branching: int = 3
+    undercut_ratio: float = 0.1
+    undercut_depth: int = 3
+    vote_density: float = 2.0
+    reviews: int = 100
+
+
+class DatasetGenerator:
+    """
+    Creates the rows of the synthetic dataset and passes them to a sink
+    """
+
+    def __init__(self, shape: DatasetShape, seed: int, first_uids: Dict[Type[DiscussionBase], int], lang_uid: int,
+                 password: str, prefix: str, delete_reasons: Optional[List[int]] = None,
+                 now: Optional[arrow.Arrow] = None):
+        """
+        :param shape: size and shape of the dataset
+        :param seed: seed of the random generator
+        :param first_uids: first free uid of every model in models_with_uids
+        :param lang_uid: language of the issues and users
+        :param password: hashed password of all users
+        :param prefix: prefix of the slugs and nicknames
+        :param delete_reasons: uids of the ReviewDeleteReasons
+        :param now: the timestamps are spread over the year before now
+        """
+        self.shape = shape
+        self.random = random.Random(seed)
+        self.next_uids = dict(first_uids)
+        self.lang_uid = lang_uid
+        self.password = password
+        self.prefix = prefix
+        self.delete_reasons = delete_reasons or [None]
+        self.now = now or arrow.utcnow()
+        self.user_uids: List[int] = []
+
+    def generate(self, sink: Sink):
+        """
+        Creates all rows
+
+        :param sink: is called with the model and the values of every row
+        :return: None
+        """
+        self.__create_users(sink)
+        for index in range(self.shape.issues):
+            self.__create_issue(sink, index)
+
+    def __uid(self, model: Type[DiscussionBase]) -> int:
+        uid = self.next_uids[model]
+        self.next_uids[model] += 1
+        return uid
+
+    def __timestamp(self) -> arrow.Arrow:
+        return self.now.shift(seconds=-self.random.randrange(365 * 24 * 3600))
+
+    def __author(self) -> int:
+        return self.random.choice(self.user_uids)
+
+    def __text(self) -> str:
+        return f'the {self.random.choice(words)} {self.random.choice(verbs)} the {self.random.choice(words)} ' \
+               f'{self.random.randrange(100000)}'
+
+    def __create_users(self, sink: Sink):
+        for index in range(self.shape.users):
+            uid = self.__uid(User)
+            self.user_uids.append(uid)
+            nickname = f'{self.prefix}-user-{index}'
+            sink(User, {'uid': uid, 'firstname': 'Synthetic', 'surname': f'User {index}', 'nickname': nickname,
+                        'public_nickname': nickname, 'email': f'{nickname}@localhost', 'gender': 'n',
+                        'password': self.password, 'group': Group.USER, 'last_action': self.now,
+                        'last_login': self.now, 'registered': self.__timestamp(), 'oauth_provider': None,
+                        'oauth_provider_id': None})
+
+    def __create_settings(self, sink: Sink, issue_uid: int):
+        for uid in self.user_uids:
+            sink(Settings, {'author_uid': uid, 'should_send_mails': False, 'should_send_notifications': False,
+                            'should_show_public_nickname': True, 'last_topic_uid': issue_uid,
+                            'lang_uid': self.lang_uid, 'keep_logged_in': False})
+
+    def __create_issue(self, sink: Sink, index: int):
+        issue_uid = self.__uid(Issue)
+        slug = f'{self.prefix}-{index}'
+        sink(Issue, {'uid': issue_uid, 'title': f'Synthetic discussion {index}', 'slug': slug,
+                     'info': f'Synthetic discussion {index} with {self.shape.statements} statements',
+                     'long_info': '', 'date': self.__timestamp(), 'author_uid': self.user_uids[0],
+                     'lang_uid': self.lang_uid, 'is_disabled': False, 'is_private': False, 'is_read_only': False,
+                     'is_featured': False})
+        if index == 0:
+            self.__create_settings(sink, issue_uid)
+
+        statements: List[int] = []
+        arguments: List[int] = []
+        open_statements: List[int] = []
+        for _ in range(min(self.shape.positions, self.shape.statements)):
+            uid = self.__create_statement(sink, issue_uid, is_position=True)
+            statements.append(uid)
+            open_statements.append(uid)
+
+        # breadth-first: every statement gets its arguments before the premises are justified themselves
+        position = 0
+        while len(statements) < self.shape.statements and position < len(open_statements):
+            conclusion_uid = open_statements[position]
+            position += 1
+            for i in range(self.shape.branching):
+                if len(statements) >= self.shape.statements:
+                    break
+                premise_uid = self.__create_statement(sink, issue_uid, is_position=False)
+                statements.append(premise_uid)
+                open_statements.append(premise_uid)
+                argument_uid = self.__create_argument(sink, issue_uid, premise_uid, i % 2 == 0,
+                                                      conclusion_uid=conclusion_uid)
+                arguments.append(argument_uid)
+                if self.random.random() < self.shape.undercut_ratio:
+                    arguments += self.__create_undercuts(sink, issue_uid, argument_uid, statements)
+
+        participants = self.__create_votes(sink, ClickedStatement, SeenStatement, 'statement_uid', statements)
+        participants |= self.__create_votes(sink, ClickedArgument, SeenArgument, 'argument_uid', arguments)
+        for user_uid in sorted(participants):
+            sink(UserParticipation, {'user_uid': user_uid, 'issue_uid': issue_uid})
+        self.__create_reviews(sink, statements, arguments)
+
+    def __create_statement(self, sink: Sink, issue_uid: int, is_position: bool) -> int:
+        uid = self.__uid(Statement)
+        sink(Statement, {'uid': uid, 'is_position': is_position, 'is_disabled': False})
+        sink(TextVersion, {'statement_uid': uid, 'content': self.__text(), 'author_uid': self.__author(),
+                           'timestamp': self.__timestamp(), 'is_disabled': False})
+        sink(StatementToIssue, {'statement_uid': uid, 'issue_uid': issue_uid})
+        return uid
+
+    def __create_argument(self, sink: Sink, issue_uid: int, premise_uid: int, is_supportive: bool,
+                          conclusion_uid: Optional[int] = None, argument_uid: Optional[int] = None) -> int:
+        author_uid = self.__author()
+        timestamp = self.__timestamp()
+        premisegroup_uid = self.__uid(PremiseGroup)
+        sink(PremiseGroup, {'uid': premisegroup_uid, 'author_uid': author_uid})
+        sink(Premise, {'premisegroup_uid': premisegroup_uid, 'statement_uid': premise_uid, 'is_negated': False,
+                       'author_uid': author_uid, 'timestamp': timestamp, 'issue_uid': issue_uid,
+                       'is_disabled': False})
+        uid = self.__uid(Argument)
+        sink(Argument, {'uid': uid, 'premisegroup_uid': premisegroup_uid, 'conclusion_uid': conclusion_uid,
+                        'argument_uid': argument_uid, 'is_supportive': is_supportive, 'author_uid': author_uid,
+                        'timestamp': timestamp, 'issue_uid': issue_uid, 'is_disabled': False})
+        return uid
+
+    def __create_undercuts(self, sink: Sink, issue_uid: int, argument_uid: int, statements: List[int]) -> List[int]:
+        """
+        Creates a chain of arguments, which undercut their predecessor
+        """
+        chain = []
+        for _ in range(self.shape.undercut_depth):
+            premise_uid = self.__create_statement(sink, issue_uid, is_position=False)
+            statements.append(premise_uid)
+            argument_uid = self.__create_argument(sink, issue_uid, premise_uid, False, argument_uid=argument_uid)
+            chain.append(argument_uid)
+        return chain
+
+    def __create_votes(self, sink: Sink, click_model, seen_model, column: str, uids: List[int]) -> set:
+        """
+        Creates on average vote_density up or down votes per statement or argument. Every voter has seen it.
+        """
+        voters = set()
+        count = min(len(self.user_uids), max(1, round(self.shape.vote_density * 2)))
+        for uid in uids:
+            votes = self.random.randint(0, count) if self.shape.vote_density > 0 else 0
+            for user_uid in self.random.sample(self.user_uids, votes):
+                voters.add(user_uid)
+                sink(click_model, {column: uid, 'author_uid': user_uid, 'timestamp': self.__timestamp(),
+                                   'is_up_vote': self.random.random() < 0.7, 'is_valid': True})
+                sink(seen_model, {column: uid, 'user_uid': user_uid})
+        return voters
+
+    def __create_reviews(self, sink: Sink, statements: List[int], arguments: List[int]):
+        """
+        Creates open reviews, which are distributed over the delete, edit, optimization and duplicate queue
+        """
+        for i in range(self.shape.reviews):
+            values = {'detector_uid': self.__author(), 'timestamp': self.__timestamp(), 'is_executed': False,
+                      'is_revoked': False}
+            queue = i % 4
+            if queue == 0:
+                sink(ReviewDelete, {**values, 'argument_uid': self.random.choice(arguments) if arguments else None,
+                                    'statement_uid': None if arguments else self.random.choice(statements),
+                                    'reason_uid': self.random.choice(self.delete_reasons)})
+            elif queue == 1:
+                statement_uid = self.random.choice(statements)
+                review_uid = self.__uid(ReviewEdit)
+                sink(ReviewEdit, {**values, 'uid': review_uid, 'argument_uid': None, 'statement_uid': statement_uid})
+                sink(ReviewEditValue, {'review_edit_uid': review_uid, 'statement_uid': statement_uid,
+                                       'typeof': '', 'content': self.__text()})
+            elif queue == 2:
+                sink(ReviewOptimization, {**values, 'argument_uid': None,
+                                          'statement_uid': self.random.choice(statements)})
+            elif len(statements) > 1:
+                duplicate_uid, original_uid = self.random.sample(statements, 2)
+                sink(ReviewDuplicate, {**values, 'duplicate_statement_uid': duplicate_uid,
+                                       'original_statement_uid': original_uid})
+
+
+class BulkWriter:
+    """
+    Buffers the rows and inserts them in chunks in the order of insert_order
+    """
+
+    def __init__(self, chunk_size: int = 10000):
+        self.chunk_size = chunk_size
+        self.counts: Dict[Type[DiscussionBase], int] = defaultdict(int)
+        self.__buffer: Dict[Type[DiscussionBase], List[dict]] = defaultdict(list)
+        self.__buffered = 0
+
+    def __call__(self, model: Type[DiscussionBase], row: dict):
+        self.__buffer[model].append(row)
+        self.__buffered += 1
+        if self.__buffered >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        for model in insert_order:
+            rows = self.__buffer.pop(model, None)
+            if rows:
+                DBDiscussionSession.bulk_insert_mappings(model, rows)
+                self.counts[model] += len(rows)
+        self.__buffered = 0
+        # bulk inserts do not flush, therefore the transaction manager does not know about the changes
+        mark_changed(DBDiscussionSession())
+
+
+def get_first_free_uids() -> Dict[Type[DiscussionBase], int]:
+    return {model: (DBDiscussionSession.query(func.max(model.uid)).scalar() or 0) + 1 for model in models_with_uids}
+
+
+def reset_sequences():
+    """
+    Moves the sequences of the tables with explicitly assigned uids behind the generated rows
+    """
+    for model in models_with_uids:
+        table = model.__tablename__
+        DBDiscussionSession.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'uid'), (SELECT max(uid) FROM {table}))"))
+
+
+def generate_dataset(shape: DatasetShape, seed: int, prefix: str, chunk_size: int = 10000) -> Dict[str, int]:
+    """
+    Generates the dataset in one transaction
+
+    :param shape: size and shape of the dataset
+    :param seed: seed of the random generator
+    :param prefix: prefix of the slugs and nicknames
+    :param chunk_size: count of rows per bulk insert
+    :return: count of inserted rows per table
+    """
+    from dbas.handler.password import get_hashed_password
+
+    with transaction.manager:
+        if DBDiscussionSession.query(Issue).filter(Issue.slug.like(f'{prefix}-%')).first():
+            raise ValueError(f'There is already a dataset with the prefix {prefix}')
+
+        lang_uid = DBDiscussionSession.query(Language.uid).filter_by(ui_locales='en').scalar()
+        delete_reasons = [uid for uid, in DBDiscussionSession.query(ReviewDeleteReason.uid)]
+        generator = DatasetGenerator(shape, seed, get_first_free_uids(), lang_uid, get_hashed_password(prefix),
+                                     prefix, delete_reasons)
+        writer = BulkWriter(chunk_size)
+        generator.generate(writer)
+        writer.flush()
+        reset_sequences()
+
+    return {model.__tablename__: count for model, count in writer.counts.items()}
+
+
+def main(argv=sys.argv):
+    defaults = DatasetShape()
+    parser = argparse.ArgumentParser(prog='dbas-generate-dataset',
+                                     description='Generates large synthetic discussions for benchmarks. The password '
+                                                 'of all generated users is the prefix.')
+    parser.add_argument('--seed', type=int, default=42, help='seed of the random generator')
+    parser.add_argument('--prefix', help='prefix of the slugs and nicknames, default: synthetic-<seed>')
+    parser.add_argument('--issues', type=int, default=defaults.issues, help='count of issues')
+    parser.add_argument('--users', type=int, default=defaults.users, help='count of users')
+    parser.add_argument('--positions', type=int, default=defaults.positions, help='positions per issue')
+    parser.add_argument('--statements', type=int, default=defaults.statements, help='statements per issue')
+    parser.add_argument('--branching', type=int, default=defaults.branching, help='arguments per statement')
+    parser.add_argument('--undercut-ratio', type=float, default=defaults.undercut_ratio,
+                        help='share of the arguments, which start a chain of undercuts')
+    parser.add_argument('--undercut-depth', type=int, default=defaults.undercut_depth,
+                        help='length of the chains of undercuts')
+    parser.add_argument('--vote-density', type=float, default=defaults.vote_density,
+                        help='average count of votes per statement and argument')
+    parser.add_argument('--reviews', type=int, default=defaults.reviews, help='open reviews per issue')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='rows per bulk insert')
+    args = parser.parse_args(argv[1:])
+
+    from dbas.console_scripts import setup_database
+
+    logging.basicConfig(level=logging.INFO)
+    setup_database(executemany_mode='values')
+
+    shape = DatasetShape(args.issues, args.users, args.positions, args.statements, args.branching,
+                         args.undercut_ratio, args.undercut_depth, args.vote_density, args.reviews)
+    prefix = args.prefix or f'synthetic-{args.seed}'
+    start = time.perf_counter()
+    try:
+        counts = generate_dataset(shape, args.seed, prefix, args.chunk_size)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    for table, count in counts.items():
+        print(f'{count:>10}  {table}')
+    print(f'Generated the issues {prefix}-0 to {prefix}-{shape.issues - 1} in {time.perf_counter() - start:.1f} s')
+
+
+if __name__ == '__main__':
+    main()
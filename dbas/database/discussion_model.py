@@ -7,14 +7,15 @@ import logging
 import random
 import warnings
 from abc import abstractmethod, ABC, ABCMeta
-from datetime import datetime
+from datetime import datetime, date
 from typing import List, Set, Optional, Dict, Any, Union
 from urllib import parse
 
 import arrow
 import bcrypt
 from slugify import slugify
-from sqlalchemy import Integer, Text, Boolean, Column, ForeignKey, DateTime, String, CheckConstraint, Enum
+from sqlalchemy import Integer, Text, Boolean, Column, ForeignKey, DateTime, String, CheckConstraint, Enum, \
+    UniqueConstraint, Date, BigInteger, Index
 from sqlalchemy.ext.declarative import DeclarativeMeta
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
@@ -2373,6 +2374,110 @@ class ReviewCanceled(DiscussionBase):
         self.timestamp = get_now()
 
 
+class ReviewExecutionJob(DiscussionBase):
+    """
+    ReviewExecutionJob-table with several columns. Every decided review, whose implications are executed by the worker
+    instead of the request of the last vote, has exactly one job.
+    """
+    __tablename__ = 'review_execution_jobs'
+    __table_args__ = (
+        UniqueConstraint('queue', 'review_uid'),
+        Index('ix_review_execution_jobs_state_run_after', 'state', 'run_after'),
+    )
+    uid: int = Column(Integer, primary_key=True)
+    queue: str = Column(Text, nullable=False)
+    review_uid: int = Column(Integer, nullable=False)
+    state: str = Column(Text, nullable=False, default='pending')
+    attempts: int = Column(Integer, nullable=False, default=0)
+    last_error: str = Column(Text, nullable=True)
+    application_url: str = Column(Text, nullable=False)
+    ui_locales: str = Column(Text, nullable=False)
+    timestamp = Column(ArrowType, default=get_now())
+    run_after = Column(ArrowType, default=get_now())
+
+    state_pending = 'pending'
+    state_running = 'running'
+    state_done = 'done'
+    state_undecided = 'undecided'  # the votes changed the decision before the worker executed the review
+    state_failed = 'failed'
+    active_states = [state_pending, state_running]
+
+    def __init__(self, queue: str, review_uid: int, application_url: str, ui_locales: str):
+        """
+        Inits a row in current review execution jobs table
+
+        :param queue: key of the queue
+        :param review_uid: uid of the review in the table of the queue
+        :param application_url: url of the app, which is used for the notifications
+        :param ui_locales: language of the notifications
+        """
+        self.queue = queue
+        self.review_uid = review_uid
+        self.state = ReviewExecutionJob.state_pending
+        self.attempts = 0
+        self.application_url = application_url
+        self.ui_locales = ui_locales
+        self.timestamp = get_now()
+        self.run_after = get_now()
+
+
+class DailyUserActivity(DiscussionBase):
+    """
+    DailyUserActivity-table with several columns. Every row holds the counts of the clicks, new statements, edits,
+    started reviews and the collected reputation of one user on one day (UTC). The rows are maintained by
+    dbas.handler.activity.
+    """
+    __tablename__ = 'daily_user_activity'
+    day: date = Column(Date, primary_key=True)
+    user_uid: int = Column(Integer, ForeignKey('users.uid'), primary_key=True)
+    statement_clicks: int = Column(Integer, nullable=False, default=0)
+    argument_clicks: int = Column(Integer, nullable=False, default=0)
+    statements: int = Column(Integer, nullable=False, default=0)
+    edits: int = Column(Integer, nullable=False, default=0)
+    reviews: int = Column(Integer, nullable=False, default=0)
+    reputation: int = Column(Integer, nullable=False, default=0)
+
+
+class DailyIssueActivity(DiscussionBase):
+    """
+    DailyIssueActivity-table with several columns. Every row holds the counts of the clicks, new statements and edits of
+    one user in one issue on one day (UTC), therefore the rows of a day and an issue are its active users. The rows are
+    maintained by dbas.handler.activity.
+    """
+    __tablename__ = 'daily_issue_activity'
+    day: date = Column(Date, primary_key=True)
+    issue_uid: int = Column(Integer, ForeignKey('issues.uid'), primary_key=True)
+    user_uid: int = Column(Integer, ForeignKey('users.uid'), primary_key=True)
+    clicks: int = Column(Integer, nullable=False, default=0)
+    statements: int = Column(Integer, nullable=False, default=0)
+    edits: int = Column(Integer, nullable=False, default=0)
+
+
+class RollupWatermark(DiscussionBase):
+    """
+    RollupWatermark-table with several columns. Every row holds the uid of the last row of a raw table, which is counted
+    in the daily activity tables, and the uid, which may be counted as soon as all transactions older than pending_txid
+    have finished.
+    """
+    __tablename__ = 'rollup_watermarks'
+    source: str = Column(Text, primary_key=True)
+    last_uid: int = Column(Integer, nullable=False, default=0)
+    pending_uid: Optional[int] = Column(Integer, nullable=True)
+    pending_txid: Optional[int] = Column(BigInteger, nullable=True)
+    timestamp = Column(ArrowType, default=get_now())
+
+    def __init__(self, source: str, last_uid: int = 0):
+        """
+        Inits a row in current rollup watermarks table
+
+        :param source: name of the raw table
+        :param last_uid: uid of the last counted row
+        """
+        self.source = source
+        self.last_uid = last_uid
+        self.timestamp = get_now()
+
+
 class RevokedContent(DiscussionBase):
     """
     RevokedContent-table with several columns.
@@ -0,0 +1,60 @@
+import unittest
+from collections import Counter
+
+import arrow
+
+from dbas.database.dataset import DatasetGenerator, DatasetShape, insert_order, models_with_uids
+from dbas.database.discussion_model import Statement, Argument, Issue, User, ClickedArgument, ClickedStatement, \
+    Settings, ReviewEdit
+
+
+class DatasetGeneratorTest(unittest.TestCase):
+    shape = DatasetShape(issues=2, users=20, positions=3, statements=200, branching=3, undercut_ratio=0.2,
+                         undercut_depth=4, vote_density=2, reviews=8)
+
+    def __generate(self, seed=1):
+        rows = []
+        first_uids = {model: 1000 for model in models_with_uids}
+        generator = DatasetGenerator(self.shape, seed, first_uids, lang_uid=2, password='hash', prefix='test',
+                                     now=arrow.get('2020-01-01'))
+        generator.generate(lambda model, row: rows.append((model, row)))
+        return rows
+
+    def test_same_seed_same_dataset(self):
+        self.assertEqual(self.__generate(), self.__generate())
+        self.assertNotEqual(self.__generate(), self.__generate(seed=2))
+
+    def test_shape(self):
+        rows = self.__generate()
+        counts = Counter(model for model, _ in rows)
+        self.assertEqual(counts[Issue], 2)
+        self.assertEqual(counts[User], 20)
+        self.assertEqual(counts[Settings], 20)
+        self.assertEqual(counts[ReviewEdit], 4)
+        self.assertGreaterEqual(counts[Statement], 400)
+        self.assertGreater(counts[ClickedStatement] + counts[ClickedArgument], 0)
+
+        arguments = {row['uid']: row for model, row in rows if model is Argument}
+        depths = []
+        for row in arguments.values():
+            depth = 0
+            while row['argument_uid'] is not None:
+                row = arguments[row['argument_uid']]
+                depth += 1
+            depths.append(depth)
+        self.assertEqual(max(depths), 4)
+
+    def test_references_point_backwards(self):
+        seen = {model: set() for model in models_with_uids}
+        columns = {'statement_uid': Statement, 'conclusion_uid': Statement, 'argument_uid': Argument,
+                   'issue_uid': Issue, 'last_topic_uid': Issue, 'author_uid': User}
+        for model, row in self.__generate():
+            for column, referenced in columns.items():
+                if row.get(column) is not None:
+                    self.assertIn(row[column], seen[referenced], f'{model.__name__}.{column}')
+            if model in seen:
+                seen[model].add(row['uid'])
+
+    def test_insert_order_covers_all_models(self):
+        models = {model for model, _ in self.__generate()}
+        self.assertTrue(models.issubset(set(insert_order)))
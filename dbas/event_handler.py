@@ -1,9 +1,12 @@
 from pyramid.events import subscriber, NewResponse
+from pyramid.request import Request
 
-from dbas.database import DBDiscussionSession
-from dbas.database.discussion_model import User
 from dbas.events import ParticipatedInDiscussion, UserArgumentAgreement, UserStatementAttitude
 from dbas.handler.voting import add_click_for_argument, add_click_for_statement
+from dbas.helper.last_action import last_actions
+
+# routes, whose requests are no action of the user
+_passive_routes = {'health', 'metrics'}
 
 
 @subscriber(ParticipatedInDiscussion)
@@ -23,6 +26,16 @@ def user_attitude_on_statement(event: UserStatementAttitude):
 
 @subscriber(NewResponse)
 def update_last_action(event: NewResponse):
-    user = DBDiscussionSession.query(User).filter_by(nickname=event.request.authenticated_userid).first()
-    if user is not None:
-        user.update_last_action()
+    request = event.request
+    if __is_passive_request(request):
+        return
+
+    # the nickname of the signed auth ticket is enough, the buffer does not need the user itself
+    nickname = request.unauthenticated_userid
+    if nickname is not None:
+        last_actions.touch(nickname)
+
+
+def __is_passive_request(request: Request) -> bool:
+    route = request.matched_route
+    return route is None or route.name in _passive_routes or route.name.startswith('__')
@@ -0,0 +1,352 @@
+"""
+Provides the daily activity of the users and issues.
+
+The tables daily_user_activity and daily_issue_activity hold the clicks, new statements, edits, started reviews and the
+collected reputation per day (UTC). They are maintained incrementally by ``dbas-rollup-activity``: for every raw
+table, the rows after its watermark are counted with one GROUP BY query and added to the rollups. The activity of a
+single user adds the rows after the watermarks, therefore it is exact even if the job lags behind.
+
+The uids are drawn before the transactions commit, so a row with a lower uid may become visible after a row with a
+higher one. A watermark is therefore only moved to a uid, when every transaction, which was running while the uid was
+visible, has finished: each run remembers the highest uid and the next transaction id of its snapshot as pending
+watermark, which a later run applies as soon as all older transactions are gone.
+"""
+import logging
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import arrow
+from sqlalchemy import Date, and_, case, cast, distinct, exists, func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Query, aliased
+from zope.sqlalchemy import mark_changed
+
+from dbas.database import DBDiscussionSession
+from dbas.database.discussion_model import ClickedArgument, ClickedStatement, DailyUserActivity, TextVersion, \
+    DailyIssueActivity, RollupWatermark, ReviewEdit, ReviewDelete, ReviewOptimization, ReviewDuplicate, \
+    ReputationHistory, ReputationReason, StatementToIssue, Argument, get_now
+
+LOG = logging.getLogger(__name__)
+
+user_columns = ('statement_clicks', 'argument_clicks', 'statements', 'edits', 'reviews', 'reputation')
+issue_columns = ('clicks', 'statements', 'edits')
+lock_key = 2041048  # key of the advisory lock of the job and the backfill
+
+
+def _is_edit():
+    older = aliased(TextVersion)
+    return exists().where(and_(older.statement_uid == TextVersion.statement_uid, older.uid < TextVersion.uid))
+
+
+def _text_version_counts() -> Dict[str, Any]:
+    is_edit = _is_edit()
+    return {'statements': func.sum(case([(is_edit, 0)], else_=1)), 'edits': func.sum(case([(is_edit, 1)], else_=0))}
+
+
+class Source(NamedTuple):
+    """
+    A raw table, whose rows are counted in the rollups
+    """
+    name: str
+    model: Any
+    user_column: Any
+    user_counts: Callable[[], Dict[str, Any]]
+    joins: Tuple = ()
+    issue_join: Optional[Tuple[Any, Any, Any]] = None  # joined table, onclause and column of the issue
+    issue_counts: Optional[Callable[[], Dict[str, Any]]] = None
+
+
+sources: List[Source] = [
+    Source('clicked_statements', ClickedStatement, ClickedStatement.author_uid,
+           lambda: {'statement_clicks': func.count()},
+           issue_join=(StatementToIssue, StatementToIssue.statement_uid == ClickedStatement.statement_uid,
+                       StatementToIssue.issue_uid),
+           issue_counts=lambda: {'clicks': func.count()}),
+    Source('clicked_arguments', ClickedArgument, ClickedArgument.author_uid,
+           lambda: {'argument_clicks': func.count()},
+           issue_join=(Argument, Argument.uid == ClickedArgument.argument_uid, Argument.issue_uid),
+           issue_counts=lambda: {'clicks': func.count()}),
+    Source('textversions', TextVersion, TextVersion.author_uid, _text_version_counts,
+           issue_join=(StatementToIssue, StatementToIssue.statement_uid == TextVersion.statement_uid,
+                       StatementToIssue.issue_uid),
+           issue_counts=_text_version_counts),
+    Source('review_edits', ReviewEdit, ReviewEdit.detector_uid, lambda: {'reviews': func.count()}),
+    Source('review_deletes', ReviewDelete, ReviewDelete.detector_uid, lambda: {'reviews': func.count()}),
+    Source('review_optimizations', ReviewOptimization, ReviewOptimization.detector_uid,
+           lambda: {'reviews': func.count()}),
+    Source('review_duplicates', ReviewDuplicate, ReviewDuplicate.detector_uid, lambda: {'reviews': func.count()}),
+    Source('reputation_history', ReputationHistory, ReputationHistory.reputator_uid,
+           lambda: {'reputation': func.sum(ReputationReason.points)},
+           joins=((ReputationReason, ReputationReason.uid == ReputationHistory.reputation_uid),)),
+]
+
+
+def get_counts(source: Source, by_issue: bool = False, after_uid: Optional[int] = None, until_uid: Optional[int] = None,
+               since: Optional[date] = None, until: Optional[date] = None, user_uid: Optional[int] = None) -> Query:
+    """
+    Counts the rows of a raw table per day and user and optionally per issue
+
+    :param source: the raw table
+    :param by_issue: count per issue too
+    :param after_uid: only count rows with a greater uid
+    :param until_uid: only count rows with a lower or equal uid
+    :param since: first day
+    :param until: day after the last day
+    :param user_uid: only count the rows of this user
+    :return: query of (day, [issue_uid,] user_uid, <counts>...)
+    """
+    model = source.model
+    day = _day(model.timestamp)
+    keys = [day, source.user_column.label('user_uid')]
+    counts = source.user_counts()
+    if by_issue:
+        keys.insert(1, source.issue_join[2].label('issue_uid'))
+        counts = source.issue_counts()
+
+    query = DBDiscussionSession.query(*keys, *[count.label(name) for name, count in counts.items()]).select_from(model)
+    for target, onclause in source.joins:
+        query = query.join(target, onclause)
+    if by_issue:
+        query = query.join(source.issue_join[0], source.issue_join[1])
+
+    query = query.filter(source.user_column.isnot(None))
+    if after_uid is not None:
+        query = query.filter(model.uid > after_uid)
+    if until_uid is not None:
+        query = query.filter(model.uid <= until_uid)
+    if since is not None:
+        query = query.filter(model.timestamp >= arrow.get(since))
+    if until is not None:
+        query = query.filter(model.timestamp < arrow.get(until))
+    if user_uid is not None:
+        query = query.filter(source.user_column == user_uid)
+    return query.group_by(*keys)
+
+
+def update_rollups() -> int:
+    """
+    Adds the rows of the raw tables after their watermarks to the rollups and moves the watermarks, as far as no running
+    transaction can commit rows with lower uids
+
+    :return: count of the inserted or updated rows of the rollups
+    """
+    _lock()
+    watermarks = _get_watermarks()
+    max_uids = {source.name: DBDiscussionSession.query(func.max(source.model.uid)).scalar() or 0 for source in sources}
+    # taken after the uids, so every transaction, which may still commit a lower uid, is running in the snapshot
+    next_txid, oldest_running_txid = _get_snapshot()
+    changed = 0
+    for source in sources:
+        max_uid = max_uids[source.name]
+        watermark = watermarks.get(source.name)
+        if watermark is None:
+            watermark = RollupWatermark(source.name)
+            DBDiscussionSession.add(watermark)
+
+        safe_uid = None
+        if oldest_running_txid >= next_txid:
+            # no other transaction is running, every uid up to the highest one is visible
+            safe_uid = max_uid
+            watermark.pending_uid, watermark.pending_txid = None, None
+        elif watermark.pending_txid is not None and oldest_running_txid >= watermark.pending_txid:
+            safe_uid = watermark.pending_uid
+            watermark.pending_uid, watermark.pending_txid = None, None
+        if watermark.pending_txid is None and max_uid > max(safe_uid or 0, watermark.last_uid):
+            watermark.pending_uid, watermark.pending_txid = max_uid, next_txid
+
+        if safe_uid is None or safe_uid <= watermark.last_uid:
+            continue
+        changed += _add_counts(source, after_uid=watermark.last_uid, until_uid=safe_uid)
+        LOG.debug("Counted %s up to %s", source.name, safe_uid)
+        watermark.last_uid = safe_uid
+        watermark.timestamp = get_now()
+
+    DBDiscussionSession.flush()
+    mark_changed(DBDiscussionSession())
+    return changed
+
+
+def backfill_rollups(since: Optional[date] = None, until: Optional[date] = None) -> int:
+    """
+    Recomputes the rollups of the days from the raw tables, e.g. after the import of a discussion or if rows were deleted
+
+    :param since: first day or None for all days
+    :param until: day after the last day or None for all days
+    :return: count of the inserted rows of the rollups
+    """
+    _lock()
+    update_rollups()
+    watermarks = _get_watermarks()
+    for model in (DailyUserActivity, DailyIssueActivity):
+        query = DBDiscussionSession.query(model)
+        if since is not None:
+            query = query.filter(model.day >= since)
+        if until is not None:
+            query = query.filter(model.day < until)
+        query.delete(synchronize_session=False)
+
+    inserted = 0
+    for source in sources:
+        inserted += _add_counts(source, until_uid=watermarks[source.name].last_uid, since=since, until=until)
+    mark_changed(DBDiscussionSession())
+    return inserted
+
+
+def get_user_activity(user_uid: int, since: date, until: date, columns: Iterable[str] = user_columns) \
+        -> Dict[date, Counter]:
+    """
+    Returns the activity of a user per day
+
+    :param user_uid: uid of the user
+    :param since: first day
+    :param until: day after the last day
+    :param columns: columns of daily_user_activity, which are needed
+    :return: counts of the columns per day, days without activity are missing
+    """
+    columns = [column for column in user_columns if column in columns]
+    activity = defaultdict(Counter)
+    rows = DBDiscussionSession.query(DailyUserActivity.day, *[getattr(DailyUserActivity, c) for c in columns]).filter(
+        DailyUserActivity.user_uid == user_uid, DailyUserActivity.day >= since, DailyUserActivity.day < until)
+    for row in rows:
+        activity[row.day].update({column: getattr(row, column) for column in columns})
+
+    watermarks = _get_watermarks()
+    for source in sources:
+        names = [name for name in source.user_counts() if name in columns]
+        if not names:
+            continue
+        watermark = watermarks.get(source.name)
+        after_uid = watermark.last_uid if watermark else 0
+        for row in get_counts(source, after_uid=after_uid, since=since, until=until, user_uid=user_uid):
+            activity[row.day].update({name: int(getattr(row, name) or 0) for name in names})
+    return activity
+
+
+def get_issue_activity(since: Optional[date] = None, until: Optional[date] = None,
+                       issue_uids: Optional[List[int]] = None) -> Query:
+    """
+    Sums up the activity per issue and day from daily_issue_activity. The rows after the watermarks are missing.
+
+    :param since: first day
+    :param until: day after the last day
+    :param issue_uids: only these issues
+    :return: query of (issue_uid, day, users, clicks, statements, edits)
+    """
+    query = DBDiscussionSession.query(DailyIssueActivity.issue_uid, DailyIssueActivity.day,
+                                      func.count().label('users'),
+                                      *[func.sum(getattr(DailyIssueActivity, c)).label(c) for c in issue_columns])
+    query = _filter_days(query, DailyIssueActivity, since, until, issue_uids)
+    return query.group_by(DailyIssueActivity.issue_uid, DailyIssueActivity.day).order_by(DailyIssueActivity.issue_uid,
+                                                                                         DailyIssueActivity.day)
+
+
+def get_issue_activity_summary(days: int) -> Query:
+    """
+    Sums up the activity of the last days per issue from daily_issue_activity
+
+    :param days: number of days before today
+    :return: query of (issue_uid, users, clicks, statements, edits)
+    """
+    query = DBDiscussionSession.query(DailyIssueActivity.issue_uid,
+                                      func.count(distinct(DailyIssueActivity.user_uid)).label('users'),
+                                      *[func.sum(getattr(DailyIssueActivity, c)).label(c) for c in issue_columns])
+    query = _filter_days(query, DailyIssueActivity, utc_today() - timedelta(days=days), None, None)
+    return query.group_by(DailyIssueActivity.issue_uid).order_by(DailyIssueActivity.issue_uid)
+
+
+def get_daily_activity(days: int) -> Dict[str, List]:
+    """
+    Sums up the activity of all users per day from daily_user_activity. The rows after the watermarks are missing.
+
+    :param days: number of days before today
+    :return: dict with the days and the series of clicks, statements, edits, reviews and active users
+    """
+    first_day = utc_today() - timedelta(days=days)
+    rows = DBDiscussionSession.query(DailyUserActivity.day,
+                                     func.sum(DailyUserActivity.statement_clicks + DailyUserActivity.argument_clicks),
+                                     func.sum(DailyUserActivity.statements), func.sum(DailyUserActivity.edits),
+                                     func.sum(DailyUserActivity.reviews), func.count()).filter(
+        DailyUserActivity.day >= first_day).group_by(DailyUserActivity.day).all()
+    activity = {row[0]: row[1:] for row in rows}
+
+    series = {'days': [first_day + timedelta(days=i) for i in range(days + 1)]}
+    for index, name in enumerate(('clicks', 'statements', 'edits', 'reviews', 'users')):
+        series[name] = [int(activity[day][index]) if day in activity else 0 for day in series['days']]
+    return series
+
+
+def delete_activity_of(user_uid: int):
+    """
+    Deletes the rows of a user from the rollups
+
+    :param user_uid: uid of the user
+    :return: None
+    """
+    DBDiscussionSession.query(DailyUserActivity).filter_by(user_uid=user_uid).delete()
+    DBDiscussionSession.query(DailyIssueActivity).filter_by(user_uid=user_uid).delete()
+
+
+def _add_counts(source: Source, **filters) -> int:
+    changed = 0
+    targets = [(DailyUserActivity, False)]
+    if source.issue_join is not None:
+        targets.append((DailyIssueActivity, True))
+    for model, by_issue in targets:
+        counts = get_counts(source, by_issue, **filters)
+        names = [column['name'] for column in counts.column_descriptions]
+        table = model.__table__
+        statement = insert(table).from_select(names, counts.statement)
+        statement = statement.on_conflict_do_update(
+            index_elements=[key.name for key in table.primary_key],
+            set_={name: table.c[name] + getattr(statement.excluded, name) for name in names if name in table.c
+                  and not table.c[name].primary_key})
+        changed += DBDiscussionSession.execute(statement).rowcount
+    return changed
+
+
+def _get_watermarks() -> Dict[str, RollupWatermark]:
+    return {watermark.source: watermark for watermark in DBDiscussionSession.query(RollupWatermark)}
+
+
+def _get_snapshot() -> Tuple[int, int]:
+    """
+    Returns the next transaction id of the snapshot of this transaction and the id of the oldest other transaction,
+    which is still running, or the next id, if there is none
+
+    :return: next_txid, oldest_running_txid
+    """
+    return DBDiscussionSession.execute(text(
+        'SELECT txid_snapshot_xmax(snapshot), coalesce((SELECT min(txid) FROM txid_snapshot_xip(snapshot) AS txid '
+        'WHERE txid IS DISTINCT FROM txid_current_if_assigned()), txid_snapshot_xmax(snapshot)) '
+        'FROM txid_current_snapshot() AS snapshot')).first()
+
+
+def utc_today() -> date:
+    """
+    The rollups count the days in UTC
+
+    :return: current day in UTC
+    """
+    return arrow.utcnow().date()
+
+
+def _lock():
+    # the job and the backfill must not count the same rows, the lock is released with the transaction
+    DBDiscussionSession.execute(select([func.pg_advisory_xact_lock(lock_key)]))
+
+
+def _filter_days(query: Query, model, since: Optional[date], until: Optional[date],
+                 issue_uids: Optional[List[int]]) -> Query:
+    if since is not None:
+        query = query.filter(model.day >= since)
+    if until is not None:
+        query = query.filter(model.day < until)
+    if issue_uids is not None:
+        query = query.filter(model.issue_uid.in_(issue_uids))
+    return query
+
+
+def _day(column):
+    # a literal instead of a parameter, so that the expression in GROUP BY equals the one in SELECT
+    return cast(func.date_trunc(literal_column("'day'"), column), Date).label('day')
@@ -4,17 +4,26 @@ Provides functions for te internal messaging system
 from typing import List
 
 import transaction
+from sqlalchemy import func
+from zope.sqlalchemy import mark_changed
 
 import dbas.handler.email as email_helper
 from dbas.database import DBDiscussionSession
 from dbas.database.discussion_model import User, TextVersion, Message, Language, Argument, \
-    sql_timestamp_pretty_print, Settings
+    sql_timestamp_pretty_print, Settings, get_now
+from dbas.helper.cache import TTLCache
 from dbas.lib import escape_string, get_profile_picture
 from dbas.strings.keywords import Keywords as _
 from dbas.strings.text_generator import get_text_for_message
 from dbas.strings.translator import Translator
 from websocket.lib import send_request_for_info_popup_to_socketio
 
+# messages about new content are sent by the anonymous system user
+anonymous_user_uid = 1
+
+# recipients, which were notified about new content at an url, within the batching window in seconds
+recent_notifications = TTLCache('recent_notifications', maxsize=4096, ttl=60)
+
 
 def send_users_notification(author: User, recipient: User, title, text, ui_locales) -> dict:
     """
@@ -37,9 +46,26 @@ def send_users_notification(author: User, recipient: User, title, text, ui_local
     return prepared_dict
 
 
+class Recipient:
+    """
+    Everything, which is needed to notify a user about new content, without loading the user, its settings and its
+    language
+    """
+
+    def __init__(self, uid: int, nickname: str, firstname: str, email: str, should_send_mails: bool,
+                 should_send_notifications: bool, ui_locales: str):
+        self.uid = uid
+        self.nickname = nickname
+        self.firstname = firstname
+        self.email = email
+        self.should_send_mails = should_send_mails
+        self.should_send_notifications = should_send_notifications
+        self.ui_locales = ui_locales
+
+
 def send_add_text_notification(url, conclusion_id, db_user: User, mailer):
     """
-    Send notifications and mails to related users.
+    Send notifications and mails to the author and the last editor of the conclusion.
 
     :param url: current url
     :param conclusion_id: Statement.uid
@@ -47,104 +73,99 @@ def send_add_text_notification(url, conclusion_id, db_user: User, mailer):
     :param mailer: Instance of pyramid mailer
     :return: None
     """
-    # getting all text versions, the overview author, last editor and settings ob both authors as well as their languages
-    # Todo: das ist unnötig
-    db_textversions: List[TextVersion] = DBDiscussionSession.query(TextVersion).filter_by(
-        statement_uid=conclusion_id).all()
-    db_root_author: User = db_textversions[0].author
-    db_last_editor: User = db_textversions[-1].author
-    db_root_author_settings: Settings = db_root_author.settings
-    db_last_editor_settings: Settings = db_last_editor.settings
-    root_lang: str = db_root_author_settings.language.ui_locales
-    editor_lang: str = db_last_editor_settings.language.ui_locales
-    _t_editor = Translator(editor_lang)
-    _t_root = Translator(root_lang)
-
-    # send mail to overview author
-    if db_root_author_settings.should_send_mails \
-            and db_user != db_root_author:
-        email_helper.send_mail_due_to_added_text(root_lang, url, db_root_author, mailer)
-
-    # send mail to last author
-    if db_last_editor_settings.should_send_mails \
-            and db_last_editor != db_root_author \
-            and db_last_editor != db_user:
-        email_helper.send_mail_due_to_added_text(editor_lang, url, db_last_editor, mailer)
-
-    # send notification via websocket to overview author
-    if db_root_author_settings.should_send_notifications and db_root_author != db_user:
-        send_request_for_info_popup_to_socketio(db_root_author.nickname, _t_root.get(_.statementAdded), url,
-                                                increase_counter=True)
-
-    # send notification via websocket to last author
-    if db_last_editor_settings.should_send_notifications \
-            and db_last_editor != db_root_author \
-            and db_last_editor != db_user:
-        send_request_for_info_popup_to_socketio(db_last_editor.nickname, _t_editor.get(_.statementAdded), url,
-                                                increase_counter=True)
-
-    # get topic and content for messages to both authors
-    topic1 = _t_root.get(_.statementAdded)
-    content1 = get_text_for_message(db_root_author.firstname, root_lang, url, _.statementAddedMessageContent, True)
-
-    topic2 = _t_editor.get(_.statementAdded)
-    content2 = get_text_for_message(db_last_editor.firstname, editor_lang, url, _.statementAddedMessageContent, True)
+    first_textversion = DBDiscussionSession.query(func.min(TextVersion.uid)).filter_by(statement_uid=conclusion_id)
+    last_textversion = DBDiscussionSession.query(func.max(TextVersion.uid)).filter_by(statement_uid=conclusion_id)
+    recipients = __query_recipients(TextVersion.author_uid) \
+        .filter(TextVersion.uid.in_([first_textversion.as_scalar(), last_textversion.as_scalar()])) \
+        .order_by(TextVersion.uid) \
+        .all()
 
-    anonymous_user = DBDiscussionSession.query(User).get(1)
-    if db_root_author != db_user:
-        DBDiscussionSession.add(Message(sender=anonymous_user,
-                                        receiver=db_root_author,
-                                        topic=topic1,
-                                        content=content1,
-                                        is_inbox=True))
-    if db_root_author != db_last_editor and db_user != db_last_editor:
-        DBDiscussionSession.add(Message(sender=anonymous_user,
-                                        receiver=db_last_editor,
-                                        topic=topic2,
-                                        content=content2,
-                                        is_inbox=True))
+    __fan_out(recipients, db_user.uid, url, _.statementAdded, _.statementAddedMessageContent, mailer,
+              increase_counter=True)
 
 
 def send_add_argument_notification(url, attacked_argument_uid, user, mailer):
     """
-    Sends an notification because an argument was added
+    Sends an notification to the author of the attacked argument, because an argument was added
 
     :param url: String
     :param attacked_argument_uid: Argument.uid
-    :param user: User
+    :param user: nickname of the current user
     :param mailer: Instance of pyramid mailer
     :return:
     """
-    # getting current argument, arguments author, current user and some settings
-    db_argument: Argument = DBDiscussionSession.query(Argument).get(attacked_argument_uid)
-    db_author: User = DBDiscussionSession.query(User).get(db_argument.author_uid)
-    db_current_user: User = DBDiscussionSession.query(User).filter_by(nickname=user).first()
-    if db_author == db_current_user:
-        return None
+    recipients = __query_recipients(Argument.author_uid).filter(Argument.uid == attacked_argument_uid).all()
+    db_current_user = DBDiscussionSession.query(User).filter_by(nickname=user).first()
 
-    db_author_settings = db_author.settings
-    user_lang = DBDiscussionSession.query(Language).get(db_author_settings.lang_uid).ui_locales
+    __fan_out(recipients, db_current_user.uid if db_current_user else None, url, _.argumentAdded,
+              _.argumentAddedMessageContent, mailer, increase_counter=False)
+    transaction.commit()
 
-    # send notification via websocket to last author
-    _t_user = Translator(user_lang)
-    if db_author_settings.should_send_notifications:
-        send_request_for_info_popup_to_socketio(db_author.nickname, _t_user.get(_.argumentAdded), url)
 
-    # send mail to last author
-    if db_author_settings.should_send_mails:
-        email_helper.send_mail_due_to_added_text(user_lang, url, db_author, mailer)
+def __query_recipients(author_column):
+    """
+    Prepares the query of the recipients, which are the authors of the given column, with their settings and
+    languages
 
-    topic = _t_user.get(_.argumentAdded)
-    content = get_text_for_message(db_author.firstname, user_lang, url, _.argumentAddedMessageContent, True)
+    :param author_column: column with the uid of the author, e.g. TextVersion.author_uid
+    :return: Query of Recipient rows, which has to be filtered
+    """
+    return DBDiscussionSession.query(User.uid, User.nickname, User.firstname, User.email, Settings.should_send_mails,
+                                     Settings.should_send_notifications, Language.ui_locales) \
+        .select_from(author_column.class_) \
+        .join(User, User.uid == author_column) \
+        .join(Settings, Settings.author_uid == User.uid) \
+        .join(Language, Language.uid == Settings.lang_uid)
 
-    # Send with System User.
-    anonymous_user = DBDiscussionSession.query(User).get(1)
-    DBDiscussionSession.add(Message(sender=anonymous_user,
-                                    receiver=db_author,
-                                    topic=topic,
-                                    content=content,
-                                    is_inbox=True))
-    transaction.commit()
+
+def __fan_out(rows, current_user_uid, url, topic_key, content_key, mailer, increase_counter):
+    """
+    Notifies every recipient once: a message in the inbox with one bulk insert, a mail via the mail pool and a popup
+    via the websocket outbox. Recipients, which were notified about the same url within the batching window, are
+    skipped.
+
+    :param rows: rows of __query_recipients
+    :param current_user_uid: User.uid of the user, who added the content and is never notified
+    :param url: url of the new content
+    :param topic_key: Keywords of the topic
+    :param content_key: Keywords of the content of the message
+    :param mailer: Instance of pyramid mailer
+    :param increase_counter: True, if the popup should increase the notification counter
+    :return: count of notified recipients
+    """
+    recipients: List[Recipient] = []
+    for row in rows:
+        recipient = Recipient(*row)
+        if recipient.uid == current_user_uid or any(r.uid == recipient.uid for r in recipients):
+            continue
+        if recent_notifications.get((recipient.uid, topic_key, url)) is not None:
+            continue
+        recent_notifications.set((recipient.uid, topic_key, url), True)
+        recipients.append(recipient)
+
+    messages = []
+    for recipient in recipients:
+        _t = Translator(recipient.ui_locales)
+        if recipient.should_send_mails:
+            email_helper.send_mail_due_to_added_text(recipient.ui_locales, url, recipient, mailer)
+        if recipient.should_send_notifications:
+            send_request_for_info_popup_to_socketio(recipient.nickname, _t.get(topic_key), url,
+                                                    increase_counter=increase_counter)
+        messages.append({
+            'from_author_uid': anonymous_user_uid,
+            'to_author_uid': recipient.uid,
+            'topic': _t.get(topic_key),
+            'content': get_text_for_message(recipient.firstname, recipient.ui_locales, url, content_key, True),
+            'timestamp': get_now(),
+            'read': False,
+            'is_inbox': True
+        })
+
+    if messages:
+        DBDiscussionSession.bulk_insert_mappings(Message, messages)
+        # bulk inserts do not flush, therefore the transaction manager does not know about the changes
+        mark_changed(DBDiscussionSession())
+    return len(recipients)
 
 
 def send_welcome_notification(user: User, translator):
@@ -0,0 +1,142 @@
+from datetime import timedelta
+from unittest import mock
+
+from dbas.database import DBDiscussionSession
+from dbas.database.discussion_model import ClickedStatement, ClickedArgument, TextVersion, DailyUserActivity, \
+    DailyIssueActivity, RollupWatermark
+from dbas.handler import activity, user
+from dbas.tests.utils import TestCaseWithConfig
+
+
+def get_source(name):
+    return next(source for source in activity.sources if source.name == name)
+
+
+class ActivityTest(TestCaseWithConfig):
+
+    def setUp(self):
+        super().setUp()
+        self.today = activity.utc_today()
+        self.tomorrow = self.today + timedelta(days=1)
+
+    def __add_activity(self):
+        DBDiscussionSession.add(ClickedStatement(self.statement_town, self.user_christian))
+        DBDiscussionSession.add(ClickedArgument(self.argument_town, self.user_christian))
+        DBDiscussionSession.add(TextVersion('an edit', self.user_christian, self.statement_town))
+        DBDiscussionSession.flush()
+
+    def __get_activity_of_today(self):
+        return activity.get_user_activity(self.user_christian.uid, self.today, self.tomorrow)[self.today]
+
+    def test_counts(self):
+        clicks = get_source('clicked_statements')
+        before = activity.get_counts(clicks, since=self.today, until=self.tomorrow,
+                                     user_uid=self.user_christian.uid).all()
+        self.__add_activity()
+        after = activity.get_counts(clicks, since=self.today, until=self.tomorrow,
+                                    user_uid=self.user_christian.uid).one()
+        self.assertEqual(after.day, self.today)
+        self.assertEqual(after.statement_clicks, sum(row.statement_clicks for row in before) + 1)
+
+        versions = activity.get_counts(get_source('textversions'), by_issue=True, since=self.today,
+                                       until=self.tomorrow, user_uid=self.user_christian.uid).all()
+        self.assertIn(self.issue_town.uid, [row.issue_uid for row in versions])
+        self.assertGreaterEqual(sum(row.edits for row in versions), 1)
+
+    def test_update_rollups(self):
+        activity.update_rollups()
+        before = self.__get_activity_of_today()
+        self.__add_activity()
+
+        # the readers count the rows after the watermarks
+        self.assertEqual(self.__get_activity_of_today()['statement_clicks'], before['statement_clicks'] + 1)
+        self.assertGreater(activity.update_rollups(), 0)
+        self.assertEqual(activity.update_rollups(), 0)
+
+        after = self.__get_activity_of_today()
+        self.assertEqual(after['statement_clicks'], before['statement_clicks'] + 1)
+        self.assertEqual(after['argument_clicks'], before['argument_clicks'] + 1)
+        self.assertEqual(after['edits'], before['edits'] + 1)
+
+        row = DBDiscussionSession.query(DailyUserActivity).get((self.today, self.user_christian.uid))
+        self.assertEqual(row.edits, after['edits'])
+        watermark = DBDiscussionSession.query(RollupWatermark).get('clicked_statements')
+        self.assertEqual(watermark.last_uid, DBDiscussionSession.query(ClickedStatement).order_by(
+            ClickedStatement.uid.desc()).first().uid)
+
+    def test_watermarks_wait_for_running_transactions(self):
+        activity.update_rollups()
+        before = self.__get_activity_of_today()
+        self.__add_activity()
+        last_click = DBDiscussionSession.query(ClickedStatement).order_by(ClickedStatement.uid.desc()).first().uid
+
+        # an older transaction may still commit rows with lower uids
+        with mock.patch.object(activity, '_get_snapshot', return_value=(1000, 900)):
+            self.assertEqual(activity.update_rollups(), 0)
+        watermark = DBDiscussionSession.query(RollupWatermark).get('clicked_statements')
+        self.assertEqual((watermark.pending_uid, watermark.pending_txid), (last_click, 1000))
+        self.assertLess(watermark.last_uid, last_click)
+
+        with mock.patch.object(activity, '_get_snapshot', return_value=(1010, 950)):
+            self.assertEqual(activity.update_rollups(), 0)
+        self.assertEqual(watermark.pending_txid, 1000)
+
+        with mock.patch.object(activity, '_get_snapshot', return_value=(1020, 1000)):
+            self.assertGreater(activity.update_rollups(), 0)
+        self.assertEqual(watermark.last_uid, last_click)
+        self.assertIsNone(watermark.pending_txid)
+        self.assertEqual(self.__get_activity_of_today()['statement_clicks'], before['statement_clicks'] + 1)
+
+    def test_backfill_equals_updates(self):
+        self.__add_activity()
+        activity.update_rollups()
+        incremental = self.__get_activity_of_today()
+        issues = activity.get_issue_activity(self.today, self.tomorrow).all()
+
+        self.assertGreater(activity.backfill_rollups(self.today - timedelta(days=1), self.tomorrow), 0)
+        self.assertEqual(self.__get_activity_of_today(), incremental)
+        self.assertEqual(activity.get_issue_activity(self.today, self.tomorrow).all(), issues)
+
+    def test_issue_activity(self):
+        self.__add_activity()
+        activity.update_rollups()
+
+        rows = activity.get_issue_activity(self.today, self.tomorrow, [self.issue_town.uid]).all()
+        self.assertEqual(len(rows), 1)
+        self.assertGreaterEqual(rows[0].users, 1)
+        self.assertGreaterEqual(rows[0].clicks, 2)
+
+        summary = {row.issue_uid: row for row in activity.get_issue_activity_summary(7)}
+        self.assertGreaterEqual(summary[self.issue_town.uid].edits, 1)
+
+        series = activity.get_daily_activity(7)
+        self.assertEqual(len(series['days']), 8)
+        self.assertEqual(series['days'][-1], self.today)
+        self.assertGreaterEqual(series['users'][-1], 1)
+
+    def test_delete_activity_of(self):
+        self.__add_activity()
+        activity.update_rollups()
+        activity.delete_activity_of(self.user_christian.uid)
+        self.assertEqual(DBDiscussionSession.query(DailyUserActivity).filter_by(
+            user_uid=self.user_christian.uid).count(), 0)
+        self.assertEqual(DBDiscussionSession.query(DailyIssueActivity).filter_by(
+            user_uid=self.user_christian.uid).count(), 0)
+
+    def test_public_data_and_summary(self):
+        before = user.get_public_data(self.user_christian.uid, 'en')
+        summary = user.get_summary_of_today(self.user_christian)
+        self.__add_activity()
+        after = user.get_public_data(self.user_christian.uid, 'en')
+
+        self.assertEqual(len(after['data1']), len(after['labels1']))
+        self.assertEqual(len(after['data2']), len(after['labels2']))
+        self.assertEqual(after['data1'], after['data2'][-8:])
+        self.assertEqual(after['data2'][-1], before['data2'][-1] + 2)
+        self.assertEqual(after['data3'], before['data3'])
+        self.assertEqual(after['data4'][-1], before['data4'][-1] + 1)
+
+        activity.update_rollups()
+        self.assertEqual(user.get_public_data(self.user_christian.uid, 'en'), after)
+        self.assertEqual(user.get_summary_of_today(self.user_christian)['discussion_stat_clicks'],
+                         summary['discussion_stat_clicks'] + 1)
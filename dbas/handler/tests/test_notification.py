@@ -0,0 +1,54 @@
+import transaction
+from pyramid_mailer.mailer import DummyMailer
+
+from dbas.database import DBDiscussionSession
+from dbas.database.discussion_model import Message, TextVersion
+from dbas.handler.notification import send_add_text_notification, send_add_argument_notification, \
+    recent_notifications
+from dbas.tests.utils import TestCaseWithConfig
+
+
+class NotificationFanOutTest(TestCaseWithConfig):
+
+    def setUp(self):
+        super().setUp()
+        recent_notifications.clear()
+        self.last_message_uid = DBDiscussionSession.query(Message.uid).order_by(Message.uid.desc()).first()[0]
+
+    def tearDown(self):
+        recent_notifications.clear()
+        DBDiscussionSession.query(Message).filter(Message.uid > self.last_message_uid).delete()
+        transaction.commit()
+        super().tearDown()
+
+    def __new_messages(self):
+        return DBDiscussionSession.query(Message).filter(Message.uid > self.last_message_uid).all()
+
+    def test_add_text_notifies_author_and_last_editor_once(self):
+        db_textversions = DBDiscussionSession.query(TextVersion).filter_by(
+            statement_uid=self.statement_town.uid).order_by(TextVersion.uid).all()
+        authors = {db_textversions[0].author_uid, db_textversions[-1].author_uid} - {self.user_pascal.uid}
+
+        send_add_text_notification('/discuss/town', self.statement_town.uid, self.user_pascal, DummyMailer())
+        messages = self.__new_messages()
+        self.assertEqual({message.to_author_uid for message in messages}, authors)
+        self.assertTrue(all(message.from_author_uid == self.user_anonymous.uid for message in messages))
+        self.assertTrue(all(message.is_inbox and not message.read for message in messages))
+
+        # the same recipients are not notified again about the same url within the batching window
+        send_add_text_notification('/discuss/town', self.statement_town.uid, self.user_pascal, DummyMailer())
+        self.assertEqual(len(self.__new_messages()), len(messages))
+
+    def test_add_text_does_not_notify_the_author_itself(self):
+        db_textversion = DBDiscussionSession.query(TextVersion).filter_by(statement_uid=self.statement_town.uid).first()
+        send_add_text_notification('/discuss/town', self.statement_town.uid, db_textversion.author, DummyMailer())
+        self.assertNotIn(db_textversion.author_uid, [message.to_author_uid for message in self.__new_messages()])
+
+    def test_add_argument_notifies_author(self):
+        send_add_argument_notification('/discuss/town', self.argument_town.uid, self.user_pascal.nickname,
+                                       DummyMailer())
+        messages = self.__new_messages()
+        if self.argument_town.author_uid == self.user_pascal.uid:
+            self.assertEqual(messages, [])
+        else:
+            self.assertEqual([message.to_author_uid for message in messages], [self.argument_town.author_uid])
@@ -4,7 +4,7 @@ Handler for user-accounts
 import logging
 import random
 import uuid
-from datetime import date, timedelta
+from datetime import timedelta
 from typing import Tuple, List, Dict, Union, Any, Optional
 
 import arrow
@@ -20,11 +20,13 @@ from dbas.database.discussion_model import User, Group, ClickedStatement, Clicke
     LastReviewerEdit, LastReviewerOptimization, \
     LastReviewerSplit, LastReviewerMerge, ReputationHistory, ReviewCanceled, RevokedContent, RevokedContentHistory, \
     Issue, Argument, Language
+from dbas.handler.activity import get_user_activity, delete_activity_of, utc_today
 from dbas.handler.email import send_mail
 from dbas.handler.notification import send_welcome_notification
 from dbas.handler.opinion import get_user_with_same_opinion_for_argument, \
     get_user_with_same_opinion_for_statements, get_user_with_opinions_for_attitude, \
     get_user_with_same_opinion_for_premisegroups_of_args, get_user_and_opinions_for_argument
+from dbas.helper.last_action import last_actions
 from dbas.lib import pretty_print_timestamp, get_text_for_argument_uid, \
     get_profile_picture, nick_of_anonymous_user
 from dbas.review.reputation import get_reputation_of
@@ -146,7 +148,13 @@ def should_log_out(timeout: int, user: User) -> bool:
         return False
 
     # check difference of
-    diff_action: timedelta = get_now() - user.last_action
+    # the newest action may still wait in the buffer of this worker
+    last_action = user.last_action
+    buffered_action = last_actions.get(user.nickname)
+    if buffered_action is not None and buffered_action > last_action:
+        last_action = buffered_action
+
+    diff_action: timedelta = get_now() - last_action
     diff_login: timedelta = get_now() - user.last_login
     diff_action: int = diff_action.seconds + diff_action.days * 24 * 60 * 60
     diff_login: int = diff_login.seconds + diff_login.days * 24 * 60 * 60
@@ -191,7 +199,7 @@ def _labels_for_historical_data(days: int, lang: str) -> List[str]:
     """
     labels = []
     for days_diff in range(days, -1, -1):
-        date_begin = date.today() - timedelta(days=days_diff)
+        date_begin = utc_today() - timedelta(days=days_diff)
         timestamp = pretty_print_timestamp(date_begin, lang)
         labels.append(timestamp)
     return labels
@@ -206,8 +214,8 @@ def _time_range_list(days: int) -> List[Tuple[Arrow, Arrow]]:
     """
     time_range = []
     for days_diff in range(days, -1, -1):
-        date_begin = date.today() - timedelta(days=days_diff)
-        date_end = date.today() - timedelta(days=days_diff - 1)
+        date_begin = utc_today() - timedelta(days=days_diff)
+        date_end = utc_today() - timedelta(days=days_diff - 1)
         begin = arrow.get(date_begin.strftime('%Y-%m-%d'), 'YYYY-MM-DD')
         end = arrow.get(date_end.strftime('%Y-%m-%d'), 'YYYY-MM-DD')
         time_range.append((begin, end))
@@ -215,47 +223,23 @@ def _time_range_list(days: int) -> List[Tuple[Arrow, Arrow]]:
     return time_range
 
 
-def _historical_user_data_for_decisions(user: User, days: int) -> List:
+def _historical_user_data(user: User, days: int) -> Dict[str, List[int]]:
     """
-    Return public data regarding the clicked Statements for a certain user
+    Return the public historical data regarding clicks, statements and edits of a certain user.
 
-    :param days: The number of days ending with today for which the data shall be procured.
     :param user: The user for which the data shall be procured.
-    :return: A Tuple containing the labels and the data points.
-    """
-    data = []
-    for begin, end in _time_range_list(days):
-        db_clicks_statements = DBDiscussionSession.query(ClickedStatement).filter(
-            ClickedStatement.author_uid == user.uid,
-            ClickedStatement.timestamp >= begin,
-            ClickedStatement.timestamp < end).all()
-        db_clicks_arguments = DBDiscussionSession.query(ClickedArgument).filter(
-            ClickedArgument.author_uid == user.uid,
-            ClickedArgument.timestamp >= begin,
-            ClickedArgument.timestamp < end).all()
-        clicks = len(db_clicks_statements) + len(db_clicks_arguments)
-        data.append(clicks)
-
-    return data
-
-
-def _historical_user_data_for_statements_edits(user: User, days: int, lang: str) -> Tuple[List, List]:
-    """
-    Return the public historical data regarding statements and edits of a certain user.
-
-    :param user: The user for which the data shall be procured.
-    :param days: The number of days the data should date back.
-    :param lang: The language in which the data shall be presented.
-    :return: A tuple with two lists containing the data regarding statements and edits.
+    :param days: The number of days ending with today for which the data shall be procured.
+    :return: A dictionary with the data points of every day for 'clicks', 'statements' and 'edits'.
     """
-    statement_data = []
-    edit_data = []
-    for begin, end in _time_range_list(days):
-        get_tv_dict = get_textversions(user, lang, begin, end)
-        statement_data.append(len(get_tv_dict.get('statements', [])))
-        edit_data.append(len(get_tv_dict.get('edits', [])))
-
-    return statement_data, edit_data
+    time_range = _time_range_list(days)
+    activity = get_user_activity(user.uid, time_range[0][0].date(), time_range[-1][1].date(),
+                                 ('statement_clicks', 'argument_clicks', 'statements', 'edits'))
+    counts = [activity[begin.date()] for begin, _ in time_range]
+    return {
+        'clicks': [day['statement_clicks'] + day['argument_clicks'] for day in counts],
+        'statements': [day['statements'] for day in counts],
+        'edits': [day['edits'] for day in counts],
+    }
 
 
 def get_public_data(user_id: int, lang: str) -> Dict[str, List]:
@@ -286,16 +270,16 @@ def get_public_data(user_id: int, lang: str) -> Dict[str, List]:
         return _special_public_data(return_dict, lang)
 
     labels_decision_30 = labels_statement_30 = labels_edit_30 = _labels_for_historical_data(30, lang)
-    data_statement_30, data_edit_30 = _historical_user_data_for_statements_edits(db_user, 30, lang)
+    data_30 = _historical_user_data(db_user, 30)
 
     return_dict['labels1'] = _labels_for_historical_data(7, lang)
     return_dict['labels2'] = labels_decision_30
     return_dict['labels3'] = labels_statement_30
     return_dict['labels4'] = labels_edit_30
-    return_dict['data1'] = _historical_user_data_for_decisions(db_user, 7)
-    return_dict['data2'] = _historical_user_data_for_decisions(db_user, 30)
-    return_dict['data3'] = data_statement_30
-    return_dict['data4'] = data_edit_30
+    return_dict['data1'] = data_30['clicks'][-8:]
+    return_dict['data2'] = data_30['clicks']
+    return_dict['data3'] = data_30['statements']
+    return_dict['data4'] = data_30['edits']
 
     return return_dict
 
@@ -308,8 +292,8 @@ def _special_public_data(rdict: Dict, lang: str) -> Dict[str, List]:
     :param lang: The language in which the dictionary is provided.
     :return: Mock public statistics in a dictionary.
     """
-    rdict['labels1'] = [pretty_print_timestamp(date.today() - timedelta(days=dd), lang) for dd in range(7, -1, -1)]
-    rdict['labels2'] = [pretty_print_timestamp(date.today() - timedelta(days=dd), lang) for dd in range(30, -1, -1)]
+    rdict['labels1'] = [pretty_print_timestamp(utc_today() - timedelta(days=dd), lang) for dd in range(7, -1, -1)]
+    rdict['labels2'] = [pretty_print_timestamp(utc_today() - timedelta(days=dd), lang) for dd in range(30, -1, -1)]
     rdict['labels3'] = rdict['labels2']
     rdict['labels4'] = rdict['labels2']
     rdict['data1'] = [9000.1] * 7
@@ -634,21 +618,19 @@ def get_summary_of_today(db_user: User) -> dict:
         return {}
 
     arg_votes, stat_votes = get_mark_count_of(db_user, True)
-    arg_clicks, stat_clicks = get_click_count_of(db_user, True)
-    reputation, tmp = get_reputation_of(db_user, True)
-    timestamp = arrow.utcnow().to('Europe/Berlin')
-    timestamp.format('DD.MM.')
+    today = utc_today()
+    activity = get_user_activity(db_user.uid, today, today + timedelta(days=1))[today]
 
     ret_dict = {
         'firstname': db_user.firstname,
-        'statements_posted': get_statement_count_of(db_user, True),
-        'edits_done': get_edit_count_of(db_user, True),
+        'statements_posted': activity['statements'],
+        'edits_done': activity['edits'],
         'discussion_arg_votes': arg_votes,
         'discussion_stat_votes': stat_votes,
-        'discussion_arg_clicks': arg_clicks,
-        'discussion_stat_clicks': stat_clicks,
-        'statements_reported': number_of_reviews(db_user, True),
-        'reputation_collected': reputation
+        'discussion_arg_clicks': activity['argument_clicks'],
+        'discussion_stat_clicks': activity['statement_clicks'],
+        'statements_reported': activity['reviews'],
+        'reputation_collected': activity['reputation']
     }
     return ret_dict
 
@@ -933,6 +915,7 @@ def delete(user: User) -> None:
     DBDiscussionSession.query(MarkedStatement).filter_by(author_uid=user.uid).delete()
     DBDiscussionSession.query(Message).filter_by(from_author_uid=user.uid).delete()
     DBDiscussionSession.query(Message).filter_by(to_author_uid=user.uid).delete()
+    delete_activity_of(user.uid)
     DBDiscussionSession.query(User).filter_by(uid=user.uid).delete()
 
 
@@ -0,0 +1,128 @@
+"""
+Provides small in-process caches, which are used to keep hot values of a worker out of the database.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from threading import RLock
+from typing import Any, Callable, Hashable, Optional
+from weakref import WeakSet
+
+LOG = logging.getLogger(__name__)
+
+_missing = object()
+
+# all caches of this process, which are reported by /metrics
+all_caches: 'WeakSet[TTLCache]' = WeakSet()
+
+
+class TTLCache:
+    """
+    Thread-safe, bounded LRU cache whose entries expire after *ttl* seconds.
+
+    Every worker process has its own instances, therefore all values stored here must be safe to be served slightly
+    stale. Invalidate the cache explicitly, whenever the underlying data changes inside this worker.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: Optional[float] = None):
+        """
+        :param name: name of the cache, used for logging and statistics
+        :param maxsize: maximal count of entries, the least recently used entry is dropped first
+        :param ttl: lifetime of an entry in seconds or None, if entries should never expire
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.__data = OrderedDict()
+        self.__lock = RLock()
+        all_caches.add(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the cached value of *key* or *default*, if the key is unknown or expired
+
+        :param key: key of the entry
+        :param default: value which is returned on a miss
+        :return: the cached value or default
+        """
+        with self.__lock:
+            entry = self.__data.get(key, _missing)
+            if entry is not _missing:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self.__data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.__data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Stores *value* for *key*
+
+        :param key: key of the entry
+        :param value: value of the entry
+        :param ttl: lifetime of this entry in seconds, overwrites the lifetime of the cache
+        :return: None
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self.__lock:
+            self.__data[key] = (value, expires_at)
+            self.__data.move_to_end(key)
+            while len(self.__data) > self.maxsize:
+                self.__data.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value of *key* or computes, stores and returns it
+
+        :param key: key of the entry
+        :param compute: function without arguments, which computes the value on a miss
+        :return: the cached or computed value
+        """
+        value = self.get(key, _missing)
+        if value is _missing:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable):
+        """
+        Drops the entry of *key*, if present
+
+        :param key: key of the entry
+        :return: None
+        """
+        with self.__lock:
+            self.__data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """
+        Drops all entries for which *predicate* returns True
+
+        :param predicate: function, which gets the key and the value of an entry
+        :return: count of dropped entries
+        """
+        with self.__lock:
+            keys = [key for key, (value, _) in self.__data.items() if predicate(key, value)]
+            for key in keys:
+                del self.__data[key]
+        return len(keys)
+
+    def clear(self):
+        """
+        Drops all entries of this cache
+
+        :return: None
+        """
+        LOG.debug("Clear cache %s", self.name)
+        with self.__lock:
+            self.__data.clear()
+
+    def __len__(self):
+        return len(self.__data)
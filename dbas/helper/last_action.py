@@ -0,0 +1,155 @@
+"""
+Write-behind buffer for the timestamps of the last actions of the users.
+
+Every response of an authenticated user refreshes ``User.last_action``. Instead of a SELECT and an UPDATE per request,
+the timestamps are collected in memory per worker and written with one UPDATE for all users every
+``last_action.flush_interval`` seconds. A user is touched at most once per ``last_action.granularity`` seconds.
+
+The writer thread is started by the first action in every process, because threads of the uWSGI master do not survive
+the fork of the workers.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import transaction
+from sqlalchemy import case, literal, or_
+
+from dbas.database import DBDiscussionSession
+from dbas.database.discussion_model import User, get_now
+from dbas.helper.cache import TTLCache
+from dbas.metrics import register_queue
+
+LOG = logging.getLogger(__name__)
+
+default_granularity: int = 60
+default_flush_interval: int = 10
+max_pending: int = 16384  # further users are not buffered until the next flush
+
+
+class LastActionBuffer:
+    """
+    Collects the last actions of the users of one worker and writes them in batches
+    """
+
+    def __init__(self, granularity: int = default_granularity, flush_interval: int = default_flush_interval):
+        """
+        :param granularity: seconds in which further actions of a user are not written
+        :param flush_interval: seconds between two writes of the buffer, 0 disables the background thread
+        """
+        self.flush_interval = flush_interval
+        self.__recent = TTLCache('last_action', maxsize=16384, ttl=granularity)
+        self.__pending: Dict[str, object] = {}
+        self.__lock = threading.Lock()
+        self.__pid: Optional[int] = None
+
+    @property
+    def granularity(self) -> int:
+        return self.__recent.ttl
+
+    def configure(self, settings: dict):
+        """
+        Reads granularity and flush interval from the settings
+
+        :param settings: the settings of the app
+        :return: None
+        """
+        self.__recent.ttl = int(settings.get('last_action.granularity', default_granularity))
+        self.__recent.clear()
+        self.flush_interval = int(settings.get('last_action.flush_interval', default_flush_interval))
+
+    def touch(self, nickname: str) -> bool:
+        """
+        Remembers the current time as last action of the user, if the last remembered action is older than the
+        granularity
+
+        :param nickname: nickname of the user
+        :return: True, if the action will be written
+        """
+        if self.__recent.get(nickname) is not None:
+            return False
+
+        self.start()
+        now = get_now()
+        with self.__lock:
+            if len(self.__pending) >= max_pending and nickname not in self.__pending:
+                LOG.warning("Drop the last action of %s, %s actions are waiting to be written", nickname,
+                            len(self.__pending))
+                return False
+            self.__pending[nickname] = now
+        self.__recent.set(nickname, now)
+        return True
+
+    def get(self, nickname: str):
+        """
+        Returns the last action of the user, which was remembered in this worker within the granularity
+
+        :param nickname: nickname of the user
+        :return: Arrow or None
+        """
+        return self.__recent.get(nickname)
+
+    def __len__(self):
+        return len(self.__pending)
+
+    def flush(self) -> int:
+        """
+        Writes all pending actions with a single UPDATE into the current transaction. Timestamps are never moved
+        backwards.
+
+        :return: count of written users
+        """
+        with self.__lock:
+            pending, self.__pending = self.__pending, {}
+        if not pending:
+            return 0
+
+        new_last_action = case({nickname: literal(timestamp, User.last_action.type)
+                                for nickname, timestamp in pending.items()},
+                               value=User.nickname)
+        count = DBDiscussionSession.query(User) \
+            .filter(User.nickname.in_(pending.keys()),
+                    or_(User.last_action.is_(None), User.last_action < new_last_action)) \
+            .update({User.last_action: new_last_action}, synchronize_session=False)
+        LOG.debug("Wrote the last action of %s of %s users", count, len(pending))
+        return count
+
+    def start(self):
+        """
+        Starts the background thread of this process, which flushes the buffer every flush interval, and flushes the
+        buffer when the process exits. Forked workers start their own thread.
+
+        :return: None
+        """
+        if self.flush_interval <= 0 or self.__pid == os.getpid():
+            return
+        with self.__lock:
+            if self.__pid == os.getpid():
+                return
+            self.__pid = os.getpid()
+            # actions, which were buffered before the fork, are written by the parent
+            self.__pending = {}
+        threading.Thread(target=self.__run, name='last-action-writer', daemon=True).start()
+        atexit.register(self.__flush_in_transaction)
+
+    def __run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.__flush_in_transaction()
+
+    def __flush_in_transaction(self):
+        try:
+            with transaction.manager:
+                self.flush()
+        except Exception:
+            LOG.exception("Could not write the last actions of the users")
+        finally:
+            DBDiscussionSession.remove()
+
+
+last_actions = LastActionBuffer()
+register_queue('last_action', last_actions)
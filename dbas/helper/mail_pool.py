@@ -0,0 +1,283 @@
+"""
+Bounded pool of workers, which deliver the mails of D-BAS.
+
+Mails are queued and sent by a fixed count of worker threads. Every worker keeps its SMTP connection open for
+``idle_timeout`` seconds, therefore a burst of notifications is delivered over a few connections. If the queue is
+full, submitting a mail waits for ``submit_timeout`` seconds and is rejected afterwards. Failed deliveries are retried
+with an exponential backoff.
+"""
+
+import heapq
+import itertools
+import logging
+import smtplib
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from pyramid_mailer.message import Message
+from repoze.sendmail.encoding import encode_message
+
+from dbas.metrics import register_queue
+
+LOG = logging.getLogger(__name__)
+
+
+class MailJob:
+    """
+    A mail and the count of its delivery attempts
+    """
+
+    def __init__(self, mailer, message: Message):
+        self.mailer = mailer
+        self.message = message
+        self.attempts = 0
+
+
+class MailPool:
+    """
+    Queue of mails, which is processed by a fixed count of worker threads
+    """
+
+    def __init__(self, workers: int = 2, max_size: int = 1000, submit_timeout: float = 1.0, max_attempts: int = 3,
+                 retry_delay: float = 2.0, idle_timeout: float = 30.0, autostart: bool = True):
+        """
+        :param workers: count of worker threads and therefore of concurrent SMTP connections
+        :param max_size: maximal count of queued mails
+        :param submit_timeout: seconds, which a submit waits for a free place in a full queue
+        :param max_attempts: maximal count of delivery attempts of a mail
+        :param retry_delay: seconds before the first retry, doubled on every further retry
+        :param idle_timeout: seconds, after which an unused SMTP connection is closed
+        :param autostart: True, if the workers should be started with the first mail
+        """
+        self.workers = workers
+        self.max_size = max_size
+        self.submit_timeout = submit_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.idle_timeout = idle_timeout
+        self.autostart = autostart
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.rejected = 0
+        self.connections_opened = 0
+        self.__queue: List[Tuple[float, int, MailJob]] = []
+        self.__counter = itertools.count()
+        self.__condition = threading.Condition()
+        self.__threads: List[threading.Thread] = []
+
+    def __len__(self):
+        return len(self.__queue)
+
+    def configure(self, settings: dict):
+        """
+        Reads the size of the pool and the retry policy from the settings
+
+        :param settings: the settings of the app
+        :return: None
+        """
+        self.workers = int(settings.get('mail.pool.workers', self.workers))
+        self.max_size = int(settings.get('mail.pool.max_size', self.max_size))
+        self.max_attempts = int(settings.get('mail.pool.max_attempts', self.max_attempts))
+        self.retry_delay = float(settings.get('mail.pool.retry_delay', self.retry_delay))
+
+    def metrics(self) -> Dict[str, int]:
+        """
+        Returns the delivery metrics of this pool
+
+        :return: dictionary with the counters and the current queue size
+        """
+        return {
+            'queued': len(self),
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+            'rejected': self.rejected,
+            'connections_opened': self.connections_opened,
+        }
+
+    def submit(self, mailer, message: Message) -> bool:
+        """
+        Queues a mail. If the queue is full, this waits for submit_timeout seconds.
+
+        :param mailer: mailer of pyramid_mailer
+        :param message: the mail
+        :return: True, if the mail was queued
+        """
+        deadline = time.monotonic() + self.submit_timeout
+        with self.__condition:
+            while len(self.__queue) >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.rejected += 1
+                    LOG.warning("The mail queue is full, reject the mail to %s", message.recipients)
+                    return False
+                self.__condition.wait(remaining)
+            self.__push(MailJob(mailer, message), time.monotonic())
+
+        if self.autostart:
+            self.start()
+        return True
+
+    def start(self):
+        """
+        Starts the worker threads, if they are not running yet
+
+        :return: None
+        """
+        with self.__condition:
+            while len(self.__threads) < self.workers:
+                thread = threading.Thread(target=self.__run, name=f'mail-worker-{len(self.__threads)}', daemon=True)
+                self.__threads.append(thread)
+                thread.start()
+
+    def process(self, include_delayed: bool = False) -> int:
+        """
+        Delivers all queued mails, which are due, in the calling thread over one connection
+
+        :param include_delayed: True, if mails waiting for a retry should be delivered, too
+        :return: count of processed mails
+        """
+        worker = _Worker(self)
+        count = 0
+        try:
+            while True:
+                job = self.__pop(wait=False, include_delayed=include_delayed)
+                if job is None:
+                    return count
+                worker.deliver(job)
+                count += 1
+        finally:
+            worker.close()
+
+    def __push(self, job: MailJob, due: float):
+        heapq.heappush(self.__queue, (due, next(self.__counter), job))
+        self.__condition.notify_all()
+
+    def __pop(self, wait: bool, include_delayed: bool = False, timeout: Optional[float] = None) -> Optional[MailJob]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.__condition:
+            while True:
+                now = time.monotonic()
+                if self.__queue and (include_delayed or self.__queue[0][0] <= now):
+                    job = heapq.heappop(self.__queue)[2]
+                    self.__condition.notify_all()
+                    return job
+                if not wait or (deadline is not None and deadline <= now):
+                    return None
+                waits = [self.__queue[0][0] - now] if self.__queue else []
+                if deadline is not None:
+                    waits.append(deadline - now)
+                self.__condition.wait(min(waits) if waits else None)
+
+    def __run(self):
+        worker = _Worker(self)
+        while True:
+            job = self.__pop(wait=True, timeout=self.idle_timeout if worker.has_connections() else None)
+            if job is None:
+                worker.close()
+                continue
+            try:
+                worker.deliver(job)
+            except Exception:
+                LOG.exception("Unexpected error in the mail worker")
+
+    def _retry_or_fail(self, job: MailJob, error: Exception):
+        if job.attempts < self.max_attempts:
+            delay = self.retry_delay * 2 ** (job.attempts - 1)
+            LOG.warning("Could not send mail to %s (%s), retry in %s seconds", job.message.recipients, error, delay)
+            self.retried += 1
+            with self.__condition:
+                self.__push(job, time.monotonic() + delay)
+        else:
+            LOG.error("Could not send mail to %s after %s attempts: %s", job.message.recipients, job.attempts, error)
+            self.failed += 1
+
+
+class _Worker:
+    """
+    Delivers mails and keeps one SMTP connection per mailer open
+    """
+
+    def __init__(self, pool: MailPool):
+        self.pool = pool
+        self.__connections: Dict[int, smtplib.SMTP] = {}
+
+    def has_connections(self) -> bool:
+        return bool(self.__connections)
+
+    def deliver(self, job: MailJob):
+        job.attempts += 1
+        smtp_mailer = getattr(job.mailer, 'smtp_mailer', None)
+        try:
+            if smtp_mailer is None:
+                # mailers without SMTP, e.g. the DummyMailer of the tests
+                job.mailer.send_immediately(job.message, fail_silently=False)
+            else:
+                self.__send(job, smtp_mailer)
+        except (smtplib.SMTPException, OSError) as e:
+            self.__close(smtp_mailer)
+            self.pool._retry_or_fail(job, e)
+            return
+        except TypeError as e:
+            LOG.error("TypeError %s", e)
+            self.pool.failed += 1
+            return
+        self.pool.sent += 1
+
+    def close(self):
+        for connection in self.__connections.values():
+            try:
+                connection.quit()
+            except (smtplib.SMTPException, OSError):
+                connection.close()
+        self.__connections.clear()
+
+    def __send(self, job: MailJob, smtp_mailer):
+        message = job.message
+        sender = message.sender or job.mailer.default_sender
+        connection = self.__connections.get(id(smtp_mailer))
+        if connection is None:
+            connection = self.__connections[id(smtp_mailer)] = self.__connect(smtp_mailer)
+        try:
+            connection.sendmail(sender, message.send_to, encode_message(message.to_message()))
+        except smtplib.SMTPServerDisconnected:
+            # the server closed the idle connection, reconnect once
+            connection = self.__connections[id(smtp_mailer)] = self.__connect(smtp_mailer)
+            connection.sendmail(sender, message.send_to, encode_message(message.to_message()))
+
+    def __connect(self, smtp_mailer) -> smtplib.SMTP:
+        """
+        Opens and authenticates a connection like repoze.sendmail does for every single mail
+
+        :param smtp_mailer: SMTPMailer of the mailer
+        :return: the connection
+        """
+        connection = smtp_mailer.smtp_factory()
+        code, response = connection.ehlo()
+        if not 200 <= code < 300:
+            code, response = connection.helo()
+            if not 200 <= code < 300:
+                raise smtplib.SMTPHeloError(code, response)
+
+        have_tls = connection.has_extn('starttls')
+        if not have_tls and smtp_mailer.force_tls:
+            raise smtplib.SMTPNotSupportedError('TLS is not available but TLS is required')
+        if have_tls and not smtp_mailer.no_tls:
+            connection.starttls()
+            connection.ehlo()
+
+        if smtp_mailer.username is not None and smtp_mailer.password is not None:
+            connection.login(smtp_mailer.username, smtp_mailer.password)
+        self.pool.connections_opened += 1
+        return connection
+
+    def __close(self, smtp_mailer):
+        connection = self.__connections.pop(id(smtp_mailer), None)
+        if connection is not None:
+            connection.close()
+
+
+mail_pool = MailPool()
+register_queue('mail', mail_pool)
@@ -0,0 +1,61 @@
+import unittest
+from unittest import mock
+
+from dbas.helper.cache import TTLCache
+
+
+class TTLCacheTest(unittest.TestCase):
+
+    def test_get_and_set(self):
+        cache = TTLCache('test')
+        self.assertIsNone(cache.get('key'))
+        cache.set('key', 42)
+        self.assertEqual(cache.get('key'), 42)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+
+    def test_least_recently_used_entry_is_dropped(self):
+        cache = TTLCache('test', maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+
+    def test_entries_expire(self):
+        cache = TTLCache('test', ttl=10)
+        with mock.patch('dbas.helper.cache.time.monotonic', return_value=100):
+            cache.set('key', 42)
+        with mock.patch('dbas.helper.cache.time.monotonic', return_value=105):
+            self.assertEqual(cache.get('key'), 42)
+        with mock.patch('dbas.helper.cache.time.monotonic', return_value=111):
+            self.assertIsNone(cache.get('key'))
+        self.assertEqual(len(cache), 0)
+
+    def test_get_or_compute(self):
+        cache = TTLCache('test')
+        compute = mock.Mock(return_value=0)
+        self.assertEqual(cache.get_or_compute('key', compute), 0)
+        self.assertEqual(cache.get_or_compute('key', compute), 0)
+        compute.assert_called_once()
+
+    def test_invalidate_and_clear(self):
+        cache = TTLCache('test')
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.invalidate('a')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 2)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate_where(self):
+        cache = TTLCache('test')
+        cache.set('a', (1, 'x'))
+        cache.set('b', (2, 'y'))
+        cache.set('c', (1, 'z'))
+        self.assertEqual(cache.invalidate_where(lambda _, value: value[0] == 1), 2)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get('b'), (2, 'y'))
@@ -0,0 +1,81 @@
+from unittest import mock
+
+import arrow
+import transaction
+
+from dbas.database import DBDiscussionSession
+from dbas.database.discussion_model import User
+from dbas.helper import last_action
+from dbas.helper.last_action import LastActionBuffer
+from dbas.tests.utils import TestCaseWithConfig
+
+
+class LastActionBufferTest(TestCaseWithConfig):
+
+    def setUp(self):
+        super().setUp()
+        self.buffer = LastActionBuffer(granularity=60, flush_interval=0)
+
+    def __set_last_action(self, nickname: str, last_action):
+        DBDiscussionSession.query(User).filter_by(nickname=nickname).update({User.last_action: last_action})
+        transaction.commit()
+
+    def test_touch_respects_granularity(self):
+        self.assertTrue(self.buffer.touch('Tobias'))
+        self.assertFalse(self.buffer.touch('Tobias'))
+        self.assertTrue(self.buffer.touch('Christian'))
+        self.assertEqual(len(self.buffer), 2)
+        self.assertIsNotNone(self.buffer.get('Tobias'))
+        self.assertIsNone(self.buffer.get('Walter'))
+
+    def test_flush_writes_all_users_at_once(self):
+        past = arrow.get('2017-01-01T00:00:00+00:00')
+        self.__set_last_action('Tobias', past)
+        self.__set_last_action('Christian', past)
+
+        self.buffer.touch('Tobias')
+        self.buffer.touch('Christian')
+        self.assertEqual(self.buffer.flush(), 2)
+        transaction.commit()
+        self.assertEqual(len(self.buffer), 0)
+
+        for nickname in ('Tobias', 'Christian'):
+            db_user = DBDiscussionSession.query(User).filter_by(nickname=nickname).one()
+            self.assertGreater(db_user.last_action, past)
+
+    def test_flush_never_moves_backwards(self):
+        future = arrow.utcnow().shift(days=1)
+        self.__set_last_action('Tobias', future)
+
+        self.buffer.touch('Tobias')
+        self.assertEqual(self.buffer.flush(), 0)
+        transaction.commit()
+
+        db_user = DBDiscussionSession.query(User).filter_by(nickname='Tobias').one()
+        self.assertEqual(db_user.last_action, future)
+
+    def test_flush_without_pending_actions(self):
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_pending_actions_are_capped(self):
+        with mock.patch.object(last_action, 'max_pending', 1):
+            self.assertTrue(self.buffer.touch('Tobias'))
+            self.assertFalse(self.buffer.touch('Christian'))
+            self.assertEqual(len(self.buffer), 1)
+            # the dropped user is buffered after the next flush
+            self.assertIsNone(self.buffer.get('Christian'))
+            self.buffer.flush()
+            self.assertTrue(self.buffer.touch('Christian'))
+
+    def test_writer_is_started_once_per_process(self):
+        buffer = LastActionBuffer(granularity=60, flush_interval=60)
+        with mock.patch('threading.Thread') as thread, mock.patch('atexit.register'):
+            buffer.touch('Tobias')
+            buffer.touch('Christian')
+            self.assertEqual(thread.call_count, 1)
+
+            # a forked worker starts its own writer and leaves the actions of the parent to the parent
+            with mock.patch('os.getpid', return_value=-1):
+                buffer.touch('Walter')
+            self.assertEqual(thread.call_count, 2)
+            self.assertEqual(len(buffer), 1)
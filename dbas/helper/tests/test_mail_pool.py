@@ -0,0 +1,101 @@
+import socketserver
+import threading
+import unittest
+
+from pyramid_mailer import Mailer
+from pyramid_mailer.mailer import DummyMailer
+from pyramid_mailer.message import Message
+
+from dbas.helper.mail_pool import MailPool
+
+
+class _DebuggingSMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Minimal SMTP server, which accepts every mail and remembers the recipients
+    """
+
+    def handle(self):
+        self.server.connections += 1
+        self.__reply('220 localhost debugging server')
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode('utf-8').strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.__reply('221 bye')
+                return
+            if command == 'EHLO':
+                self.__reply('250 localhost')
+            elif command == 'RCPT':
+                recipients.append(line.split(':', 1)[1].strip('<> '))
+                self.__reply('250 ok')
+            elif command == 'DATA':
+                self.__reply('354 end with .')
+                while self.rfile.readline().rstrip(b'\r\n') != b'.':
+                    pass
+                self.server.received.extend(recipients)
+                recipients = []
+                self.__reply('250 ok')
+            else:
+                self.__reply('250 ok')
+
+    def __reply(self, text):
+        self.wfile.write((text + '\r\n').encode('utf-8'))
+
+
+class MailPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(('localhost', 0), _DebuggingSMTPHandler)
+        self.server.daemon_threads = True
+        self.server.connections = 0
+        self.server.received = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.mailer = Mailer(host='localhost', port=self.server.server_address[1],
+                             default_sender='dbas@localhost')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @staticmethod
+    def __message(recipient: str) -> Message:
+        return Message(subject='Test', sender='dbas@localhost', recipients=[recipient], body='Hello')
+
+    def test_connection_is_reused(self):
+        pool = MailPool(autostart=False)
+        for i in range(5):
+            self.assertTrue(pool.submit(self.mailer, self.__message(f'user{i}@localhost')))
+
+        self.assertEqual(pool.process(), 5)
+        self.assertEqual(self.server.received, [f'user{i}@localhost' for i in range(5)])
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(pool.metrics()['sent'], 5)
+        self.assertEqual(pool.metrics()['connections_opened'], 1)
+
+    def test_full_queue_rejects_mails(self):
+        pool = MailPool(max_size=1, submit_timeout=0.1, autostart=False)
+        self.assertTrue(pool.submit(self.mailer, self.__message('a@localhost')))
+        self.assertFalse(pool.submit(self.mailer, self.__message('b@localhost')))
+        self.assertEqual(pool.metrics()['rejected'], 1)
+        self.assertEqual(len(pool), 1)
+
+    def test_failed_deliveries_are_retried(self):
+        unreachable = Mailer(host='localhost', port=1)
+        pool = MailPool(max_attempts=3, retry_delay=60, autostart=False)
+        pool.submit(unreachable, self.__message('a@localhost'))
+
+        self.assertEqual(pool.process(), 1)
+        self.assertEqual(pool.metrics()['retried'], 1)
+        self.assertEqual(len(pool), 1)
+
+        self.assertEqual(pool.process(include_delayed=True), 2)
+        self.assertEqual(pool.metrics()['failed'], 1)
+        self.assertEqual(len(pool), 0)
+
+    def test_mailers_without_smtp(self):
+        mailer = DummyMailer()
+        pool = MailPool(autostart=False)
+        pool.submit(mailer, self.__message('a@localhost'))
+        pool.process()
+        self.assertEqual(len(mailer.outbox), 1)
@@ -0,0 +1,566 @@
+"""
+Runtime metrics of D-BAS in the text format of Prometheus, which are served by ``/metrics``.
+
+Every worker process records its own metrics. If ``metrics.multiprocess_dir`` or ``PROMETHEUS_MULTIPROC_DIR`` is set,
+every process writes a snapshot of its metrics into this directory every ``metrics.flush_interval`` seconds and when it
+exits. ``/metrics`` merges the snapshots of all processes: counters and histograms are summed over all processes, which
+ever wrote a snapshot, gauges only over the running processes. The directory has to be emptied before the server starts.
+"""
+
+import atexit
+import glob
+import ipaddress
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from pyramid.httpexceptions import HTTPForbidden
+from pyramid.request import Request
+from pyramid.response import Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from dbas.helper.cache import all_caches
+
+LOG = logging.getLogger(__name__)
+
+content_type = 'text/plain; version=0.0.4; charset=utf-8'
+default_buckets = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+sql_buckets = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+http_methods = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Sample(NamedTuple):
+    name: str
+    labels: Labels
+    value: float
+
+
+class MetricFamily(NamedTuple):
+    name: str
+    type: str
+    documentation: str
+    samples: List[Sample]
+
+
+class Metric:
+    """
+    Base of all metrics. The values are stored per combination of label values.
+    """
+    type = 'untyped'
+    per_process = True
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        :param name: name of the metric
+        :param documentation: help text of the metric
+        :param labelnames: names of the labels
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = OrderedDict()
+
+    def collect(self) -> MetricFamily:
+        return MetricFamily(self.name, self.type, self.documentation, self.samples())
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [Sample(self.name, self._pairs(key), value) for key, value in self._values.items()]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames) or set(labels) != set(self.labelnames):
+            raise ValueError(f'Metric {self.name} expects the labels {self.labelnames}, not {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _pairs(self, key: Tuple[str, ...]) -> Labels:
+        return tuple(zip(self.labelnames, key))
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError('A counter can not decrease')
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = default_buckets):
+        """
+        :param buckets: ascending upper bounds of the buckets, +Inf is added
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observes the duration of the with-block
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in values:
+            pairs = self._pairs(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = '+Inf' if bound == math.inf else repr(float(bound))
+                samples.append(Sample(f'{self.name}_bucket', pairs + (('le', le),), cumulative))
+            samples.append(Sample(f'{self.name}_sum', pairs, total))
+            samples.append(Sample(f'{self.name}_count', pairs, cumulative))
+        return samples
+
+
+class CallbackMetric(Metric):
+    """
+    Metric, whose values are read from a function when the metrics are collected
+    """
+
+    def __init__(self, name: str, documentation: str, type: str, func: Callable[[], Dict[Tuple[str, ...], float]],
+                 labelnames: Sequence[str] = (), per_process: bool = True):
+        """
+        :param type: 'counter' or 'gauge'
+        :param func: returns the values by the tuple of the label values
+        :param per_process: False, if the value is the same in every process and only read by the scraping one
+        """
+        super().__init__(name, documentation, labelnames)
+        self.type = type
+        self.func = func
+        self.per_process = per_process
+
+    def samples(self) -> List[Sample]:
+        return [Sample(self.name, self._pairs(key), value) for key, value in self.func().items()]
+
+
+class MetricsRegistry:
+    """
+    Metrics of this process, which are merged with the snapshots of the other worker processes
+    """
+
+    def __init__(self, flush_interval: float = 5.0):
+        """
+        :param flush_interval: seconds between two snapshots of this process
+        """
+        self.directory: Optional[str] = None
+        self.flush_interval = flush_interval
+        self.allowed_networks = [ipaddress.ip_network('127.0.0.0/8'), ipaddress.ip_network('::1/128')]
+        self.__metrics: Dict[str, Metric] = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__pid: Optional[int] = None
+
+    def configure(self, settings: dict):
+        """
+        Reads the directory of the snapshots, the flush interval and the allowed networks from the settings
+
+        :param settings: settings of the app
+        :return: None
+        """
+        self.directory = settings.get('metrics.multiprocess_dir') or os.environ.get('PROMETHEUS_MULTIPROC_DIR') or None
+        self.flush_interval = float(settings.get('metrics.flush_interval', self.flush_interval))
+        networks = settings.get('metrics.allowed_networks')
+        if networks is not None:
+            self.allowed_networks = [ipaddress.ip_network(network, strict=False) for network in networks.split()]
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def register(self, metric: Metric) -> Metric:
+        with self.__lock:
+            if metric.name in self.__metrics:
+                raise ValueError(f'There is already a metric {metric.name}')
+            self.__metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, metric: Metric):
+        with self.__lock:
+            self.__metrics.pop(metric.name, None)
+
+    def collect(self, per_process: bool = True) -> List[MetricFamily]:
+        """
+        Collects the metrics of this process
+
+        :param per_process: True for the metrics of this process, False for the metrics, which are the same in all
+        :return: list of metric families
+        """
+        families = []
+        for metric in list(self.__metrics.values()):
+            if metric.per_process != per_process:
+                continue
+            try:
+                families.append(metric.collect())
+            except Exception:
+                LOG.exception("Could not collect the metric %s", metric.name)
+        return families
+
+    def collect_all(self) -> List[MetricFamily]:
+        """
+        Collects the metrics of all worker processes
+
+        :return: list of metric families
+        """
+        if not self.directory:
+            return self.collect() + self.collect(per_process=False)
+        self.flush()
+        return merge(self.__read_snapshots()) + self.collect(per_process=False)
+
+    def is_allowed(self, address: Optional[str]) -> bool:
+        """
+        Checks whether the client may read the metrics without authentication
+
+        :param address: ip address of the client
+        :return: True, if the address is in an allowed network
+        """
+        try:
+            ip = ipaddress.ip_address(address or '')
+        except ValueError:
+            return False
+        return any(ip in network for network in self.allowed_networks)
+
+    def start(self):
+        """
+        Starts the thread, which writes the snapshots of this process. Forked workers start their own thread.
+
+        :return: None
+        """
+        if not self.directory or self.__pid == os.getpid():
+            return
+        with self.__lock:
+            if self.__pid == os.getpid():
+                return
+            self.__pid = os.getpid()
+        threading.Thread(target=self.__run, name='metrics-snapshot', daemon=True).start()
+        atexit.register(self.flush)
+
+    def flush(self):
+        """
+        Writes the snapshot of this process into the directory
+
+        :return: None
+        """
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump([family._asdict() for family in self.collect()], f)
+        os.replace(tmp_path, path)
+
+    def __run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                LOG.exception("Could not write the snapshot of the metrics")
+
+    def __read_snapshots(self) -> Iterable[Tuple[bool, List[MetricFamily]]]:
+        for path in sorted(glob.glob(os.path.join(self.directory, '*.json'))):
+            try:
+                with open(path) as f:
+                    families = [MetricFamily(family['name'], family['type'], family['documentation'],
+                                             [Sample(name, tuple(map(tuple, labels)), value)
+                                              for name, labels, value in family['samples']])
+                                for family in json.load(f)]
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                LOG.warning("Could not read the snapshot %s: %s", path, e)
+                continue
+            yield is_running(int(os.path.basename(path).split('.')[0])), families
+
+
+def merge(snapshots: Iterable[Tuple[bool, List[MetricFamily]]]) -> List[MetricFamily]:
+    """
+    Sums up the samples of the snapshots. Gauges of processes, which are not running anymore, are skipped.
+
+    :param snapshots: tuples of a flag, whether the process is running, and its metric families
+    :return: merged metric families
+    """
+    families: Dict[str, MetricFamily] = OrderedDict()
+    values: Dict[str, Dict[Tuple[str, Labels], float]] = defaultdict(OrderedDict)
+    for running, snapshot in snapshots:
+        for family in snapshot:
+            families.setdefault(family.name, family)
+            if family.type == 'gauge' and not running:
+                continue
+            family_values = values[family.name]
+            for sample in family.samples:
+                key = (sample.name, sample.labels)
+                family_values[key] = family_values.get(key, 0) + sample.value
+    return [MetricFamily(name, family.type, family.documentation,
+                         [Sample(name, labels, value) for (name, labels), value in values[name].items()])
+            for name, family in families.items()]
+
+
+def render(families: Iterable[MetricFamily]) -> str:
+    """
+    Renders metric families in the text format of Prometheus
+
+    :param families: metric families
+    :return: text of the exposition
+    """
+    lines = []
+    for family in families:
+        lines.append(f'# HELP {family.name} {family.documentation}')
+        lines.append(f'# TYPE {family.name} {family.type}')
+        for sample in family.samples:
+            labels = ','.join(f'{name}="{escape_label_value(value)}"' for name, value in sample.labels)
+            labels = f'{{{labels}}}' if labels else ''
+            lines.append(f'{sample.name}{labels} {format_value(sample.value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+metrics = MetricsRegistry()
+
+request_duration = metrics.register(Histogram('dbas_http_request_duration_seconds', 'Duration of the requests',
+                                              ('route', 'method', 'status')))
+requests_in_flight = metrics.register(Gauge('dbas_http_requests_in_flight', 'Requests, which are processed'))
+sql_duration = metrics.register(Histogram('dbas_sql_query_duration_seconds', 'Duration of the SQL statements',
+                                          buckets=sql_buckets))
+pool_checkouts = metrics.register(Counter('dbas_db_pool_checkouts_total', 'Checkouts of pooled connections'))
+outbound_duration = metrics.register(Histogram('dbas_outbound_request_duration_seconds',
+                                               'Duration of the requests to other services', ('service',)))
+outbound_errors = metrics.register(Counter('dbas_outbound_request_errors_total',
+                                           'Failed requests to other services', ('service',)))
+
+__pools = []
+__queues = OrderedDict()
+
+
+def instrument_engine(engine: Engine):
+    """
+    Records the SQL statements and the pool checkouts of the engine
+
+    :param engine: engine of the database
+    :return: None
+    """
+    if engine.pool in __pools:
+        return
+    __pools.append(engine.pool)
+    event.listen(engine, 'before_cursor_execute', __before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', __after_cursor_execute)
+    event.listen(engine.pool, 'checkout', lambda *_: pool_checkouts.inc())
+
+
+def register_queue(name: str, queue):
+    """
+    Reports the depth of a background queue. If the queue has a ``metrics()`` method, like the mail pool, its counters
+    are reported, too.
+
+    :param name: name of the queue
+    :param queue: queue, which supports len()
+    :return: None
+    """
+    __queues[name] = queue
+
+
+@contextmanager
+def observe_outbound(service: str):
+    """
+    Records the duration and the failure of a request to another service in the with-block
+
+    :param service: name of the service
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        outbound_errors.inc(service=service)
+        raise
+    finally:
+        outbound_duration.observe(time.perf_counter() - start, service=service)
+
+
+def metrics_tween_factory(handler, registry):
+    """
+    Records the duration and the count of requests, which are in flight
+    """
+
+    def metrics_tween(request: Request):
+        metrics.start()
+        requests_in_flight.inc()
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = handler(request)
+            status = response.status_code
+            return response
+        finally:
+            requests_in_flight.dec()
+            route = request.matched_route.name if request.matched_route else 'none'
+            method = request.method if request.method in http_methods else 'other'
+            request_duration.observe(time.perf_counter() - start, route=route, method=method, status=status)
+
+    return metrics_tween
+
+
+def metrics_view(request: Request):
+    """
+    Returns the metrics of all worker processes to clients of the allowed networks and admins. The network is checked
+    against the address of the peer, because X-Forwarded-For can be set by every client.
+
+    :param request: current request of the server
+    :return: text of the exposition
+    """
+    if not metrics.is_allowed(request.remote_addr) and not request.has_permission('admin'):
+        return HTTPForbidden()
+    response = Response(render(metrics.collect_all()))
+    response.headers['Content-Type'] = content_type
+    return response
+
+
+def includeme(config):
+    metrics.configure(config.get_settings())
+    instrument_engine(__get_bound_engine())
+    config.add_route('metrics', '/metrics')
+    config.add_view(metrics_view, route_name='metrics', permission='everybody')
+    config.add_tween('dbas.metrics.metrics_tween_factory')
+
+
+def __get_bound_engine() -> Engine:
+    from dbas.database import DBDiscussionSession
+    return DBDiscussionSession.get_bind()
+
+
+def __before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_start', []).append(time.perf_counter())
+
+
+def __after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_start')
+    if starts:
+        sql_duration.observe(time.perf_counter() - starts.pop())
+
+
+def __pool_values() -> Dict[str, float]:
+    values = defaultdict(float)
+    for pool in __pools:
+        for name in ('size', 'checkedout', 'overflow'):
+            if hasattr(pool, name):
+                values[name] += getattr(pool, name)()
+    return values
+
+
+def __cache_values(attribute: str) -> Dict[Tuple[str, ...], float]:
+    values = defaultdict(float)
+    for cache in list(all_caches):
+        values[(cache.name,)] += len(cache) if attribute == 'entries' else getattr(cache, attribute)
+    return values
+
+
+def __queue_depths() -> Dict[Tuple[str, ...], float]:
+    return {(name,): len(queue) for name, queue in __queues.items()}
+
+
+def __queue_jobs() -> Dict[Tuple[str, ...], float]:
+    values = {}
+    for name, queue in __queues.items():
+        if hasattr(queue, 'metrics'):
+            values.update({(name, outcome): count for outcome, count in queue.metrics().items() if outcome != 'queued'})
+    return values
+
+
+def __review_jobs() -> Dict[Tuple[str, ...], float]:
+    from sqlalchemy import func
+    from dbas.database import DBDiscussionSession
+    from dbas.database.discussion_model import ReviewExecutionJob
+
+    rows = DBDiscussionSession.query(ReviewExecutionJob.state, func.count(ReviewExecutionJob.uid)).group_by(
+        ReviewExecutionJob.state).all()
+    return {(state,): count for state, count in rows}
+
+
+metrics.register(CallbackMetric('dbas_db_pool_size', 'Size of the connection pool', 'gauge',
+                                lambda: {(): __pool_values()['size']}))
+metrics.register(CallbackMetric('dbas_db_pool_checkedout', 'Connections, which are checked out of the pool', 'gauge',
+                                lambda: {(): __pool_values()['checkedout']}))
+metrics.register(CallbackMetric('dbas_db_pool_overflow', 'Connections, which are opened beyond the size of the pool',
+                                'gauge', lambda: {(): __pool_values()['overflow']}))
+metrics.register(CallbackMetric('dbas_cache_hits_total', 'Hits of the in-process caches', 'counter',
+                                lambda: __cache_values('hits'), ('cache',)))
+metrics.register(CallbackMetric('dbas_cache_misses_total', 'Misses of the in-process caches', 'counter',
+                                lambda: __cache_values('misses'), ('cache',)))
+metrics.register(CallbackMetric('dbas_cache_entries', 'Entries of the in-process caches', 'gauge',
+                                lambda: __cache_values('entries'), ('cache',)))
+metrics.register(CallbackMetric('dbas_queue_depth', 'Items, which wait in a background queue', 'gauge',
+                                __queue_depths, ('queue',)))
+metrics.register(CallbackMetric('dbas_queue_jobs_total', 'Processed items of a background queue by outcome',
+                                'counter', __queue_jobs, ('queue', 'outcome')))
+metrics.register(CallbackMetric('dbas_review_jobs', 'Jobs of the review execution worker by state', 'gauge',
+                                __review_jobs, ('state',), per_process=False))
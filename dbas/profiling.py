@@ -0,0 +1,440 @@
+"""
+On-demand profiling of the requests of live workers.
+
+An admin starts a profiling session for a route pattern, a duration and a sample rate. The session is a file in
+``profiling.dir``, therefore every worker process sees it within a second. A sampled request of a matching route runs
+under cProfile, while a background thread of the worker samples its stack every ``profiling.interval`` seconds. The
+same thread writes the aggregated profile and stacks per route of its worker into ``profiling.dir`` at most every
+``profiling.dump_interval`` seconds, where they are merged for the download as pstats file or as collapsed stacks for
+flamegraphs.
+"""
+
+import atexit
+import cProfile
+import json
+import logging
+import marshal
+import os
+import pstats
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from fnmatch import fnmatch
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from pyramid.interfaces import IRoutesMapper
+from pyramid.request import Request
+
+LOG = logging.getLogger(__name__)
+
+session_file = 'session.json'
+max_duration = 3600  # seconds
+max_stack_depth = 200
+
+
+class ProfilingSession(NamedTuple):
+    pattern: str
+    sample_rate: float
+    started: float
+    until: float
+
+    def matches(self, route) -> bool:
+        """
+        Checks whether the name or the pattern of the route matches the glob pattern of this session
+
+        :param route: route of pyramid
+        :return: True, if requests of this route should be profiled
+        """
+        return fnmatch(route.name, self.pattern) or fnmatch(route.pattern, self.pattern)
+
+    @property
+    def is_active(self) -> bool:
+        return time.time() < self.until
+
+
+class RouteProfile:
+    """
+    Aggregated profile and stack samples of one route in this process
+    """
+
+    def __init__(self, route: str):
+        self.route = route
+        self.requests = 0
+        self.stats: Optional[pstats.Stats] = None
+        self.stacks: Dict[str, int] = Counter()
+        self.changed = False
+        self.dumped_at = 0.0
+        self.dumped_requests = 0
+
+
+class ProfileDump(NamedTuple):
+    """
+    Copy of a route profile, which is written without holding the lock of the profiler
+    """
+    profile: RouteProfile
+    requests: int
+    stats: dict
+    stacks: Dict[str, int]
+
+
+class Profiler:
+    """
+    Profiles sampled requests of the routes, which match the current session
+    """
+
+    def __init__(self, directory: Optional[str] = None, interval: float = 0.005, check_interval: float = 1.0,
+                 dump_interval: float = 5.0):
+        """
+        :param directory: directory of the session and the profiles
+        :param interval: seconds between two stack samples
+        :param check_interval: seconds, for which the session file is not read again
+        :param dump_interval: seconds, for which a changed profile is not written again
+        """
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'dbas-profiles')
+        self.interval = interval
+        self.check_interval = check_interval
+        self.dump_interval = dump_interval
+        self.__session: Optional[ProfilingSession] = None
+        self.__checked_at = 0.0
+        self.__profiles: Dict[str, RouteProfile] = {}
+        self.__profiles_started: Optional[float] = None
+        self.__active: Dict[int, RouteProfile] = {}
+        self.__condition = threading.Condition()
+        self.__dump_lock = threading.Lock()
+        self.__pid: Optional[int] = None
+
+    def configure(self, settings: dict):
+        """
+        Reads the directory, the sample interval and the dump interval from the settings
+
+        :param settings: settings of the app
+        :return: None
+        """
+        self.directory = settings.get('profiling.dir', self.directory)
+        self.interval = float(settings.get('profiling.interval', self.interval))
+        self.dump_interval = float(settings.get('profiling.dump_interval', self.dump_interval))
+        self.__checked_at = 0.0
+
+    def start_session(self, pattern: str, duration: float, sample_rate: float) -> ProfilingSession:
+        """
+        Starts a session for all workers and drops the profiles of the previous session
+
+        :param pattern: glob pattern of the name or the pattern of the routes
+        :param duration: duration of the session in seconds
+        :param sample_rate: share of the matching requests, which are profiled
+        :return: the new session
+        """
+        if not pattern or not 0 < duration <= max_duration or not 0 < sample_rate <= 1:
+            raise ValueError('Invalid pattern, duration or sample rate')
+        os.makedirs(self.directory, exist_ok=True)
+        for filename in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, filename))
+
+        now = time.time()
+        session = ProfilingSession(pattern, sample_rate, now, now + duration)
+        self.__write_json(session_file, session._asdict())
+        self.__checked_at = 0.0
+        LOG.info("Start profiling of %s for %s s with sample rate %s", pattern, duration, sample_rate)
+        return session
+
+    def stop_session(self):
+        """
+        Stops the current session of all workers, the profiles are kept
+
+        :return: None
+        """
+        try:
+            with open(os.path.join(self.directory, session_file)) as f:
+                session = ProfilingSession(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return
+        self.__write_json(session_file, session._replace(until=min(session.until, time.time()))._asdict())
+        self.__checked_at = 0.0
+        LOG.info("Stop profiling of %s", session.pattern)
+
+    def current_session(self) -> Optional[ProfilingSession]:
+        """
+        Returns the active session. The session file is read at most once per check_interval.
+
+        :return: the session or None
+        """
+        now = time.monotonic()
+        if now - self.__checked_at >= self.check_interval:
+            self.__checked_at = now
+            try:
+                with open(os.path.join(self.directory, session_file)) as f:
+                    self.__session = ProfilingSession(**json.load(f))
+            except (OSError, ValueError, TypeError):
+                self.__session = None
+        if self.__session is None or not self.__session.is_active:
+            return None
+        return self.__session
+
+    def last_session(self) -> Optional[ProfilingSession]:
+        """
+        Returns the last started session, even if it is not active anymore
+
+        :return: the session or None
+        """
+        self.current_session()
+        return self.__session
+
+    def should_profile(self, route) -> bool:
+        session = self.current_session()
+        return session is not None and session.matches(route) and random.random() < session.sample_rate
+
+    def profile(self, route: str, func: Callable, *args, **kwargs):
+        """
+        Calls func under cProfile and samples the stack of the calling thread meanwhile
+
+        :param route: name of the route
+        :param func: the function
+        :return: result of func
+        """
+        self.__start_sampler()
+        session = self.last_session()
+        started = session.started if session else None
+        with self.__condition:
+            self.__drop_profiles_of_other_sessions(started)
+            profile = self.__profiles.setdefault(route, RouteProfile(route))
+            self.__active[threading.get_ident()] = profile
+            self.__condition.notify()
+
+        profiler = cProfile.Profile()
+        profiled = False
+        try:
+            profiled = self.__enable(profiler)
+            return func(*args, **kwargs)
+        finally:
+            if profiled:
+                profiler.disable()
+            with self.__condition:
+                self.__active.pop(threading.get_ident(), None)
+                profile.requests += 1
+                if profiled:
+                    profile.stats = pstats.Stats(profiler) if profile.stats is None else profile.stats.add(profiler)
+                profile.changed = True
+                self.__condition.notify()
+
+    def flush(self):
+        """
+        Writes all changed profiles of this process at once, e.g. at the exit of the worker
+
+        :return: None
+        """
+        with self.__condition:
+            dumps = self.__copy_changed(force=True)
+        self.__write_dumps(dumps)
+
+    def get_routes(self) -> List[dict]:
+        """
+        Sums up the profiled requests and stack samples of all workers per route
+
+        :return: list of routes with their requests and samples
+        """
+        routes = defaultdict(lambda: {'requests': 0, 'samples': 0})
+        for path in self.__files('.json'):
+            try:
+                with open(path) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError) as e:
+                LOG.warning("Could not read %s: %s", path, e)
+                continue
+            route = routes[meta['route']]
+            route['requests'] += meta['requests']
+            route['samples'] += meta['samples']
+        return [{'route': name, 'key': route_key(name), **values} for name, values in sorted(routes.items())]
+
+    def get_pstats(self, key: str) -> Optional[bytes]:
+        """
+        Merges the profiles of all workers of a route
+
+        :param key: key of the route
+        :return: content of a pstats file or None, if the route was not profiled
+        """
+        paths = list(self.__files('.prof', key))
+        if not paths:
+            return None
+        stats = pstats.Stats(*paths)
+        return marshal.dumps(stats.stats)
+
+    def get_collapsed_stacks(self, key: str) -> Optional[str]:
+        """
+        Merges the stack samples of all workers of a route
+
+        :param key: key of the route
+        :return: collapsed stacks for flamegraph.pl or speedscope or None, if the route was not profiled
+        """
+        paths = list(self.__files('.collapsed', key))
+        if not paths:
+            return None
+        stacks = Counter()
+        for path in paths:
+            with open(path) as f:
+                for line in f:
+                    stack, _, count = line.rstrip('\n').rpartition(' ')
+                    if stack:
+                        stacks[stack] += int(count)
+        return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+    @staticmethod
+    def __enable(profiler: cProfile.Profile) -> bool:
+        try:
+            profiler.enable()
+        except ValueError:  # since Python 3.12 only one request of the process can run under cProfile
+            return False
+        return True
+
+    def __start_sampler(self):
+        if self.__pid == os.getpid():
+            return
+        with self.__condition:
+            if self.__pid == os.getpid():
+                return
+            self.__pid = os.getpid()
+            self.__active.clear()
+        threading.Thread(target=self.__sample, name='profiling-sampler', daemon=True).start()
+        atexit.register(self.flush)
+
+    def __sample(self):
+        root_code = self.profile.__code__
+        while True:
+            with self.__condition:
+                if not self.__active:
+                    self.__condition.wait(self.__next_dump())
+                active = dict(self.__active)
+            # profiles of a session, which was replaced meanwhile, must not be written into the new session
+            session = self.last_session()
+            with self.__condition:
+                self.__drop_profiles_of_other_sessions(session.started if session else None)
+                dumps = self.__copy_changed()
+            self.__write_dumps(dumps)
+            if not active:
+                continue
+
+            frames = sys._current_frames()
+            with self.__condition:
+                for thread_id, profile in active.items():
+                    frame = frames.get(thread_id)
+                    stack = collapse_stack(frame, root_code) if frame is not None else ''
+                    if stack:
+                        profile.stacks[stack] += 1
+            time.sleep(self.interval)
+
+    def __drop_profiles_of_other_sessions(self, started: Optional[float]):
+        # the caller holds the condition
+        if started != self.__profiles_started:
+            self.__profiles.clear()
+            self.__profiles_started = started
+
+    def __next_dump(self) -> Optional[float]:
+        # seconds until the next changed profile may be written or None, if no profile has changed
+        due = [profile.dumped_at + self.dump_interval for profile in self.__profiles.values() if profile.changed]
+        return max(min(due) - time.monotonic(), 0) if due else None
+
+    def __copy_changed(self, force: bool = False) -> List[ProfileDump]:
+        # the caller holds the condition, the copies are written outside of it
+        now = time.monotonic()
+        dumps = []
+        for profile in self.__profiles.values():
+            if not profile.changed or (not force and now - profile.dumped_at < self.dump_interval):
+                continue
+            profile.changed = False
+            profile.dumped_at = now
+            # pstats.Stats.add replaces the entries instead of changing them, therefore a flat copy suffices
+            stats = dict(profile.stats.stats) if profile.stats is not None else {}
+            dumps.append(ProfileDump(profile, profile.requests, stats, dict(profile.stacks)))
+        return dumps
+
+    def __write_dumps(self, dumps: List[ProfileDump]):
+        with self.__dump_lock:
+            for dump in dumps:
+                if dump.requests < dump.profile.dumped_requests:
+                    continue  # a newer copy was written meanwhile
+                dump.profile.dumped_requests = dump.requests
+                try:
+                    self.__dump(dump)
+                except OSError as e:
+                    LOG.warning("Could not store the profile of %s: %s", dump.profile.route, e)
+
+    def __dump(self, dump: ProfileDump):
+        os.makedirs(self.directory, exist_ok=True)
+        name = f'{route_key(dump.profile.route)}.{os.getpid()}'
+        self.__write_file(f'{name}.prof', 'wb', marshal.dumps(dump.stats))
+        self.__write_file(f'{name}.collapsed', 'w',
+                          ''.join(f'{stack} {count}\n' for stack, count in dump.stacks.items()))
+        self.__write_json(f'{name}.json', {'route': dump.profile.route, 'requests': dump.requests,
+                                           'samples': sum(dump.stacks.values())})
+
+    def __write_file(self, filename: str, mode: str, content):
+        path = os.path.join(self.directory, filename)
+        with open(f'{path}.tmp', mode) as f:
+            f.write(content)
+        os.replace(f'{path}.tmp', path)
+
+    def __write_json(self, filename: str, content: dict):
+        path = os.path.join(self.directory, filename)
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(content, f)
+        os.replace(f'{path}.tmp', path)
+
+    def __files(self, extension: str, key: Optional[str] = None):
+        if not os.path.isdir(self.directory):
+            return
+        for filename in sorted(os.listdir(self.directory)):
+            if filename == session_file or not filename.endswith(extension):
+                continue
+            if key is None or filename.rsplit('.', 2)[0] == key:
+                yield os.path.join(self.directory, filename)
+
+
+def route_key(route: str) -> str:
+    """
+    Returns a name of the route, which is safe as part of a filename and an url
+    """
+    return re.sub(r'[^A-Za-z0-9_-]', '_', route)
+
+
+def collapse_stack(frame, root_code=None) -> str:
+    """
+    Renders a stack as semicolon separated frames from the outermost to the innermost one
+
+    :param frame: innermost frame
+    :param root_code: code object of the frame, where the stack ends
+    :return: the collapsed stack
+    """
+    names = []
+    while frame is not None and frame.f_code is not root_code and len(names) < max_stack_depth:
+        code = frame.f_code
+        names.append(f'{frame.f_globals.get("__name__", "?")}:{code.co_name}:{code.co_firstlineno}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+profiler = Profiler()
+
+
+def profiling_tween_factory(handler, registry):
+    """
+    Profiles sampled requests of the routes, which match the current session
+    """
+    mapper = registry.queryUtility(IRoutesMapper)
+
+    def profiling_tween(request: Request):
+        if mapper is None or profiler.current_session() is None:
+            return handler(request)
+        route = mapper(request)['route']
+        if route is None or not profiler.should_profile(route):
+            return handler(request)
+        return profiler.profile(route.name, handler, request)
+
+    return profiling_tween
+
+
+def includeme(config):
+    profiler.configure(config.get_settings())
+    config.add_tween('dbas.profiling.profiling_tween_factory')
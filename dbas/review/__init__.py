@@ -14,3 +14,6 @@ class ReviewDeleteReasons(Enum):
 # text length of the elements on the history and ongoing page
 # please note, that a hover will always show the full text
 txt_len_history_page = 35
+
+# count of reviews per queue on one page of the history and ongoing page
+history_page_size = 20
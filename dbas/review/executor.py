@@ -0,0 +1,167 @@
+"""
+Executes decided reviews outside of the request of the last vote. Merging, splitting or bending a premisegroup touches a
+lot of rows and sends notifications, therefore the vote only enqueues a ReviewExecutionJob and this worker does the
+rest. Every job is claimed with a lease, so a crashed worker does not block the job forever, and failed jobs are retried
+with an increasing delay.
+"""
+
+import logging
+import time
+
+import transaction
+
+from dbas.database import DBDiscussionSession
+from dbas.database.discussion_model import ReviewExecutionJob, get_now
+from dbas.review.mapper import get_review_model_by_key
+from dbas.review.queue import key_delete, key_duplicate, key_merge, key_split
+from dbas.review.queue.delete import DeleteQueue
+from dbas.review.queue.duplicate import DuplicateQueue
+from dbas.review.queue.lib import invalidate_review_count_cache
+from dbas.review.queue.merge import MergeQueue
+from dbas.review.queue.split import SplitQueue
+from dbas.strings.translator import Translator
+
+LOG = logging.getLogger(__name__)
+
+# queues, whose decisions can be executed by the worker
+async_review_queues = {
+    key_delete: DeleteQueue,
+    key_duplicate: DuplicateQueue,
+    key_merge: MergeQueue,
+    key_split: SplitQueue,
+}
+
+max_attempts: int = 5  # a job fails finally after this count of attempts
+lease_time_in_sec: int = 300  # a running job is claimable again after this time
+retry_delay_in_sec: int = 30  # delay of the first retry, which doubles with every attempt
+max_backoff_in_sec: int = 60  # maximal sleep of the worker after failed polls
+
+
+def execute_pending_jobs(limit: int = 10) -> int:
+    """
+    Claims and executes up to *limit* jobs, which are pending or whose lease is expired
+
+    :param limit: maximal count of jobs
+    :return: count of claimed jobs
+    """
+    now = get_now()
+    job_uids = [uid for uid, in DBDiscussionSession.query(ReviewExecutionJob.uid).filter(
+        ReviewExecutionJob.state.in_(ReviewExecutionJob.active_states),
+        ReviewExecutionJob.run_after <= now).order_by(ReviewExecutionJob.uid).limit(limit).all()]
+    transaction.commit()
+
+    claimed = 0
+    for job_uid in job_uids:
+        if not __claim_job(job_uid):
+            continue
+        claimed += 1
+        try:
+            __execute_job(job_uid)
+        except Exception as e:
+            LOG.exception("Execution of review job %s failed", job_uid)
+            transaction.abort()
+            __mark_job_as_failed(job_uid, e)
+
+    if claimed:
+        invalidate_review_count_cache()
+    return claimed
+
+
+def run_worker(poll_interval: float = 2.0, limit: int = 10):
+    """
+    Executes pending jobs until the process is stopped. The worker only sleeps, if there was nothing to do or the poll
+    failed. Failed polls are logged and the worker backs off with an increasing delay.
+
+    :param poll_interval: seconds between two polls of an empty job table
+    :param limit: maximal count of jobs per poll
+    :return: None
+    """
+    LOG.info("Start review worker with a poll interval of %ss", poll_interval)
+    failures = 0
+    while True:
+        try:
+            executed = execute_pending_jobs(limit)
+        except Exception:
+            # e.g. the database is not reachable: keep the worker alive and back off, until the poll succeeds again
+            LOG.exception("Could not execute the pending review jobs")
+            transaction.abort()
+            failures += 1
+            time.sleep(min(poll_interval * 2 ** failures, max_backoff_in_sec))
+            continue
+
+        failures = 0
+        if executed == 0:
+            time.sleep(poll_interval)
+
+
+def __claim_job(job_uid: int) -> bool:
+    """
+    Claims the job for this worker by extending its lease. Only one worker wins, because the update is conditional on
+    the lease, which was seen before.
+
+    :param job_uid: ReviewExecutionJob.uid
+    :return: True, if this worker owns the job now
+    """
+    now = get_now()
+    count = DBDiscussionSession.query(ReviewExecutionJob).filter(
+        ReviewExecutionJob.uid == job_uid,
+        ReviewExecutionJob.state.in_(ReviewExecutionJob.active_states),
+        ReviewExecutionJob.run_after <= now
+    ).update({
+        ReviewExecutionJob.state: ReviewExecutionJob.state_running,
+        ReviewExecutionJob.attempts: ReviewExecutionJob.attempts + 1,
+        ReviewExecutionJob.run_after: now.shift(seconds=lease_time_in_sec)
+    }, synchronize_session=False)
+    transaction.commit()
+    return count == 1
+
+
+def __execute_job(job_uid: int):
+    """
+    Executes the review of the job. Reviews, which were executed or canceled in the meantime, are skipped, so running a
+    job twice has no further effect. The decision is checked again by the queue: if the votes no longer decide the
+    review, the job is closed as undecided and reopened by the vote, which decides the review again.
+
+    :param job_uid: ReviewExecutionJob.uid
+    :return: None
+    """
+    db_job = DBDiscussionSession.query(ReviewExecutionJob).get(job_uid)
+    db_review = DBDiscussionSession.query(get_review_model_by_key(db_job.queue)).get(db_job.review_uid)
+
+    state = ReviewExecutionJob.state_done
+    if db_review is None or db_review.is_executed or db_review.is_revoked:
+        LOG.debug("Skip %s review %s, it was already executed or canceled", db_job.queue, db_job.review_uid)
+    else:
+        LOG.debug("Execute %s review %s", db_job.queue, db_job.review_uid)
+        queue = async_review_queues[db_job.queue]()
+        if not queue.execute_review(db_review, db_job.application_url, Translator(db_job.ui_locales)):
+            LOG.warning("The %s review %s is not decided anymore", db_job.queue, db_job.review_uid)
+            state = ReviewExecutionJob.state_undecided
+
+    db_job = DBDiscussionSession.query(ReviewExecutionJob).get(job_uid)
+    db_job.state = state
+    db_job.last_error = None
+    DBDiscussionSession.add(db_job)
+    DBDiscussionSession.flush()
+    transaction.commit()
+
+
+def __mark_job_as_failed(job_uid: int, error: Exception):
+    """
+    Reschedules the job with an exponential backoff or marks it as failed after too many attempts
+
+    :param job_uid: ReviewExecutionJob.uid
+    :param error: the raised exception
+    :return: None
+    """
+    db_job = DBDiscussionSession.query(ReviewExecutionJob).get(job_uid)
+    db_job.last_error = repr(error)
+    if db_job.attempts >= max_attempts:
+        LOG.error("Give up %s review %s after %s attempts", db_job.queue, db_job.review_uid, db_job.attempts)
+        db_job.state = ReviewExecutionJob.state_failed
+    else:
+        db_job.state = ReviewExecutionJob.state_pending
+        db_job.run_after = get_now().shift(seconds=retry_delay_in_sec * 2 ** (db_job.attempts - 1))
+    DBDiscussionSession.add(db_job)
+    DBDiscussionSession.flush()
+    transaction.commit()
@@ -14,6 +14,7 @@ from dbas.database.discussion_model import ReviewDeleteReason, ReviewDelete, Rev
 from dbas.review import FlaggedBy, ReviewDeleteReasons
 from dbas.review.queue import key_merge, key_split, key_duplicate, key_optimization
 from dbas.review.queue.adapter import QueueAdapter
+from dbas.review.queue.lib import invalidate_review_count_cache
 from dbas.strings.keywords import Keywords as _
 from dbas.strings.translator import Translator
 
@@ -153,6 +154,7 @@ def _add_delete_review(argument: Optional[Argument], statement: Optional[Stateme
     DBDiscussionSession.add(review_delete)
     DBDiscussionSession.flush()
     transaction.commit()
+    invalidate_review_count_cache()
 
 
 def _add_optimization_review(argument: Optional[Argument], statement: Optional[Statement], user: User):
@@ -169,6 +171,7 @@ def _add_optimization_review(argument: Optional[Argument], statement: Optional[S
     DBDiscussionSession.add(review_optimization)
     DBDiscussionSession.flush()
     transaction.commit()
+    invalidate_review_count_cache()
 
 
 def _add_duplication_review(duplicate_statement: Statement, original_statement: Statement, user: User):
@@ -186,6 +189,7 @@ def _add_duplication_review(duplicate_statement: Statement, original_statement:
     DBDiscussionSession.add(review_duplication)
     DBDiscussionSession.flush()  # vorsicht
     transaction.commit()  # vorsicht
+    invalidate_review_count_cache()
 
 
 def _add_split_review(premisegroup: PremiseGroup, detector: User, text_values: list):
@@ -209,6 +213,7 @@ def _add_split_review(premisegroup: PremiseGroup, detector: User, text_values: l
         DBDiscussionSession.flush()
 
     transaction.commit()
+    invalidate_review_count_cache()
 
 
 def _add_merge_review(premisegroup: PremiseGroup, detector: User, text_values: list):
@@ -232,3 +237,4 @@ def _add_merge_review(premisegroup: PremiseGroup, detector: User, text_values: l
         DBDiscussionSession.flush()
 
     transaction.commit()
+    invalidate_review_count_cache()
@@ -2,16 +2,21 @@
 Provides helping function for the managing the queue with all executed decisions as well as all ongoing decisions.
 """
 import logging
-from typing import Optional
+from typing import Optional, Dict, List, Tuple
+from urllib.parse import urlencode
+
+from sqlalchemy import func
 
 from dbas.database import DBDiscussionSession
 from dbas.database.discussion_model import User, sql_timestamp_pretty_print
+from dbas.input_validator import is_integer
 from dbas.lib import get_profile_picture
-from dbas.review import txt_len_history_page
-from dbas.review.mapper import get_review_model_by_key, get_queue_by_key
+from dbas.review import txt_len_history_page, history_page_size
+from dbas.review.mapper import get_review_model_by_key, get_queue_by_key, get_last_reviewer_by_key
 from dbas.review.queue import key_edit, key_delete, key_duplicate, key_merge, key_split, review_queues, key_history, \
     key_ongoing
 from dbas.review.queue.adapter import QueueAdapter
+from dbas.review.queue.lib import get_executing_review_uids
 from dbas.review.reputation import get_reputation_of, reputation_borders
 from dbas.review.reputation import reputation_icons
 from dbas.strings.keywords import Keywords as _
@@ -20,96 +25,150 @@ from dbas.strings.lib import start_with_capital
 LOG = logging.getLogger(__name__)
 
 
-def get_review_history(main_page, db_user, translator):
+def get_review_history(main_page, db_user, translator, cursors: Dict[str, int] = None):
     """
     Returns the history of all reviews
 
     :param main_page: Host URL
     :param db_user: User
     :param translator: Translator
+    :param cursors: uid per queue, only reviews older than this uid will be returned
     :return: dict()
     """
-    return _get_reviews_from_history_queue(main_page, db_user, translator, True)
+    return _get_reviews_from_history_queue(main_page, db_user, translator, True, cursors)
 
 
-def get_ongoing_reviews(main_page, db_user, translator):
+def get_ongoing_reviews(main_page, db_user, translator, cursors: Dict[str, int] = None):
     """"
     Returns the history of all reviews
 
     :param main_page: Host URL
     :param db_user: User
     :param translator: Translator
+    :param cursors: uid per queue, only reviews older than this uid will be returned
     :return: dict()
     """
-    return _get_reviews_from_history_queue(main_page, db_user, translator, False)
+    return _get_reviews_from_history_queue(main_page, db_user, translator, False, cursors)
+
+
+def get_cursors_from_params(params) -> Dict[str, int]:
+    """
+    Collects the keyset cursors of every queue out of the given request parameters. The cursor of a queue is named
+    before_<queue>.
+
+    :param params: request.params
+    :return: dict with queue keys and Review.uids
+    """
+    return {key: int(params[f'before_{key}']) for key in review_queues if is_integer(params.get(f'before_{key}'))}
 
 
-def _get_reviews_from_history_queue(main_page, db_user, translator, is_executed=False):
+def get_votes_of_review(key: str, db_review, main_page: str) -> dict:
+    """
+    Returns all voters of the given review, which are loaded lazily on the history and ongoing page.
+
+    :param key: key of the queue
+    :param db_review: Review
+    :param main_page: Host URL
+    :return: dict with the lists of pro and con voters
+    """
+    last_reviewer_table = get_last_reviewer_by_key(key)
+    vote_column = __get_vote_column(last_reviewer_table)
+    db_votes = DBDiscussionSession.query(last_reviewer_table.reviewer_uid, vote_column).filter(
+        last_reviewer_table.review_uid == db_review.uid).all()
+    users = _get_user_dicts_for_review([reviewer_uid for reviewer_uid, is_pro in db_votes], main_page)
+
+    return {
+        'votes_pro': [users[reviewer_uid] for reviewer_uid, is_pro in db_votes if is_pro],
+        'votes_con': [users[reviewer_uid] for reviewer_uid, is_pro in db_votes if not is_pro]
+    }
+
+
+def _get_reviews_from_history_queue(main_page, db_user, translator, is_executed=False, cursors=None):
     """
 
     :param main_page: Host URL
     :param db_user: User
     :param translator: Translator
     :param is_executed: Boolean
+    :param cursors: uid per queue, only reviews older than this uid will be returned
     :return: dict()
     """
+    cursors = cursors if cursors else {}
     past_decision = []
     for key in review_queues:
         review_table = get_review_model_by_key(key)
-        executed_list = _get_executed_reviews_of(key, main_page, review_table, translator, is_executed)
+        executed_list, next_cursor = _get_executed_reviews_of(key, main_page, review_table, translator, is_executed,
+                                                              cursors.get(key))
         past_decision.append({
             'title': start_with_capital(key) + ' Queue',
             'icon': reputation_icons[key],
             'queue': key,
             'content': executed_list,
+            'next_url': __get_url_of_next_page(main_page, is_executed, cursors, key, next_cursor),
             'has_reason': key in [key_delete],
             'has_oem_text': key in [key_edit, key_merge, key_split],
             'has_duplicate_text': key in [key_duplicate]
         })
 
     return {
-        'has_access': _has_access_to_history(db_user, is_executed),
+        'has_access': has_access_to_history(db_user, is_executed),
         'is_history': is_executed,
         'past_decision': past_decision
     }
 
 
-def _get_executed_reviews_of(table, main_page, table_type, translator, is_executed=False):
+def _get_executed_reviews_of(table, main_page, table_type, translator, is_executed=False, before_uid=None):
     """
-    Returns array with all relevant information about the last reviews of the given table.
+    Returns one page with all relevant information about the last reviews of the given table. The page starts
+    after *before_uid*, because the reviews are ordered by their uid, descending.
 
     :param table: Shortcut for the table
     :param main_page: Main page of D-BAS
     :param table_type: Type of the review table
     :param translator: current ui_locales
     :param is_executed
-    :return: Array with all decision per table
+    :param before_uid: Review.uid of the last review of the previous page or None for the first page
+    :return: Array with all decision of this page and the cursor for the next page or None
     """
-    LOG.debug("Table: %s (%s)", table, table_type)
-    some_list = list()
-    db_reviews = DBDiscussionSession.query(table_type).filter(table_type.is_executed == is_executed).order_by(
-        table_type.uid.desc()).all()
+    LOG.debug("Table: %s (%s), before %s", table, table_type, before_uid)
+    db_reviews = DBDiscussionSession.query(table_type).filter(table_type.is_executed == is_executed)
+    if before_uid is not None:
+        db_reviews = db_reviews.filter(table_type.uid < before_uid)
+    db_reviews = db_reviews.order_by(table_type.uid.desc()).limit(history_page_size + 1).all()
+
+    next_cursor = None
+    if len(db_reviews) > history_page_size:
+        db_reviews = db_reviews[:history_page_size]
+        next_cursor = db_reviews[-1].uid
+
+    review_uids = [review.uid for review in db_reviews]
+    votes = _get_vote_counts_of(table, review_uids)
+    reporters = _get_user_dicts_for_review({review.detector_uid for review in db_reviews}, main_page)
+    executing = set() if is_executed else get_executing_review_uids(table, review_uids)
+    adapter = QueueAdapter(queue=get_queue_by_key(table)(), application_url=main_page, translator=translator)
 
+    some_list = list()
     for review in db_reviews:
-        entry = _get_executed_review_element_of(table, main_page, review, translator, is_executed)
+        entry = _get_executed_review_element_of(table, adapter, review, translator, is_executed)
         if entry:
+            entry['count_pro'], entry['count_con'] = votes.get(review.uid, (0, 0))
+            entry['reporter'] = reporters[review.detector_uid]
+            entry['is_executing'] = review.uid in executing
             some_list.append(entry)
 
-    return some_list
+    return some_list, next_cursor
 
 
-def _get_executed_review_element_of(table_key, main_page, db_review, translator, is_executed) -> Optional[dict]:
+def _get_executed_review_element_of(table_key, adapter, db_review, translator, is_executed) -> Optional[dict]:
     """
 
     :param table_key: Shortcut for the table
-    :param main_page: Main page of D-BAS
+    :param adapter: QueueAdapter of the table
     :param db_review: Element
     :param translator: current ui_locales
     :param is_executed
     :return: Element
     """
-    queue = get_queue_by_key(table_key)
-    adapter = QueueAdapter(queue=queue(), application_url=main_page, translator=translator)
     full_text = adapter.get_text_of_element(db_review)
     if not full_text:
         return None
@@ -125,26 +184,22 @@ def _get_executed_review_element_of(table_key, main_page, db_review, translator,
     short_text += '...' if len(full_text) > txt_len_history_page else '.'
     short_text = f'<span class="text-primary">{short_text}</span>'
 
-    pro_list, con_list = adapter.get_all_votes_for(db_review)
-
     # and build up some dict
-    pdict = _handle_table_of_review_element(table_key, db_review, short_text, full_text, is_executed)
+    pdict = _handle_table_of_review_element(table_key, adapter, db_review, short_text, full_text, is_executed)
     if not pdict:
         return None
 
     pdict['entry_id'] = db_review.uid
     pdict['timestamp'] = sql_timestamp_pretty_print(db_review.timestamp, translator.get_lang())
-    pdict['votes_pro'] = pro_list
-    pdict['votes_con'] = con_list
-    pdict['reporter'] = _get_user_dict_for_review(db_review.detector_uid, main_page)
 
     return pdict
 
 
-def _handle_table_of_review_element(table_key, review, short_text, full_text, is_executed):
+def _handle_table_of_review_element(table_key, adapter, review, short_text, full_text, is_executed):
     """
 
     :param table_key:
+    :param adapter:
     :param review:
     :param short_text:
     :param full_text:
@@ -156,29 +211,85 @@ def _handle_table_of_review_element(table_key, review, short_text, full_text, is
     pdict['argument_shorttext'] = short_text
     pdict['argument_fulltext'] = full_text
 
-    queue = get_queue_by_key(table_key)
-    adapter = QueueAdapter(queue())
     return adapter.get_history_table_row(review, pdict, is_executed=is_executed, short_text=short_text,
                                          full_text=full_text)
 
 
-def _get_user_dict_for_review(user_id, main_page):
+def _get_vote_counts_of(key: str, review_uids: List[int]) -> Dict[int, Tuple[int, int]]:
+    """
+    Counts the pro and con votes of all given reviews with one query
+
+    :param key: key of the queue
+    :param review_uids: list of Review.uids
+    :return: dict with Review.uid as key and the tuple of pro and con votes as value
     """
-    Fetches some data of the given user.
+    if not review_uids:
+        return {}
 
+    last_reviewer_table = get_last_reviewer_by_key(key)
+    vote_column = __get_vote_column(last_reviewer_table)
+    db_counts = DBDiscussionSession.query(last_reviewer_table.review_uid, vote_column, func.count()).filter(
+        last_reviewer_table.review_uid.in_(review_uids)).group_by(last_reviewer_table.review_uid, vote_column).all()
+
+    counts = {}
+    for review_uid, is_pro, count in db_counts:
+        count_pro, count_con = counts.get(review_uid, (0, 0))
+        counts[review_uid] = (count_pro + count, count_con) if is_pro else (count_pro, count_con + count)
+    return counts
+
+
+def __get_vote_column(last_reviewer_table):
+    """
+    Returns the column of the last reviewer table, which holds the decision of the reviewer
+
+    :param last_reviewer_table: one table out of the LastReviews
+    :return: Column
+    """
+    for name in ['is_okay', 'should_merge', 'should_split']:
+        if hasattr(last_reviewer_table, name):
+            return getattr(last_reviewer_table, name)
+
+
+def __get_url_of_next_page(main_page, is_executed, cursors, key, next_cursor) -> Optional[str]:
+    """
+    Builds the url of the next page of the given queue, whereby the pages of all other queues are kept
+
+    :param main_page: Main page of D-BAS
+    :param is_executed: True for the history, False for the ongoing page
+    :param cursors: current cursors of all queues
+    :param key: key of the queue
+    :param next_cursor: cursor of the next page of the queue or None
+    :return: url or None, if there is no next page
+    """
+    if next_cursor is None:
+        return None
+    params = {f'before_{queue}': uid for queue, uid in cursors.items()}
+    params[f'before_{key}'] = next_cursor
+    page = key_history if is_executed else key_ongoing
+    return f'{main_page}/review/{page}?{urlencode(sorted(params.items()))}'
+
+
+def _get_user_dicts_for_review(user_uids, main_page) -> Dict[int, dict]:
+    """
+    Fetches some data of the given users with one query.
+
+    :param user_uids: User.uids
     :param main_page: main_page of D-BAS
-    :return: dict with gravatar, users page and nickname
+    :return: dict with the User.uid as key and a dict with gravatar, users page and nickname as value
     """
-    db_user = DBDiscussionSession.query(User).get(user_id)
-    image_url = get_profile_picture(db_user, 20)
-    return {
-        'gravatar_url': image_url,
+    user_uids = set(user_uids)
+    if not user_uids:
+        return {}
+
+    db_users = DBDiscussionSession.query(User).filter(User.uid.in_(user_uids)).all()
+    return {db_user.uid: {
+        'gravatar_url': get_profile_picture(db_user, 20),
         'nickname': db_user.global_nickname,
         'userpage_url': f'{main_page}/user/{db_user.uid}'
-    }
+    } for db_user in db_users}
 
 
-def _has_access_to_history(db_user, is_executed: bool) -> bool:
+def has_access_to_history(db_user, is_executed: bool) -> bool:
     """
     Does the user has access to the history?
 
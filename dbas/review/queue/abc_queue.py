@@ -137,3 +137,16 @@ class QueueABC(metaclass=ABCMeta):
         :return:
         """
         pass
+
+    @abstractmethod
+    def execute_review(self, db_review: AbstractReviewCase, application_url: str, translator: Translator) -> bool:
+        """
+        Executes the implications of a decided review and closes it. Queues, whose decisions are executed by the vote
+        itself, never execute anything here.
+
+        :param db_review: the decided review
+        :param application_url: the app url
+        :param translator: a instance of a translator
+        :return: False, if the review is not decided (anymore) or nothing was executed
+        """
+        pass
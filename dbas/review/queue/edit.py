@@ -15,7 +15,7 @@ from dbas.review import FlaggedBy, txt_len_history_page
 from dbas.review.queue import max_votes, min_difference, key_edit, Code
 from dbas.review.queue.abc_queue import QueueABC
 from dbas.review.queue.lib import get_all_allowed_reviews_for_user, get_base_subpage_dict, \
-    get_reporter_stats_for_review, add_vote_for, get_user_dict_for_review
+    get_reporter_stats_for_review, add_vote_for, get_user_dict_for_review, invalidate_review_count_cache
 from dbas.review.reputation import get_reason_by_action, ReputationReasons, \
     add_reputation_and_send_popup
 from dbas.strings.keywords import Keywords as _
@@ -156,6 +156,7 @@ class EditQueue(QueueABC):
         DBDiscussionSession.flush()
         transaction.commit()
 
+        invalidate_review_count_cache()
         return True
 
     def add_review(self, db_user: User):
@@ -196,6 +197,7 @@ class EditQueue(QueueABC):
         DBDiscussionSession.add(db_review_canceled)
         DBDiscussionSession.flush()
         transaction.commit()
+        invalidate_review_count_cache()
         return True
 
     def revoke_ballot(self, db_user: User, db_review: ReviewEdit):
@@ -218,6 +220,7 @@ class EditQueue(QueueABC):
         DBDiscussionSession.add(db_review_canceled)
         DBDiscussionSession.flush()
         transaction.commit()
+        invalidate_review_count_cache()
         return True
 
     def element_in_queue(self, db_user: User, **kwargs) -> Optional[FlaggedBy]:
@@ -284,6 +287,17 @@ class EditQueue(QueueABC):
         else:
             return DBDiscussionSession.query(Statement).get(db_review.statement_uid).get_text()
 
+    def execute_review(self, db_review: ReviewEdit, application_url: str, translator: Translator) -> bool:
+        """
+        The decisions of this queue are executed by the last vote itself, therefore there is nothing to execute.
+
+        :param db_review: the decided review
+        :param application_url: the app url
+        :param translator: a instance of a translator
+        :return: False
+        """
+        return False
+
     def get_all_votes_for(self, db_review: ReviewEdit, application_url: str) -> Tuple[list, list]:
         """
         Returns all pro and con votes for the given element
@@ -326,6 +340,7 @@ class EditQueue(QueueABC):
         if len(text) > 0 and textversion.content.lower().strip() != text.lower().strip():
             LOG.debug("Added review element for %s. (return %s)", uid, Code.SUCCESS)
             DBDiscussionSession.add(ReviewEdit(detector=user, statement=statement))
+            invalidate_review_count_cache()
             return Code.SUCCESS
 
         LOG.debug("No case for %s (return %s)", uid, Code.ERROR)
@@ -1,18 +1,24 @@
 import logging
 import random
-from typing import List, Type
+from typing import List, Type, Optional, Set
 
 import transaction
 
 from dbas.database import DBDiscussionSession
 from dbas.database.discussion_model import Argument, Issue, Statement, StatementToIssue, sql_timestamp_pretty_print, \
-    Premise, User, AbstractReviewCase, AbstractLastReviewerCase
+    Premise, User, AbstractReviewCase, AbstractLastReviewerCase, ReviewExecutionJob, get_now
+from dbas.helper.cache import TTLCache
 from dbas.lib import get_text_for_argument_uid, get_profile_picture
 from dbas.review.mapper import get_review_modal_mapping, get_last_reviewer_by_key
+from dbas.review.queue import max_votes, min_difference
 from dbas.review.reputation import get_reputation_of, reputation_borders
 
 LOG = logging.getLogger(__name__)
 
+# pending review counts per user for the badge in the header, the lifetime covers changes of other workers as well as
+# changes of the reputation or the participation of a user
+review_count_cache = TTLCache('review_count', maxsize=4096, ttl=60)
+
 
 def get_all_allowed_reviews_for_user(session, session_keyword, db_user, review_type, last_reviewer_type):
     """
@@ -254,6 +260,74 @@ def undo_premisegroups(pgroups_splitted_or_merged, replacements):
     transaction.commit()
 
 
+def get_decision_of_votes(count_pro: int, count_con: int) -> Optional[bool]:
+    """
+    Decides a review based on the votes. A review is decided, if one side reached the maximal count of votes or if one
+    side leads with the minimal difference.
+
+    :param count_pro: count of votes, which agree with the flag
+    :param count_con: count of votes, which disagree with the flag
+    :return: True, if the flag is accepted, False if it is rejected and None, if the review is still open
+    """
+    if max(count_pro, count_con) >= max_votes:
+        return count_pro > count_con
+    if count_con - count_pro >= min_difference:
+        return False
+    if count_pro - count_con >= min_difference:
+        return True
+    return None
+
+
+def enqueue_review_execution(key: str, db_review: AbstractReviewCase, application_url: str,
+                             ui_locales: str) -> ReviewExecutionJob:
+    """
+    Hands the execution of a decided review over to the review worker. Every review has at most one job: further votes
+    return the pending or running job and a job, which was closed before the review was executed, is reopened.
+
+    :param key: key of the queue
+    :param db_review: the decided review
+    :param application_url: the app url
+    :param ui_locales: language of the notifications
+    :return: ReviewExecutionJob
+    """
+    db_job = DBDiscussionSession.query(ReviewExecutionJob).filter_by(queue=key, review_uid=db_review.uid).first()
+    if db_job and db_job.state in ReviewExecutionJob.active_states:
+        LOG.debug("Execution of %s review %s is already enqueued", key, db_review.uid)
+        return db_job
+
+    if db_job:
+        LOG.debug("Reopen the %s job of %s review %s", db_job.state, key, db_review.uid)
+        db_job.state = ReviewExecutionJob.state_pending
+        db_job.attempts = 0
+        db_job.last_error = None
+        db_job.application_url = application_url
+        db_job.ui_locales = ui_locales
+        db_job.run_after = get_now()
+    else:
+        LOG.debug("Enqueue execution of %s review %s", key, db_review.uid)
+        db_job = ReviewExecutionJob(key, db_review.uid, application_url, ui_locales)
+    DBDiscussionSession.add(db_job)
+    DBDiscussionSession.flush()
+    return db_job
+
+
+def get_executing_review_uids(key: str, review_uids: List[int]) -> Set[int]:
+    """
+    Returns the uids of the given reviews, which are decided but still wait for the review worker
+
+    :param key: key of the queue
+    :param review_uids: uids of reviews of the queue
+    :return: set of review uids
+    """
+    if not review_uids:
+        return set()
+    db_jobs = DBDiscussionSession.query(ReviewExecutionJob.review_uid).filter(
+        ReviewExecutionJob.queue == key,
+        ReviewExecutionJob.review_uid.in_(review_uids),
+        ReviewExecutionJob.state.in_(ReviewExecutionJob.active_states)).all()
+    return {review_uid for review_uid, in db_jobs}
+
+
 def get_count_of_all():
     counts = [DBDiscussionSession.query(model).count() for model in get_review_modal_mapping().values()]
     return sum(counts)
@@ -261,7 +335,34 @@ def get_count_of_all():
 
 def get_complete_review_count(db_user: User) -> int:
     """
-    Sums up the review points of the user
+    Sums up the review points of the user. The result is cached per user until any review is added, voted or executed.
+
+    :param db_user: User
+    :return: int
+    """
+    key = db_user.uid if db_user else None
+    return review_count_cache.get_or_compute(key, lambda: __compute_complete_review_count(db_user))
+
+
+def invalidate_review_count_cache():
+    """
+    Drops all cached review counts. Every new, voted or executed review changes the counts of nearly every user,
+    therefore the counts are recomputed lazily on the next request of each user. Until the current transaction is
+    committed, other requests still count the old rows, therefore the counts are dropped again after the commit.
+
+    :return: None
+    """
+    review_count_cache.clear()
+    transaction.get().addAfterCommitHook(__clear_review_count_cache)
+
+
+def __clear_review_count_cache(_success: bool):
+    review_count_cache.clear()
+
+
+def __compute_complete_review_count(db_user: User) -> int:
+    """
+    Sums up the review points of the user without asking the cache
 
     :param db_user: User
     :return: int
@@ -16,7 +16,7 @@ from dbas.review.queue import max_votes, key_optimization, max_lock_time_in_sec
 from dbas.review.queue.abc_queue import QueueABC
 from dbas.review.queue.lib import get_issues_for_statement_uids, \
     get_reporter_stats_for_review, get_all_allowed_reviews_for_user, revoke_decision_and_implications, \
-    get_user_dict_for_review
+    get_user_dict_for_review, invalidate_review_count_cache
 from dbas.review.reputation import get_reason_by_action, ReputationReasons, \
     add_reputation_and_send_popup
 from dbas.strings.keywords import Keywords as _
@@ -146,6 +146,7 @@ class OptimizationQueue(QueueABC):
         DBDiscussionSession.flush()
         transaction.commit()
 
+        invalidate_review_count_cache()
         return True
 
     def add_review(self, db_user: User):
@@ -186,6 +187,7 @@ class OptimizationQueue(QueueABC):
         DBDiscussionSession.add(db_review_canceled)
         DBDiscussionSession.flush()
         transaction.commit()
+        invalidate_review_count_cache()
         return True
 
     def revoke_ballot(self, db_user: User, db_review: ReviewOptimization):
@@ -201,6 +203,7 @@ class OptimizationQueue(QueueABC):
         DBDiscussionSession.add(db_review_canceled)
         DBDiscussionSession.flush()
         transaction.commit()
+        invalidate_review_count_cache()
         return True
 
     def element_in_queue(self, db_user: User, **kwargs) -> Optional[FlaggedBy]:
@@ -234,6 +237,17 @@ class OptimizationQueue(QueueABC):
         else:
             return DBDiscussionSession.query(Statement).get(db_review.statement_uid).get_text()
 
+    def execute_review(self, db_review: ReviewOptimization, application_url: str, translator: Translator) -> bool:
+        """
+        The decisions of this queue are executed by the last vote itself, therefore there is nothing to execute.
+
+        :param db_review: the decided review
+        :param application_url: the app url
+        :param translator: a instance of a translator
+        :return: False
+        """
+        return False
+
     def get_all_votes_for(self, db_review: ReviewOptimization, application_url: str) -> Tuple[list, list]:
         """
         Returns all pro and con votes for the given element
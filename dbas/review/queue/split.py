@@ -12,10 +12,11 @@ from dbas.database.discussion_model import User, LastReviewerSplit, ReviewSplit,
     StatementReplacementsByPremiseGroupSplit, ReviewCanceled, ReviewMergeValues, LastReviewerMerge
 from dbas.handler.statements import set_statement
 from dbas.review import FlaggedBy, txt_len_history_page
-from dbas.review.queue import max_votes, min_difference, key_split
+from dbas.review.queue import key_split
 from dbas.review.queue.abc_queue import QueueABC
 from dbas.review.queue.lib import get_all_allowed_reviews_for_user, get_issues_for_statement_uids, \
-    get_reporter_stats_for_review, undo_premisegroups, add_vote_for, get_user_dict_for_review
+    get_reporter_stats_for_review, undo_premisegroups, add_vote_for, get_user_dict_for_review, \
+    invalidate_review_count_cache, get_decision_of_votes, enqueue_review_execution
 from dbas.review.reputation import get_reason_by_action, ReputationReasons, \
     add_reputation_and_send_popup
 from dbas.strings.keywords import Keywords as _
@@ -129,43 +130,48 @@ class SplitQueue(QueueABC):
         :return:
         """
         LOG.debug("Adding vote for split case with id %s", db_review.uid)
-        db_user_created_flag = DBDiscussionSession.query(User).get(db_review.detector_uid)
-        rep_reason = None
 
         # add new vote
         add_vote_for(db_user, db_review, is_okay, LastReviewerSplit)
 
-        # get all keep and delete votes
-        count_of_split, count_of_keep = self.get_review_count(db_review.uid)
-
         # do we reached any limit?
-        reached_max = max(count_of_split, count_of_keep) >= max_votes
-        if reached_max:
-            if count_of_split > count_of_keep:  # split pgroup
-                self.__split_premisegroup(db_review)
-                rep_reason = get_reason_by_action(ReputationReasons.success_flag)
-            else:  # just close the review
-                rep_reason = get_reason_by_action(ReputationReasons.bad_flag)
-            db_review.set_executed(True)
-            db_review.update_timestamp()
-
-        elif count_of_keep - count_of_split >= min_difference:  # just close the review
-            rep_reason = get_reason_by_action(ReputationReasons.bad_flag)
-            db_review.set_executed(True)
-            db_review.update_timestamp()
+        if get_decision_of_votes(*self.get_review_count(db_review.uid)) is not None:
+            if kwargs.get('execute_async'):
+                enqueue_review_execution(self.key, db_review, application_url, translator.get_lang())
+            else:
+                self.execute_review(db_review, application_url, translator)
+        DBDiscussionSession.flush()
+        transaction.commit()
+
+        invalidate_review_count_cache()
+        return True
+
+    def execute_review(self, db_review: ReviewSplit, application_url: str, translator: Translator) -> bool:
+        """
+        Executes the implications of a decided review and closes it. If the flag is accepted, the flagged element will be
+        split into two seperate statements.
 
-        elif count_of_split - count_of_keep >= min_difference:  # split pgroup
+        :param db_review: the decided review
+        :param application_url: the app url
+        :param translator: a instance of a translator
+        :return: False, if the review is not decided yet
+        """
+        is_accepted = get_decision_of_votes(*self.get_review_count(db_review.uid))
+        if is_accepted is None:
+            return False
+
+        if is_accepted:  # split pgroup
             self.__split_premisegroup(db_review)
             rep_reason = get_reason_by_action(ReputationReasons.success_flag)
-            db_review.set_executed(True)
-            db_review.update_timestamp()
+        else:  # just close the review
+            rep_reason = get_reason_by_action(ReputationReasons.bad_flag)
+        db_review.set_executed(True)
+        db_review.update_timestamp()
 
-        if rep_reason:
-            add_reputation_and_send_popup(db_user_created_flag, rep_reason, application_url, translator)
-            DBDiscussionSession.add(db_review)
+        db_user_created_flag = DBDiscussionSession.query(User).get(db_review.detector_uid)
+        add_reputation_and_send_popup(db_user_created_flag, rep_reason, application_url, translator)
+        DBDiscussionSession.add(db_review)
         DBDiscussionSession.flush()
-        transaction.commit()
-
         return True
 
     def add_review(self, db_user: User):
@@ -206,6 +212,7 @@ class SplitQueue(QueueABC):
         DBDiscussionSession.add(db_review_canceled)
         DBDiscussionSession.flush()
         transaction.commit()
+        invalidate_review_count_cache()
         return True
 
     def revoke_ballot(self, db_user: User, db_review: ReviewSplit):
@@ -233,6 +240,7 @@ class SplitQueue(QueueABC):
         DBDiscussionSession.add(db_review_canceled)
         DBDiscussionSession.flush()
         transaction.commit()
+        invalidate_review_count_cache()
         return True
 
     def element_in_queue(self, db_user: User, **kwargs) -> Optional[FlaggedBy]:
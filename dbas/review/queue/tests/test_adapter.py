@@ -1,5 +1,6 @@
 import unittest
 
+import transaction
 from pyramid import testing
 
 import dbas.review.queue.lib
@@ -36,9 +37,27 @@ class AdapterTest(unittest.TestCase):
         u2: User = DBDiscussionSession.query(User).get(2)
         issue_cat_or_dog: Issue = DBDiscussionSession.query(Issue).get(2)
         u2.participates_in.append(issue_cat_or_dog)
+        dbas.review.queue.lib.invalidate_review_count_cache()
         self.assertEqual(0, dbas.review.queue.lib.get_complete_review_count(u1))
         self.assertLess(0, dbas.review.queue.lib.get_complete_review_count(u2))
         u2.participates_in.remove(issue_cat_or_dog)
+        dbas.review.queue.lib.invalidate_review_count_cache()
+
+    def test_complete_review_count_is_cached_until_invalidation(self):
+        dbas.review.queue.lib.invalidate_review_count_cache()
+        count = dbas.review.queue.lib.get_complete_review_count(self.user)
+        self.assertEqual(1, len(dbas.review.queue.lib.review_count_cache))
+        self.assertEqual(count, dbas.review.queue.lib.get_complete_review_count(self.user))
+        dbas.review.queue.lib.invalidate_review_count_cache()
+        self.assertEqual(0, len(dbas.review.queue.lib.review_count_cache))
+
+    def test_complete_review_count_is_invalidated_after_commit(self):
+        dbas.review.queue.lib.invalidate_review_count_cache()
+        # counts, which are cached before the commit, may miss the rows of the transaction
+        dbas.review.queue.lib.get_complete_review_count(self.user)
+        self.assertEqual(1, len(dbas.review.queue.lib.review_count_cache))
+        transaction.commit()
+        self.assertEqual(0, len(dbas.review.queue.lib.review_count_cache))
 
     def test_lock_optimization_review(self):
         _tn = Translator('en')
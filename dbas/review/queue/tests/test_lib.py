@@ -1,5 +1,10 @@
-from dbas.database.discussion_model import ReviewDuplicate, LastReviewerDuplicate
-from dbas.review.queue.lib import get_review_count_for
+import transaction
+
+from dbas.database import DBDiscussionSession
+from dbas.database.discussion_model import ReviewDuplicate, LastReviewerDuplicate, ReviewDelete, ReviewExecutionJob
+from dbas.review.queue import key_delete
+from dbas.review.queue.lib import get_review_count_for, get_decision_of_votes, enqueue_review_execution, \
+    get_executing_review_uids
 from dbas.review.reputation import get_reason_by_action, ReputationReasons
 from dbas.tests.utils import TestCaseWithConfig
 
@@ -42,3 +47,25 @@ class LibTest(TestCaseWithConfig):
 
         self.user_bjoern.participates_in.remove(self.issue_cat_or_dog)
         self.user_antonia.participates_in.remove(self.issue_cat_or_dog)
+
+    def test_get_decision_of_votes(self):
+        self.assertIsNone(get_decision_of_votes(0, 0))
+        self.assertIsNone(get_decision_of_votes(2, 0))
+        self.assertIsNone(get_decision_of_votes(3, 1))
+        self.assertTrue(get_decision_of_votes(3, 0))
+        self.assertFalse(get_decision_of_votes(1, 4))
+        self.assertTrue(get_decision_of_votes(5, 3))
+        self.assertFalse(get_decision_of_votes(4, 5))
+
+    def test_enqueue_review_execution_is_idempotent(self):
+        db_review = DBDiscussionSession.query(ReviewDelete).filter_by(is_executed=False, is_revoked=False).first()
+        db_job = enqueue_review_execution(key_delete, db_review, 'main', 'en')
+        self.assertEqual(db_job, enqueue_review_execution(key_delete, db_review, 'main', 'en'))
+        self.assertEqual(DBDiscussionSession.query(ReviewExecutionJob).filter_by(review_uid=db_review.uid).count(), 1)
+        self.assertEqual(get_executing_review_uids(key_delete, [db_review.uid, db_review.uid + 1]), {db_review.uid})
+
+        db_job.state = ReviewExecutionJob.state_done
+        self.assertEqual(get_executing_review_uids(key_delete, [db_review.uid]), set())
+
+        DBDiscussionSession.query(ReviewExecutionJob).delete()
+        transaction.commit()
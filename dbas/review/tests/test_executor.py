@@ -0,0 +1,130 @@
+from unittest import mock
+
+import transaction
+from sqlalchemy.exc import OperationalError
+
+from dbas.database import DBDiscussionSession
+from dbas.database.discussion_model import ReviewDelete, ReviewExecutionJob
+from dbas.review.executor import execute_pending_jobs, run_worker
+from dbas.review.queue import key_delete
+from dbas.review.queue.delete import DeleteQueue
+from dbas.review.queue.lib import enqueue_review_execution
+from dbas.tests.utils import TestCaseWithConfig, construct_dummy_request
+from dbas.validators.reviews import valid_not_executed_review, valid_review_not_executing, \
+    valid_uid_as_row_in_review_queue
+
+
+class TestReviewExecutor(TestCaseWithConfig):
+
+    def tearDown(self):
+        DBDiscussionSession.query(ReviewExecutionJob).delete()
+        transaction.commit()
+        super().tearDown()
+
+    def __enqueue(self, is_executed: bool) -> int:
+        db_review = DBDiscussionSession.query(ReviewDelete).filter_by(is_executed=is_executed,
+                                                                      is_revoked=False).first()
+        review_uid = db_review.uid
+        enqueue_review_execution(key_delete, db_review, 'main', 'en')
+        transaction.commit()
+        return review_uid
+
+    def test_execute_pending_jobs_skips_executed_reviews(self):
+        review_uid = self.__enqueue(is_executed=True)
+
+        with mock.patch.object(DeleteQueue, 'execute_review') as execute_review:
+            self.assertEqual(execute_pending_jobs(), 1)
+            execute_review.assert_not_called()
+
+        db_job = DBDiscussionSession.query(ReviewExecutionJob).filter_by(review_uid=review_uid).one()
+        self.assertEqual(db_job.state, ReviewExecutionJob.state_done)
+        self.assertEqual(db_job.attempts, 1)
+        self.assertEqual(execute_pending_jobs(), 0)
+
+    def test_execute_pending_jobs_executes_open_reviews(self):
+        review_uid = self.__enqueue(is_executed=False)
+
+        with mock.patch.object(DeleteQueue, 'execute_review', return_value=True) as execute_review:
+            self.assertEqual(execute_pending_jobs(), 1)
+            execute_review.assert_called_once()
+
+        db_job = DBDiscussionSession.query(ReviewExecutionJob).filter_by(review_uid=review_uid).one()
+        self.assertEqual(db_job.state, ReviewExecutionJob.state_done)
+
+    def test_execute_pending_jobs_retries_failed_jobs(self):
+        review_uid = self.__enqueue(is_executed=False)
+
+        with mock.patch.object(DeleteQueue, 'execute_review', side_effect=RuntimeError('boom')):
+            self.assertEqual(execute_pending_jobs(), 1)
+
+        db_job = DBDiscussionSession.query(ReviewExecutionJob).filter_by(review_uid=review_uid).one()
+        self.assertEqual(db_job.state, ReviewExecutionJob.state_pending)
+        self.assertEqual(db_job.attempts, 1)
+        self.assertIn('boom', db_job.last_error)
+
+        # the retry is delayed
+        self.assertEqual(execute_pending_jobs(), 0)
+
+    def test_execute_pending_jobs_reopens_undecided_reviews(self):
+        review_uid = self.__enqueue(is_executed=False)
+
+        with mock.patch.object(DeleteQueue, 'execute_review', return_value=False):
+            self.assertEqual(execute_pending_jobs(), 1)
+
+        db_job = DBDiscussionSession.query(ReviewExecutionJob).filter_by(review_uid=review_uid).one()
+        self.assertEqual(db_job.state, ReviewExecutionJob.state_undecided)
+        self.assertEqual(execute_pending_jobs(), 0)
+
+        # the vote, which decides the review again, reopens the job
+        db_review = DBDiscussionSession.query(ReviewDelete).get(review_uid)
+        enqueue_review_execution(key_delete, db_review, 'main', 'en')
+        transaction.commit()
+        db_job = DBDiscussionSession.query(ReviewExecutionJob).filter_by(review_uid=review_uid).one()
+        self.assertEqual(db_job.state, ReviewExecutionJob.state_pending)
+        self.assertEqual(db_job.attempts, 0)
+
+        with mock.patch.object(DeleteQueue, 'execute_review', return_value=True) as execute_review:
+            self.assertEqual(execute_pending_jobs(), 1)
+            execute_review.assert_called_once()
+
+    def test_pending_reviews_are_locked(self):
+        review_uid = self.__enqueue(is_executed=False)
+
+        request = construct_dummy_request(json_body={'review_uid': review_uid})
+        self.assertFalse(valid_not_executed_review('review_uid', ReviewDelete)(request))
+
+        request = construct_dummy_request(json_body={'uid': review_uid, 'queue': key_delete})
+        valid_uid_as_row_in_review_queue(request)
+        self.assertFalse(valid_review_not_executing(request))
+
+        DBDiscussionSession.query(ReviewExecutionJob).delete()
+        transaction.commit()
+        request = construct_dummy_request(json_body={'review_uid': review_uid})
+        self.assertTrue(valid_not_executed_review('review_uid', ReviewDelete)(request))
+        request = construct_dummy_request(json_body={'uid': review_uid, 'queue': key_delete})
+        valid_uid_as_row_in_review_queue(request)
+        self.assertTrue(valid_review_not_executing(request))
+
+    def test_worker_survives_failed_polls(self):
+        class StopWorker(Exception):
+            pass
+
+        polls = [OperationalError('SELECT', {}, Exception('connection lost')), 0]
+        sleeps = []
+
+        def poll(limit):
+            result = polls.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if not polls:
+                raise StopWorker()
+
+        with mock.patch('dbas.review.executor.execute_pending_jobs', side_effect=poll), \
+                mock.patch('dbas.review.executor.time.sleep', side_effect=sleep):
+            self.assertRaises(StopWorker, run_worker, poll_interval=1.0)
+
+        self.assertEqual(sleeps, [2.0, 1.0])
@@ -1,4 +1,9 @@
-from dbas.review.history import get_review_history, get_ongoing_reviews
+from unittest import mock
+
+from dbas.database import DBDiscussionSession
+from dbas.database.discussion_model import ReviewDelete
+from dbas.review.history import get_review_history, get_ongoing_reviews, get_cursors_from_params, get_votes_of_review
+from dbas.review.queue import key_delete, key_edit
 from dbas.review.reputation import get_history_of
 from dbas.strings.translator import Translator
 from dbas.tests.utils import TestCaseWithConfig
@@ -31,6 +36,41 @@ class TestReviewHistoryHelper(TestCaseWithConfig):
         self.assertIn('past_decision', ongoing)
         self.assertFalse(ongoing['has_access'])
 
+    def test_get_review_history_is_paginated(self):
+        with mock.patch('dbas.review.history.history_page_size', 1):
+            history = get_review_history('mainpage', self.user_tobi, self.translator)
+            delete_queue = next(q for q in history['past_decision'] if q['queue'] == key_delete)
+            self.assertLessEqual(len(delete_queue['content']), 1)
+            self.assertIn('before_delete=', delete_queue['next_url'])
+
+            cursor = int(delete_queue['next_url'].split('before_delete=')[1])
+            history = get_review_history('mainpage', self.user_tobi, self.translator, {key_delete: cursor})
+            delete_queue = next(q for q in history['past_decision'] if q['queue'] == key_delete)
+            for entry in delete_queue['content']:
+                self.assertLess(entry['entry_id'], cursor)
+
+    def test_get_review_history_has_vote_counts(self):
+        history = get_review_history('mainpage', self.user_tobi, self.translator)
+        for queue in history['past_decision']:
+            for entry in queue['content']:
+                self.assertIn('count_pro', entry)
+                self.assertIn('count_con', entry)
+                self.assertIn('nickname', entry['reporter'])
+
+    def test_get_cursors_from_params(self):
+        cursors = get_cursors_from_params({'before_delete': '12', 'before_edit': 'abc', 'before_foo': '3'})
+        self.assertEqual(cursors, {key_delete: 12})
+        self.assertNotIn(key_edit, cursors)
+
+    def test_get_votes_of_review(self):
+        db_review = DBDiscussionSession.query(ReviewDelete).get(1)
+        votes = get_votes_of_review(key_delete, db_review, 'mainpage')
+        self.assertEqual(len(votes['votes_pro']), 4)
+        self.assertEqual(len(votes['votes_con']), 1)
+        for voter in votes['votes_pro'] + votes['votes_con']:
+            self.assertIn('gravatar_url', voter)
+            self.assertTrue(voter['userpage_url'].startswith('mainpage/user/'))
+
     def test_get_reputation_history_of(self):
         history = get_history_of(self.user_tobi, self.translator)
         self.assertGreater(len(history), 0)
@@ -0,0 +1,103 @@
+"""
+Session factories of D-BAS.
+
+The sessions are either stored by beaker (``session.backend = beaker``) or in Redis (``session.backend = redis``).
+Redis sessions are serialized as compact JSON instead of pickled objects: the history of a session is stored as its
+string and the lists of already seen reviews as plain lists. Values, which can not be expressed in JSON, e.g. the
+OAuth session of a login, are pickled one by one.
+"""
+
+import base64
+import json
+import logging
+import pickle
+from typing import Any
+
+from pyramid_beaker import session_factory_from_settings as beaker_session_factory_from_settings
+
+from dbas.handler.history import SessionHistory
+
+LOG = logging.getLogger(__name__)
+
+_history_marker = '__session_history__'
+_pickle_marker = '__pickle__'
+
+
+def serialize(value: Any) -> bytes:
+    """
+    Serializes the data of a session
+
+    :param value: data of the session
+    :return: compact JSON
+    """
+    return json.dumps(__encode(value), separators=(',', ':')).encode('utf-8')
+
+
+def deserialize(data: bytes) -> Any:
+    """
+    Deserializes the data of a session, which was serialized with `serialize`
+
+    :param data: compact JSON
+    :return: data of the session
+    """
+    return json.loads(data.decode('utf-8'), object_hook=__decode)
+
+
+def __encode(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, SessionHistory):
+        return {_history_marker: value.get_session_history_as_string()}
+    if isinstance(value, list):
+        return [__encode(item) for item in value]
+    if isinstance(value, dict) and all(isinstance(key, str) for key in value) \
+            and _history_marker not in value and _pickle_marker not in value:
+        return {key: __encode(item) for key, item in value.items()}
+    return {_pickle_marker: base64.b64encode(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)).decode('ascii')}
+
+
+def __decode(value: dict) -> Any:
+    if len(value) == 1:
+        if _history_marker in value:
+            history = value[_history_marker]
+            return SessionHistory(history) if history else SessionHistory()
+        if _pickle_marker in value:
+            return pickle.loads(base64.b64decode(value[_pickle_marker]))
+    return value
+
+
+def session_factory_from_settings(settings: dict):
+    """
+    Creates the session factory of the configured backend
+
+    :param settings: the settings of the app
+    :return: session factory
+    """
+    backend = settings.get('session.backend', 'beaker')
+    if backend == 'redis':
+        return redis_session_factory_from_settings(settings)
+    if backend != 'beaker':
+        raise ValueError(f'Unknown session backend: {backend}')
+    return beaker_session_factory_from_settings(settings)
+
+
+def redis_session_factory_from_settings(settings: dict):
+    """
+    Creates a factory of sessions, which are stored in Redis and serialized as compact JSON. Secret, timeout and name
+    of the cookie fall back to the settings of the beaker sessions.
+
+    :param settings: the settings of the app
+    :return: session factory
+    """
+    from pyramid_redis_sessions import RedisSessionFactory
+
+    url = settings.get('redis.sessions.url', 'redis://localhost:6379/0')
+    LOG.info("Store sessions in Redis at %s", url.rsplit('@', 1)[-1])
+    return RedisSessionFactory(
+        secret=settings.get('redis.sessions.secret', settings.get('beaker.session.secret')),
+        timeout=int(settings.get('redis.sessions.timeout', settings.get('beaker.session.timeout', 86400))),
+        cookie_name=settings.get('redis.sessions.cookie_name', settings.get('beaker.session.key', 'session')),
+        url=url,
+        serialize=serialize,
+        deserialize=deserialize
+    )
@@ -0,0 +1,258 @@
+"""
+Aggregation of the SQL statements per fingerprint and call site.
+
+The fingerprint of a statement is its SQL without literals, parameters and the length of IN and VALUES lists. The call
+site is the innermost function of D-BAS, which issued the statement. Every worker sums up count, total and maximal
+duration per fingerprint and call site, logs statements, which are slower than ``slow_query.threshold`` seconds, and
+writes its aggregates into ``slow_query.dir`` every ``slow_query.flush_interval`` seconds. The report of the admin
+interface merges the aggregates of all workers.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from dbas.helper.cache import TTLCache
+
+LOG = logging.getLogger(__name__)
+
+project_packages = ('dbas', 'api', 'admin', 'graph', 'websocket', 'search')
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+max_stack_depth = 100
+reset_file = 'reset'
+
+__comments = re.compile(r'--[^\n]*|/\*.*?\*/', re.DOTALL)
+__strings = re.compile(r"'(?:[^']|'')*'")
+__parameters = re.compile(r'%\(\w+\)s|%s|:\w+|\?')
+__numbers = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])')
+__whitespace = re.compile(r'\s+')
+__in_lists = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+__value_rows = re.compile(r'(\bVALUES\s*\([^()]*\))(?:\s*,\s*\([^()]*\))+', re.IGNORECASE)
+
+
+class QueryStats(NamedTuple):
+    fingerprint: str
+    call_site: str
+    statement: str
+    count: int
+    total: float
+    max: float
+
+    def add(self, other: 'QueryStats') -> 'QueryStats':
+        return self._replace(count=self.count + other.count, total=self.total + other.total,
+                             max=max(self.max, other.max))
+
+
+def normalize(statement: str) -> str:
+    """
+    Replaces the literals, parameters and lists of a statement by placeholders
+
+    :param statement: SQL statement
+    :return: normalized statement
+    """
+    statement = __comments.sub(' ', statement)
+    statement = __strings.sub('?', statement)
+    statement = __parameters.sub('?', statement)
+    statement = __numbers.sub('?', statement)
+    statement = __whitespace.sub(' ', statement).strip()
+    statement = __in_lists.sub('IN (?...)', statement)
+    return __value_rows.sub(r'\1', statement)
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+
+
+def find_call_site(frame=None) -> str:
+    """
+    Returns the innermost function of D-BAS on the stack
+
+    :param frame: innermost frame, which is searched
+    :return: path of the file relative to the project and name of the function, e.g. ``dbas/lib.py:get_text``
+    """
+    frame = frame or sys._getframe(1)
+    depth = 0
+    while frame is not None and depth < max_stack_depth:
+        module = frame.f_globals.get('__name__', '')
+        if module.split('.')[0] in project_packages and module != __name__:
+            code = frame.f_code
+            return f'{os.path.relpath(code.co_filename, project_root)}:{code.co_name}'
+        frame = frame.f_back
+        depth += 1
+    return 'unknown'
+
+
+class SlowQueryLog:
+    """
+    Aggregates the SQL statements of this worker per fingerprint and call site
+    """
+
+    def __init__(self, threshold: float = 0.25, directory: Optional[str] = None, flush_interval: float = 10):
+        """
+        :param threshold: statements, which take longer than this seconds, are logged
+        :param directory: directory, where the workers store their aggregates
+        :param flush_interval: seconds between two writes of the aggregates of this worker
+        """
+        self.threshold = threshold
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'dbas-slow-queries')
+        self.flush_interval = flush_interval
+        self.__stats: Dict[Tuple[str, str], QueryStats] = {}
+        self.__fingerprints = TTLCache('sql_fingerprints', maxsize=4096)
+        self.__engines = []
+        self.__lock = threading.Lock()
+        self.__flushed_at = time.monotonic()
+        self.__reset_at = time.time()
+
+    def configure(self, settings: dict):
+        """
+        Reads the threshold, the directory and the flush interval from the settings
+
+        :param settings: settings of the app
+        :return: None
+        """
+        self.threshold = float(settings.get('slow_query.threshold', self.threshold))
+        self.directory = settings.get('slow_query.dir', self.directory)
+        self.flush_interval = float(settings.get('slow_query.flush_interval', self.flush_interval))
+
+    def instrument(self, engine: Engine):
+        """
+        Records the statements of the engine
+
+        :param engine: engine of the database
+        :return: None
+        """
+        if engine in self.__engines:
+            return
+        self.__engines.append(engine)
+        event.listen(engine, 'before_cursor_execute', self.__before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self.__after_cursor_execute)
+
+    def record(self, statement: str, duration: float, call_site: str):
+        """
+        Adds a statement to the aggregates and logs it, if it is slow
+
+        :param statement: SQL statement
+        :param duration: duration in seconds
+        :param call_site: function, which issued the statement
+        :return: None
+        """
+        normalized, key = self.__fingerprints.get_or_compute(statement, lambda: self.__fingerprint(statement))
+        stats = QueryStats(key, call_site, normalized, 1, duration, duration)
+        with self.__lock:
+            previous = self.__stats.get((key, call_site))
+            self.__stats[(key, call_site)] = stats if previous is None else previous.add(stats)
+            flush = time.monotonic() - self.__flushed_at >= self.flush_interval
+            if flush:
+                self.__flushed_at = time.monotonic()
+
+        if duration >= self.threshold:
+            LOG.warning("Slow query %s took %.0f ms at %s: %s", key, duration * 1000, call_site, normalized)
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the aggregates of this worker into the directory
+
+        :return: None
+        """
+        reset_at = self.__get_reset_time()
+        with self.__lock:
+            if reset_at > self.__reset_at:
+                self.__stats.clear()
+                self.__reset_at = reset_at
+            stats = [s._asdict() for s in self.__stats.values()]
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f'{os.getpid()}.json')
+            with open(f'{path}.tmp', 'w') as f:
+                json.dump(stats, f)
+            os.replace(f'{path}.tmp', path)
+        except OSError as e:
+            LOG.warning("Could not write the aggregated queries: %s", e)
+
+    def reset(self):
+        """
+        Drops the aggregates of all workers. The other workers drop their aggregates with their next flush.
+
+        :return: None
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, reset_file), 'w') as f:
+            f.write(str(time.time()))
+        for filename in os.listdir(self.directory):
+            if filename.endswith('.json'):
+                os.remove(os.path.join(self.directory, filename))
+        with self.__lock:
+            self.__stats.clear()
+            self.__reset_at = time.time()
+
+    def get_report(self, limit: int = 20, order: str = 'total') -> List[QueryStats]:
+        """
+        Merges the aggregates of all workers and returns the worst fingerprints and call sites
+
+        :param limit: count of the returned rows
+        :param order: 'total', 'max', 'count' or 'mean'
+        :return: list of aggregates, the worst first
+        """
+        if order not in ('total', 'max', 'count', 'mean'):
+            raise ValueError(f'Unknown order {order}')
+        self.flush()
+        merged: Dict[Tuple[str, str], QueryStats] = {}
+        filenames = sorted(os.listdir(self.directory)) if os.path.isdir(self.directory) else []
+        for filename in filenames:
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    rows = [QueryStats(**row) for row in json.load(f)]
+            except (OSError, ValueError, TypeError) as e:
+                LOG.warning("Could not read the aggregated queries of %s: %s", filename, e)
+                continue
+            for row in rows:
+                key = (row.fingerprint, row.call_site)
+                merged[key] = row if key not in merged else merged[key].add(row)
+
+        def sort_key(row: QueryStats) -> float:
+            return row.total / row.count if order == 'mean' else getattr(row, order)
+
+        return sorted(merged.values(), key=sort_key, reverse=True)[:limit]
+
+    def __get_reset_time(self) -> float:
+        try:
+            with open(os.path.join(self.directory, reset_file)) as f:
+                return float(f.read())
+        except (OSError, ValueError):
+            return 0.0
+
+    @staticmethod
+    def __fingerprint(statement: str) -> Tuple[str, str]:
+        normalized = normalize(statement)
+        return normalized, fingerprint(normalized)
+
+    @staticmethod
+    def __before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+    def __after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('slow_query_start')
+        if not starts:
+            return
+        duration = time.perf_counter() - starts.pop()
+        try:
+            self.record(statement, duration, find_call_site())
+        except Exception:
+            LOG.exception("Could not record the statement")
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,126 @@
+"""
+Profiles the startup of the WSGI app.
+
+The app is loaded from an ini file in a child interpreter, which runs with ``-X importtime``. The report lists the
+modules with the highest cumulative import time, the import time per top-level package and the duration of the phases
+of ``main``::
+
+    dbas-profile-startup development.ini --top 30
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple
+
+child_flag = '--child'
+
+
+class ImportTiming(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(lines: Iterable[str]) -> List[ImportTiming]:
+    """
+    Parses the output of ``python -X importtime``
+
+    :param lines: lines of stderr
+    :return: import times of the modules in the order of the output
+    """
+    timings = []
+    for line in lines:
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        timings.append(ImportTiming(stripped, int(parts[0]), int(parts[1]), (len(name) - len(stripped) - 1) // 2))
+    return timings
+
+
+def self_time_per_package(timings: Iterable[ImportTiming]) -> Dict[str, int]:
+    """
+    Sums up the self import time of all modules per top-level package
+
+    :param timings: import times of the modules
+    :return: microseconds by name of the package
+    """
+    packages: Dict[str, int] = defaultdict(int)
+    for timing in timings:
+        packages[timing.module.split('.')[0]] += timing.self_us
+    return dict(packages)
+
+
+def print_report(timings: List[ImportTiming], phases: List, top: int):
+    """
+    Prints the slowest imports, the import time per package and the phases of main
+
+    :param timings: import times of the modules
+    :param phases: names and durations in seconds of the phases of main
+    :param top: count of listed modules and packages
+    :return: None
+    """
+    print(f'{"cumulative":>12} {"self":>10}  module')
+    for timing in sorted(timings, key=lambda t: t.cumulative_us, reverse=True)[:top]:
+        print(f'{timing.cumulative_us / 1000:9.1f} ms {timing.self_us / 1000:7.1f} ms  {timing.module}')
+
+    print(f'\n{"self":>12}  package')
+    packages = sorted(self_time_per_package(timings).items(), key=lambda item: item[1], reverse=True)
+    for package, duration in packages[:top]:
+        print(f'{duration / 1000:9.1f} ms  {package}')
+    print(f'{sum(t.self_us for t in timings) / 1000:9.1f} ms  all imports')
+
+    print(f'\n{"duration":>12}  phase of main()')
+    for name, duration in phases:
+        print(f'{duration * 1000:9.1f} ms  {name}')
+    print(f'{sum(duration for _, duration in phases) * 1000:9.1f} ms  all phases')
+
+
+def load_app(config: str):
+    """
+    Loads the app like pserve does and prints the phases of main as JSON. Runs in the child interpreter.
+
+    :param config: path of the ini file
+    :return: None
+    """
+    from pyramid.paster import get_app, setup_logging
+
+    setup_logging(config)
+    app = get_app(config, 'main')
+    timer = getattr(app.registry, 'startup_timer', None)
+    print(json.dumps(timer.phases if timer else []))
+
+
+def main(argv=sys.argv):
+    parser = argparse.ArgumentParser(prog='dbas-profile-startup',
+                                     description='Reports the import times of the modules and the duration of the '
+                                                 'phases of main() while the app is loaded.')
+    parser.add_argument('config', nargs='?', default='development.ini', help='ini file of the app')
+    parser.add_argument('--top', type=int, default=25, help='count of listed modules and packages')
+    parser.add_argument(child_flag, action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv[1:])
+
+    if args.child:
+        load_app(args.config)
+        return
+
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-m', __name__, child_flag, args.config],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    stderr = process.stderr.splitlines()
+    if process.returncode != 0:
+        print('\n'.join(line for line in stderr if not line.startswith('import time:')), file=sys.stderr)
+        sys.exit(process.returncode)
+
+    phases = json.loads(process.stdout.strip().splitlines()[-1])
+    print_report(parse_importtime(stderr), phases, args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -230,6 +230,27 @@ AjaxReviewHandler.prototype.cancelReview = function (queue, uid) {
     this.__ajax_skeleton(url, data, true, uid);
 };
 
+/**
+ *
+ * @param queue
+ * @param uid
+ */
+AjaxReviewHandler.prototype.getReviewVotes = function (queue, uid) {
+    'use strict';
+    var url = 'get_review_votes';
+    var data = {
+        queue: queue,
+        uid: parseInt(uid)
+    };
+    var done = function ajaxGetReviewVotesDone(data) {
+        new ReviewHistory().setVotes(queue, uid, data);
+    };
+    var fail = function ajaxGetReviewVotesFail(data) {
+        setGlobalErrorHandler(_t(ohsnap), data.responseJSON.errors[0].description);
+    };
+    ajaxSkeleton(url, 'POST', data, done, fail);
+};
+
 AjaxReviewHandler.prototype.__ajax_skeleton = function (url, data, remove_element_on_success, uid) {
     'use strict';
     var done = function (data) {
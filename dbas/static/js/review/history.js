@@ -7,6 +7,11 @@ $(document).ready(function () {
         var revokedArgument = $('#' + queue + id + ' td:first-child').attr('title');
         new ReviewHistory().showUndoPopup(queue, id, revokedArgument);
     });
+
+    $('.review-votes').click(function (event) {
+        event.preventDefault();
+        new AjaxReviewHandler().getReviewVotes($(this).data('queue'), $(this).data('id'));
+    });
 });
 
 function ReviewHistory() {
@@ -37,4 +42,26 @@ function ReviewHistory() {
             $('#' + popupConfirmDialogId).modal('hide');
         });
     };
+
+    /**
+     * Replaces the placeholders of the voters with their avatars
+     *
+     * @param queue
+     * @param id
+     * @param votes dict with the lists votes_pro and votes_con
+     */
+    this.setVotes = function (queue, id, votes) {
+        var row = $('#' + queue + id);
+        var getAvatars = function (voters) {
+            if (voters.length === 0) {
+                return '-';
+            }
+            return $.map(voters, function (voter) {
+                var img = $('<img>').addClass('img-circle').attr('src', voter.gravatar_url);
+                return $('<a>').attr({'href': voter.userpage_url, 'title': voter.nickname}).append(img);
+            });
+        };
+        row.find('td.votes-pro').empty().append(getAvatars(votes.votes_pro));
+        row.find('td.votes-con').empty().append(getAvatars(votes.votes_con));
+    };
 }
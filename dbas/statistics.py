@@ -1,167 +1,263 @@
+"""
+Exports statistics of the discussions for experiments.
+
+Every report is one GROUP BY query, whose rows are streamed into a JSON or CSV file. The reports can be restricted to
+issues and to a time range, in which the counted rows were created::
+
+    dbas-statistics experiment --format csv --issue 1 town-has-to-cut-spending --since 2019-01-01 --until 2019-02-01
+"""
+
 import argparse
+import csv
 import json
 import os
 import sys
-from collections import Counter
+from collections import OrderedDict
+from typing import Callable, Iterable, List, NamedTuple, Optional, TextIO
 
-from sqlalchemy import engine_from_config
+import arrow
+from sqlalchemy import case, func
+from sqlalchemy.orm import Query
 
-from dbas import get_db_environs, load_discussion_database
+from dbas.console_scripts import setup_database
 from dbas.database import DBDiscussionSession
 from dbas.database.discussion_model import StatementToIssue, TextVersion, Issue, Argument, SeenArgument, Premise
+from dbas.handler.activity import get_issue_activity
+
+formats = ('json', 'csv')
+
+
+class Filters(NamedTuple):
+    issue_uids: Optional[List[int]] = None
+    since: Optional[arrow.Arrow] = None
+    until: Optional[arrow.Arrow] = None
+
+    def apply(self, query: Query, issue_column, timestamp_column) -> Query:
+        """
+        Restricts the query to the issues and the time range
+
+        :param query: query of a report
+        :param issue_column: column with the uid of the issue
+        :param timestamp_column: column with the creation time of the counted rows
+        :return: the restricted query
+        """
+        if self.issue_uids is not None:
+            query = query.filter(issue_column.in_(self.issue_uids))
+        if self.since is not None:
+            query = query.filter(timestamp_column >= self.since)
+        if self.until is not None:
+            query = query.filter(timestamp_column < self.until)
+        return query
+
+
+def get_participating_users(filters: Filters = Filters()) -> Query:
+    """
+    Authors of the statements per issue. The author of a statement is the author of its first text version.
+
+    :param filters: restriction of the issues and the time range
+    :return: query of (issue_uid, user_uid)
+    """
+    return __get_statement_authors(filters, DBDiscussionSession.query(
+        StatementToIssue.issue_uid.label('issue_uid'), TextVersion.author_uid.label('user_uid')))
+
+
+def get_statements_per_user(filters: Filters = Filters()) -> Query:
+    """
+    Count of statements per author and issue
+
+    :param filters: restriction of the issues and the time range
+    :return: query of (issue_uid, user_uid, statements)
+    """
+    return __get_statement_authors(filters, DBDiscussionSession.query(
+        StatementToIssue.issue_uid.label('issue_uid'), TextVersion.author_uid.label('user_uid'),
+        func.count().label('statements')))
+
+
+def get_supports_and_attacks_per_issue(filters: Filters = Filters()) -> Query:
+    """
+    Count of supporting and attacking arguments per issue, disabled arguments are skipped
+
+    :param filters: restriction of the issues and the time range
+    :return: query of (issue_uid, supports, attacks)
+    """
+    query = DBDiscussionSession.query(Argument.issue_uid.label('issue_uid'), *__supports_and_attacks())
+    query = filters.apply(query.filter(Argument.is_disabled.is_(False)), Argument.issue_uid, Argument.timestamp)
+    return query.group_by(Argument.issue_uid).order_by(Argument.issue_uid)
+
+
+def get_supports_and_attacks_per_user(filters: Filters = Filters()) -> Query:
+    """
+    Count of supporting and attacking arguments per author and issue, disabled arguments are skipped
+
+    :param filters: restriction of the issues and the time range
+    :return: query of (issue_uid, user_uid, supports, attacks)
+    """
+    query = DBDiscussionSession.query(Argument.issue_uid.label('issue_uid'), Argument.author_uid.label('user_uid'),
+                                      *__supports_and_attacks())
+    query = filters.apply(query.filter(Argument.is_disabled.is_(False)), Argument.issue_uid, Argument.timestamp)
+    return query.group_by(Argument.issue_uid, Argument.author_uid).order_by(Argument.issue_uid, Argument.author_uid)
+
+
+def get_seen_arguments_per_user(filters: Filters = Filters()) -> Query:
+    """
+    Count of seen arguments per user and issue. Seen arguments have no timestamp, therefore the time range restricts
+    the creation of the arguments.
+
+    :param filters: restriction of the issues and the time range
+    :return: query of (issue_uid, user_uid, seen_arguments)
+    """
+    query = DBDiscussionSession.query(Argument.issue_uid.label('issue_uid'), SeenArgument.user_uid.label('user_uid'),
+                                      func.count().label('seen_arguments')).join(
+        Argument, Argument.uid == SeenArgument.argument_uid)
+    query = filters.apply(query, Argument.issue_uid, Argument.timestamp)
+    return query.group_by(Argument.issue_uid, SeenArgument.user_uid).order_by(Argument.issue_uid,
+                                                                              SeenArgument.user_uid)
+
+
+def get_reused_statements(filters: Filters = Filters()) -> Query:
+    """
+    Count of premises per statement and issue
+
+    :param filters: restriction of the issues and the time range
+    :return: query of (issue_uid, statement_uid, premises)
+    """
+    query = DBDiscussionSession.query(Premise.issue_uid.label('issue_uid'), Premise.statement_uid.label('statement_uid'),
+                                      func.count().label('premises'))
+    query = filters.apply(query, Premise.issue_uid, Premise.timestamp)
+    return query.group_by(Premise.issue_uid, Premise.statement_uid).order_by(Premise.issue_uid, Premise.statement_uid)
+
+
+def get_daily_activity_per_issue(filters: Filters = Filters()) -> Query:
+    """
+    Active users, clicks, new statements and edits per issue and day from the daily rollups. The time range is rounded
+    to whole days (UTC).
+
+    :param filters: restriction of the issues and the time range
+    :return: query of (issue_uid, day, users, clicks, statements, edits)
+    """
+    return get_issue_activity(filters.since and filters.since.date(), filters.until and filters.until.date(),
+                              filters.issue_uids)
+
+
+# reports by the name of their file
+reports: 'OrderedDict[str, Callable[[Filters], Query]]' = OrderedDict([
+    ('participating_user', get_participating_users),
+    ('all_statements_per_user', get_statements_per_user),
+    ('amount_of_supports_attacks_per_issue', get_supports_and_attacks_per_issue),
+    ('amount_of_supports_attacks_per_user', get_supports_and_attacks_per_user),
+    ('number_of_seen_arguments_per_user', get_seen_arguments_per_user),
+    ('reused_statements', get_reused_statements),
+    ('daily_activity_per_issue', get_daily_activity_per_issue),
+])
+
+
+def write_report(query: Query, output: TextIO, output_format: str, chunk_size: int = 1000) -> int:
+    """
+    Streams the rows of the query into the output
+
+    :param query: query of a report
+    :param output: opened text file
+    :param output_format: 'json' for an array of objects or 'csv' with a header
+    :param chunk_size: count of rows, which are fetched at once
+    :return: count of written rows
+    """
+    fields = [column['name'] for column in query.column_descriptions]
+    rows = (dict(zip(fields, row)) for row in query.yield_per(chunk_size))
+    if output_format == 'csv':
+        return __write_csv(rows, fields, output)
+    return __write_json(rows, output)
+
+
+def get_issue_uids(issues: Optional[Iterable[str]]) -> Optional[List[int]]:
+    """
+    Looks up the uids of issues, which are given by uid or slug
+
+    :param issues: uids or slugs of the issues or None for all issues
+    :return: uids of the issues or None for all issues
+    """
+    if issues is None:
+        return None
+    uids = []
+    for issue in issues:
+        db_issue = DBDiscussionSession.query(Issue).filter(
+            Issue.uid == int(issue) if issue.isdigit() else Issue.slug == issue).first()
+        if db_issue is None:
+            raise ValueError(f'There is no issue {issue}')
+        uids.append(db_issue.uid)
+    return uids
+
+
+def main(argv=sys.argv):
+    parser = argparse.ArgumentParser(prog='dbas-statistics',
+                                     description='Exports statistics of the discussions as JSON or CSV files.')
+    parser.add_argument('prefix', help='prefix of the files')
+    parser.add_argument('--report', dest='reports', nargs='+', choices=list(reports), default=list(reports),
+                        help='reports, which are exported, all by default')
+    parser.add_argument('--format', choices=formats, default='json', help='format of the files')
+    parser.add_argument('--output-dir', default='./experiment_results', help='directory of the files')
+    parser.add_argument('--issue', dest='issues', nargs='+', help='uids or slugs of the issues, all by default')
+    parser.add_argument('--since', type=__parse_time, help='skip rows, which were created before this time')
+    parser.add_argument('--until', type=__parse_time, help='skip rows, which were created at or after this time')
+    args = parser.parse_args(argv[1:])
+
+    setup_database()
+    try:
+        filters = Filters(get_issue_uids(args.issues), args.since, args.until)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
 
-# Set up the database session. Without this, you can not use DBDiscussionSession!
-settings = {}  # Add console script specific configuration here.
-settings.update(get_db_environs("sqlalchemy.discussion.url", db_name="discussion"))
-
-discussion_engine = engine_from_config(settings, "sqlalchemy.discussion.")
-load_discussion_database(discussion_engine)
+    os.makedirs(args.output_dir, exist_ok=True)
+    for name in args.reports:
+        path = os.path.join(args.output_dir, f'{args.prefix}_{name}.{args.format}')
+        with open(path, 'w', newline='') as f:
+            count = write_report(reports[name](filters), f, args.format)
+        print(f'{count:>10}  {path}')
 
 
-def get_all_participating_users_of_issue() -> dict:
-    issues_dict = {}
-    issues_uids = [el.uid for el in
-                   DBDiscussionSession.query(Issue).all()]
+def __get_statement_authors(filters: Filters, query: Query) -> Query:
+    first_versions = DBDiscussionSession.query(TextVersion.statement_uid.label('statement_uid'),
+                                               func.min(TextVersion.uid).label('uid')).group_by(
+        TextVersion.statement_uid).subquery()
+    query = query.join(first_versions, first_versions.c.statement_uid == StatementToIssue.statement_uid).join(
+        TextVersion, TextVersion.uid == first_versions.c.uid)
+    query = filters.apply(query, StatementToIssue.issue_uid, TextVersion.timestamp)
+    return query.group_by(StatementToIssue.issue_uid, TextVersion.author_uid).order_by(StatementToIssue.issue_uid,
+                                                                                       TextVersion.author_uid)
 
-    for issue_uid in issues_uids:
-
-        issues_statements_uids = [el.statement_uid for el in
-                                  DBDiscussionSession.query(StatementToIssue).filter_by(issue_uid=issue_uid).all()]
-
-        participating_users = []
-        for statement in issues_statements_uids:
-            participating_users += [
-                "User_" + str(
-                    DBDiscussionSession.query(TextVersion).filter_by(statement_uid=statement).first().author_uid)
-            ]
-        if len(participating_users) > 0:
-            issues_dict["Issue_" + str(issue_uid)] = list(set(participating_users))
-
-    return issues_dict
-
-
-def get_statements_which_have_been_used_more_than_once() -> dict:
-    issues_uids = [el.uid for el in
-                   DBDiscussionSession.query(Issue).all()]
-
-    statements_per_issue = {}
-    for issue_uid in issues_uids:
-        statements = [el.statement_uid for el in
-                      DBDiscussionSession.query(Premise).filter_by(issue_uid=issue_uid).all()]
-        statements_per_issue["Issue_" + str(issue_uid)] = statements
-
-    for key in statements_per_issue.keys():
-        statements = Counter(statements_per_issue[key])
-        statement_count = {}
-        for statement_key in statements.keys():
-            statement_count["Statement_uid_" + str(statement_key)] = statements[statement_key]
-        statements_per_issue[key] = statement_count
-
-    return statements_per_issue
-
-
-def get_all_statements_for_user_of_issues() -> dict:
-    participation_dict = {}
-    issues = get_all_participating_users_of_issue()
-    for issue_uid in issues.keys():
-        participating_users = issues[issue_uid]
-        if len(participating_users) == 0:
-            continue
-        issues_statements_uids = [el.statement_uid for el in DBDiscussionSession.query(StatementToIssue).filter_by(
-            issue_uid=int(issue_uid.replace("Issue_", ""))).all()]
-
-        all_statements_of_participating_users = []
-        for statement in issues_statements_uids:
-            res = DBDiscussionSession.query(TextVersion).filter_by(statement_uid=statement).first().author_uid
-            if "User_" + str(res) in participating_users:
-                all_statements_of_participating_users += ["User_" + str(res) + "_number_of_statements"]
-
-        participation_dict[issue_uid] = dict(Counter(all_statements_of_participating_users))
-
-    return participation_dict
-
-
-def get_amount_of_support_and_attack_per_issue() -> dict:
-    relations_dict = {}
-    issues = get_all_participating_users_of_issue()
-    for issue_uid in issues.keys():
-        if len(issues[issue_uid]) == 0:
-            continue
-        arguments_relations = ["support" if el.is_supportive else "attack" for el in
-                               DBDiscussionSession.query(Argument).filter_by(
-                                   issue_uid=int(issue_uid.replace("Issue_", ""))).all()
-                               if not el.is_disabled]
-        relations_dict[issue_uid] = dict(Counter(arguments_relations))
-
-    return relations_dict
-
-
-def get_amount_of_support_and_attack_per_issue_per_user() -> dict:
-    issues_dict = {}
-    issues = get_all_participating_users_of_issue()
-    for issue_uid in issues.keys():
-        if len(issues[issue_uid]) == 0:
-            continue
-        user_dict = {}
-        for user in issues[issue_uid]:
-            arguments_relations = ["support" if el.is_supportive else "attack" for el in
-                                   DBDiscussionSession.query(Argument).filter_by(
-                                       issue_uid=int(issue_uid.replace("Issue_", ""))).filter_by(
-                                       author_uid=int(user.replace("User_", ""))).all()
-                                   if not el.is_disabled]
-
-            res = dict(Counter(arguments_relations))
-            user_dict[user] = res
-
-        issues_dict[issue_uid] = user_dict
-
-    return issues_dict
-
-
-def get_number_of_seen_arguments_per_user_per_issue() -> dict:
-    all_seen_arguments = [(el.user_uid, el.argument_uid) for el in DBDiscussionSession.query(SeenArgument).all()]
-    all_arguments_per_issue = [(el.uid, el.issue_uid) for el in DBDiscussionSession.query(Argument).all()]
-    all_seen_arguments_per_issue = []
-    for user_uid, argument_uid_seen in all_seen_arguments:
-        for argument_uid, issue_uid in all_arguments_per_issue:
-            if argument_uid_seen == argument_uid:
-                all_seen_arguments_per_issue += [(user_uid, argument_uid, issue_uid)]
-    res = {}
-    issue_uids = list(set([x[2] for x in all_seen_arguments_per_issue]))
-    for issue_uid in issue_uids:
-        if "Issue_" + str(issue_uid) not in res.keys():
-            res["Issue_" + str(issue_uid)] = {}
-        for user_uid, argument_uid, issue_uid_to_match in all_seen_arguments_per_issue:
-            if issue_uid_to_match == issue_uid:
-                if "User_" + str(user_uid) not in res["Issue_" + str(issue_uid)]:
-                    res["Issue_" + str(issue_uid)]["User_" + str(user_uid)] = 0
-                res["Issue_" + str(issue_uid)]["User_" + str(user_uid)] += 1
-    return res
-
-
-def write_file_to(prefix: str, name: str, input: str):
-    path = "./experiment_results/"
-    if not os.path.exists(os.path.dirname(path)):
-        os.makedirs(os.path.dirname(path))
-
-    with open("{}{}_{}.json".format(path, prefix, name), "w") as json_file:
-        json.dump(input, json_file, indent=4)
 
+def __supports_and_attacks():
+    return (func.sum(case([(Argument.is_supportive.is_(True), 1)], else_=0)).label('supports'),
+            func.sum(case([(Argument.is_supportive.is_(True), 0)], else_=1)).label('attacks'))
 
-if __name__ == '__main__':
 
-    parser = argparse.ArgumentParser()
-    parser.add_argument("run",
-                        help="To run this script, use \"docker exec dbas_web_1 python dbas/statistics.py <prefix> \" ")
-    args = parser.parse_args()
-    if len(sys.argv) != 2:
-        print("Add the prefix as argument for this script")
-        sys.exit(1)
-    prefix = str(sys.argv[1])
-
-    write_file_to(prefix, "participating_user", get_all_participating_users_of_issue())
-    write_file_to(prefix, "all_statements_per_user", get_all_statements_for_user_of_issues())
-    write_file_to(prefix, "amount_of_supports_attacks_per_issue", get_amount_of_support_and_attack_per_issue())
-    write_file_to(prefix, "amount_of_supports_attacks_per_user", get_amount_of_support_and_attack_per_issue_per_user())
-    write_file_to(prefix, "number_of_seen_arguments_per_user", get_number_of_seen_arguments_per_user_per_issue())
-    write_file_to(prefix, "reused_statements", get_statements_which_have_been_used_more_than_once())
+def __write_csv(rows: Iterable[dict], fields: List[str], output: TextIO) -> int:
+    writer = csv.DictWriter(output, fieldnames=fields)
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def __write_json(rows: Iterable[dict], output: TextIO) -> int:
+    output.write('[')
+    count = 0
+    for row in rows:
+        output.write(',\n' if count else '\n')
+        output.write(json.dumps(row, default=str))
+        count += 1
+    output.write('\n]\n')
+    return count
+
+
+def __parse_time(value: str) -> arrow.Arrow:
+    try:
+        return arrow.get(value)
+    except (ValueError, TypeError, arrow.parser.ParserError) as e:
+        raise argparse.ArgumentTypeError(f'Invalid time {value}: {e}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyramid import testing
+
+from dbas.helper.cache import TTLCache
+from dbas.metrics import Counter, Gauge, Histogram, MetricsRegistry, CallbackMetric, merge, metrics, \
+    metrics_tween_factory, metrics_view, observe_outbound, render, request_duration, outbound_errors
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_cumulative_buckets(self):
+        histogram = Histogram('test_duration_seconds', 'Duration', ('route',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5):
+            histogram.observe(value, route='main')
+
+        samples = {(sample.name, sample.labels): sample.value for sample in histogram.samples()}
+        self.assertEqual(samples[('test_duration_seconds_bucket', (('route', 'main'), ('le', '0.1')))], 1)
+        self.assertEqual(samples[('test_duration_seconds_bucket', (('route', 'main'), ('le', '1.0')))], 3)
+        self.assertEqual(samples[('test_duration_seconds_bucket', (('route', 'main'), ('le', '+Inf')))], 4)
+        self.assertEqual(samples[('test_duration_seconds_count', (('route', 'main'),))], 4)
+        self.assertAlmostEqual(samples[('test_duration_seconds_sum', (('route', 'main'),))], 6.05)
+
+    def test_wrong_labels(self):
+        histogram = Histogram('test_duration_seconds', 'Duration', ('route',))
+        self.assertRaises(ValueError, histogram.observe, 1, method='GET')
+
+
+class RenderTest(unittest.TestCase):
+
+    def test_text_format(self):
+        counter = Counter('test_requests_total', 'Requests', ('path',))
+        counter.inc(path='/a"b')
+        counter.inc(2, path='/a"b')
+        gauge = Gauge('test_in_flight', 'In flight')
+        gauge.set(1.5)
+
+        text = render([counter.collect(), gauge.collect()])
+        self.assertIn('# TYPE test_requests_total counter\n', text)
+        self.assertIn('test_requests_total{path="/a\\"b"} 3\n', text)
+        self.assertIn('# HELP test_in_flight In flight\n', text)
+        self.assertIn('test_in_flight 1.5\n', text)
+
+    def test_cache_counters(self):
+        cache = TTLCache('test_metrics_cache')
+        cache.set('key', 'value')
+        cache.get('key')
+        cache.get('unknown')
+        text = render(metrics.collect())
+        self.assertIn('dbas_cache_hits_total{cache="test_metrics_cache"} 1\n', text)
+        self.assertIn('dbas_cache_misses_total{cache="test_metrics_cache"} 1\n', text)
+        self.assertIn('dbas_cache_entries{cache="test_metrics_cache"} 1\n', text)
+
+
+class MultiprocessTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.registry = MetricsRegistry()
+        self.registry.configure({'metrics.multiprocess_dir': self.directory})
+        self.counter = self.registry.register(Counter('test_requests_total', 'Requests'))
+        self.gauge = self.registry.register(Gauge('test_in_flight', 'In flight'))
+        self.registry.register(CallbackMetric('test_global', 'Global', 'gauge', lambda: {(): 7}, per_process=False))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def __write_snapshot(self, pid, requests, in_flight):
+        self.counter.clear()
+        self.gauge.clear()
+        self.counter.inc(requests)
+        self.gauge.set(in_flight)
+        with open(os.path.join(self.directory, f'{pid}.json'), 'w') as f:
+            json.dump([family._asdict() for family in self.registry.collect()], f)
+
+    def test_sums_the_snapshots_of_all_processes(self):
+        dead_pid = 2 ** 22 + 1
+        self.__write_snapshot(dead_pid, requests=5, in_flight=3)
+        self.__write_snapshot(os.getppid(), requests=2, in_flight=1)
+        self.counter.clear()
+        self.gauge.clear()
+        self.counter.inc(1)
+        self.gauge.set(1)
+
+        families = {family.name: family for family in self.registry.collect_all()}
+        self.assertEqual(families['test_requests_total'].samples[0].value, 8)
+        self.assertEqual(families['test_in_flight'].samples[0].value, 2)
+        self.assertEqual(families['test_global'].samples[0].value, 7)
+        self.assertTrue(os.path.isfile(os.path.join(self.directory, f'{os.getpid()}.json')))
+
+    def test_skips_broken_snapshots(self):
+        with open(os.path.join(self.directory, '1.json'), 'w') as f:
+            f.write('{')
+        self.counter.inc()
+        families = {family.name: family for family in self.registry.collect_all()}
+        self.assertEqual(families['test_requests_total'].samples[0].value, 1)
+
+    def test_merge_keeps_the_type(self):
+        histogram = Histogram('test_duration_seconds', 'Duration', buckets=(1,))
+        histogram.observe(0.5)
+        merged = merge([(True, [histogram.collect()]), (False, [histogram.collect()])])
+        self.assertEqual(merged[0].type, 'histogram')
+        self.assertEqual([sample.value for sample in merged[0].samples], [2, 2, 1.0, 2])
+
+
+class AccessTest(unittest.TestCase):
+
+    def test_allowed_networks(self):
+        registry = MetricsRegistry()
+        registry.configure({'metrics.allowed_networks': '10.0.0.0/8 ::1'})
+        self.assertTrue(registry.is_allowed('10.1.2.3'))
+        self.assertTrue(registry.is_allowed('::1'))
+        self.assertFalse(registry.is_allowed('127.0.0.1'))
+        self.assertFalse(registry.is_allowed(None))
+
+    def test_forwarded_addresses_are_ignored(self):
+        request = testing.DummyRequest(remote_addr='203.0.113.7', headers={'X-Forwarded-For': '127.0.0.1'})
+        request.has_permission = lambda permission: False
+        self.assertEqual(metrics_view(request).status_code, 403)
+
+        request = testing.DummyRequest(remote_addr='127.0.0.1', headers={'X-Forwarded-For': '203.0.113.7'})
+        request.has_permission = lambda permission: False
+        self.assertEqual(metrics_view(request).status_code, 200)
+
+
+class TweenTest(unittest.TestCase):
+
+    def test_records_requests_and_outbound_calls(self):
+        tween = metrics_tween_factory(lambda request: testing.DummyResource(status_code=201), None)
+        request = testing.DummyRequest(method='PUT')
+        request.matched_route = None
+        before = self.__value(request_duration, 'dbas_http_request_duration_seconds_count',
+                              (('route', 'none'), ('method', 'PUT'), ('status', '201')))
+        tween(request)
+        after = self.__value(request_duration, 'dbas_http_request_duration_seconds_count',
+                             (('route', 'none'), ('method', 'PUT'), ('status', '201')))
+        self.assertEqual(after, before + 1)
+
+        with self.assertRaises(KeyError):
+            with observe_outbound('test_service'):
+                raise KeyError()
+        self.assertEqual(self.__value(outbound_errors, 'dbas_outbound_request_errors_total',
+                                      (('service', 'test_service'),)), 1)
+
+    @staticmethod
+    def __value(metric, name, labels):
+        return next((sample.value for sample in metric.samples() if sample.name == name and sample.labels == labels),
+                    0)
@@ -0,0 +1,141 @@
+import os
+import pstats
+import shutil
+import tempfile
+import time
+import unittest
+
+from pyramid import testing
+from pyramid.interfaces import IRoutesMapper
+
+from dbas.profiling import Profiler, ProfilingSession, route_key
+
+
+def slow_view(duration):
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        pass
+    return 'done'
+
+
+class DummyRoute:
+    def __init__(self, name, pattern):
+        self.name = name
+        self.pattern = pattern
+
+
+class ProfilingSessionTest(unittest.TestCase):
+
+    def test_matches_name_or_pattern(self):
+        session = ProfilingSession('discussion_*', 1, 0, time.time() + 60)
+        self.assertTrue(session.matches(DummyRoute('discussion_attitude', '/discuss/{slug}/attitude/{id}')))
+        self.assertFalse(session.matches(DummyRoute('review_index', '/review')))
+        self.assertTrue(ProfilingSession('/review*', 1, 0, 0).matches(DummyRoute('review_index', '/review')))
+        self.assertFalse(ProfilingSession('*', 1, 0, time.time() - 1).is_active)
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.profiler = Profiler(self.directory, interval=0.001, check_interval=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_invalid_session(self):
+        self.assertRaises(ValueError, self.profiler.start_session, '', 60, 1)
+        self.assertRaises(ValueError, self.profiler.start_session, '*', 0, 1)
+        self.assertRaises(ValueError, self.profiler.start_session, '*', 60, 1.5)
+
+    def test_start_and_stop(self):
+        self.assertIsNone(self.profiler.current_session())
+        self.profiler.start_session('discussion_*', 60, 0.5)
+        self.assertEqual(self.profiler.current_session().pattern, 'discussion_*')
+
+        self.profiler.stop_session()
+        self.assertIsNone(self.profiler.current_session())
+        self.assertEqual(self.profiler.last_session().pattern, 'discussion_*')
+
+    def test_profile_and_download(self):
+        self.profiler.start_session('*', 60, 1)
+        for _ in range(2):
+            self.assertEqual(self.profiler.profile('discussion_init', slow_view, 0.05), 'done')
+        self.profiler.flush()
+
+        routes = self.profiler.get_routes()
+        self.assertEqual([route['route'] for route in routes], ['discussion_init'])
+        self.assertEqual(routes[0]['requests'], 2)
+        self.assertGreater(routes[0]['samples'], 0)
+
+        path = os.path.join(self.directory, 'download.pstats')
+        with open(path, 'wb') as f:
+            f.write(self.profiler.get_pstats('discussion_init'))
+        functions = [function for _, _, function in pstats.Stats(path).stats]
+        self.assertIn('slow_view', functions)
+
+        stacks = self.profiler.get_collapsed_stacks('discussion_init')
+        self.assertIn('slow_view', stacks)
+        self.assertNotIn(':profile:', stacks)
+        self.assertIsNone(self.profiler.get_collapsed_stacks('unknown'))
+
+    def test_dumps_are_throttled(self):
+        self.profiler.dump_interval = 3600
+        self.profiler.start_session('*', 60, 1)
+        self.profiler.profile('discussion_init', slow_view, 0)
+
+        # the first dump is due at once and written by the sampler thread
+        deadline = time.monotonic() + 5
+        while not self.profiler.get_routes() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.profiler.get_routes()[0]['requests'], 1)
+
+        self.profiler.profile('discussion_init', slow_view, 0)
+        time.sleep(0.05)
+        self.assertEqual(self.profiler.get_routes()[0]['requests'], 1)
+        self.profiler.flush()
+        self.assertEqual(self.profiler.get_routes()[0]['requests'], 2)
+
+    def test_new_session_drops_profiles(self):
+        self.profiler.start_session('*', 60, 1)
+        self.profiler.profile('discussion_init', slow_view, 0)
+        self.profiler.flush()
+        self.profiler.start_session('*', 60, 1)
+        self.assertEqual(self.profiler.get_routes(), [])
+
+    def test_route_key(self):
+        self.assertEqual(route_key('__static/'), '__static_')
+
+
+class ProfilingTweenTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        testing.tearDown()
+        shutil.rmtree(self.directory)
+
+    def test_profiles_matching_routes_only(self):
+        from dbas import profiling
+
+        route = DummyRoute('discussion_init', '/discuss/{slug}')
+        self.config.registry.registerUtility(lambda request: {'route': route, 'match': {}}, IRoutesMapper)
+        original = profiling.profiler
+        profiling.profiler = Profiler(self.directory, interval=0.001, check_interval=0)
+        try:
+            tween = profiling.profiling_tween_factory(lambda request: 'response', self.config.registry)
+            self.assertEqual(tween(testing.DummyRequest()), 'response')
+            self.assertEqual(profiling.profiler.get_routes(), [])
+
+            profiling.profiler.start_session('review_*', 60, 1)
+            tween(testing.DummyRequest())
+            self.assertEqual(profiling.profiler.get_routes(), [])
+
+            profiling.profiler.start_session('discussion_*', 60, 1)
+            tween(testing.DummyRequest())
+            profiling.profiler.flush()
+            self.assertEqual(profiling.profiler.get_routes()[0]['requests'], 1)
+        finally:
+            profiling.profiler = original
@@ -0,0 +1,156 @@
+import json
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+import unittest
+from datetime import date
+from typing import Optional
+
+from pyramid import testing
+from pyramid.request import Request
+from pyramid.response import Response
+
+from dbas.handler.history import SessionHistory
+from dbas.session import serialize, deserialize, session_factory_from_settings
+
+
+class SessionSerializationTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        data = {
+            'managed_dict': {
+                'session_history': SessionHistory('attitude/2-justify/2/agree'),
+                'issue': 2,
+                'already_seen_delete': [1, 2, 3],
+                'next': None
+            },
+            'created': 1.5,
+            'timeout': 86400
+        }
+        restored = deserialize(serialize(data))
+
+        session_history = restored['managed_dict'].pop('session_history')
+        self.assertIsInstance(session_history, SessionHistory)
+        self.assertEqual(session_history.get_session_history_as_list(), ['attitude/2', 'justify/2/agree'])
+        data['managed_dict'].pop('session_history')
+        self.assertEqual(restored, data)
+
+    def test_empty_history(self):
+        restored = deserialize(serialize({'session_history': SessionHistory()}))
+        self.assertEqual(restored['session_history'].get_session_history_as_list(), [])
+
+    def test_serialization_is_json(self):
+        data = serialize({'session_history': SessionHistory('attitude/2'), 'issue': 2})
+        self.assertEqual(data, b'{"session_history":{"__session_history__":"attitude/2"},"issue":2}')
+
+    def test_values_without_json_representation_are_pickled(self):
+        data = {'tuple': (1, 2), 'date': date(2019, 1, 1), 'int_keys': {1: 'a'}, 'marker': {'__pickle__': 'x'}}
+        self.assertEqual(deserialize(serialize(data)), data)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            session_factory_from_settings({'session.backend': 'memcached'})
+
+
+@unittest.skipUnless(shutil.which('redis-server'), 'redis-server is not installed')
+class RedisSessionTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        import redis
+
+        with socket.socket() as s:
+            s.bind(('localhost', 0))
+            cls.port = s.getsockname()[1]
+        cls.directory = tempfile.mkdtemp()
+        cls.server = subprocess.Popen(['redis-server', '--port', str(cls.port), '--bind', '127.0.0.1', '--save', '',
+                                       '--appendonly', 'no', '--dir', cls.directory],
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        cls.redis = redis.StrictRedis(port=cls.port)
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                cls.redis.ping()
+                break
+            except redis.ConnectionError:
+                if time.monotonic() > deadline:
+                    cls.tearDownClass()
+                    raise
+                time.sleep(0.05)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.terminate()
+        cls.server.wait()
+        shutil.rmtree(cls.directory)
+
+    def setUp(self):
+        self.config = testing.setUp()
+        self.redis.flushdb()
+        self.session_factory = session_factory_from_settings({
+            'session.backend': 'redis',
+            'redis.sessions.url': f'redis://127.0.0.1:{self.port}/0',
+            'redis.sessions.secret': 'secret',
+            'redis.sessions.timeout': '600',
+        })
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def __request(self, cookie: Optional[str] = None):
+        request = Request.blank('/discuss', headers={'Cookie': cookie} if cookie else {})
+        return request, self.session_factory(request)
+
+    @staticmethod
+    def __respond(request) -> Optional[str]:
+        response = Response()
+        request._process_response_callbacks(response)
+        set_cookie = response.headers.get('Set-Cookie')
+        return set_cookie.split(';', 1)[0] if set_cookie else None
+
+    def test_session_is_loaded_from_redis(self):
+        request, session = self.__request()
+        session['session_history'] = SessionHistory('attitude/2-justify/2/agree')
+        session['issue'] = 2
+        cookie = self.__respond(request)
+
+        stored = json.loads(self.redis.get(session.session_id).decode('utf-8'))
+        self.assertEqual(stored['managed_dict']['issue'], 2)
+        self.assertEqual(stored['managed_dict']['session_history'], {'__session_history__': 'attitude/2-justify/2/agree'})
+        self.assertTrue(0 < self.redis.ttl(session.session_id) <= 600)
+
+        _, loaded = self.__request(cookie)
+        self.assertEqual(loaded.session_id, session.session_id)
+        self.assertEqual(loaded['issue'], 2)
+        self.assertEqual(loaded['session_history'].get_session_history_as_list(), ['attitude/2', 'justify/2/agree'])
+
+    def test_changes_are_visible_to_the_next_request(self):
+        request, session = self.__request()
+        session['issue'] = 2
+        cookie = self.__respond(request)
+
+        request, session = self.__request(cookie)
+        session['issue'] = 3
+        session['already_seen_delete'] = [1, 2]
+        self.__respond(request)
+
+        _, loaded = self.__request(cookie)
+        self.assertEqual(loaded['issue'], 3)
+        self.assertEqual(loaded['already_seen_delete'], [1, 2])
+
+    def test_invalidated_session_is_dropped(self):
+        request, session = self.__request()
+        session['issue'] = 2
+        cookie = self.__respond(request)
+        session_id = session.session_id
+
+        request, session = self.__request(cookie)
+        session.invalidate()
+        self.__respond(request)
+        self.assertFalse(self.redis.exists(session_id))
+
+        _, loaded = self.__request(cookie)
+        self.assertNotEqual(loaded.session_id, session_id)
+        self.assertNotIn('issue', loaded)
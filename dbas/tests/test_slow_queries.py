@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine
+
+from dbas.slow_queries import SlowQueryLog, find_call_site, fingerprint, normalize
+
+
+def issue_statement(engine):
+    engine.execute('SELECT 1 WHERE 2 IN (3, 4, 5)').fetchall()
+
+
+class NormalizeTest(unittest.TestCase):
+
+    def test_literals_and_parameters(self):
+        self.assertEqual(normalize("SELECT * FROM users WHERE nickname = 'it''s' AND uid > 42 -- comment\n"
+                                   "LIMIT %(param_1)s"),
+                         'SELECT * FROM users WHERE nickname = ? AND uid > ? LIMIT ?')
+
+    def test_lists(self):
+        self.assertEqual(normalize('SELECT uid FROM arguments WHERE uid IN (%(uid_1)s, %(uid_2)s, %(uid_3)s)'),
+                         normalize('SELECT uid FROM arguments WHERE uid IN (%(uid_1)s)'))
+        self.assertEqual(normalize('INSERT INTO clicks (a, b) VALUES (%(a_m0)s, %(b_m0)s), (%(a_m1)s, %(b_m1)s)'),
+                         'INSERT INTO clicks (a, b) VALUES (?, ?)')
+
+    def test_names_with_digits(self):
+        self.assertEqual(normalize('SELECT statements_1.uid FROM statements AS statements_1'),
+                         'SELECT statements_1.uid FROM statements AS statements_1')
+
+    def test_fingerprint(self):
+        self.assertEqual(fingerprint('SELECT ?'), fingerprint('SELECT ?'))
+        self.assertNotEqual(fingerprint('SELECT ?'), fingerprint('SELECT ? FROM t'))
+
+
+class SlowQueryLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.log = SlowQueryLog(threshold=10, directory=self.directory, flush_interval=3600)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_call_site(self):
+        self.assertEqual(find_call_site(), 'dbas/tests/test_slow_queries.py:test_call_site')
+
+    def test_aggregates_per_fingerprint_and_call_site(self):
+        self.log.record('SELECT 1', 0.1, 'dbas/lib.py:a')
+        self.log.record('SELECT 2', 0.3, 'dbas/lib.py:a')
+        self.log.record('SELECT 3', 0.2, 'dbas/lib.py:b')
+
+        report = self.log.get_report()
+        self.assertEqual([(row.call_site, row.count) for row in report], [('dbas/lib.py:a', 2), ('dbas/lib.py:b', 1)])
+        self.assertAlmostEqual(report[0].total, 0.4)
+        self.assertAlmostEqual(report[0].max, 0.3)
+        self.assertEqual(report[0].statement, 'SELECT ?')
+        self.assertEqual([row.call_site for row in self.log.get_report(order='mean')],
+                         ['dbas/lib.py:a', 'dbas/lib.py:b'])
+        self.assertEqual(len(self.log.get_report(limit=1)), 1)
+        self.assertRaises(ValueError, self.log.get_report, order='unknown')
+
+    def test_merges_workers(self):
+        other = SlowQueryLog(directory=self.directory)
+        other.record('SELECT 1', 0.5, 'dbas/lib.py:a')
+        with mock.patch('os.getpid', return_value=1):
+            other.flush()
+        self.log.record('SELECT 1', 0.1, 'dbas/lib.py:a')
+
+        report = self.log.get_report()
+        self.assertEqual(report[0].count, 2)
+        self.assertAlmostEqual(report[0].max, 0.5)
+
+        self.log.reset()
+        self.assertEqual(self.log.get_report(), [])
+
+    def test_instrumented_engine(self):
+        engine = create_engine('sqlite://')
+        self.log.instrument(engine)
+        issue_statement(engine)
+
+        report = self.log.get_report()
+        self.assertEqual(report[0].call_site, 'dbas/tests/test_slow_queries.py:issue_statement')
+        self.assertEqual(report[0].statement, 'SELECT ? WHERE ? IN (?...)')
@@ -0,0 +1,27 @@
+import unittest
+
+from dbas.startup_profile import parse_importtime, self_time_per_package, ImportTiming
+
+output = """import time: self [us] | cumulative | imported package
+import time:       140 |        140 |   _io
+import time:       352 |        850 | _frozen_importlib_external
+import time:        80 |         80 |     sqlalchemy.util
+import time:       300 |        380 |   sqlalchemy.orm
+import time:       120 |        500 | sqlalchemy
+Traceback (most recent call last):
+"""
+
+
+class ParseImportTimeTest(unittest.TestCase):
+
+    def test_parse(self):
+        timings = parse_importtime(output.splitlines())
+        self.assertEqual(len(timings), 5)
+        self.assertEqual(timings[0], ImportTiming('_io', 140, 140, 1))
+        self.assertEqual(timings[2], ImportTiming('sqlalchemy.util', 80, 80, 2))
+        self.assertEqual(timings[4], ImportTiming('sqlalchemy', 120, 500, 0))
+
+    def test_self_time_per_package(self):
+        packages = self_time_per_package(parse_importtime(output.splitlines()))
+        self.assertEqual(packages['sqlalchemy'], 500)
+        self.assertEqual(packages['_io'], 140)
@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from collections import Counter
+
+import arrow
+
+from dbas import statistics
+from dbas.database import DBDiscussionSession
+from dbas.database.discussion_model import Argument, Premise, SeenArgument, StatementToIssue, TextVersion
+from dbas.statistics import Filters
+from dbas.tests.utils import TestCaseWithConfig
+
+
+class StatisticsTest(TestCaseWithConfig):
+
+    def test_supports_and_attacks_per_issue(self):
+        expected = Counter()
+        for argument in DBDiscussionSession.query(Argument).filter_by(is_disabled=False):
+            expected[(argument.issue_uid, argument.is_supportive)] += 1
+
+        rows = statistics.get_supports_and_attacks_per_issue().all()
+        self.assertEqual([row.issue_uid for row in rows], sorted({issue for issue, _ in expected}))
+        for row in rows:
+            self.assertEqual(row.supports, expected[(row.issue_uid, True)])
+            self.assertEqual(row.attacks, expected[(row.issue_uid, False)])
+
+    def test_supports_and_attacks_per_user(self):
+        rows = statistics.get_supports_and_attacks_per_user(Filters([self.issue_town.uid])).all()
+        arguments = DBDiscussionSession.query(Argument).filter_by(issue_uid=self.issue_town.uid, is_disabled=False)
+        self.assertEqual(sum(row.supports + row.attacks for row in rows), arguments.count())
+        self.assertEqual({row.issue_uid for row in rows}, {self.issue_town.uid})
+
+    def test_statements_per_user(self):
+        expected = Counter()
+        for link in DBDiscussionSession.query(StatementToIssue):
+            first_version = DBDiscussionSession.query(TextVersion).filter_by(
+                statement_uid=link.statement_uid).order_by(TextVersion.uid).first()
+            expected[(link.issue_uid, first_version.author_uid)] += 1
+
+        rows = statistics.get_statements_per_user().all()
+        self.assertEqual({(row.issue_uid, row.user_uid): row.statements for row in rows}, dict(expected))
+        self.assertEqual([(row.issue_uid, row.user_uid) for row in statistics.get_participating_users()],
+                         sorted(expected))
+
+    def test_seen_arguments_per_user(self):
+        rows = statistics.get_seen_arguments_per_user().all()
+        self.assertEqual(sum(row.seen_arguments for row in rows), DBDiscussionSession.query(SeenArgument).count())
+
+    def test_reused_statements(self):
+        rows = statistics.get_reused_statements().all()
+        self.assertEqual(sum(row.premises for row in rows), DBDiscussionSession.query(Premise).count())
+
+    def test_time_range(self):
+        future = arrow.utcnow().shift(years=1)
+        for report in statistics.reports.values():
+            self.assertEqual(report(Filters(since=future)).all(), [])
+        self.assertEqual(statistics.get_reused_statements(Filters(until=future)).count(),
+                         statistics.get_reused_statements().count())
+
+    def test_issue_uids(self):
+        self.assertIsNone(statistics.get_issue_uids(None))
+        self.assertEqual(statistics.get_issue_uids([str(self.issue_town.uid), self.issue_cat_or_dog.slug]),
+                         [self.issue_town.uid, self.issue_cat_or_dog.uid])
+        self.assertRaises(ValueError, statistics.get_issue_uids, ['no-such-issue'])
+
+    def test_write_report(self):
+        query = statistics.get_supports_and_attacks_per_issue()
+
+        output = io.StringIO()
+        count = statistics.write_report(query, output, 'json', chunk_size=2)
+        rows = json.loads(output.getvalue())
+        self.assertEqual(len(rows), count)
+        self.assertEqual(set(rows[0]), {'issue_uid', 'supports', 'attacks'})
+
+        output = io.StringIO()
+        self.assertEqual(statistics.write_report(query, output, 'csv'), count)
+        rows = list(csv.DictReader(io.StringIO(output.getvalue())))
+        self.assertEqual(len(rows), count)
+        self.assertEqual(int(rows[0]['issue_uid']), query.first().issue_uid)
+
+    def test_write_empty_report(self):
+        output = io.StringIO()
+        query = statistics.get_reused_statements(Filters(since=arrow.utcnow().shift(years=1)))
+        self.assertEqual(statistics.write_report(query, output, 'json'), 0)
+        self.assertEqual(json.loads(output.getvalue()), [])
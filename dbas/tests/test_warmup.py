@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from pyramid import testing
+from pyramid.interfaces import ILocalizer
+
+from dbas import warmup
+from dbas.warmup import StartupTimer, precompile_templates, preload_translations
+
+
+class StartupTimerTest(unittest.TestCase):
+
+    def test_phases(self):
+        timer = StartupTimer()
+        timer.lap('first')
+        self.assertEqual(timer.measure('second', sum, [1, 2]), 3)
+        self.assertEqual([name for name, _ in timer.phases], ['first', 'second'])
+        self.assertGreaterEqual(timer.total, sum(duration for _, duration in timer.phases))
+
+
+class PrecompileTemplatesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.directory, 'static'))
+        self.__write('page.pt', '<div tal:content="text">text</div>')
+        self.__write('broken.pt', '<div tal:content="python: 1 +"></div>')
+        self.__write('static/ignored.pt', '<div></div>')
+        self.__write('readme.txt', 'no template')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def __write(self, name, content):
+        with open(os.path.join(self.directory, name), 'w') as f:
+            f.write(content)
+
+    def test_compiles_valid_templates_only(self):
+        self.assertEqual(precompile_templates([self.directory]), 1)
+
+
+class WarmUpTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp(settings={'available_languages': 'en'})
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def test_templates_need_a_cache_directory(self):
+        with mock.patch.dict(os.environ, clear=True), mock.patch.object(warmup, 'precompile_templates') as precompile:
+            timer = StartupTimer()
+            warmup.warm_up(self.config.registry, timer)
+        precompile.assert_not_called()
+        self.assertNotIn('warmup.templates', [name for name, _ in timer.phases])
+
+        with mock.patch.dict(os.environ, {'CHAMELEON_CACHE': 'cache'}), \
+                mock.patch.object(warmup, 'precompile_templates') as precompile:
+            warmup.warm_up(self.config.registry, StartupTimer())
+        precompile.assert_called_once()
+
+
+class PreloadTranslationsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config = testing.setUp(settings={'available_languages': 'de en'})
+        self.config.add_translation_dirs('dbas:locale')
+
+    def tearDown(self):
+        testing.tearDown()
+
+    def test_localizers_are_registered(self):
+        self.assertEqual(preload_translations(self.config.registry), 2)
+        for language in ('de', 'en'):
+            self.assertIsNotNone(self.config.registry.queryUtility(ILocalizer, name=language))
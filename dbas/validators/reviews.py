@@ -6,8 +6,10 @@ from dbas.database import DBDiscussionSession
 from dbas.database.discussion_model import ReviewDeleteReason
 from dbas.handler.language import get_language_from_cookie
 from dbas.input_validator import is_integer
-from dbas.review.mapper import get_review_model_by_key
+from dbas.review.history import has_access_to_history
+from dbas.review.mapper import get_review_model_by_key, get_review_modal_mapping
 from dbas.review.queue import review_queues, all_queues
+from dbas.review.queue.lib import get_executing_review_uids
 from dbas.review.reputation import get_reputation_of, reputation_borders
 from dbas.strings.keywords import Keywords as _
 from dbas.strings.translator import Translator
@@ -78,13 +80,18 @@ def valid_not_executed_review(keyword, model):
         db_review = DBDiscussionSession \
             .query(model).filter(model.uid == uid,
                                  model.is_executed == False).first() if is_integer(uid) else None
-        if db_review:
-            request.validated['db_review'] = db_review
-            return True
-        else:
+        if not db_review:
             add_error(request, 'Database has no row {} of {}'.format(uid, model))
             return False
 
+        key = next((key for key, table in get_review_modal_mapping().items() if table is model), None)
+        if key and get_executing_review_uids(key, [db_review.uid]):
+            add_error(request, 'Review {} of {} is decided and waits for its execution'.format(uid, model))
+            return False
+
+        request.validated['db_review'] = db_review
+        return True
+
     return valid_model
 
 
@@ -118,3 +125,35 @@ def valid_uid_as_row_in_review_queue(request):
     else:
         add_error(request, 'Invalid id for any review queue found: {}'.format(queue))
     return False
+
+
+def valid_review_not_executing(request):
+    """
+    Validates, that the review of valid_uid_as_row_in_review_queue is not decided and waiting for the review worker
+
+    :param request:
+    :return:
+    """
+    if 'review' not in request.validated:
+        return False
+    if get_executing_review_uids(request.validated['queue'], [request.validated['uid']]):
+        add_error(request, 'Review {} is decided and waits for its execution'.format(request.validated['uid']))
+        return False
+    return True
+
+
+def valid_user_has_history_access(request):
+    """
+    Given a user and a review, validates the access to the history or ongoing page of this review
+
+    :param request:
+    :return:
+    """
+    db_user = request.validated.get('user')
+    db_review = request.validated.get('review')
+    if db_user and db_review and has_access_to_history(db_user, db_review.is_executed):
+        return True
+    else:
+        _tn = Translator(get_language_from_cookie(request))
+        add_error(request, 'Invalid user rights', _tn.get(_.internalError))
+        return False
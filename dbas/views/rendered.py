@@ -2,13 +2,13 @@
 Collection of pyramids views components of D-BAS' core.
 """
 
-import graphene
 import logging
+
 from pyramid.httpexceptions import HTTPNotFound, HTTPFound
 from pyramid.view import view_config, notfound_view_config
 from webob_graphql import serve_graphql_request
 
-from api.v2.query.core import Query
+from api.v2.query.schema import schema
 from dbas.database import DBDiscussionSession
 from dbas.helper.decoration import prep_extras_dict
 from dbas.validators.core import validate
@@ -26,7 +26,6 @@ def main_graphiql(request):
     :return: graphql
     """
     LOG.debug("Show GraphiQL configuration")
-    schema = graphene.Schema(query=Query)
     context = {'session': DBDiscussionSession}
     return serve_graphql_request(request, schema, batch_enabled=True, context_value=context)
 
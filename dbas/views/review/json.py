@@ -2,6 +2,7 @@ import logging
 from typing import Union
 
 from pyramid.httpexceptions import HTTPBadRequest
+from pyramid.settings import asbool
 from pyramid.view import view_config
 
 from dbas.database import DBDiscussionSession
@@ -11,6 +12,7 @@ from dbas.handler.language import get_language_from_cookie
 from dbas.helper.query import revoke_author_of_statement_content, revoke_author_of_argument_content
 from dbas.lib import get_discussion_language
 from dbas.review.flags import flag_element, flag_statement_for_merge_or_split, flag_pgroup_for_merge_or_split
+from dbas.review.history import get_votes_of_review
 from dbas.review.mapper import get_queue_by_key
 from dbas.review.queue import key_edit, key_delete, key_duplicate, key_optimization, key_merge, key_split
 from dbas.review.queue.adapter import QueueAdapter
@@ -25,7 +27,8 @@ from dbas.validators.core import validate, has_keywords_in_json_path, has_maybe_
 from dbas.validators.database import valid_database_model
 from dbas.validators.discussion import valid_premisegroup, valid_text_values, valid_statement, valid_argument, \
     valid_statement_uid
-from dbas.validators.reviews import valid_review_reason, valid_not_executed_review, valid_uid_as_row_in_review_queue
+from dbas.validators.reviews import valid_review_reason, valid_not_executed_review, valid_uid_as_row_in_review_queue, \
+    valid_user_has_history_access, valid_review_not_executing
 from dbas.validators.user import valid_user, valid_user_as_author, valid_user_as_author_of_statement, \
     valid_user_as_author_of_argument
 from websocket.lib import send_request_for_recent_reviewer_socketio
@@ -106,6 +109,16 @@ def split_or_merge_premisegroup(request):
     return flag_pgroup_for_merge_or_split(key, pgroup, db_user, _tn)
 
 
+def __execute_async(request) -> bool:
+    """
+    Decided reviews of the delete, duplicate, merge and split queue are executed by the review worker, if it is enabled
+
+    :param request: current request of the server
+    :return: True, if the execution should be enqueued
+    """
+    return asbool(request.registry.settings.get('review.async_execution', False))
+
+
 @view_config(route_name='review_delete_argument', renderer='json')
 @validate(valid_user, valid_not_executed_review('review_uid', ReviewDelete),
           has_keywords_in_json_path(('should_delete', bool)))
@@ -124,7 +137,8 @@ def review_delete_argument(request):
     main_page = request.application_url
     _t = Translator(ui_locales)
 
-    QueueAdapter(DeleteQueue(), db_user, main_page, _t).add_vote(db_review, should_delete)
+    QueueAdapter(DeleteQueue(), db_user, main_page, _t,
+                 execute_async=__execute_async(request)).add_vote(db_review, should_delete)
     send_request_for_recent_reviewer_socketio(db_user.nickname, main_page, key_delete)
     return True
 
@@ -170,7 +184,8 @@ def review_duplicate_statement(request):
     main_page = request.application_url
     _t = Translator(ui_locales)
 
-    QueueAdapter(DuplicateQueue(), db_user, main_page, _t).add_vote(db_review, is_duplicate)
+    QueueAdapter(DuplicateQueue(), db_user, main_page, _t,
+                 execute_async=__execute_async(request)).add_vote(db_review, is_duplicate)
     send_request_for_recent_reviewer_socketio(db_user.nickname, main_page, key_duplicate)
     return True
 
@@ -217,7 +232,8 @@ def review_splitted_premisegroup(request):
     main_page = request.application_url
     _t = Translator(ui_locales)
 
-    QueueAdapter(SplitQueue(), db_user, main_page, _t).add_vote(db_review, should_split)
+    QueueAdapter(SplitQueue(), db_user, main_page, _t,
+                 execute_async=__execute_async(request)).add_vote(db_review, should_split)
     send_request_for_recent_reviewer_socketio(db_user.nickname, main_page, key_split)
     return True
 
@@ -240,7 +256,8 @@ def review_merged_premisegroup(request):
     main_page = request.application_url
     _t = Translator(ui_locales)
 
-    QueueAdapter(MergeQueue(), db_user, main_page, _t).add_vote(db_review, should_merge)
+    QueueAdapter(MergeQueue(), db_user, main_page, _t,
+                 execute_async=__execute_async(request)).add_vote(db_review, should_merge)
     send_request_for_recent_reviewer_socketio(db_user.nickname, main_page, key_merge)
     return True
 
@@ -266,7 +283,8 @@ def undo_review(request):
 
 
 @view_config(route_name='cancel_review', renderer='json')
-@validate(valid_user_as_author, valid_uid_as_row_in_review_queue, has_keywords_in_json_path(('queue', str)))
+@validate(valid_user_as_author, valid_uid_as_row_in_review_queue, valid_review_not_executing,
+          has_keywords_in_json_path(('queue', str)))
 def cancel_review(request):
     """
     Trys to cancel an ongoing review
@@ -285,6 +303,19 @@ def cancel_review(request):
     return adapter.cancel_ballot(db_review)
 
 
+@view_config(route_name='get_review_votes', renderer='json')
+@validate(valid_user, valid_uid_as_row_in_review_queue, valid_user_has_history_access)
+def get_review_votes(request):
+    """
+    Returns all voters of a review of the history or ongoing page
+
+    :param request: current request of the server
+    :return: json-dict()
+    """
+    LOG.debug("Get the votes of a review. %s", request.json_body)
+    return get_votes_of_review(request.validated['queue'], request.validated['review'], request.application_url)
+
+
 @view_config(route_name='review_lock', renderer='json', require_csrf=False)
 @validate(valid_user, valid_database_model('review_uid', ReviewOptimization), has_keywords_in_json_path(('lock', bool)))
 def review_lock(request):
@@ -6,7 +6,7 @@ import dbas.review
 import dbas.review.queue
 from dbas.handler.language import get_language_from_cookie
 from dbas.helper.decoration import prep_extras_dict
-from dbas.review.history import get_ongoing_reviews, get_review_history
+from dbas.review.history import get_ongoing_reviews, get_review_history, get_cursors_from_params
 from dbas.review.mapper import get_title_by_key
 from dbas.review.queue.abc_queue import subclass_by_name
 from dbas.review.queue.adapter import QueueAdapter
@@ -97,7 +97,8 @@ def history(request):
     ui_locales = get_language_from_cookie(request)
     _tn = Translator(ui_locales)
 
-    specific_history = get_review_history(request.application_url, request.validated['user'], _tn)
+    cursors = get_cursors_from_params(request.params)
+    specific_history = get_review_history(request.application_url, request.validated['user'], _tn, cursors)
     prep_dict = main_dict(request, _tn.get(_.review_history))
     prep_dict.update({'history': specific_history})
     return prep_dict
@@ -116,7 +117,8 @@ def ongoing(request):
     ui_locales = get_language_from_cookie(request)
     _tn = Translator(ui_locales)
 
-    specific_history = get_ongoing_reviews(request.application_url, request.validated['user'], _tn)
+    cursors = get_cursors_from_params(request.params)
+    specific_history = get_ongoing_reviews(request.application_url, request.validated['user'], _tn, cursors)
     prep_dict = main_dict(request, _tn.get(_.review_ongoing))
     prep_dict.update({'history': specific_history})
     return prep_dict
@@ -16,7 +16,7 @@ from dbas.tests.utils import TestCaseWithConfig, construct_dummy_request
 from dbas.views import review_delete_argument, revoke_statement_content, flag_argument_or_statement, \
     split_or_merge_statement, split_or_merge_premisegroup, review_edit_argument, review_splitted_premisegroup, \
     review_duplicate_statement, review_optimization_argument, undo_review, cancel_review, review_lock, \
-    review_merged_premisegroup
+    review_merged_premisegroup, get_review_votes
 
 
 class AjaxReviewTest(unittest.TestCase):
@@ -380,6 +380,25 @@ class AjaxReviewTest(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(db_canceled1, db_canceled2)
 
+    def test_get_review_votes(self):
+        self.config.testing_securitypolicy(userid='Tobias', permissive=True)
+        request = construct_dummy_request(json_body={
+            'queue': key_delete,
+            'uid': 5
+        })
+        response = get_review_votes(request)
+        self.assertIn('votes_pro', response)
+        self.assertIn('votes_con', response)
+
+    def test_get_review_votes_without_access(self):
+        self.config.testing_securitypolicy(userid='', permissive=True)
+        request = construct_dummy_request(json_body={
+            'queue': key_delete,
+            'uid': 5
+        })
+        response = get_review_votes(request)
+        self.assertEqual(response.status_code, 400)
+
     def test_cancel_review(self):
         self.config.testing_securitypolicy(userid='Tobias', permissive=True)
         db_canceled1 = DBDiscussionSession.query(ReviewCanceled).count()
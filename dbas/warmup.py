@@ -0,0 +1,155 @@
+"""
+Warm-up of a worker before it serves its first request.
+
+Without a warm-up, the first requests after each restart compile the Chameleon templates, configure the SQLAlchemy
+mappers, validate the GraphQL queries and load the translation catalogs. If ``startup.warmup`` is enabled, ``main``
+does this work up front. Templates are compiled into the directory of ``CHAMELEON_CACHE``. Without this variable,
+Chameleon keeps no compiled templates between the loads, so the templates are not warmed up.
+"""
+
+import importlib
+import logging
+import os
+import time
+from typing import Callable, Iterable, List, Tuple
+
+from pyramid.i18n import make_localizer
+from pyramid.interfaces import ILocalizer, ITranslationDirectories
+from pyramid.registry import Registry
+from sqlalchemy.orm import configure_mappers
+
+LOG = logging.getLogger(__name__)
+
+template_packages = ('dbas', 'admin', 'websocket')
+ignored_template_dirs = {'static', 'cache', 'node_modules', '__pycache__'}
+
+
+class StartupTimer:
+    """
+    Measures the duration of the consecutive phases of the startup
+    """
+
+    def __init__(self):
+        self.start = self.__last = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+
+    def lap(self, name: str) -> float:
+        """
+        Ends the current phase
+
+        :param name: name of the phase
+        :return: duration of the phase in seconds
+        """
+        now = time.perf_counter()
+        duration = now - self.__last
+        self.__last = now
+        self.phases.append((name, duration))
+        return duration
+
+    def measure(self, name: str, func: Callable, *args, **kwargs):
+        """
+        Calls func as its own phase
+
+        :param name: name of the phase
+        :param func: the function
+        :return: result of func
+        """
+        self.__last = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.lap(name)
+        return result
+
+    @property
+    def total(self) -> float:
+        return self.__last - self.start
+
+    def log(self):
+        """
+        Logs the duration of every phase and the total duration
+
+        :return: None
+        """
+        breakdown = ', '.join(f'{name} {duration * 1000:.0f} ms' for name, duration in self.phases)
+        LOG.info("Startup took %.0f ms: %s", self.total * 1000, breakdown)
+
+
+def warm_up(registry: Registry, timer: StartupTimer):
+    """
+    Does the work of the first requests up front. A failing phase is logged, but does not prevent the startup.
+
+    :param registry: registry of the configured app
+    :param timer: timer of the startup
+    :return: None
+    """
+    phases = [('mappers', configure_mappers)]
+    if os.environ.get('CHAMELEON_CACHE'):
+        phases.append(('templates', lambda: precompile_templates(__get_template_dirs())))
+    else:
+        LOG.info("Skip the warm-up of the templates, because CHAMELEON_CACHE is not set")
+    phases += [
+        ('graphql', __warm_up_graphql),
+        ('translations', lambda: preload_translations(registry)),
+    ]
+    for name, func in phases:
+        try:
+            timer.measure(f'warmup.{name}', func)
+        except Exception:
+            LOG.exception("Warm-up phase %s failed", name)
+
+
+def precompile_templates(directories: Iterable[str]) -> int:
+    """
+    Compiles all templates of the directories, like ``precompile_templates.py`` does
+
+    :param directories: directories, which are searched recursively
+    :return: count of compiled templates
+    """
+    from pyramid_chameleon.zpt import PyramidPageTemplateFile
+
+    count = 0
+    for path in __find_templates(directories):
+        try:
+            PyramidPageTemplateFile(path, macro=None).cook_check()
+            count += 1
+        except Exception as e:
+            LOG.warning("Could not compile template %s: %s", path, e)
+    LOG.debug("Compiled %s templates", count)
+    return count
+
+
+def preload_translations(registry: Registry) -> int:
+    """
+    Loads the translation catalogs of all available languages into the localizers of the registry
+
+    :param registry: registry of the app
+    :return: count of loaded localizers
+    """
+    translation_dirs = registry.queryUtility(ITranslationDirectories, default=[])
+    languages = registry.settings.get('available_languages', 'de en').split()
+    for language in languages:
+        if registry.queryUtility(ILocalizer, name=language) is None:
+            registry.registerUtility(make_localizer(language, translation_dirs), ILocalizer, name=language)
+    return len(languages)
+
+
+def __get_template_dirs() -> List[str]:
+    return [os.path.dirname(importlib.import_module(package).__file__) for package in template_packages]
+
+
+def __find_templates(directories: Iterable[str]) -> Iterable[str]:
+    for directory in directories:
+        for dirpath, dirnames, filenames in os.walk(directory):
+            dirnames[:] = [d for d in dirnames if d not in ignored_template_dirs and not d.startswith('.')]
+            for filename in sorted(filenames):
+                if filename.endswith('.pt') and not filename.startswith('.'):
+                    yield os.path.join(dirpath, filename)
+
+
+def __warm_up_graphql():
+    """
+    Builds the schema and validates the persisted queries into the document cache
+    """
+    from api.v2.query.schema import get_document, persisted_queries
+
+    for query_hash in list(persisted_queries):
+        get_document(query_hash=query_hash)
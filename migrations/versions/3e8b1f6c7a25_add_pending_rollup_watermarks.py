@@ -0,0 +1,25 @@
+"""Add pending rollup watermarks
+
+Revision ID: 3e8b1f6c7a25
+Revises: d5a7e3b9c214
+Create Date: 2026-10-19 21:14:52.381046
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '3e8b1f6c7a25'
+down_revision = 'd5a7e3b9c214'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('rollup_watermarks', sa.Column('pending_uid', sa.Integer(), nullable=True))
+    op.add_column('rollup_watermarks', sa.Column('pending_txid', sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('rollup_watermarks', 'pending_txid')
+    op.drop_column('rollup_watermarks', 'pending_uid')
@@ -0,0 +1,54 @@
+"""Add daily activity rollups
+
+Revision ID: d5a7e3b9c214
+Revises: 8c2f4e9a1d07
+Create Date: 2026-10-19 18:05:37.914625
+
+"""
+import sqlalchemy as sa
+import sqlalchemy_utils
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'd5a7e3b9c214'
+down_revision = '8c2f4e9a1d07'
+branch_labels = None
+depends_on = None
+
+new_user_columns = ['statement_clicks', 'argument_clicks', 'reviews', 'reputation']
+
+
+def upgrade():
+    # the rows are recomputed by the backfill, see dbas-rollup-activity --backfill
+    op.execute('DELETE FROM daily_user_activity')
+    op.drop_column('daily_user_activity', 'clicks')
+    for column in new_user_columns:
+        op.add_column('daily_user_activity', sa.Column(column, sa.Integer(), nullable=False, server_default='0'))
+
+    op.create_table('daily_issue_activity',
+                    sa.Column('day', sa.Date(), nullable=False),
+                    sa.Column('issue_uid', sa.Integer(), nullable=False),
+                    sa.Column('user_uid', sa.Integer(), nullable=False),
+                    sa.Column('clicks', sa.Integer(), nullable=False, server_default='0'),
+                    sa.Column('statements', sa.Integer(), nullable=False, server_default='0'),
+                    sa.Column('edits', sa.Integer(), nullable=False, server_default='0'),
+                    sa.ForeignKeyConstraint(['issue_uid'], ['issues.uid'], ),
+                    sa.ForeignKeyConstraint(['user_uid'], ['users.uid'], ),
+                    sa.PrimaryKeyConstraint('day', 'issue_uid', 'user_uid')
+                    )
+    op.create_table('rollup_watermarks',
+                    sa.Column('source', sa.Text(), nullable=False),
+                    sa.Column('last_uid', sa.Integer(), nullable=False),
+                    sa.Column('timestamp', sqlalchemy_utils.types.arrow.ArrowType(), nullable=True),
+                    sa.PrimaryKeyConstraint('source')
+                    )
+
+
+def downgrade():
+    op.drop_table('rollup_watermarks')
+    op.drop_table('daily_issue_activity')
+
+    op.execute('DELETE FROM daily_user_activity')
+    for column in new_user_columns:
+        op.drop_column('daily_user_activity', column)
+    op.add_column('daily_user_activity', sa.Column('clicks', sa.Integer(), nullable=False, server_default='0'))
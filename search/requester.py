@@ -5,6 +5,7 @@ import requests
 from dbas.database import DBDiscussionSession
 from dbas.database.discussion_model import Issue
 from dbas.helper.url import UrlManager
+from dbas.metrics import observe_outbound
 from dbas.strings.fuzzy_modes import FuzzyMode
 from search.routes import get_statements_with_value_path, get_duplicates_or_reasons_path, \
     get_edits_path, get_suggestions_path, get_statements_path
@@ -21,7 +22,9 @@ def response_as_dict(query: str) -> dict:
     :return: return results as a dict
     """
     LOG.debug("Call %s", query)
-    return requests.get(query, timeout=1.0).json()
+    with observe_outbound('search'):
+        response = requests.get(query, timeout=1.0)
+    return response.json()
 
 
 def get_suggestions(issue_uid: int, position: bool, search_value: str = '') -> dict:
@@ -38,5 +38,10 @@ setup(name='dbas',
       [console_scripts]
       promote_to_admin = dbas.console_scripts:promote_user
       demote_to_user = dbas.console_scripts:demote_user
+      execute_reviews = dbas.console_scripts:execute_reviews
+      dbas-profile-startup = dbas.startup_profile:main
+      dbas-generate-dataset = dbas.database.dataset:main
+      dbas-statistics = dbas.statistics:main
+      dbas-rollup-activity = dbas.console_scripts:rollup_activity
       """,
       )
@@ -1,15 +1,14 @@
 """
-Provides functions
+Provides functions, which queue requests to the socketio server in the outbox
 """
 
 import logging
-import time
-import urllib.request
 from os import environ
 
 from dbas.database import DBDiscussionSession
 from dbas.database.discussion_model import User
 from dbas.lib import get_profile_picture, get_global_url
+from websocket.outbox import outbox
 
 LOG = logging.getLogger(__name__)
 fallback_port = 5222
@@ -23,12 +22,13 @@ def send_request_for_info_popup_to_socketio(nickname, message='', url=None, incr
     :param message: String
     :param url: Issue.uid
     :param increase_counter: Boolean
-    :return: Status code of the request
+    :return: True, if the request was queued
     """
     LOG.debug("Send a request to socketio for user %s", nickname)
     if url:
         use_https = 'localhost' not in url
-        __send_request_for_popup_to_socketio(nickname, 'info', message, url, increase_counter, use_https)
+        return __send_request_for_popup_to_socketio(nickname, 'info', message, url, increase_counter, use_https)
+    return False
 
 
 def send_request_for_info_popup_to_socketio_with_delay(nickname, message='', url=None, increase_counter=False, delay=5):
@@ -40,14 +40,14 @@ def send_request_for_info_popup_to_socketio_with_delay(nickname, message='', url
     :param url: String
     :param increase_counter: Boolean
     :param delay: int
-    :return: Status code of the request
+    :return: True, if the request was queued
     """
-    LOG.debug("send_request_for_info_popup_to_socketio_with_delay - sleeping for %s", delay)
-    time.sleep(delay)
-    LOG.debug("Stop sleeping")
+    LOG.debug("Send a request to socketio for user %s in %s seconds", nickname, delay)
     if url:
         use_https = 'localhost' not in url
-        __send_request_for_popup_to_socketio(nickname, 'info', message, url, increase_counter, use_https)
+        return __send_request_for_popup_to_socketio(nickname, 'info', message, url, increase_counter, use_https,
+                                                    delay)
+    return False
 
 
 def send_request_for_success_popup_to_socketio(nickname, message='', url=None, increase_counter=False):
@@ -58,12 +58,13 @@ def send_request_for_success_popup_to_socketio(nickname, message='', url=None, i
     :param message: String
     :param url: String
     :param increase_counter:
-    :return: Status code of the request
+    :return: True, if the request was queued
     """
     LOG.debug("Send request success popup")
     if url:
         use_https = 'localhost' not in url
-        __send_request_for_popup_to_socketio(nickname, 'success', message, url, increase_counter, use_https)
+        return __send_request_for_popup_to_socketio(nickname, 'success', message, url, increase_counter, use_https)
+    return False
 
 
 def send_request_for_warning_popup_to_socketio(nickname, message='', url=None, increase_counter=False):
@@ -74,16 +75,16 @@ def send_request_for_warning_popup_to_socketio(nickname, message='', url=None, i
     :param message: String
     :param url: String
     :param increase_counter:
-    :return: Status code of the request
+    :return: True, if the request was queued
     """
     LOG.debug("Send request for socketio warning popup")
-    __send_request_for_popup_to_socketio(nickname, 'warning', message, url, increase_counter)
+    return __send_request_for_popup_to_socketio(nickname, 'warning', message, url, increase_counter)
 
 
 def __send_request_for_popup_to_socketio(nickname, popup_type, message='', url=None, increase_counter=False,
-                                         use_https=False):
+                                         use_https=False, delay=0):
     """
-    Sends an request to the socket io server
+    Queues a request to the socket io server
 
     :param popup_type: String (success, warning, info)
     :param nickname: nickname of the user
@@ -91,31 +92,23 @@ def __send_request_for_popup_to_socketio(nickname, popup_type, message='', url=N
     :param url: URL for the event, what happened
     :param increase_counter: True, when the notification counter in D-BAS should be increased
     :param use_https: Boolean
-    :return: Status code of the request
+    :param delay: seconds, which have to pass before the request is sent
+    :return: True, if the request was queued
     """
     LOG.debug("Send request to socketio server")
 
     if popup_type not in ['success', 'warning', 'info']:
         popup_type = 'info'
 
-    params = '?type={}&nickname={}&'.format(popup_type, nickname)
+    params = {'type': popup_type, 'nickname': nickname}
     if message:
-        params += 'msg={}&'.format(message)
+        params['msg'] = message
     if url:
-        params += 'url={}&'.format(url)
+        params['url'] = url
     if increase_counter:
-        params += 'increase_counter=True&'
-    params = params[:-1]
+        params['increase_counter'] = 'True'
 
-    port = __get_port()
-
-    if use_https:
-        link = '{}:{}/'.format(get_global_url(), port)
-    else:
-        link = 'http://localhost:{}/'.format(port)
-    rurl = '{}publish{}'.format(link, params)
-
-    return __open_url(rurl)
+    return outbox.put(__get_socketio_url('publish', use_https), params, delay)
 
 
 def send_request_for_recent_reviewer_socketio(nickname, main_page, queue):
@@ -125,7 +118,7 @@ def send_request_for_recent_reviewer_socketio(nickname, main_page, queue):
     :param nickname: Current users nickname
     :param main_page: URL of the app itself
     :param queue: Key of the last reviewers queue
-    :return: Status code of the request
+    :return: True, if the request was queued
     """
     LOG.debug("Update last reviewer view via websockets. Nickname %s for queue %s", nickname, queue)
     db_user = DBDiscussionSession.query(User).filter_by(nickname=nickname).first()
@@ -143,37 +136,28 @@ def __send_request_for_recent_review_to_socketio(reviewer_name, reviewer_image_u
     :param reviewer_image_url: String
     :param queue: String
     :param use_https: Boolean
-    :return: Status code of the request
+    :return: True, if the request was queued
     """
     LOG.debug("Private method for updating last reviewer view")
-    params = '?reviewer_name=' + reviewer_name + '&img_url=' + reviewer_image_url + '&queue=' + queue
+    params = {'reviewer_name': reviewer_name, 'img_url': reviewer_image_url, 'queue': queue}
+    return outbox.put(__get_socketio_url('recent_review', use_https), params)
+
+
+def __get_socketio_url(route, use_https):
+    """
+    Returns the url of a route of the socketio server
 
+    :param route: String
+    :param use_https: Boolean
+    :return: String
+    """
     port = __get_port()
 
     if use_https:
         link = '{}:{}/'.format(get_global_url(), port)
     else:
         link = 'http://localhost:{}/'.format(port)
-    rurl = '{}recent_review{}'.format(link, params)
-
-    return __open_url(rurl)
-
-
-def __open_url(url):
-    """
-    Calls url via urllib and returns status code on success or none on error
-
-    :param url: String
-    :return: None or HTTP status code
-    """
-    try:
-        resp = urllib.request.urlopen(url)
-        LOG.debug("COntent of request %s", resp.read())
-    except Exception as e:
-        LOG.error("Error %s by calling %s", e, url)
-        return None
-    LOG.debug("Status code of request: %s", resp.getcode())
-    return resp.getcode()
+    return link + route
 
 
 def __get_port():
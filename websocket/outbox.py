@@ -0,0 +1,180 @@
+"""
+Outbox for the requests to the socket.io server.
+
+The requests of a web request are only queued. A background thread of the worker sends them in batches over pooled
+keep-alive connections, therefore a slow or unavailable websocket service does not delay the web requests. Delayed
+popups wait in a queue of the outbox instead of a sleeping request thread.
+"""
+
+import atexit
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from dbas.metrics import observe_outbound, register_queue
+
+LOG = logging.getLogger(__name__)
+
+Event = Tuple[str, Dict[str, str]]
+
+
+class Outbox:
+    """
+    Queue of requests, which are sent by a background dispatcher
+    """
+
+    def __init__(self, timeout: float = 2.0, batch_size: int = 50, max_size: int = 10000, pool_size: int = 4,
+                 autostart: bool = True):
+        """
+        :param timeout: timeout of one request in seconds
+        :param batch_size: maximal count of requests, which are sent in one flush
+        :param max_size: maximal count of queued requests, further requests are dropped
+        :param pool_size: count of keep-alive connections per host
+        :param autostart: True, if the dispatcher should be started with the first queued request
+        """
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.max_size = max_size
+        self.autostart = autostart
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.__ready: Deque[Event] = deque()
+        self.__delayed: List[Tuple[float, int, Event]] = []
+        self.__counter = itertools.count()
+        self.__condition = threading.Condition()
+        self.__thread: Optional[threading.Thread] = None
+
+        self.__http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.__http.mount('http://', adapter)
+        self.__http.mount('https://', adapter)
+
+    def __len__(self):
+        return len(self.__ready) + len(self.__delayed)
+
+    def metrics(self) -> Dict[str, int]:
+        """
+        Returns the delivery metrics of this outbox
+
+        :return: dictionary with the counters and the current queue size
+        """
+        return {
+            'queued': len(self),
+            'sent': self.sent,
+            'failed': self.failed,
+            'dropped': self.dropped,
+        }
+
+    def put(self, url: str, params: Dict[str, str], delay: float = 0) -> bool:
+        """
+        Queues a GET request
+
+        :param url: url of the request without query string
+        :param params: parameters of the query string
+        :param delay: seconds, which have to pass before the request is sent
+        :return: True, if the request was queued, False, if the outbox is full
+        """
+        with self.__condition:
+            if len(self) >= self.max_size:
+                self.dropped += 1
+                LOG.warning("The websocket outbox is full, drop the request to %s", url)
+                return False
+            if delay > 0:
+                heapq.heappush(self.__delayed, (time.monotonic() + delay, next(self.__counter), (url, params)))
+            else:
+                self.__ready.append((url, params))
+            self.__condition.notify()
+
+        if self.autostart:
+            self.start()
+        return True
+
+    def flush(self, include_delayed: bool = False) -> int:
+        """
+        Sends all requests, which are due, in the calling thread
+
+        :param include_delayed: True, if delayed requests should be sent, too
+        :return: count of sent requests
+        """
+        count = 0
+        while True:
+            batch = self.__take_batch(include_delayed)
+            if not batch:
+                return count
+            count += self.__send(batch)
+
+    def start(self):
+        """
+        Starts the background dispatcher, if it is not running yet, and sends the remaining requests when the worker
+        exits
+
+        :return: None
+        """
+        if self.__thread is not None:
+            return
+        with self.__condition:
+            if self.__thread is not None:
+                return
+            self.__thread = threading.Thread(target=self.__run, name='websocket-outbox', daemon=True)
+            self.__thread.start()
+        atexit.register(self.flush)
+
+    def __run(self):
+        while True:
+            with self.__condition:
+                while not self.__ready and not self.__is_delayed_due():
+                    self.__condition.wait(timeout=self.__time_until_next_delayed())
+            try:
+                self.flush()
+            except Exception:
+                LOG.exception("Could not send the requests of the websocket outbox")
+
+    def __is_delayed_due(self) -> bool:
+        return bool(self.__delayed) and self.__delayed[0][0] <= time.monotonic()
+
+    def __time_until_next_delayed(self) -> Optional[float]:
+        if not self.__delayed:
+            return None
+        return max(0.0, self.__delayed[0][0] - time.monotonic())
+
+    def __take_batch(self, include_delayed: bool) -> List[Event]:
+        with self.__condition:
+            while self.__delayed and (include_delayed or self.__is_delayed_due()):
+                self.__ready.append(heapq.heappop(self.__delayed)[2])
+            batch = []
+            while self.__ready and len(batch) < self.batch_size:
+                batch.append(self.__ready.popleft())
+            return batch
+
+    def __send(self, batch: List[Event]) -> int:
+        """
+        Sends a batch of requests over the pooled connections. Failed requests are logged and not retried, because
+        popups are only useful for a short time.
+
+        :param batch: list of urls and parameters
+        :return: count of successful requests
+        """
+        count = 0
+        for url, params in batch:
+            try:
+                with observe_outbound('websocket'):
+                    response = self.__http.get(url, params=params, timeout=self.timeout)
+                LOG.debug("Status code of request to %s: %s", url, response.status_code)
+                count += 1
+            except requests.RequestException as e:
+                self.failed += 1
+                LOG.error("Error %s by calling %s", e, url)
+        self.sent += count
+        return count
+
+
+outbox = Outbox()
+register_queue('websocket_outbox', outbox)
@@ -0,0 +1,80 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from websocket.outbox import Outbox
+
+
+class _RecordingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        self.server.received.append((url.path, parse_qs(url.query)))
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class OutboxTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('localhost', 0), _RecordingHandler)
+        self.server.received = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://localhost:{}/publish'.format(self.server.server_port)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_put_does_not_send(self):
+        outbox = Outbox(autostart=False)
+        self.assertTrue(outbox.put(self.url, {'type': 'info', 'msg': 'Hello World'}))
+        self.assertEqual(len(outbox), 1)
+        self.assertEqual(self.server.received, [])
+
+    def test_flush_sends_batches(self):
+        outbox = Outbox(batch_size=2, autostart=False)
+        for i in range(5):
+            outbox.put(self.url, {'nickname': 'Tobias', 'msg': 'message {}'.format(i)})
+
+        self.assertEqual(outbox.flush(), 5)
+        self.assertEqual(len(outbox), 0)
+        self.assertEqual(outbox.sent, 5)
+        self.assertEqual([params['msg'][0] for _, params in self.server.received],
+                         ['message {}'.format(i) for i in range(5)])
+
+    def test_delayed_requests_wait(self):
+        outbox = Outbox(autostart=False)
+        outbox.put(self.url, {'msg': 'later'}, delay=60)
+        self.assertEqual(outbox.flush(), 0)
+        self.assertEqual(len(outbox), 1)
+        self.assertEqual(outbox.flush(include_delayed=True), 1)
+
+    def test_full_outbox_drops_requests(self):
+        outbox = Outbox(max_size=1, autostart=False)
+        self.assertTrue(outbox.put(self.url, {}))
+        self.assertFalse(outbox.put(self.url, {}))
+        self.assertEqual(outbox.dropped, 1)
+
+    def test_unreachable_server_is_counted(self):
+        outbox = Outbox(timeout=0.5, autostart=False)
+        outbox.put('http://localhost:1/publish', {})
+        self.assertEqual(outbox.flush(), 0)
+        self.assertEqual(outbox.failed, 1)
+
+    def test_dispatcher_sends_in_background(self):
+        outbox = Outbox()
+        outbox.put(self.url, {'msg': 'now'})
+        outbox.put(self.url, {'msg': 'soon'}, delay=0.2)
+
+        deadline = time.monotonic() + 5
+        while len(self.server.received) < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual([params['msg'][0] for _, params in self.server.received], ['now', 'soon'])